@@ -3,17 +3,16 @@ from datetime import datetime, timedelta
 from typing import Any, Dict
 
 import dateutil.parser
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api.deps import get_session
 from app.core.intelligence_utils import enrich_user_intent
 from app.models.bolna_execution_map import BolnaExecutionMap
-from app.models.call_raw_data import CallRawData
 from app.models.campaign import Campaign
 from app.models.campaign_event import CampaignEvent
 from app.models.queue_item import QueueItem
+from app.services.bolna_webhook_pipeline import bolna_webhook_pipeline, extract_call_id, is_terminal_event
 from app.services.intelligence.scheduling_service import scheduling_service
 from app.services.user_queue_warmer import UserQueueWarmer
 from app.services.lead_closure import LeadClosure
@@ -21,17 +20,29 @@ from app.services.lead_closure import LeadClosure
 router = APIRouter()
 
 @router.post("/webhook/bolna")
-async def bolna_webhook(
-    payload: Dict[str, Any],
-    session: AsyncSession = Depends(get_session),
-) -> Any:
-    print(f"[BolnaWebhook] Received payload: {payload}")
-    
-    with open("webhook_live.log", "a") as f:
-        f.write(f"[{datetime.now()}] Webhook Received: {payload}\n")
+async def bolna_webhook(payload: Dict[str, Any]) -> Any:
+    """
+    Fast ack: stores the raw payload (CallRawData) and queues it. Outcome
+    detection and queue transitions run in `process_bolna_event` on the
+    webhook pipeline's workers (app.services.bolna_webhook_pipeline).
+    """
+    bolna_call_id = extract_call_id(payload)
+    if not bolna_call_id:
+        return {"status": "ignored", "reason": "no_call_id"}
+
+    await bolna_webhook_pipeline.ingest(bolna_call_id, payload)
+    return {"status": "accepted"}
+
+
+async def process_bolna_event(payload: Dict[str, Any], session: AsyncSession) -> Dict[str, Any]:
+    """
+    Applies one Bolna webhook payload: execution map, campaign events, and on
+    terminal states the outcome, retries, user queue promotion and call log.
+    """
+    print(f"[BolnaWebhook] Processing payload for {payload.get('status')}: {extract_call_id(payload)}")
     
     # 1. Extract IDs
-    bolna_call_id = payload.get("execution_id") or payload.get("run_id") or payload.get("call_id") or payload.get("id")
+    bolna_call_id = extract_call_id(payload)
     if not bolna_call_id:
         return {"status": "ignored", "reason": "no_call_id"}
         
@@ -43,18 +54,6 @@ async def bolna_webhook(
     if not execution_map:
         print(f"[BolnaWebhook] No execution map found for {bolna_call_id}")
         return {"status": "ignored", "reason": "not_found"}
-        
-    # 2.5 Save Raw Data (New Requirement)
-    try:
-        raw_entry = CallRawData(
-            campaign_id=execution_map.campaign_id,
-            bolna_call_id=bolna_call_id,
-            payload=payload
-        )
-        session.add(raw_entry)
-        # We allow this to be committed along with the rest of the updates
-    except Exception as e:
-        print(f"[BolnaWebhook] Failed to save raw data: {e}")
 
     # 3. Update Observability Data (BolnaExecutionMap)
     execution_map.last_webhook_payload = payload
@@ -116,11 +115,9 @@ async def bolna_webhook(
     # when the call reaches a terminal state. Intermediate states (ringing, speaking)
     # just update the execution map for real-time visibility.
     
-    TERMINAL_STATES = ["completed", "failed", "call-disconnected", "voicemail_detected", "no-answer", "busy", "canceled"]
     current_status = (payload.get("status") or "").lower()
-    is_terminal = current_status in TERMINAL_STATES or payload.get("answered_by_voice_mail")
 
-    if not is_terminal:
+    if not is_terminal_event(payload):
         # Just update the map and broadcast real-time status
         # [NEW] Heartbeat: Keep the item "fresh" to avoid stale cleanup during long calls
         q_item.updated_at = datetime.utcnow()
@@ -128,9 +125,9 @@ async def bolna_webhook(
         
         await session.commit()
         
-        from app.api.v1.endpoints.execution import get_campaign_realtime_status_internal
-        # Note: broadcast is handled inside get_campaign_realtime_status_internal
-        await get_campaign_realtime_status_internal(q_item.campaign_id, session, trigger_warmer=False)
+        # Coalesced recompute + diff push (a call emits many intermediate events)
+        from app.services.campaign_live_status import campaign_live_status
+        campaign_live_status.notify_changed(q_item.campaign_id)
         
         return {"status": "processed", "state": "intermediate", "detected_status": current_status}
 
@@ -347,17 +344,16 @@ async def bolna_webhook(
     await session.commit()
 
     # 7. Broadcast Real-time Update
-
-    # 7. Broadcast Real-time Update
-    # 7. Broadcast Real-time Update
-    from app.api.v1.endpoints.execution import get_campaign_realtime_status_internal
+    from app.services.campaign_live_status import campaign_live_status
     
     try:
         # Trigger warmer on terminal state to replenish queue if needed
-        await get_campaign_realtime_status_internal(q_item.campaign_id, session, trigger_warmer=True)
-        print(f"[BolnaWebhook] Broadcasted terminal update for campaign {q_item.campaign_id}")
+        from app.services.queue_warmer import QueueWarmer
+        await QueueWarmer.check_and_replenish(q_item.campaign_id, session)
     except Exception as e:
-        print(f"[BolnaWebhook] Failed to broadcast update: {e}")
+        print(f"[BolnaWebhook] QueueWarmer failed after terminal update: {e}")
+    campaign_live_status.notify_changed(q_item.campaign_id)
+    print(f"[BolnaWebhook] Queued live status update for campaign {q_item.campaign_id}")
 
     return {"status": "processed", "detected_state": determined_status if not should_retry else "RETRYING"}
 
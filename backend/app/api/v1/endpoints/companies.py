@@ -4,6 +4,7 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.auth_cache import cache_role, get_cached_role
 from app.core.db import get_session
 from app.core.security import get_current_user
 from app.models.company import Company
@@ -36,13 +37,16 @@ async def read_company(
     # Security: Verify membership since we bypassed TenantMiddleware
     user_id = current_user.get("uid") or current_user.get("user_id")
     
-    mem_stmt = select(CompanyMembership).where(
-        CompanyMembership.company_id == id,
-        CompanyMembership.user_id == user_id
-    )
-    membership = (await session.execute(mem_stmt)).scalars().first()
-    
-    if not membership:
-        raise HTTPException(status_code=403, detail="Forbidden: You are not a member of this company")
+    # Same (company, user) -> role cache as TenantMiddleware
+    if get_cached_role(id, user_id) is None:
+        mem_stmt = select(CompanyMembership.role).where(
+            CompanyMembership.company_id == id,
+            CompanyMembership.user_id == user_id
+        )
+        role = (await session.execute(mem_stmt)).scalars().first()
+        
+        if not role:
+            raise HTTPException(status_code=403, detail="Forbidden: You are not a member of this company")
+        cache_role(id, user_id, role)
         
     return company
@@ -9,7 +9,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core import security
 from app.core.db import get_session
 from app.models.company import Workspace
-from app.services.intelligence.insight_engine import insight_engine
+from app.services.intelligence.deck_cache import insight_deck_cache
 from app.services.smart_scan_service import smart_scan_service
 
 router = APIRouter()
@@ -121,8 +121,8 @@ async def get_birds_eye_view(
              # For MVP, let's rely on live generation or simple caching check
              pass 
              
-        # Generate Fresh Deck (Robust)
-        intelligence_data = await insight_engine.generate_full_deck(session, brand_id)
+        # Cached deck; regenerated in the background only when brand data changed
+        intelligence_data = await insight_deck_cache.get_deck(session, brand_id)
              
         return {
             "status": "active",
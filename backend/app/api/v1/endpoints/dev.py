@@ -6,6 +6,7 @@ from sqlmodel import delete, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sse_starlette.sse import EventSourceResponse
 
+from app.core.auth_cache import invalidate_membership
 from app.core.db import engine, get_session
 from app.core.security import get_current_user
 from app.models.audit import AuditTrail
@@ -114,6 +115,7 @@ async def purge_data(
         await session.exec(delete(Workspace).where(Workspace.company_id == company_id))
         await session.exec(delete(Brand).where(Brand.company_id == company_id))
         await session.exec(delete(CompanyMembership).where(CompanyMembership.company_id == company_id))
+        invalidate_membership(company_id)
         await session.exec(delete(Company).where(Company.id == company_id))
         
     await session.commit()
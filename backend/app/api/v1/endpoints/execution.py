@@ -1,11 +1,13 @@
 from datetime import datetime, timedelta
-from typing import Any, List, Optional
+from typing import Any, List, Literal, Optional
+import base64
 import logging
 import asyncio
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
+from sqlalchemy import tuple_
 from sqlmodel import and_, func, or_, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -20,6 +22,7 @@ from app.models.campaign import Campaign
 from app.models.campaign_lead import CampaignLead
 from app.models.queue_item import QueueItem
 from app.models.user import User
+from app.services.campaign_live_status import campaign_live_status
 from app.services.intelligence.google_calendar_service import google_calendar_service
 from app.services.queue_warmer import QueueWarmer
 from app.services.websocket_manager import manager as ws_manager
@@ -49,8 +52,10 @@ async def get_active_status(
 ) -> Any:
     """
     Returns the real-time status of active agents (calls).
+    Served from the event-driven live snapshot; replenishment runs on the scheduler and call events.
     """
-    return await get_campaign_realtime_status_internal(campaign_id, session, trigger_warmer=True)
+    _, snapshot = await campaign_live_status.get_snapshot(campaign_id, session)
+    return snapshot
 
 
 @router.get("/campaign/{campaign_id}/completion-data")
@@ -62,7 +67,7 @@ async def get_completion_data(
     """
     Returns completion data for a campaign (fallback for WebSocket failures).
     """
-    status_data = await get_campaign_realtime_status_internal(campaign_id, session, trigger_warmer=False)
+    _, status_data = await campaign_live_status.get_snapshot(campaign_id, session)
     return status_data.get("completion_data", {})
 
 
@@ -1039,14 +1044,7 @@ async def get_campaign_realtime_status_internal(campaign_id: UUID, session: Asyn
         }
     }
     
-    # Broadcast to WebSocket clients (non-blocking)
-    try:
-        # Import moved to top-level or ensure it's available
-        from app.services.websocket_manager import manager
-        await manager.broadcast_status_update(str(campaign_id), response_data)
-    except Exception as e:
-        print(f"[WebSocket] Broadcast error: {e}")
-    
+    # Subscribers get diffs via CampaignLiveStatusService.refresh, not a full push per computation
     return response_data
 
 
@@ -1336,7 +1334,7 @@ async def start_session(
     await session.commit()
 
     try:
-        status_data = await get_campaign_realtime_status_internal(campaign_id, session, trigger_warmer=False)
+        _, status_data = await campaign_live_status.refresh(campaign_id, session)
         print("[Execution] DEBUG: Status data fetched successfully.")
     except Exception as e:
         print(f"[Execution] Warning: Failed to fetch initial status data: {e}")
@@ -1392,7 +1390,7 @@ async def pause_session(
     await session.commit()
 
     # Broadcast new state
-    status_data = await get_campaign_realtime_status_internal(campaign_id, session, trigger_warmer=False)
+    _, status_data = await campaign_live_status.refresh(campaign_id, session)
     
     return {"status": "paused", "campaign_status": campaign.status, "data": status_data}
 
@@ -1589,7 +1587,7 @@ async def reset_campaign(
     await session.commit()
 
     # Refresh state and broadcast
-    status_data = await get_campaign_realtime_status_internal(campaign_id, session, trigger_warmer=False)
+    _, status_data = await campaign_live_status.refresh(campaign_id, session)
     
     return {"status": "reset_complete", "items_reset": count, "maps_invalidated": len(active_maps) if item_ids else 0, "campaign_status": campaign.status, "data": status_data}
 
@@ -1647,7 +1645,7 @@ async def retry_lead(
     await session.commit()
     
     # Trigger UI update
-    status_data = await get_campaign_realtime_status_internal(campaign_id, session, trigger_warmer=False)
+    _, status_data = await campaign_live_status.refresh(campaign_id, session)
     
     return {"status": "retry_initiated", "lead_id": lead_id, "data": status_data}
 
@@ -1730,7 +1728,7 @@ async def replenish_calls(
     await QueueWarmer.check_and_replenish(campaign_id, session)
     
     # 4. Return Status
-    status_data = await get_campaign_realtime_status_internal(campaign_id, session)
+    _, status_data = await campaign_live_status.refresh(campaign_id, session)
     
     return {
         "status": "replenished", 
@@ -1844,18 +1842,17 @@ async def campaign_websocket(
 
     try:
         # Register the connection
-        if campaign_id_str not in ws_manager.active_connections:
-            ws_manager.active_connections[campaign_id_str] = set()
-        ws_manager.active_connections[campaign_id_str].add(websocket)
+        await ws_manager.connect(websocket, campaign_id_str)
         logger.info(f"[WebSocket] Connected user {user_id} for campaign {campaign_id_str}. Active: {len(ws_manager.active_connections[campaign_id_str])}")
         
-        # Initial state push
+        # Initial state push (stored live snapshot; diffs follow as the campaign changes)
         async with async_session_factory() as session:
             try:
-                initial_status = await get_campaign_realtime_status_internal(campaign_id, session, trigger_warmer=True)
+                version, initial_status = await campaign_live_status.get_snapshot(campaign_id, session)
                 await ws_manager.send_personal_message({
                     "type": "status_update",
                     "campaign_id": campaign_id_str,
+                    "version": version,
                     "data": initial_status
                 }, websocket)
             except Exception as e:
@@ -1877,6 +1874,16 @@ async def campaign_websocket(
                         "type": "pong",
                         "timestamp": datetime.utcnow().isoformat() + "Z"
                     }, websocket)
+                elif data == "resync":
+                    # Client missed a diff (version gap): resend the full stored snapshot
+                    async with async_session_factory() as session:
+                        version, snapshot = await campaign_live_status.get_snapshot(campaign_id, session)
+                    await ws_manager.send_personal_message({
+                        "type": "status_update",
+                        "campaign_id": campaign_id_str,
+                        "version": version,
+                        "data": snapshot
+                    }, websocket)
             except asyncio.TimeoutError:
                 # No data from client is fine, we just continue the loop
                 # The manager will broadcast periodic updates anyway
@@ -1927,105 +1934,175 @@ def _parse_fallback_extraction(payload: dict) -> dict:
             
     return {}
 
+# Call-log list: keyset pagination on (created_at, id), newest first
+MAX_CALL_LOG_PAGE_SIZE = 100
+
+CALL_LOG_INTENT_MAP = {
+    "INTENT_YES": "Interested",
+    "INTENT_NO": "Not Interested",
+    "SCHEDULED": "Scheduled",
+    "INTENT_NO_ANSWER": "No Answer",
+    "FAILED": "Failed Attempt",
+    "DIALING_INTENT": "Dialing",
+    "CONSUMED": "Completed", 
+    "COMPLETED": "Completed"
+}
+
+
+def _call_log_columns(fields: str) -> list:
+    """
+    Columns for the call-log views. "summary" leaves out transcripts, extraction
+    and the raw webhook payload (only its recording URL is read, in SQL).
+    """
+    payload = BolnaExecutionMap.last_webhook_payload
+    columns = [
+        BolnaExecutionMap.id,
+        BolnaExecutionMap.bolna_call_id,
+        BolnaExecutionMap.call_status,
+        BolnaExecutionMap.call_outcome,
+        BolnaExecutionMap.call_duration,
+        BolnaExecutionMap.total_cost,
+        BolnaExecutionMap.currency,
+        BolnaExecutionMap.created_at,
+        BolnaExecutionMap.termination_reason,
+        BolnaExecutionMap.transcript_summary,
+        BolnaExecutionMap.telephony_provider,
+        func.coalesce(
+            payload["telephony_data"]["recording_url"].as_string(),
+            payload["recording_url"].as_string(),
+        ).label("recording_url"),
+        QueueItem.status.label("queue_status"),
+        CampaignLead.id.label("lead_id"),
+        CampaignLead.customer_name,
+        CampaignLead.contact_number,
+        CampaignLead.cohort,
+    ]
+    if fields == "full":
+        columns += [
+            BolnaExecutionMap.full_transcript,
+            BolnaExecutionMap.transcript,
+            BolnaExecutionMap.extracted_data,
+            BolnaExecutionMap.last_webhook_payload,
+        ]
+    return columns
+
+
+def _call_log_query(campaign_id: UUID, fields: str):
+    # Chained outerjoins: if a QueueItem is deleted (e.g. during a reset),
+    # we still want to show the execution log row, even if lead info is partially missing.
+    return (
+        select(*_call_log_columns(fields))
+        .select_from(BolnaExecutionMap)
+        .outerjoin(QueueItem, BolnaExecutionMap.queue_item_id == QueueItem.id)
+        .outerjoin(CampaignLead, QueueItem.lead_id == CampaignLead.id)
+        .where(BolnaExecutionMap.campaign_id == campaign_id)
+    )
+
+
+def _encode_call_log_cursor(created_at: datetime, execution_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{execution_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_call_log_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, execution_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(execution_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _format_call_log(row, full: bool) -> dict:
+    # 1. Business Outcome Logic
+    # Priority: explicit outcome > intent map > queue status > "-"
+    business_outcome = row.call_outcome
+    if not business_outcome:
+        if row.queue_status in CALL_LOG_INTENT_MAP:
+            business_outcome = CALL_LOG_INTENT_MAP[row.queue_status]
+        elif row.queue_status:
+            # Fallback to humanized status (e.g. "INTENT_YES_PENDING" -> "Intent Yes Pending")
+            business_outcome = row.queue_status.replace("_", " ").title()
+        else:
+            business_outcome = (row.call_status or "Unknown").title()
+
+    # 2. Reason Logic
+    # Priority: termination_reason > call_status > "-"
+    reason = row.termination_reason or row.call_status  # e.g. "completed", "failed"
+
+    has_lead = row.lead_id is not None
+    log = {
+        "id": str(row.id),
+        "bolna_call_id": row.bolna_call_id,
+        "status": row.call_status,
+        "outcome": business_outcome,
+        "duration": row.call_duration,
+        "total_cost": row.total_cost,
+        "currency": row.currency,
+        "created_at": row.created_at.isoformat() + "Z" if row.created_at else None,
+        "termination_reason": reason,
+        "transcript_summary": row.transcript_summary,
+        "recording_url": row.recording_url,
+        "telephony_provider": row.telephony_provider,
+        "lead": {
+            "id": str(row.lead_id) if has_lead else None,
+            "name": row.customer_name if has_lead else "Unknown Lead",
+            "number": row.contact_number if has_lead else "N/A",
+            "cohort": row.cohort if has_lead else "N/A"
+        }
+    }
+    if full:
+        last_webhook = row.last_webhook_payload or {}
+        if not isinstance(last_webhook, dict):
+            last_webhook = {}
+        log.update({
+            "full_transcript": row.full_transcript or row.transcript,
+            "extracted_data": row.extracted_data if isinstance(row.extracted_data, dict) else _parse_fallback_extraction(last_webhook),
+            "raw_data": last_webhook,
+            "usage_metadata": last_webhook.get("usage_breakdown") or last_webhook.get("usage"),
+        })
+    return log
+
+
 @router.get("/campaign/{campaign_id}/logs")
 async def get_campaign_call_logs(
     campaign_id: UUID,
+    response: Response,
     page: int = 1,
     page_size: int = 20,
+    cursor: Optional[str] = None,
+    fields: Literal["summary", "full"] = "summary",
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Paginated call logs for a specific campaign.
+    Paginated call logs for a specific campaign, newest first.
+
+    Pass `cursor` (from the previous response's X-Next-Cursor header) for keyset
+    pagination; `page` is the legacy OFFSET form. Rows are summaries without
+    transcripts and raw payloads - fetch those per row from /logs/{execution_id},
+    or pass `fields=full`.
     """
-    offset = (page - 1) * page_size
-    
-    # Join BolnaExecutionMap with QueueItem and CampaignLead via chained outerjoins.
-    # We MUST use outerjoin because if a QueueItem is deleted (e.g. during a reset),
-    # we still want to show the execution log row, even if lead info is partially missing.
-    stmt = (
-        select(BolnaExecutionMap, CampaignLead, QueueItem)
-        .outerjoin(QueueItem, BolnaExecutionMap.queue_item_id == QueueItem.id)
-        .outerjoin(CampaignLead, QueueItem.lead_id == CampaignLead.id)
-        .where(BolnaExecutionMap.campaign_id == campaign_id)
-        .order_by(BolnaExecutionMap.created_at.desc())
-        .offset(offset)
-        .limit(page_size)
+    page_size = max(1, min(page_size, MAX_CALL_LOG_PAGE_SIZE))
+    stmt = _call_log_query(campaign_id, fields).order_by(
+        BolnaExecutionMap.created_at.desc(), BolnaExecutionMap.id.desc()
     )
+    if cursor:
+        created_at, execution_id = _decode_call_log_cursor(cursor)
+        stmt = stmt.where(tuple_(BolnaExecutionMap.created_at, BolnaExecutionMap.id) < tuple_(created_at, execution_id))
+    elif page > 1:
+        stmt = stmt.offset((page - 1) * page_size)
     
-    results = await session.execute(stmt)
+    rows = (await session.execute(stmt.limit(page_size))).all()
+    if len(rows) == page_size and rows[-1].created_at:
+        response.headers["X-Next-Cursor"] = _encode_call_log_cursor(rows[-1].created_at, rows[-1].id)
+
     logs = []
-    
-    for execution, lead, q_item in results.all():
+    for row in rows:
         try:
-            # 1. Business Outcome Logic
-            # Priority: explicit outcome > intent map > queue status > "-"
-            business_outcome = execution.call_outcome
-
-            # Map Intent (Strong overrides)
-            intent_map = {
-                "INTENT_YES": "Interested",
-                "INTENT_NO": "Not Interested",
-                "SCHEDULED": "Scheduled",
-                "INTENT_NO_ANSWER": "No Answer",
-                "FAILED": "Failed Attempt",
-                "DIALING_INTENT": "Dialing",
-                "CONSUMED": "Completed", 
-                "COMPLETED": "Completed"
-            }
-            
-            if not business_outcome:
-                if q_item and q_item.status in intent_map:
-                    business_outcome = intent_map[q_item.status]
-                elif q_item:
-                    # Fallback to humanized status (e.g. "INTENT_YES_PENDING" -> "Intent Yes Pending")
-                    business_outcome = (q_item.status or "Unknown").replace("_", " ").title()
-                else:
-                    business_outcome = (execution.call_status or "Unknown").title()
-
-            # 2. Reason Logic
-            # Priority: termination_reason > call_status > "-"
-            reason = execution.termination_reason
-            if not reason:
-                reason = execution.call_status # e.g. "completed", "failed"
-            
-            # Extract recording_url from telephony_data or fallback to top-level
-            last_webhook = execution.last_webhook_payload or {}
-            if not isinstance(last_webhook, dict):
-                last_webhook = {}
-                
-            telephony_data = last_webhook.get("telephony_data", {})
-            if not isinstance(telephony_data, dict):
-                telephony_data = {}
-                
-            recording_url = telephony_data.get("recording_url") or last_webhook.get("recording_url")
-                
-            logs.append({
-                "id": str(execution.id),
-                "bolna_call_id": execution.bolna_call_id,
-                "status": execution.call_status,
-                "outcome": business_outcome,
-                "duration": execution.call_duration,
-                "total_cost": execution.total_cost,
-                "currency": execution.currency,
-                "created_at": execution.created_at.isoformat() + "Z" if execution.created_at else None,
-                "termination_reason": reason,
-                "transcript_summary": execution.transcript_summary,
-                "full_transcript": execution.full_transcript or execution.transcript,
-                "extracted_data": execution.extracted_data if isinstance(execution.extracted_data, dict) else _parse_fallback_extraction(last_webhook),
-                "recording_url": recording_url,
-                "raw_data": last_webhook,
-                "usage_metadata": last_webhook.get("usage_breakdown") or last_webhook.get("usage"),
-                "telephony_provider": execution.telephony_provider,
-                "lead": {
-                    "id": str(lead.id) if lead else None,
-                    "name": lead.customer_name if lead else "Unknown Lead",
-                    "number": lead.contact_number if lead else "N/A",
-                    "cohort": lead.cohort if lead else "N/A"
-                }
-            })
+            logs.append(_format_call_log(row, full=fields == "full"))
         except Exception as e:
-            print(f"[Execution] Error processing log row {execution.id if execution else 'unknown'}: {e}")
+            print(f"[Execution] Error processing log row {row.id}: {e}")
             import traceback
             traceback.print_exc()
             continue
@@ -2033,6 +2110,23 @@ async def get_campaign_call_logs(
     return logs
 
 
+@router.get("/campaign/{campaign_id}/logs/{execution_id}")
+async def get_campaign_call_log(
+    campaign_id: UUID,
+    execution_id: UUID,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    One call log with transcript, extracted data and raw webhook payload.
+    """
+    stmt = _call_log_query(campaign_id, "full").where(BolnaExecutionMap.id == execution_id)
+    row = (await session.execute(stmt)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Call log not found")
+    return _format_call_log(row, full=True)
+
+
 @router.get("/campaign/{campaign_id}/lead/{lead_id}/events")
 async def get_lead_campaign_events(
     campaign_id: UUID,
@@ -2358,11 +2452,10 @@ async def copy_to_queue(
     from app.services.user_queue_warmer import UserQueueWarmer
     await UserQueueWarmer.check_backpressure(session, campaign_id)
     
-    # Broadcast update
-    status_data = await get_campaign_realtime_status_internal(campaign_id, session)
+    # Broadcast update (refresh pushes the status diff)
+    _, status_data = await campaign_live_status.refresh(campaign_id, session)
     try:
         from app.services.websocket_manager import manager
-        await manager.broadcast_status_update(str(campaign_id), status_data)
         # Also broadcast specific user queue update event
         await manager.broadcast_status_update(str(campaign_id), {"event": "user_queue_update"})
     except:
@@ -15,6 +15,7 @@ from fastapi.responses import RedirectResponse, Response
 from loguru import logger
 from pydantic import BaseModel
 from sqlalchemy import and_, case, desc, func, not_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
@@ -26,6 +27,7 @@ from app.models.calendar_connection import CalendarConnection
 from app.models.campaign import Campaign
 from app.models.campaign_lead import CampaignLead
 from app.models.insight_tracking import InsightImpression
+from app.models.lead_import import LeadImport
 from app.models.user import User
 from app.schemas.campaign import (
     CampaignContextSuggestions,
@@ -35,8 +37,9 @@ from app.schemas.campaign import (
     ReplaceLeadsRequest,
 )
 from app.services.intelligence.campaign_service import campaign_service
+from app.services.intelligence.deck_cache import insight_deck_cache
 from app.services.intelligence.google_calendar_service import google_calendar_service
-from app.services.intelligence.insight_engine import insight_engine
+from app.services.intelligence.lead_import import LeadRecordParser, UploadStalled, lead_importer
 
 router = APIRouter()
 
@@ -205,11 +208,16 @@ async def sync_campaign_calendar(
 @router.get("/deck/{brand_id}")
 async def get_intelligence_deck(
     brand_id: UUID,
+    refresh: bool = False,
     session: AsyncSession = Depends(get_session),
     x_company_id: str = Header(..., alias="X-Company-ID")
 ) -> Dict[str, Any]:
     """
-    Generate full intelligence deck for a brand.
+    Get the full intelligence deck for a brand.
+    
+    Served from the per-brand deck cache; regenerated only when the brand's data
+    changed (stale decks are returned immediately and refreshed in the background)
+    or when `refresh=true`.
     
     Returns:
         {
@@ -217,7 +225,8 @@ async def get_intelligence_deck(
             "full_deck": [...],  # All insights
             "category_distribution": {"financial": 2, "growth": 2, "operational": 1},
             "generation_time_ms": 456.78,
-            "generated_at": "2024-01-15T..."
+            "generated_at": "2024-01-15T...",
+            "cache_status": "hit" | "stale" | "miss"
         }
     """
     try:
@@ -230,15 +239,15 @@ async def get_intelligence_deck(
         if not brand:
             raise HTTPException(status_code=403, detail="Brand not found or access denied")
         
-        # Generate deck
-        deck = await insight_engine.generate_full_deck(session, brand_id)
+        deck = await insight_deck_cache.get_deck(session, brand_id, force_refresh=refresh)
         
         logger.info(
             "Intelligence deck API called",
             extra={
                 "brand_id": str(brand_id),
                 "company_id": x_company_id,
-                "insights_count": len(deck.get("insights", []))
+                "insights_count": len(deck.get("insights", [])),
+                "cache_status": deck.get("cache_status")
             }
         )
         
@@ -272,10 +281,11 @@ async def get_top_insight(
         if not brand:
             raise HTTPException(status_code=403, detail="Brand not found or access denied")
         
-        # Generate deck and return top 1
-        deck = await insight_engine.generate_deck(session, brand_id)
+        # Cached deck, top 1
+        deck = await insight_deck_cache.get_deck(session, brand_id)
+        insights = deck.get("insights", [])
         
-        return deck[0] if deck else {}
+        return insights[0] if insights else {}
         
     except HTTPException:
         raise
@@ -1392,6 +1402,158 @@ async def create_campaign_from_csv(
         raise HTTPException(status_code=500, detail=f"Failed to create campaign: {str(e)}")
 
 
+@router.post("/campaigns/import-leads")
+async def import_campaign_leads(
+    request: Request,
+    campaign_name: Optional[str] = None,
+    force_create: bool = False,
+    import_id: Optional[UUID] = None,
+    name_column: Optional[str] = None,
+    phone_column: Optional[str] = None,
+    cohort_column: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    x_company_id: str = Header(..., alias="X-Company-ID"),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Streaming variant of create-from-csv for large lead files.
+    The body is raw CSV with a header row (text/csv) or NDJSON lead objects
+    (application/x-ndjson). Leads are parsed as they arrive and COPYed in
+    chunks, so memory does not grow with the file (see
+    app.services.intelligence.lead_import). Pass an `import_id` to poll
+    GET /campaigns/lead-imports/{import_id} while the upload runs.
+    The request's transaction stays open while the body streams; a stall of
+    more than LEAD_IMPORT_IDLE_TIMEOUT_S between chunks fails with 408.
+    """
+    import time
+    t_start = time.time()
+
+    try:
+        company_id = UUID(x_company_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Company ID")
+
+    content_type = request.headers.get("content-type", "")
+    fmt = "ndjson" if ("ndjson" in content_type or "jsonl" in content_type) else "csv"
+    parser = LeadRecordParser(fmt, name_column=name_column, phone_column=phone_column, cohort_column=cohort_column)
+
+    import_id = import_id or uuid4()
+    try:
+        await lead_importer.begin(import_id, company_id, current_user.id)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail=f"Lead import {import_id} already exists")
+
+    try:
+        staged = await lead_importer.stage(session, request.stream(), parser, import_id)
+        t_staged = time.time()
+
+        if staged.rows_read - staged.rows_skipped == 0:
+            raise ValueError("No leads with a contact number found")
+
+        # Same file re-uploaded within a day (full-content hash)
+        if not force_create:
+            one_day_ago = datetime.utcnow() - timedelta(days=1)
+            stmt = select(Campaign).where(
+                Campaign.company_id == company_id,
+                Campaign.source_file_hash == staged.source_hash,
+                Campaign.created_at >= one_day_ago
+            ).order_by(desc(Campaign.created_at)).limit(1)
+            existing_campaign = (await session.execute(stmt)).scalars().first()
+
+            if existing_campaign:
+                await session.rollback()
+                await lead_importer.record(import_id, status="DUPLICATE", campaign_id=existing_campaign.id)
+                from fastapi.responses import JSONResponse
+                return JSONResponse(
+                    status_code=409,
+                    content={
+                        "detail": "Duplicate upload detected",
+                        "code": "DUPLICATE_UPLOAD",
+                        "campaign_id": str(existing_campaign.id),
+                        "campaign_name": existing_campaign.name,
+                        "created_at": existing_campaign.created_at.isoformat() + "Z"
+                    }
+                )
+
+        if not campaign_name or str(campaign_name).strip() == "":
+            campaign_name = f"Intelligence Batch - {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
+
+        campaign = Campaign(
+            company_id=company_id,
+            user_id=current_user.id,
+            name=campaign_name,
+            status="DRAFT",
+            phone_number="",
+            source_file_hash=staged.source_hash
+        )
+        session.add(campaign)
+        await session.flush()
+
+        leads_count = await lead_importer.merge(session, campaign.id)
+        await session.commit()
+        t_end = time.time()
+
+    except ValueError as e:
+        await session.rollback()
+        await lead_importer.record(import_id, status="FAILED", error_message=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadStalled as e:
+        await session.rollback()
+        await lead_importer.record(import_id, status="FAILED", error_message=str(e))
+        raise HTTPException(status_code=408, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to import leads: {e}")
+        await session.rollback()
+        await lead_importer.record(import_id, status="FAILED", error_message=str(e))
+        raise HTTPException(status_code=500, detail=f"Failed to import leads: {str(e)}")
+
+    await lead_importer.record(
+        import_id, status="COMPLETED", campaign_id=campaign.id, leads_count=leads_count,
+        bytes_read=staged.bytes_read, rows_read=staged.rows_read, rows_skipped=staged.rows_skipped,
+    )
+    logger.info(
+        f"Lead Import Performance: Total={t_end - t_start:.3f}s | "
+        f"Stage={t_staged - t_start:.3f}s | "
+        f"Merge={t_end - t_staged:.3f}s | "
+        f"Rows={staged.rows_read} | Leads={leads_count}"
+    )
+
+    return {
+        "status": "success",
+        "import_id": import_id,
+        "campaign_id": campaign.id,
+        "leads_count": leads_count,
+        "original_count": staged.rows_read,
+        "skipped_count": staged.rows_skipped,
+        "campaign_name": campaign.name,
+        "performance": {
+            "total_seconds": round(t_end - t_start, 3),
+            "rows_per_second": round(staged.rows_read / (t_end - t_start + 0.001), 0)
+        }
+    }
+
+
+@router.get("/campaigns/lead-imports/{import_id}")
+async def get_lead_import(
+    import_id: UUID,
+    current_user: User = Depends(get_current_active_user),
+    x_company_id: str = Header(..., alias="X-Company-ID"),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Progress of a streaming lead import (bytes / rows read so far, final counts).
+    """
+    try:
+        company_id = UUID(x_company_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Company ID")
+
+    lead_import = await session.get(LeadImport, import_id)
+    if not lead_import or lead_import.company_id != company_id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return lead_import
+
+
 @router.post("/campaigns/create-full")
 async def create_full_campaign(
     request: CreateFullCampaignRequest,
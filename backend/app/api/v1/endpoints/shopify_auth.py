@@ -14,7 +14,7 @@ from fastapi import (
 from fastapi.responses import RedirectResponse
 from loguru import logger
 from pydantic import BaseModel
-from sqlmodel import func, select
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.deps import get_current_active_user, get_db_session
@@ -23,11 +23,33 @@ from app.core.limiter import limiter
 from app.core.version import get_app_version
 from app.models.integration import Integration, IntegrationStatus
 from app.models.user import User
-from app.services.analytics.service import AnalyticsService
 from app.services.shopify.oauth_service import shopify_oauth_service
+from app.services.shopify.refinement_worker import shopify_refinement_worker
+from app.services.shopify.shop_directory import shop_directory
 
 router = APIRouter()
 
+# Webhook topic fragment -> raw ingest object_type (first match wins)
+WEBHOOK_OBJECT_TYPES = [
+    ("orders", "order"),
+    ("refunds", "refund"),
+    ("fulfillments", "fulfillment"),
+    ("customers", "customer"),
+    ("products", "product"),
+    ("inventory_levels", "inventory_level"),
+    ("inventory_items", "inventory_item"),
+    ("locations", "location"),
+    ("payouts", "payout"),
+    ("disputes", "dispute"),
+    ("price_rules", "price_rule"),
+    ("checkouts", "checkout"),
+    ("marketing_events", "marketing_event"),
+]
+
+
+def webhook_object_type(topic: str) -> str:
+    return next((obj_type for fragment, obj_type in WEBHOOK_OBJECT_TYPES if fragment in topic), "unknown")
+
 # --- Schemas ---
 
 class ShopUrlRequest(BaseModel):
@@ -341,7 +363,8 @@ async def handle_shopify_webhook(
 ):
     """
     Receives real-time data from Shopify.
-    Verifies HMAC -> Ingests Raw -> Triggers Refinement.
+    Verifies HMAC -> Ingests Raw -> Acks. Refinement is queued on
+    `shopify_refinement_worker` so a webhook storm never refines inline.
     """
     try:
         # 1. Get Raw Body
@@ -365,79 +388,39 @@ async def handle_shopify_webhook(
         else:
             logger.info(f"Webhook HMAC Verification bypassed (Dev Mode) for {x_shopify_shop_domain}")
 
-        # 3. Find Integration
-        # Query for this shop using JSON extraction (no status filter - accept webhooks in any state)
-        stmt = select(Integration).where(
-            Integration.metadata_info["shop"].astext == x_shopify_shop_domain
-        )
-        
-        result = await session.execute(stmt)
-        integration = result.scalars().first()
-        
+        # 3. Find Integration (cached, any status - accept webhooks in any state)
+        integration = await shop_directory.resolve(session, x_shopify_shop_domain)
         if not integration:
             logger.warning(f"Integration not found for shop: {x_shopify_shop_domain}")
             return {"status": "ignored", "reason": "unknown_shop"}
 
-        logger.info(f"Found integration {integration.id} for shop {x_shopify_shop_domain}")
-
         # 4. Ingest
         payload = await request.json()
         from app.models.shopify.product import ShopifyProduct
-        from app.services.shopify.refinement_service import shopify_refinement_service
         from app.services.shopify.sync_service import shopify_sync_service
         
-        # Map topic to object_type
-        obj_type = "unknown"
         if not x_shopify_topic:
              x_shopify_topic = "unknown"
-             
-        if "orders" in x_shopify_topic:
-            obj_type = "order"
-        elif "refunds" in x_shopify_topic:
-            obj_type = "refund"
-        elif "fulfillments" in x_shopify_topic:
-            obj_type = "fulfillment"
-        elif "customers" in x_shopify_topic:
-            obj_type = "customer"
-        elif "products" in x_shopify_topic:
-            obj_type = "product"
-            
-            # --- SPECIAL HANDLING FOR PRODUCT DELETION ---
-            # Deletion webhooks only have {id: ...}. If we delete the SQL record, we lose the 'title'.
-            # We look it up NOW (while it still exists) and store it in payload for activity log.
-            if "delete" in x_shopify_topic:
-                try:
-                    p_id = payload.get("id")
-                    if p_id:
-                        p_stmt = select(ShopifyProduct).where(
-                            ShopifyProduct.integration_id == integration.id,
-                            ShopifyProduct.shopify_product_id == p_id
-                        )
-                        p_res = await session.execute(p_stmt)
-                        p_obj = p_res.scalars().first()
-                        if p_obj:
-                            payload["_cached_title"] = p_obj.title
-                            logger.info(f"Cached product title '{p_obj.title}' for deletion webhook")
-                except Exception as cache_err:
-                    logger.error(f"Failed to cache product title: {cache_err}")
-            # ---------------------------------------------
-
-        elif "inventory_levels" in x_shopify_topic:
-            obj_type = "inventory_level"
-        elif "inventory_items" in x_shopify_topic:
-            obj_type = "inventory_item"
-        elif "locations" in x_shopify_topic:
-            obj_type = "location"
-        elif "payouts" in x_shopify_topic:
-            obj_type = "payout"
-        elif "disputes" in x_shopify_topic:
-            obj_type = "dispute"
-        elif "price_rules" in x_shopify_topic:
-            obj_type = "price_rule"
-        elif "checkouts" in x_shopify_topic:
-            obj_type = "checkout"
-        elif "marketing_events" in x_shopify_topic:
-            obj_type = "marketing_event"
+        obj_type = webhook_object_type(x_shopify_topic)
+
+        # --- SPECIAL HANDLING FOR PRODUCT DELETION ---
+        # Deletion webhooks only have {id: ...}. If we delete the SQL record, we lose the 'title'.
+        # We look it up NOW (while it still exists) and store it in payload for activity log.
+        if obj_type == "product" and "delete" in x_shopify_topic:
+            try:
+                p_id = payload.get("id")
+                if p_id:
+                    p_stmt = select(ShopifyProduct.title).where(
+                        ShopifyProduct.integration_id == integration.id,
+                        ShopifyProduct.shopify_product_id == p_id
+                    )
+                    title = (await session.execute(p_stmt)).scalars().first()
+                    if title:
+                        payload["_cached_title"] = title
+                        logger.info(f"Cached product title '{title}' for deletion webhook")
+            except Exception as cache_err:
+                logger.error(f"Failed to cache product title: {cache_err}")
+        # ---------------------------------------------
             
         await shopify_sync_service.ingest_raw_object(
             session=session,
@@ -448,110 +431,10 @@ async def handle_shopify_webhook(
             topic=x_shopify_topic,
             created_by="System"
         )
-        
-        # 5. Trigger Immediate Refinement (with integration filter)
         await session.commit()
         
-        # Process the webhook immediately for real-time updates
-        try:
-            await shopify_refinement_service.process_pending_records(
-                session, 
-                integration_id=integration.id,
-                limit=10
-            )
-            await session.commit()
-            logger.info(f"✅ Refinement completed successfully for integration {integration.id}")
-        except Exception as refinement_error:
-            logger.error(f"Refinement failed but webhook logged: {refinement_error}")
-            # Don't fail the webhook - it's already logged
-        
-        logger.info(f"🔍 About to start stats recalculation for integration {integration.id}")
-        # 6. Real-Time Stats Recalculation from DB (Source of Truth)
-        # Query actual counts from refined tables to ensure accuracy
-        logger.info(f"Starting real-time stats recalculation for integration {integration.id}")
-        from app.models.shopify.customer import ShopifyCustomer
-        from app.models.shopify.inventory import ShopifyInventoryLevel, ShopifyLocation
-        from app.models.shopify.order import ShopifyOrder
-        from app.models.shopify.product import ShopifyProduct
-        
-        try:
-            logger.info("Querying database for fresh stats...")
-            # Orders count
-            orders_stmt = select(func.count(ShopifyOrder.id)).where(
-                ShopifyOrder.integration_id == integration.id
-            )
-            orders_count = (await session.execute(orders_stmt)).scalar_one() or 0
-            
-            # Products count
-            products_stmt = select(func.count(ShopifyProduct.id)).where(
-                ShopifyProduct.integration_id == integration.id
-            )
-            products_count = (await session.execute(products_stmt)).scalar_one() or 0
-            
-            # Customers count
-            customers_stmt = select(func.count(ShopifyCustomer.id)).where(
-                ShopifyCustomer.integration_id == integration.id
-            )
-            customers_count = (await session.execute(customers_stmt)).scalar_one() or 0
-            
-            # Locations count
-            locations_stmt = select(func.count(ShopifyLocation.id)).where(
-                ShopifyLocation.integration_id == integration.id
-            )
-            locations_count = (await session.execute(locations_stmt)).scalar_one() or 0
-            
-            # Inventory total (sum of available across all locations)
-            inventory_stmt = select(func.sum(ShopifyInventoryLevel.available)).where(
-                ShopifyInventoryLevel.integration_id == integration.id
-            )
-            inventory_count = (await session.execute(inventory_stmt)).scalar_one() or 0
-            
-            # Revenue calculation (matching Shopify's definition)
-            # Total Sales = Gross Sales - Returns + Net Tax
-            revenue_stmt = select(
-                func.sum(ShopifyOrder.subtotal_price - ShopifyOrder.refunded_subtotal + ShopifyOrder.total_tax - ShopifyOrder.refunded_tax)
-            ).where(
-                ShopifyOrder.integration_id == integration.id,
-                ShopifyOrder.financial_status != "unknown",
-                ShopifyOrder.shopify_order_number != 1070  # Exclude test orders
-            )
-            total_revenue = (await session.execute(revenue_stmt)).scalar_one() or 0.0
-            
-            # Update metadata with fresh DB counts
-            current_meta = integration.metadata_info or {}
-            sync_stats = current_meta.get("sync_stats", {})
-            sync_stats.update({
-                "orders_count": orders_count,
-                "products_count": products_count,
-                "customers_count": customers_count,
-                "locations_count": locations_count,
-                "inventory_count": int(inventory_count),
-                "total_revenue": float(total_revenue),
-                "last_updated": datetime.now(timezone.utc).isoformat()
-            })
-            current_meta["sync_stats"] = sync_stats
-            integration.metadata_info = current_meta
-            integration.last_sync_at = datetime.now(timezone.utc)
-            
-            from sqlalchemy.orm.attributes import flag_modified
-            flag_modified(integration, "metadata_info")
-            session.add(integration)
-            await session.commit()
-            
-            # --- Trigger Historical Metrics Snapshot (Module 6) ---
-            try:
-                today = datetime.now(timezone.utc).date()
-                await AnalyticsService.refresh_snapshot(session, integration, today)
-                await session.commit()
-                logger.info(f"✅ Daily Snapshot updated for {today}")
-            except Exception as metric_err:
-                logger.error(f"Failed to update daily snapshot: {metric_err}")
-
-            logger.info(f"Real-time stats updated: Orders={orders_count}, Products={products_count}, Inventory={inventory_count}")
-            
-        except Exception as stats_error:
-            logger.error(f"Stats recalculation failed: {stats_error}")
-            # Don't fail the webhook - stats will be corrected on next sync
+        # 5. Refinement and stats recalculation run in the background worker
+        shopify_refinement_worker.notify(integration.id)
 
         return {"status": "received"}
 
@@ -57,8 +57,8 @@ async def get_user_queue(
             )
         )
         
-    # Sort by priority score DESC
-    query = query.order_by(desc(UserQueueItem.priority_score), UserQueueItem.detected_at.asc())
+    # Sort by exact priority DESC (stored static part + time function, computed in SQL)
+    query = query.order_by(desc(UserQueueWarmer.priority_order(datetime.utcnow())), UserQueueItem.detected_at.asc())
     query = query.offset(offset).limit(limit)
     
     # DEBUG: Log the query and params
@@ -137,7 +137,7 @@ async def get_user_queue(
             "intent_strength": item.intent_strength,
             "confirmation_slot": item.confirmation_slot,
             "detected_at": item.detected_at,
-            "priority_score": item.priority_score,
+            "priority_score": UserQueueWarmer.current_priority(item),
             "status": item.status,
             "user_call_count": item.user_call_count,
             "last_user_call_at": item.last_user_call_at,
@@ -176,6 +176,32 @@ async def get_next_lead(
         "locked_until": item.lock_expires_at
     }
 
+@router.post("/{campaign_id}/claim")
+async def claim_leads(
+    campaign_id: UUID,
+    count: int = Query(1, ge=1, le=UserQueueWarmer.MAX_CLAIM_BATCH),
+    current_user: User = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_session)
+) -> Any:
+    """Claim (lock) a batch of the highest priority ready leads for the current user."""
+    await UserQueueWarmer.unlock_stale_locks(session, campaign_id)
+    
+    items = await UserQueueWarmer.claim_leads(session, campaign_id, current_user.id, limit=count)
+    if not items:
+        raise HTTPException(status_code=404, detail="No leads ready in queue")
+    
+    leads = (await session.execute(
+        select(CampaignLead).where(CampaignLead.id.in_([item.lead_id for item in items]))
+    )).scalars().all()
+    leads_by_id = {lead.id: lead for lead in leads}
+    
+    await manager.broadcast_status_update(str(campaign_id), {"event": "user_queue_update"})
+    
+    return [
+        {"item": item, "lead": leads_by_id.get(item.lead_id), "locked_until": item.lock_expires_at}
+        for item in items
+    ]
+
 @router.post("/{item_id}/call-status")
 async def update_call_status(
     item_id: UUID,
@@ -369,33 +395,18 @@ async def boost_lead_endpoint(
     existing_boosts = existing_boosts_result.scalars().all()
 
     for boosted_item in existing_boosts:
+        # Stored priority parts are recomputed on flush
         boosted_item.manual_priority_boost = 0
-        boosted_item.priority_score = UserQueueWarmer._calculate_priority_score(
-            confirmation_slot=boosted_item.confirmation_slot,
-            intent_strength=boosted_item.intent_strength,
-            retry_count=boosted_item.retry_count,
-            manual_priority_boost=0,
-            detected_at=boosted_item.detected_at
-        )
         session.add(boosted_item)
 
     # Apply massive boost
     # 50000 ensures it beats even the "Committed Time" boost of 10000
     item.manual_priority_boost = 50000
     
-    # Recalculate priority immediately
-    item.priority_score = UserQueueWarmer._calculate_priority_score(
-        confirmation_slot=item.confirmation_slot,
-        intent_strength=item.intent_strength,
-        retry_count=item.retry_count,
-        manual_priority_boost=item.manual_priority_boost,
-        detected_at=item.detected_at
-    )
-    
     session.add(item)
     await session.commit()
     
     # Broadcast update
     await manager.broadcast_status_update(str(item.campaign_id), {"event": "user_queue_update"})
     
-    return {"status": "success", "new_priority": item.priority_score}
+    return {"status": "success", "new_priority": UserQueueWarmer.current_priority(item)}
@@ -0,0 +1,60 @@
+"""
+In-process caches for the per-request auth path (TenantMiddleware).
+
+- token_cache:      verified Firebase ID token payloads, keyed by a hash of the
+                    token. An entry never outlives the token's own `exp`.
+- membership_cache: (company_id, user_id) -> role for existing memberships.
+                    CompanyMembership writes invalidate it (listeners in
+                    app.models.iam); bulk deletes call invalidate_membership,
+                    and raw user_id rewrites invalidate_user_memberships.
+                    Other workers converge within MEMBERSHIP_CACHE_TTL_S.
+"""
+import hashlib
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+
+# Stop serving a token slightly before Firebase would reject it
+TOKEN_EXPIRY_SKEW_S = 30
+
+
+token_cache = TTLCache(settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL_S)
+membership_cache = TTLCache(settings.MEMBERSHIP_CACHE_SIZE, settings.MEMBERSHIP_CACHE_TTL_S)
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_cached_token(token: str) -> Optional[Dict[str, Any]]:
+    payload = token_cache.get(_token_key(token))
+    return dict(payload) if payload is not None else None
+
+
+def cache_token(token: str, payload: Dict[str, Any]):
+    expires_in = payload.get("exp", 0) - time.time() - TOKEN_EXPIRY_SKEW_S
+    token_cache.set(_token_key(token), dict(payload), ttl_seconds=expires_in)
+
+
+def get_cached_role(company_id: uuid.UUID, user_id: str) -> Optional[str]:
+    return membership_cache.get((company_id, user_id))
+
+
+def cache_role(company_id: uuid.UUID, user_id: str, role: str):
+    membership_cache.set((company_id, user_id), role)
+
+
+def invalidate_membership(company_id: uuid.UUID, user_id: Optional[str] = None):
+    """Drops one membership, or every cached membership of a company when user_id is None."""
+    if user_id is not None:
+        membership_cache.pop((company_id, user_id))
+    else:
+        membership_cache.discard_where(lambda key: key[0] == company_id)
+
+
+def invalidate_user_memberships(user_id: str):
+    """Drops every cached membership of a user, e.g. after its rows move to another uid."""
+    membership_cache.discard_where(lambda key: key[1] == user_id)
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Dict, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -31,6 +31,12 @@ class Settings(BaseSettings):
     SWAGGER_DEV_PASSWORD: str = "admin"
     SWAGGER_DEV_TOKEN: str = "secret"
     
+    # Auth caches (per worker)
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # Verified ID tokens; each entry also expires with its token
+    AUTH_TOKEN_CACHE_TTL_S: int = 300  # Upper bound on reuse of one verification
+    MEMBERSHIP_CACHE_SIZE: int = 10000  # (company, user) -> role
+    MEMBERSHIP_CACHE_TTL_S: int = 60  # Bounds staleness across workers; local changes invalidate immediately
+    
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_PER_MINUTE: int = 60
@@ -46,9 +52,45 @@ class Settings(BaseSettings):
     SHOPIFY_API_SECRET: Optional[str] = None
     GEMINI_API_KEY: Optional[str] = None
     SHOPIFY_ENCRYPTION_KEY: Optional[str] = None
+    SHOPIFY_BACKFILL_CONCURRENCY: int = 4  # Resource streams fetched in parallel per sync
+    # Raw ingest retention: days a processed payload stays in the hot table, per object_type
+    SHOPIFY_RAW_RETENTION_DAYS: Dict[str, int] = {
+        "default": 90,
+        "checkout": 30,
+        "report_data": 30,
+        "analytics_data": 30,
+        "inventory_level": 30,
+    }
+    SHOPIFY_RAW_ARCHIVE_RETENTION_DAYS: int = 365  # Archive partitions older than this are dropped
+    SHOPIFY_REFINED_PAYLOAD_RETENTION_DAYS: int = 90  # raw_payload blanked on refined rows after this
+    SHOPIFY_PRUNE_BATCH_SIZE: int = 1000
+    SHOPIFY_PRUNE_TIME_BUDGET_S: int = 600  # A run stops after this; the next run resumes
+    SHOPIFY_WEBHOOK_REFINE_BATCH_SIZE: int = 100  # Pending webhook rows refined per transaction
+    SHOPIFY_WEBHOOK_REFINE_CONCURRENCY: int = 4  # Integrations refined in parallel per worker process
+    SHOPIFY_WEBHOOK_REFINE_MAX_BATCHES: int = 10  # Batches per integration per turn before yielding to others
+    SHOP_DIRECTORY_CACHE_SIZE: int = 10000
+    SHOP_DIRECTORY_TTL_S: int = 300  # Shop domain -> integration cache lifetime
+    LEAD_IMPORT_CHUNK_ROWS: int = 5000  # Leads buffered per COPY into the import staging table
+    LEAD_IMPORT_IDLE_TIMEOUT_S: int = 30  # Max wait for the next body chunk while the import transaction is open
+    LLM_CACHE_MAX_ENTRIES: int = 2048  # In-memory LLM responses per worker (LRU)
+    LLM_CACHE_SQLITE_PATH: Optional[str] = None  # Shared on-disk tier for all workers on a host; unset = memory only
+    LLM_MAX_CONCURRENCY: int = 8  # Gemini requests in flight per worker process
+    LLM_BATCH_ENRICHMENT: bool = True  # Deck enrichment as one prompt per batch instead of 2 calls per insight
+    LLM_ENRICH_BATCH_SIZE: int = 20  # Insights per batched enrichment prompt
     BACKEND_URL: str = "http://localhost:8000"
     FRONTEND_URL: str = "http://localhost:3000"
 
+    # Campaign replenishment (per-minute QueueWarmer tick)
+    REPLENISH_CONCURRENCY: int = 8  # Campaigns replenished in parallel, one session each
+    REPLENISH_FULL_PASS_TICKS: int = 5  # Every Nth tick also runs campaigns whose state did not change
+    REPLENISH_SHARD_COUNT: int = 1  # Workers splitting campaigns by id; each sets its own index
+    REPLENISH_SHARD_INDEX: int = 0
+
+    # Campaign WebSocket fan-out
+    WS_BACKPLANE: str = "memory"  # memory (single worker) | postgres (LISTEN/NOTIFY across workers)
+    WS_SEND_QUEUE_SIZE: int = 32  # Per-socket outbound queue; oldest message dropped when full
+    WS_SEND_TIMEOUT_S: float = 10.0  # A socket stuck longer than this on one send is disconnected
+
     # Google Calendar Integration
     GOOGLE_CLIENT_ID: Optional[str] = None
     GOOGLE_CLIENT_SECRET: Optional[str] = None
@@ -58,6 +100,13 @@ class Settings(BaseSettings):
     BOLNA_API_KEY: Optional[str] = None
     BOLNA_AGENT_ID: Optional[str] = None
     BOLNA_API_BASE_URL: str = "https://api.bolna.ai"
+    BOLNA_DIAL_CONCURRENCY: int = 10  # In-flight call requests per worker (also the HTTP pool size)
+    BOLNA_DIAL_RATE_PER_SECOND: float = 5.0  # Token-bucket refill rate; <= 0 disables rate limiting
+    BOLNA_DIAL_BURST: int = 10  # Requests allowed back-to-back before the rate applies
+    BOLNA_HTTP_TIMEOUT_S: float = 15.0
+    BOLNA_WEBHOOK_WORKERS: int = 4  # Webhook processing workers per process; a call always maps to the same one
+    BOLNA_WEBHOOK_QUEUE_SIZE: int = 10000  # Per-worker backlog; overflow is left to the recovery sweep
+    BOLNA_WEBHOOK_RECOVERY_AGE_S: int = 300  # Stored-but-unprocessed payloads older than this are re-queued
 
     class Config:
         env_file = ".env"
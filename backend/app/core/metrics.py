@@ -49,6 +49,57 @@ cache_misses = Counter(
     'Number of cache misses for insight generation'
 )
 
+replenishment_tick_duration = Histogram(
+    'campaign_replenishment_tick_seconds',
+    'Time spent replenishing one campaign in a scheduler tick',
+    ['outcome']  # replenished, error
+)
+
+replenishment_ticks_total = Counter(
+    'campaign_replenishment_ticks_total',
+    'Per-campaign replenishment tick outcomes',
+    ['outcome']  # replenished, unchanged, locked, error
+)
+
+bolna_call_duration = Histogram(
+    'bolna_call_request_seconds',
+    'Latency of Bolna call-trigger requests',
+    ['outcome']  # success, error
+)
+
+bolna_call_errors = Counter(
+    'bolna_call_errors_total',
+    'Failed Bolna call-trigger requests',
+    ['reason']  # http_<status>, timeout, transport, other
+)
+
+bolna_webhook_events = Counter(
+    'bolna_webhook_events_total',
+    'Bolna webhook deliveries by pipeline outcome',
+    ['outcome']  # accepted, coalesced, overflow, processed, failed, recovered
+)
+
+bolna_webhook_processing_duration = Histogram(
+    'bolna_webhook_processing_seconds',
+    'Time spent applying one queued Bolna webhook event'
+)
+
+shopify_webhook_refine_batch_duration = Histogram(
+    'shopify_webhook_refine_batch_seconds',
+    'Time spent refining one micro-batch of Shopify webhook rows'
+)
+
+shopify_webhook_records_refined = Counter(
+    'shopify_webhook_records_refined_total',
+    'Shopify webhook rows taken through refinement by the background worker'
+)
+
+llm_enrichment_insights = Counter(
+    'llm_enrichment_insights_total',
+    'Insights enriched by the LLM, by path (cached / batched / fallback / failed)',
+    ['path']
+)
+
 def track_generation_time(generator_name: str):
     """Decorator to track insight generation time."""
     def decorator(func: Callable):
@@ -0,0 +1,128 @@
+"""
+User queue priority, split into a stored part and a deterministic time part.
+
+score(now) = max(0, static + slot_bracket(now) + drift(now))
+
+- static:        intent strength, retry penalty and manual boost. Only changes
+                 when the item itself is written, so it is stored
+                 (UserQueueItem.static_priority).
+- slot_bracket:  step function of the minutes left until the committed callback
+                 slot. Changes a handful of times per item.
+- drift:         the continuous parts - 24h freshness decay and the overdue ramp.
+
+UserQueueItem.priority_score stores max(0, static + slot_bracket): it only moves
+when an item crosses a bracket, so keeping it current rewrites just those rows.
+Exact ordering uses `priority_expression`, the same function evaluated in SQL.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Integer, case, cast, func
+
+# Committed slot brackets, in minutes from now until the slot
+SLOT_WINDOW_START = -30    # -30min .. +60min: call now
+SLOT_WINDOW_END = 60
+SLOT_SOON = 120            # within 2 hours
+SLOT_LATER = 240           # within 4 hours
+
+SLOT_WINDOW_POINTS = 10000
+SLOT_OVERDUE_POINTS = 8000
+SLOT_SOON_POINTS = 5000
+SLOT_LATER_POINTS = 3000
+
+OVERDUE_POINTS_PER_MINUTE = 10
+OVERDUE_MAX_POINTS = 2000
+INTENT_POINTS = 2000
+DECAY_POINTS = 1000
+DECAY_MINUTES = 1440
+RETRY_PENALTY = 100
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Columns are naive UTC; slots parsed from ISO strings may still carry an offset
+    if value is not None and value.tzinfo:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def static_priority(intent_strength: float, retry_count: int, manual_priority_boost: int = 0) -> int:
+    return int((intent_strength or 0.0) * INTENT_POINTS) - (retry_count or 0) * RETRY_PENALTY + (manual_priority_boost or 0)
+
+
+def slot_bracket(confirmation_slot: Optional[datetime], now: datetime) -> int:
+    confirmation_slot = _naive_utc(confirmation_slot)
+    if not confirmation_slot:
+        return 0
+    minutes_to_slot = (confirmation_slot - now).total_seconds() / 60
+    if SLOT_WINDOW_START <= minutes_to_slot <= SLOT_WINDOW_END:
+        return SLOT_WINDOW_POINTS
+    if minutes_to_slot < SLOT_WINDOW_START:
+        return SLOT_OVERDUE_POINTS
+    if minutes_to_slot <= SLOT_SOON:
+        return SLOT_SOON_POINTS
+    if minutes_to_slot <= SLOT_LATER:
+        return SLOT_LATER_POINTS
+    return 0
+
+
+def drift(confirmation_slot: Optional[datetime], detected_at: Optional[datetime], now: datetime) -> int:
+    points = 0
+    confirmation_slot, detected_at = _naive_utc(confirmation_slot), _naive_utc(detected_at)
+    if confirmation_slot:
+        minutes_overdue = SLOT_WINDOW_START - (confirmation_slot - now).total_seconds() / 60
+        if minutes_overdue > 0:
+            points += min(OVERDUE_MAX_POINTS, int(minutes_overdue * OVERDUE_POINTS_PER_MINUTE))
+    if detected_at:
+        age_minutes = (now - detected_at).total_seconds() / 60
+        points += int(max(0, 1 - age_minutes / DECAY_MINUTES) * DECAY_POINTS)
+    else:
+        # If no detected_at, assume fresh
+        points += DECAY_POINTS
+    return points
+
+
+def bracket_score(static: int, confirmation_slot: Optional[datetime], now: datetime) -> int:
+    """The stored `priority_score`."""
+    return max(0, static + slot_bracket(confirmation_slot, now))
+
+
+def priority_score(static: int, confirmation_slot: Optional[datetime], detected_at: Optional[datetime], now: datetime) -> int:
+    return max(0, static + slot_bracket(confirmation_slot, now) + drift(confirmation_slot, detected_at, now))
+
+
+# ----------------------------------------------------------------------
+# SQL forms (PostgreSQL); same brackets and rounding as above
+# ----------------------------------------------------------------------
+
+def _minutes_to_slot_sql(confirmation_slot, now: datetime):
+    return func.extract("epoch", confirmation_slot - now) / 60
+
+
+def slot_bracket_sql(confirmation_slot, now: datetime):
+    minutes_to_slot = _minutes_to_slot_sql(confirmation_slot, now)
+    return case(
+        (confirmation_slot.is_(None), 0),
+        (minutes_to_slot.between(SLOT_WINDOW_START, SLOT_WINDOW_END), SLOT_WINDOW_POINTS),
+        (minutes_to_slot < SLOT_WINDOW_START, SLOT_OVERDUE_POINTS),
+        (minutes_to_slot <= SLOT_SOON, SLOT_SOON_POINTS),
+        (minutes_to_slot <= SLOT_LATER, SLOT_LATER_POINTS),
+        else_=0,
+    )
+
+
+def bracket_score_sql(static, confirmation_slot, now: datetime):
+    return func.greatest(0, static + slot_bracket_sql(confirmation_slot, now))
+
+
+def priority_expression(static, confirmation_slot, detected_at, now: datetime):
+    minutes_overdue = SLOT_WINDOW_START - _minutes_to_slot_sql(confirmation_slot, now)
+    age_minutes = func.extract("epoch", now - detected_at) / 60
+    overdue = case(
+        (minutes_overdue > 0, func.least(OVERDUE_MAX_POINTS, func.trunc(minutes_overdue * OVERDUE_POINTS_PER_MINUTE))),
+        else_=0,
+    )
+    decay = case(
+        (detected_at.is_(None), DECAY_POINTS),
+        else_=func.trunc(func.greatest(0, 1 - age_minutes / DECAY_MINUTES) * DECAY_POINTS),
+    )
+    return cast(func.greatest(0, static + slot_bracket_sql(confirmation_slot, now) + overdue + decay), Integer)
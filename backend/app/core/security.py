@@ -11,6 +11,7 @@ from fastapi.security import (
 )
 from firebase_admin import auth, credentials
 
+from app.core.auth_cache import cache_token, get_cached_token
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -121,6 +122,11 @@ async def get_current_user_no_depends(auth_header: str):
             "is_dev": True
         }
         
+    # Polling clients resend the same token; skip re-verifying it until it expires
+    cached = get_cached_token(token)
+    if cached is not None:
+        return cached
+        
     try:
         # Run blocking auth verification in a thread pool
         loop = asyncio.get_running_loop()
@@ -129,6 +135,7 @@ async def get_current_user_no_depends(auth_header: str):
         # Normalize User ID
         if "user_id" in decoded_token and "uid" not in decoded_token:
             decoded_token["uid"] = decoded_token["user_id"]
+        cache_token(token, decoded_token)
         return decoded_token
     except Exception as e:
         raise HTTPException(
@@ -31,9 +31,26 @@ async def lifespan(app: FastAPI):
     from app.services.scheduler import shutdown_scheduler, start_scheduler
     start_scheduler()
     
+    # Subscribe this worker to the campaign WebSocket backplane
+    from app.services.websocket_manager import manager as ws_manager
+    await ws_manager.start()
+    
+    # Bolna webhooks are acked immediately and processed by these workers
+    from app.services.bolna_webhook_pipeline import bolna_webhook_pipeline
+    await bolna_webhook_pipeline.start()
+    
+    # Shopify webhooks are refined in the background (resumes rows left pending)
+    from app.services.shopify.refinement_worker import shopify_refinement_worker
+    await shopify_refinement_worker.start()
+    
     yield
     # Shutdown
     shutdown_scheduler()
+    await ws_manager.stop()
+    await bolna_webhook_pipeline.stop()
+    await shopify_refinement_worker.stop()
+    from app.services.bolna_dialer import bolna_dialer
+    await bolna_dialer.aclose()
 
 async def run_reconciliation_worker():
     """
@@ -374,7 +391,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["*"],
+    # "*" is not honored on credentialed requests, so cursor headers are listed
+    expose_headers=["*", "X-Next-Cursor"],
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -6,6 +6,7 @@ from fastapi.responses import JSONResponse
 from sqlmodel import select
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.core.auth_cache import cache_role, get_cached_role
 from app.core.context import set_company_ctx, set_user_ctx, set_workspace_ctx
 from app.core.db import async_session_factory
 from app.core.security import get_current_user_no_depends
@@ -94,17 +95,24 @@ class TenantMiddleware(BaseHTTPMiddleware):
         if not user_id:
              return JSONResponse(content={"detail": "Unauthorized: Invalid Token (No User ID)"}, status_code=401)
 
+        # Hot path: role cached per (company, user); membership writes invalidate it
+        cached_role = get_cached_role(company_id, user_id)
+        if cached_role is not None:
+            request.state.role = cached_role
+            return await call_next(request)
+
         try:
             async with async_session_factory() as session:
-                stmt = select(CompanyMembership).where(
+                stmt = select(CompanyMembership.role).where(
                     CompanyMembership.company_id == company_id,
                     CompanyMembership.user_id == user_id
                 )
                 result = await session.execute(stmt)
-                membership = result.scalars().first()
+                role = result.scalars().first()
                 
-                if membership:
-                    request.state.role = membership.role
+                if role:
+                    request.state.role = role
+                    cache_role(company_id, user_id, role)
                 else:
                     # Final attempt: RAW SQL to bypass potential ORM/Session synchronization issues
                     try:
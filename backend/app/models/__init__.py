@@ -10,6 +10,7 @@ from .campaign import Campaign
 from .campaign_event import CampaignEvent
 from .campaign_goal_detail import CampaignGoalDetail
 from .campaign_lead import CampaignLead
+from .campaign_live_status import CampaignLiveStatus
 from .cohort import Cohort
 from .company import Brand, Company, Workspace
 from .datasource import DataSource, DataSourceCategory
@@ -17,6 +18,7 @@ from .datasource_request import RequestStatus, RequestType, UserRequest
 from .iam import CompanyMembership, SystemRole, WorkspaceMembership
 from .insight_feedback import FeedbackLearning, InsightFeedback
 from .insight_tracking import (
+    InsightDeckCache,
     InsightGenerationLog,
     InsightImpression,
     InsightSuppression,
@@ -24,6 +26,7 @@ from .insight_tracking import (
 from .integration import Integration, IntegrationStatus
 from .integration_analytics import IntegrationDailyMetric
 from .interview import InterviewSession
+from .lead_import import LeadImport
 from .metrics import (
     BusinessMetrics,
     IntegrationMetrics,
@@ -56,7 +59,9 @@ from .shopify.marketing import ShopifyMarketingEvent
 from .shopify.metrics import ShopifyDailyMetric
 from .shopify.order import ShopifyLineItem, ShopifyOrder
 from .shopify.product import ShopifyProduct, ShopifyProductImage, ShopifyProductVariant
-from .shopify.raw_ingest import ShopifyRawIngest
+from .shopify.raw_ingest import ShopifyRawIngest, ShopifyRawIngestArchive
 from .shopify.refund import ShopifyRefund
+from .shopify.sync_checkpoint import ShopifyPruneCursor, ShopifySyncCheckpoint
 from .shopify.transaction import ShopifyTransaction
+from .shopify.velocity import ShopifyVariantDailySales, ShopifyVariantVelocity
 from .user import User
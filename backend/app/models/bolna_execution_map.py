@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Index
 from sqlmodel import Column, Field, SQLModel, Text
 
 
@@ -39,3 +39,10 @@ class BolnaExecutionMap(SQLModel, table=True):
     
     # Raw webhook data for debugging
     last_webhook_payload: Optional[Dict[str, Any]] = Field(default={}, sa_column=Column(JSON))
+
+    __table_args__ = (
+        # Live-call lookups in QueueWarmer only look at recently updated maps
+        Index("ix_bolna_execution_maps_campaign_updated", "campaign_id", "updated_at"),
+        # Keyset pagination of the campaign call log (newest first)
+        Index("ix_bolna_execution_maps_campaign_created", "campaign_id", "created_at", "id"),
+    )
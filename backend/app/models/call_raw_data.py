@@ -1,14 +1,22 @@
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import JSON, ForeignKey
+from sqlalchemy import JSON, ForeignKey, Index, text
 from sqlalchemy import UUID as SAUUID
 from sqlmodel import Column, Field, SQLModel
 
 
 class CallRawData(SQLModel, table=True):
     __tablename__ = "call_raw_data"
+    __table_args__ = (
+        # Recovery sweep of the webhook pipeline: payloads stored but never processed
+        Index(
+            "ix_call_raw_data_unprocessed",
+            "created_at",
+            postgresql_where=text("processed_at IS NULL"),
+        ),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     
@@ -22,3 +30,7 @@ class CallRawData(SQLModel, table=True):
     payload: Dict = Field(default={}, sa_column=Column(JSON))
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Set once the webhook pipeline has applied the payload
+    processed_at: Optional[datetime] = Field(default=None)
+    # Recovery sweep lease; an expired lease can be claimed again
+    claimed_at: Optional[datetime] = Field(default=None)
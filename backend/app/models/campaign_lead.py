@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Index, text
 from sqlmodel import Column, Field, SQLModel, UniqueConstraint
 
 
@@ -24,4 +24,6 @@ class CampaignLead(SQLModel, table=True):
 
     __table_args__ = (
         UniqueConstraint("campaign_id", "contact_number", name="unique_campaign_lead_phone"),
+        # Digits-only number, as compared by QueueWarmer's set-based promotion (queue_warmer.normalized_number)
+        Index("ix_campaign_leads_normalized_number", "campaign_id", text("regexp_replace(contact_number, '\\D', '', 'g')")),
     )
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Any, Dict
+from uuid import UUID
+
+from sqlalchemy import JSON
+from sqlmodel import Column, Field, SQLModel
+
+
+class CampaignLiveStatus(SQLModel, table=True):
+    """
+    Last computed execution-dashboard payload for a campaign.
+
+    Recomputed only when a call event, QueueWarmer pass or outcome endpoint
+    changes the campaign; viewers read this row instead of re-running the
+    dashboard query. `version` increases on every change and is what
+    WebSocket diffs (`status_diff`) are based on, across all API workers.
+    """
+    __tablename__ = "campaign_live_status"
+
+    campaign_id: UUID = Field(foreign_key="campaigns.id", primary_key=True)
+    version: int = Field(default=0, nullable=False)
+    snapshot: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -3,8 +3,11 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
+from sqlalchemy import event
 from sqlmodel import Field, Relationship, SQLModel, UniqueConstraint
 
+from app.core.auth_cache import invalidate_membership
+
 
 class SystemRole(str, Enum):
     OWNER = "owner"
@@ -36,6 +39,13 @@ class CompanyMembership(SQLModel, table=True):
     # Relationships
     company: "Company" = Relationship(back_populates="memberships")
 
+# Keep TenantMiddleware's membership cache in step with ORM writes (bulk deletes invalidate explicitly)
+@event.listens_for(CompanyMembership, "after_insert")
+@event.listens_for(CompanyMembership, "after_update")
+@event.listens_for(CompanyMembership, "after_delete")
+def receive_membership_change(mapper, connection, target):
+    invalidate_membership(target.company_id, target.user_id)
+
 class WorkspaceMembership(SQLModel, table=True):
     __tablename__ = "workspace_membership"
     __table_args__ = (UniqueConstraint("workspace_id", "user_id"),)
@@ -77,3 +77,24 @@ class InsightSuppression(SQLModel, table=True):
         table_args = (
             {"schema": None},
         )
+
+
+class InsightDeckCache(SQLModel, table=True):
+    """
+    Last generated insight deck per brand, keyed by a data version stamp.
+    
+    Used for:
+    - Serving dashboards instantly (stale-while-revalidate)
+    - Regenerating only when the brand's Shopify data actually changed
+    
+    `data_version` is bumped by ShopifyRefinementService in the same transaction
+    as the refined rows; the deck is fresh while `deck_version == data_version`.
+    """
+    __tablename__ = "insight_deck_cache"
+    
+    brand_id: UUID = Field(foreign_key="brand.id", primary_key=True)
+    data_version: int = Field(default=0, nullable=False)
+    deck_version: int = Field(default=-1, nullable=False)
+    deck: Dict[str, Any] = Field(default={}, sa_column=Column(postgresql.JSON))
+    generated_at: Optional[datetime] = Field(default=None)
+    refreshing_since: Optional[datetime] = Field(default=None)  # Cross-worker refresh lease
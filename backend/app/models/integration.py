@@ -19,11 +19,15 @@ class IntegrationStatus(str, Enum):
     SYNCING = "SYNCING"
     DISCONNECT_REQUESTED = "DISCONNECT_REQUESTED"
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, String, event, text
 
 
 class Integration(SQLModel, table=True):
     __tablename__ = "integration"
+    __table_args__ = (
+        # Webhook routing: shop domain -> integration (see app.services.shopify.shop_directory)
+        Index("ix_integration_shop_domain", text("(metadata_info ->> 'shop')")),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     
@@ -72,3 +76,11 @@ class Integration(SQLModel, table=True):
         json_encoders = {
             datetime: lambda v: v.replace(tzinfo=timezone.utc).isoformat() if not v.tzinfo else v.isoformat()
         }
+
+
+@event.listens_for(Integration, "after_update")
+@event.listens_for(Integration, "after_delete")
+def receive_integration_change(mapper, connection, target):
+    from app.services.shopify.shop_directory import shop_directory
+
+    shop_directory.invalidate((target.metadata_info or {}).get("shop"))
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlmodel import Field, SQLModel
+
+
+class LeadImport(SQLModel, table=True):
+    """
+    Progress of one streaming lead upload (POST /intelligence/campaigns/import-leads).
+
+    Written from its own session, so clients polling
+    GET /intelligence/campaigns/lead-imports/{id} see it while the import
+    transaction is still open, on any API worker.
+    """
+    __tablename__ = "lead_imports"
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    company_id: UUID = Field(index=True)
+    user_id: str = Field(index=True)
+    # Set on completion; the campaign row is not committed before that
+    campaign_id: Optional[UUID] = Field(default=None)
+
+    status: str = Field(default="RUNNING")  # RUNNING, COMPLETED, DUPLICATE, FAILED
+    bytes_read: int = Field(default=0)
+    rows_read: int = Field(default=0)
+    rows_skipped: int = Field(default=0)  # No usable phone number
+    leads_count: int = Field(default=0)  # Leads created after dedupe
+    error_message: Optional[str] = Field(default=None)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -59,7 +59,8 @@ class ShopifyOrder(UserTrackedModel, SQLModel, table=True):
 
 class ShopifyLineItem(UserTrackedModel, SQLModel, table=True):
     __tablename__ = "shopify_line_item"
-    
+    __table_args__ = (UniqueConstraint("integration_id", "shopify_line_item_id"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     
     # Context
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import JSON, BigInteger, ForeignKey
+from sqlalchemy import JSON, BigInteger, ForeignKey, Index
 from sqlalchemy import UUID as PG_UUID
 from sqlmodel import JSON, Column, Field, SQLModel
 
@@ -11,6 +11,10 @@ from app.models.base_mixins import UserTrackedModel
 
 class ShopifyRawIngest(UserTrackedModel, SQLModel, table=True):
     __tablename__ = "shopify_raw_ingest"
+    __table_args__ = (
+        # Drives retention: oldest rows of one object_type first
+        Index("ix_shopify_raw_ingest_object_type_fetched_at", "object_type", "fetched_at"),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     
@@ -50,3 +54,33 @@ class ShopifyRawIngest(UserTrackedModel, SQLModel, table=True):
 
     class Config:
         arbitrary_types_allowed = True
+
+
+class ShopifyRawIngestArchive(SQLModel, table=True):
+    """
+    Cold storage for raw payloads aged out of `shopify_raw_ingest`.
+    Range-partitioned by month on `fetched_at` so expired months are removed
+    with a partition DROP instead of row-by-row DELETEs.
+    """
+    __tablename__ = "shopify_raw_ingest_archive"
+    __table_args__ = {"postgresql_partition_by": "RANGE (fetched_at)"}
+
+    # The partition key must be part of the primary key
+    id: UUID = Field(primary_key=True)
+    fetched_at: datetime = Field(primary_key=True)
+
+    integration_id: UUID = Field(index=True)
+    company_id: UUID = Field(index=True)
+
+    object_type: str
+    shopify_object_id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, nullable=True))
+    shopify_updated_at: Optional[datetime] = Field(default=None)
+    dedupe_key: str
+    source: str
+    topic: Optional[str] = Field(default=None)
+    processing_status: str
+
+    payload: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))
+
+    processed_at: Optional[datetime] = Field(default=None)
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlmodel import Column, Field, SQLModel
+
+
+class ShopifySyncCheckpoint(SQLModel, table=True):
+    """
+    Resumable cursor for one paginated Shopify resource stream of a backfill.
+    A crashed sync restarts each stream from its last committed `page_info`.
+    """
+    __tablename__ = "shopify_sync_checkpoint"
+    __table_args__ = (UniqueConstraint("integration_id", "resource"),)
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+
+    integration_id: UUID = Field(sa_column=Column(ForeignKey("integration.id", ondelete="CASCADE"), index=True, nullable=False))
+    resource: str = Field(index=True)  # orders, customers, products, checkouts
+
+    # Sync window the cursor belongs to (None = all time). A different window starts over.
+    window_start: Optional[datetime] = Field(default=None)
+
+    page_info: Optional[str] = Field(default=None)
+    pages_synced: int = Field(default=0)
+    objects_synced: int = Field(default=0)
+    completed: bool = Field(default=False)
+
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ShopifyPruneCursor(SQLModel, table=True):
+    """
+    Keyset position of a batched retention pass over one table.
+    Lets the nightly prune resume where the previous (time-boxed) run stopped
+    instead of rescanning rows it already processed.
+    """
+    __tablename__ = "shopify_prune_cursor"
+
+    target: str = Field(primary_key=True)  # e.g. "shopify_order.raw_payload"
+    last_ts: Optional[datetime] = Field(default=None)
+    last_id: Optional[UUID] = Field(default=None)
+    rows_processed: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,58 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import BigInteger, ForeignKey
+from sqlmodel import Column, Field, SQLModel
+
+
+class ShopifyVariantDailySales(SQLModel, table=True):
+    """
+    Units sold per variant per UTC day (valid orders only: not cancelled, not voided).
+
+    Maintained incrementally by ShopifyRefinementService: every refined order
+    re-aggregates its creation day from the line items, so the table always
+    matches the refined orders without re-scanning history.
+    """
+    __tablename__ = "shopify_variant_daily_sales"
+
+    integration_id: UUID = Field(sa_column=Column(ForeignKey("integration.id", ondelete="CASCADE"), primary_key=True))
+    shopify_variant_id: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    sales_date: date = Field(primary_key=True)
+    company_id: UUID = Field(foreign_key="company.id", index=True, nullable=False)
+
+    units: int = Field(default=0)
+    order_count: int = Field(default=0)
+    revenue: Decimal = Field(default=0, max_digits=20, decimal_places=2)
+
+
+class ShopifyVariantVelocity(SQLModel, table=True):
+    """
+    Rolling sales velocity and stock cover per variant, derived from
+    ShopifyVariantDailySales and the summed inventory levels.
+
+    Windows are complete UTC days ending the day before `as_of`
+    (units_7d: [as_of-7, as_of-1], units_prev_7d: the 7 days before that).
+    Refreshed for touched variants on refinement and for every variant nightly.
+    """
+    __tablename__ = "shopify_variant_velocity"
+
+    integration_id: UUID = Field(sa_column=Column(ForeignKey("integration.id", ondelete="CASCADE"), primary_key=True))
+    shopify_variant_id: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    company_id: UUID = Field(foreign_key="company.id", index=True, nullable=False)
+    as_of: date
+
+    units_7d: int = Field(default=0)
+    units_prev_7d: int = Field(default=0)
+    units_30d: int = Field(default=0)
+    units_90d: int = Field(default=0)
+    velocity_7d: float = Field(default=0.0)
+    velocity_30d: float = Field(default=0.0)
+    velocity_90d: float = Field(default=0.0)
+    last_sale_date: Optional[date] = Field(default=None)
+
+    available: int = Field(default=0)  # Summed across locations
+    days_of_cover: Optional[float] = Field(default=None)  # available / velocity_30d; NULL when not selling
+
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
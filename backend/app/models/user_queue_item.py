@@ -2,8 +2,11 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index, event, text
 from sqlmodel import Field, SQLModel, Column, JSON
 
+from app.core.queue_priority import bracket_score, static_priority
+
 
 class UserQueueItem(SQLModel, table=True):
     """
@@ -11,6 +14,15 @@ class UserQueueItem(SQLModel, table=True):
     These are leads that AI agents have identified as high-intent and need human interaction.
     """
     __tablename__ = "user_queue_items"
+    __table_args__ = (
+        # Lead claiming: one campaign's READY items, retry cooldown included. Only a
+        # filter - the exact priority claims sort by depends on now() and cannot be indexed
+        Index(
+            "ix_user_queue_items_ready",
+            "campaign_id", "retry_scheduled_for",
+            postgresql_where=text("status = 'READY'"),
+        ),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     campaign_id: UUID = Field(foreign_key="campaigns.id", index=True)
@@ -48,8 +60,9 @@ class UserQueueItem(SQLModel, table=True):
     locked_at: Optional[datetime] = Field(default=None)
     lock_expires_at: Optional[datetime] = Field(default=None)
     
-    # Priority (for dynamic sorting)
-    priority_score: int = Field(default=0, index=True)
+    # Priority (for dynamic sorting, see app.core.queue_priority)
+    priority_score: int = Field(default=0, index=True)  # static + committed-slot bracket; exact order is computed in SQL
+    static_priority: int = Field(default=0)  # Intent, retry penalty and manual boost
     manual_priority_boost: int = Field(default=0)  # For manual swapping/promotion
     
     # User Preferences (extracted from AI calls)
@@ -58,3 +71,12 @@ class UserQueueItem(SQLModel, table=True):
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Keep the stored priority parts in step with the fields they derive from
+@event.listens_for(UserQueueItem, 'before_insert')
+@event.listens_for(UserQueueItem, 'before_update')
+def receive_before_write(mapper, connection, target):
+    """Recompute static_priority and the bracket priority_score whenever an item is written."""
+    target.static_priority = static_priority(target.intent_strength, target.retry_count, target.manual_priority_boost)
+    target.priority_score = bracket_score(target.static_priority, target.confirmation_slot, datetime.utcnow())
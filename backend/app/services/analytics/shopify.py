@@ -1,16 +1,14 @@
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, datetime, timezone
 from decimal import Decimal
 
 from loguru import logger
-from sqlmodel import func, select
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.integration import Integration
 from app.models.integration_analytics import IntegrationDailyMetric
-from app.models.shopify.customer import ShopifyCustomer
-from app.models.shopify.order import ShopifyOrder
-from app.models.shopify.transaction import ShopifyTransaction
 from app.services.analytics.base import BaseAnalyticsProvider
+from app.services.shopify.metrics_service import shopify_metrics_service
 
 
 class ShopifyAnalyticsProvider(BaseAnalyticsProvider):
@@ -22,52 +20,27 @@ class ShopifyAnalyticsProvider(BaseAnalyticsProvider):
     ) -> IntegrationDailyMetric:
         logger.info(f"Calculating Shopify Metrics for {integration.id} on {target_date}")
 
-        start_dt = datetime.combine(target_date, datetime.min.time())
-        end_dt = start_dt + timedelta(days=1)
+        # Single grouped aggregates instead of materializing every order of the day
+        days = [target_date]
+        totals = (await shopify_metrics_service.order_totals_by_day(
+            session, integration.id, days, exclude_cancelled=False
+        )).get(target_date)
+        total_refunds = (await shopify_metrics_service.refunds_by_day(
+            session, integration.id, days
+        )).get(target_date, Decimal("0.00"))
+        customer_count_new = (await shopify_metrics_service.new_customers_by_day(
+            session, integration.id, days
+        )).get(target_date, 0)
 
-        # 1. Fetch Orders for the date
-        order_stmt = select(ShopifyOrder).where(
-            ShopifyOrder.integration_id == integration.id,
-            ShopifyOrder.shopify_created_at >= start_dt,
-            ShopifyOrder.shopify_created_at < end_dt
-        )
-        orders = (await session.execute(order_stmt)).scalars().all()
-
-        # 2. Fetch Refunds (Transaction-based)
-        refund_stmt = select(func.sum(ShopifyTransaction.amount)).where(
-            ShopifyTransaction.integration_id == integration.id,
-            ShopifyTransaction.kind == "refund",
-            ShopifyTransaction.status == "success",
-            ShopifyTransaction.shopify_processed_at >= start_dt,
-            ShopifyTransaction.shopify_processed_at < end_dt
-        )
-        total_refunds = (await session.execute(refund_stmt)).scalar() or Decimal("0.00")
-        total_refunds = Decimal(str(total_refunds))
-
-        # 3. Aggregates for Orders
-        gross_sales = Decimal("0.00")
-        total_discounts = Decimal("0.00")
-        total_tax = Decimal("0.00")
-        total_shipping = Decimal("0.00")
-        order_count = len(orders)
-
-        for order in orders:
-            gross_sales += order.subtotal_price + order.total_discounts
-            total_discounts += order.total_discounts
-            total_tax += order.total_tax
-            total_shipping += order.total_shipping
+        gross_sales = Decimal(str(totals.gross_sales)) if totals else Decimal("0.00")
+        total_discounts = Decimal(str(totals.total_discounts)) if totals else Decimal("0.00")
+        total_tax = Decimal(str(totals.total_tax)) if totals else Decimal("0.00")
+        total_shipping = Decimal(str(totals.total_shipping)) if totals else Decimal("0.00")
+        order_count = totals.order_count if totals else 0
 
         net_sales = gross_sales - total_discounts - total_refunds
         total_sales = gross_sales - total_discounts + total_tax + total_shipping
 
-        # 4. New Customers
-        customer_stmt = select(func.count(ShopifyCustomer.id)).where(
-            ShopifyCustomer.integration_id == integration.id,
-            ShopifyCustomer.shopify_created_at >= start_dt,
-            ShopifyCustomer.shopify_created_at < end_dt
-        )
-        customer_count_new = (await session.execute(customer_stmt)).scalar() or 0
-
         # UPSERT into the generic table
         stmt = select(IntegrationDailyMetric).where(
             IntegrationDailyMetric.integration_id == integration.id,
@@ -91,7 +64,7 @@ class ShopifyAnalyticsProvider(BaseAnalyticsProvider):
             "total_tax": total_tax,
             "total_shipping": total_shipping,
             "average_value": total_sales / order_count if order_count > 0 else 0,
-            "currency": orders[0].currency if orders else "USD",
+            "currency": totals.currency if totals and totals.currency else "USD",
             "meta_data": {
                 "source": "shopify",
                 "sync_timestamp": datetime.now(timezone.utc).isoformat()
@@ -3,6 +3,7 @@ from datetime import datetime
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.auth_cache import invalidate_user_memberships
 from app.models.iam import CompanyMembership
 from app.models.user import User, UserCreate, UserRead
 
@@ -24,6 +25,7 @@ async def sync_user(session: AsyncSession, user_in: UserCreate) -> UserRead:
             continue
 
 async def _sync_user_attempt(session: AsyncSession, user_in: UserCreate) -> UserRead:
+    migrated_uid = None
 
     # 1. Try to find by ID (Standard Case)
     statement = select(User).where(User.id == user_in.id)
@@ -54,6 +56,7 @@ async def _sync_user_attempt(session: AsyncSession, user_in: UserCreate) -> User
             # 1. Memberships (Foreign Keys)
             await session.exec(text(f"UPDATE company_membership SET user_id = '{new_uid}' WHERE user_id = '{old_uid}'"))
             await session.exec(text(f"UPDATE workspace_membership SET user_id = '{new_uid}' WHERE user_id = '{old_uid}'"))
+            migrated_uid = old_uid
             
             # 2. Onboarding State (Foreign Key-ish)
             await session.exec(text(f"UPDATE onboarding_state SET user_id = '{new_uid}' WHERE user_id = '{old_uid}'"))
@@ -107,6 +110,9 @@ async def _sync_user_attempt(session: AsyncSession, user_in: UserCreate) -> User
     # Note: We must flush user first to ensure it exists for FK queries if needed, 
     # but here we just query membership.
     await session.commit()
+    if migrated_uid:
+        # The raw UPDATEs bypass the membership listeners in app.models.iam
+        invalidate_user_memberships(migrated_uid)
     await session.refresh(user) 
     
     membership_stmt = select(CompanyMembership).where(CompanyMembership.user_id == user.id)
@@ -1,13 +1,13 @@
-import asyncio
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 
-import httpx
 import pytz
+from sqlalchemy.dialects.postgresql import distinct_on
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select, desc 
 
+from app.core.ttl_cache import TTLCache
 from app.core.config import settings
 from app.models.bolna_execution_map import BolnaExecutionMap
 from app.models.campaign import Campaign
@@ -16,9 +16,16 @@ from app.models.company import Company
 from app.models.queue_item import QueueItem
 from app.models.user import User
 from app.models.call_log import CallLog
+from app.services.bolna_dialer import bolna_dialer
+
+IST = pytz.timezone("Asia/Kolkata")
 
 
 class BolnaCaller:
+    # campaign_id -> (Campaign.updated_at, [(start, end, window)]); updated_at moves on every campaign write.
+    # Bounded so campaigns that stop dialing age out.
+    _window_cache = TTLCache(1024, 3600)
+
     @staticmethod
     async def create_and_schedule_batch(
         session: AsyncSession, 
@@ -28,6 +35,10 @@ class BolnaCaller:
     ) -> Dict[str, Any]:
         """
         Triggers calls for a batch of leads using Bolna API.
+
+        `results` holds one entry per lead, in input order ("success", "error", or
+        "skipped" for missing leads / guardrail hits). Calls go out through the
+        shared, rate-limited `bolna_dialer`.
         """
         
         # 1. Fetch Campaign Details
@@ -43,54 +54,34 @@ class BolnaCaller:
         user = await session.get(User, campaign.user_id)
         
         # 1.2 Determine Active Execution Window
-        window_str = "No window scheduled"
-        
-        # USE AWARE DATETIMES
-        now_utc = datetime.now(pytz.utc)
-        tz_ist = pytz.timezone("Asia/Kolkata")
-        
-        active_window = None
-        if campaign.execution_windows:
-            try:
-                # Find the window where 'now' falls between start and end
-                for w in campaign.execution_windows:
-                    day = w.get('day', '')
-                    st = w.get('start', '')
-                    et = w.get('end', '')
-                    if day and st and et:
-                        start_dt = tz_ist.localize(datetime.fromisoformat(f"{day}T{st}:00"))
-                        end_dt = tz_ist.localize(datetime.fromisoformat(f"{day}T{et}:00"))
-                        
-                        if start_dt <= now_utc <= end_dt:
-                            active_window = w
-                            break
-                
-                if active_window:
-                    day = active_window.get('day', '')
-                    st = active_window.get('start', '')
-                    et = active_window.get('end', '')
-                    
-                    # Exact format requested: YYYY-MM-DD HH:MM to YYYY-MM-DD HH:MM IST
-                    window_str = f"{day} {st} to {day} {et} IST"
-                    
-                    # BOLNA FIX: Exact naive ISO format requested: YYYY-MM-DDTHH:MM:SS
-                    start_dt = tz_ist.localize(datetime.fromisoformat(f"{day}T{st}:00"))
-                    end_dt = tz_ist.localize(datetime.fromisoformat(f"{day}T{et}:00"))
-                    
-                    start_iso = start_dt.strftime("%Y-%m-%dT%H:%M:%S")
-                    end_iso = end_dt.strftime("%Y-%m-%dT%H:%M:%S")
-                else:
-                    # No active window found - Prevent call
-                    print(f"[BolnaCaller] ERROR: No active execution window for campaign {campaign.id}. 'Now' is {now_utc.astimezone(tz_ist)}")
-                    return {"status": "error", "error_type": "WINDOW_EXPIRED", "message": "No active execution window found for the current time."}
-                    
-            except Exception as e:
-                print(f"[BolnaCaller] Error parsing execution windows: {e}")
-                return {"status": "error", "message": f"Error parsing execution windows: {e}"}
-        else:
+        if not campaign.execution_windows:
             # No windows defined at all
             return {"status": "error", "error_type": "WINDOW_EXPIRED", "message": "No execution windows defined for this campaign."}
 
+        # USE AWARE DATETIMES
+        now_utc = datetime.now(pytz.utc)
+        try:
+            active_window = next(
+                (window for window in BolnaCaller._parsed_windows(campaign) if window[0] <= now_utc <= window[1]),
+                None
+            )
+        except Exception as e:
+            print(f"[BolnaCaller] Error parsing execution windows: {e}")
+            return {"status": "error", "message": f"Error parsing execution windows: {e}"}
+
+        if not active_window:
+            # No active window found - Prevent call
+            print(f"[BolnaCaller] ERROR: No active execution window for campaign {campaign.id}. 'Now' is {now_utc.astimezone(IST)}")
+            return {"status": "error", "error_type": "WINDOW_EXPIRED", "message": "No active execution window found for the current time."}
+
+        start_dt, end_dt, window = active_window
+        day = window.get('day', '')
+        # Exact format requested: YYYY-MM-DD HH:MM to YYYY-MM-DD HH:MM IST
+        window_str = f"{day} {window.get('start', '')} to {day} {window.get('end', '')} IST"
+        # BOLNA FIX: Exact naive ISO format requested: YYYY-MM-DDTHH:MM:SS
+        start_iso = start_dt.strftime("%Y-%m-%dT%H:%M:%S")
+        end_iso = end_dt.strftime("%Y-%m-%dT%H:%M:%S")
+
         # 1.3 Team Member First Name
         team_first_name = (user.designation if user else None) or "Aditi"
         if user and user.full_name:
@@ -113,22 +104,42 @@ class BolnaCaller:
              print("[BolnaCaller] ERROR: BOLNA_AGENT_ID not set in config.")
              return {"status": "error", "message": "Missing Agent ID"}
 
-        # 2. Prepare Batch Payload
-        tasks = []
-        
+        # 2. Prefetch leads, queue items and (for follow-ups) the previous call, one query each
+        leads = {
+            lead.id: lead
+            for lead in (await session.execute(select(CampaignLead).where(CampaignLead.id.in_(lead_ids)))).scalars().all()
+        }
+        q_items = {
+            item.id: item
+            for item in (await session.execute(select(QueueItem).where(QueueItem.id.in_(queue_item_ids)))).scalars().all()
+        }
+        last_calls = await BolnaCaller._last_calls(
+            session,
+            campaign_id,
+            [lead_id for lead_id, item_id in zip(lead_ids, queue_item_ids)
+             if q_items.get(item_id) and q_items[item_id].execution_count > 1]
+        )
+
+        # 3. Prepare Batch Payload
+        results: List[Optional[Dict[str, Any]]] = [None] * len(lead_ids)
+        tasks: Dict[int, Dict[str, Any]] = {}
+        sent_numbers = set() # Safety check for intra-batch duplicates
+        webhook_url = await bolna_dialer.webhook_url()
+
         for idx, lead_id in enumerate(lead_ids):
-            lead = await session.get(CampaignLead, lead_id)
+            lead = leads.get(lead_id)
             if not lead:
+                results[idx] = {"status": "skipped", "error": "Lead not found"}
                 continue
 
-            queue_item_id = queue_item_ids[idx]
-            q_item = await session.get(QueueItem, queue_item_id)
+            q_item = q_items.get(queue_item_ids[idx])
             
             # [HARD GUARDRAIL] Redundant safety check
             # We allow execution_count == 2 (that's the 2nd call), but not more.
             # Note: QueueWarmer increments count BEFORE calling this, so a valid 2nd call will have count=2 here.
             if q_item and q_item.execution_count > 2:
                 print(f"[BolnaCaller] HARD GUARDRAIL: Skipping call for lead {lead.id} - Execution count {q_item.execution_count} exceeds limit.")
+                results[idx] = {"status": "skipped", "error": "Execution limit reached"}
                 continue
 
             
@@ -172,211 +183,140 @@ class BolnaCaller:
                 "endTime": end_iso,
             }
 
-            # [CONTEXT LOGIC] If this is a follow-up call (execution_count > 1), fetch previous call transcript
+            # [CONTEXT LOGIC] If this is a follow-up call (execution_count > 1), inject previous call transcript
             if q_item and q_item.execution_count > 1:
-                try:
-                    # Fetch the latest call log for this lead and campaign
-                    statement = (
-                        select(CallLog)
-                        .where(CallLog.lead_id == lead.id)
-                        .where(CallLog.campaign_id == campaign.id)
-                        .order_by(desc(CallLog.created_at))
-                        .limit(1)
-                    )
-                    result = await session.exec(statement)
-                    last_call = result.first()
-                    
-                    if last_call:
-                        # Prefer full_transcript, fallback to transcript_summary
-                        previous_transcript = last_call.full_transcript or last_call.transcript_summary or "No transcript available."
-                        variables["last_call_context"] = previous_transcript
-                        print(f"[BolnaCaller] Injected last_call_context for lead {lead.id}: {previous_transcript[:50]}...")
-                    else:
-                         print(f"[BolnaCaller] Warning: Execution count is {q_item.execution_count} but no previous CallLog found for lead {lead.id}")
-                except Exception as e:
-                    print(f"[BolnaCaller] Error fetching previous context: {e}")
+                last_call = last_calls.get(lead.id)
+                if last_call:
+                    # Prefer full_transcript, fallback to transcript_summary
+                    previous_transcript = last_call.full_transcript or last_call.transcript_summary or "No transcript available."
+                    variables["last_call_context"] = previous_transcript
+                    print(f"[BolnaCaller] Injected last_call_context for lead {lead.id}: {previous_transcript[:50]}...")
+                else:
+                     print(f"[BolnaCaller] Warning: Execution count is {q_item.execution_count} but no previous CallLog found for lead {lead.id}")
 
-            
-            # --- Normalize Phone Number ---
-            raw_number = lead.contact_number or ""
-            # Remove all non-numeric characters except +
-            clean_number = "".join(filter(lambda x: x.isdigit() or x == '+', raw_number))
-            
-            # Logic: If it's a 10 digit number, assume +91
-            if len(clean_number) == 10 and clean_number.isdigit():
-                clean_number = f"+91{clean_number}"
-            # If it starts with 0 and followed by 10 digits
-            elif len(clean_number) == 11 and clean_number.startswith('0'):
-                clean_number = f"+91{clean_number[1:]}"
-            # If it doesn't start with +, add it
-            elif not clean_number.startswith('+'):
-                clean_number = f"+{clean_number}"
+            clean_number = BolnaCaller._dial_number(lead.contact_number)
+            if clean_number in sent_numbers:
+                print(f"[BolnaCaller] Safety: Skipping duplicate number {clean_number} in batch.")
+                results[idx] = {"status": "error", "error": "Duplicate phone number in batch"}
+                continue
+            sent_numbers.add(clean_number)
 
             task_payload = {
                 "recipient_phone_number": clean_number, 
                 "agent_id": settings_agent_id,
                 "user_data": variables  # Bolna expects user_data for variables
             }
-            
-            tasks.append(task_payload)
+            # Inject Webhook URL if detected
+            if webhook_url:
+                task_payload["webhook_url"] = webhook_url
+                variables["webhook_endpoint"] = webhook_url
 
-            # NOTE: If Bolna API requires ONE call per request, we loop. 
-            # If it supports batch, we send list. 
-            # implementation_plan said "batch", assuming `POST /batch`.
-            # Let's assume singular call loop for safety unless docs say otherwise.
-        
-        # 3. Execute Calls (Concurrent)
-        results = []
-        sent_numbers = set() # Safety check for intra-batch duplicates
+            # Bolna takes one call per request
+            tasks[idx] = task_payload
         
-        # [FIX] Auto-detect Ngrok URL for Webhook
-        # This ensures real-time updates work in dev environment without manual config
-        webhook_url = None
-        try:
-            async with httpx.AsyncClient() as client:
-                # Try fetching from local Ngrok API
-                ngrok_res = await client.get("http://localhost:4040/api/tunnels", timeout=0.5)
-                if ngrok_res.status_code == 200:
-                    tunnels = ngrok_res.json().get("tunnels", [])
-                    # Find https tunnel
-                    public_url = next((t["public_url"] for t in tunnels if t["proto"] == "https"), None)
-                    if public_url:
-                        webhook_url = f"{public_url}/api/v1/integrations/webhook/bolna"
-                        print(f"[BolnaCaller] Auto-detected Ngrok Webhook URL: {webhook_url}")
-        except Exception:
-            # Silently fail if ngrok API is not accessible (e.g. prod)
-            pass
-
-        # Define internal helper for single concurrent call
-        async def params_trigger_single_call(client, task, original_index, url, headers):
-            current_number = task["recipient_phone_number"]
-            try:
-                print(f"[BolnaCaller] Triggering call to {current_number} via {url}")
-                print(f"[BolnaCaller] Payload for {current_number}: {task}") 
-                
-                # Using a longer timeout since we are firing many at once, though awaiting them concurrently 
-                # effectively reduces total wait time, individual request might still take a moment.
-                response = await client.post(url, json=task, headers=headers, timeout=15.0)
-                
-                if response.status_code >= 400:
-                        print(f"[BolnaCaller] API Error for {current_number} ({response.status_code}): {response.text}")
-                
-                response.raise_for_status()
-                data = response.json()
-                print(f"[BolnaCaller] Success response for {current_number}: {data}")
-                
-                return {
-                    "status": "success", 
-                    "original_index": original_index,
-                    "data": data,
-                    "phone": current_number
-                }
-            except Exception as e:
-                error_msg = str(e)
-                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 400:
-                    try:
-                        err_data = e.response.json()
-                        bolna_msg = err_data.get("message", "")
-                        if "verified phone numbers" in bolna_msg:
-                            error_msg = "Unverified Phone Number (Telephony Error)"
-                        else:
-                            error_msg = f"Bolna API Error: {bolna_msg}"
-                    except:
-                        pass
-                
-                print(f"[BolnaCaller] Failed to trigger call for {current_number}: {error_msg}")
-                # [FIX]: Return the actual error message so QueueWarmer can mark it as FAILED outcome
-                return {
-                    "status": "error", 
-                    "original_index": original_index,
-                    "error": error_msg,
-                    "phone": current_number
-                }
+        # 4. Execute Calls (concurrent, bounded and rate-limited by the dialer)
+        if tasks:
+            print(f"[BolnaCaller] Dialing {len(tasks)} calls...")
+            call_results = await bolna_dialer.dial_many(list(tasks.values()))
+        else:
+            call_results = []
 
-        # Prepare coroutines
-        async with httpx.AsyncClient() as client:
-            coros = []
+        # Process results sequentially to update DB (Session is not thread-safe)
+        for i, res in zip(tasks, call_results):
+            if res["status"] == "error":
+                results[i] = {"status": "error", "error": res["error"]}
+                continue
             
-            # Pre-calc headers/url
-            url = f"{settings.BOLNA_API_BASE_URL}/call" 
-            headers = {"Authorization": f"Bearer {settings_api_key}"}
-
-            for i, task in enumerate(tasks):
-                current_number = task["recipient_phone_number"]
-                
-                if current_number in sent_numbers:
-                    print(f"[BolnaCaller] Safety: Skipping duplicate number {current_number} in batch.")
-                    results.append({"status": "error", "error": "Duplicate phone number in batch"})
-                    continue
-                
-                sent_numbers.add(current_number)
-
-                # Inject Webhook URL if detected
-                if webhook_url:
-                    task["webhook_url"] = webhook_url 
-                    if "user_data" in task:
-                        task["user_data"]["webhook_endpoint"] = webhook_url
+            # Success path
+            data = res["data"]
+            call_id = data.get("execution_id") or data.get("run_id") or data.get("call_id") or data.get("id") or f"mock-{uuid4()}"
+            
+            # 5. Save Execution Map (Session add is synchronous and fast)
+            execution_map = BolnaExecutionMap(
+                queue_item_id=queue_item_ids[i],
+                campaign_id=campaign_id,
+                bolna_call_id=call_id,
+                bolna_agent_id=settings_agent_id or "unknown",
+                call_status="initiated",
+                total_cost=0.0,
+                currency="USD",
+                call_duration=0
+            )
+            session.add(execution_map)
 
-                coros.append(params_trigger_single_call(client, task, i, url, headers))
+            # 6. Create Persistent Call Log
+            call_log = CallLog(
+                campaign_id=campaign_id,
+                lead_id=lead_ids[i],
+                bolna_call_id=call_id,
+                bolna_agent_id=settings_agent_id or "unknown",
+                status="initiated",
+                webhook_payload=data,
+                duration=0,
+                total_cost=0.0,
+                currency="USD"
+            )
+            session.add(call_log)
+            results[i] = {"status": "success", "call_id": call_id}
 
-            if not coros:
-                 # await session.commit() # Pass up
-                 return {"results": results, "count": len(results)}
+        await session.flush() # Replaced commit with flush
+        return {"results": results, "count": len(results)}
 
-            # Run all network requests concurrently!
-            print(f"[BolnaCaller] Awaiting {len(coros)} concurrent calls...")
-            concurrent_results = await asyncio.gather(*coros, return_exceptions=True)
-            
-            # Process results sequentially to update DB (Session is not thread-safe)
-            for res in concurrent_results:
-                if isinstance(res, Exception):
-                    # Should be covered by internal try/except but just in case
-                    print(f"[BolnaCaller] Unexpected concurrent error: {res}")
-                    results.append({"status": "error", "error": str(res)})
-                    continue
-                    
-                i = res["original_index"]
-                
-                if res["status"] == "error":
-                    results.append({"status": "error", "error": res["error"]})
-                    continue
-                
-                # Success path
-                data = res["data"]
-                call_id = data.get("execution_id") or data.get("run_id") or data.get("call_id") or data.get("id") or f"mock-{uuid4()}"
-                
-                # 4. Save Execution Map (Session add is synchronous and fast)
-                execution_map = BolnaExecutionMap(
-                    queue_item_id=queue_item_ids[i],
-                    campaign_id=campaign_id,
-                    bolna_call_id=call_id,
-                    bolna_agent_id=settings_agent_id or "unknown",
-                    call_status="initiated",
-                    total_cost=0.0,
-                    currency="USD",
-                    call_duration=0
-                )
-                session.add(execution_map)
+    @staticmethod
+    def _parsed_windows(campaign: Campaign) -> List[Tuple[datetime, datetime, Dict[str, Any]]]:
+        """Execution windows as aware IST datetimes, parsed once per campaign version."""
+        cached = BolnaCaller._window_cache.get(campaign.id)
+        if cached and cached[0] == campaign.updated_at:
+            return cached[1]
 
-                # 5. Create Persistent Call Log
-                current_lead_id = lead_ids[i]
+        parsed = []
+        for w in campaign.execution_windows or []:
+            day = w.get('day', '')
+            st = w.get('start', '')
+            et = w.get('end', '')
+            if day and st and et:
+                parsed.append((
+                    IST.localize(datetime.fromisoformat(f"{day}T{st}:00")),
+                    IST.localize(datetime.fromisoformat(f"{day}T{et}:00")),
+                    w,
+                ))
+        BolnaCaller._window_cache.set(campaign.id, (campaign.updated_at, parsed))
+        return parsed
 
-                call_log = CallLog(
-                    campaign_id=campaign_id,
-                    lead_id=current_lead_id,
-                    bolna_call_id=call_id,
-                    bolna_agent_id=settings_agent_id or "unknown",
-                    status="initiated",
-                    webhook_payload=data,
-                    duration=0,
-                    total_cost=0.0,
-                    currency="USD"
-                )
-                session.add(call_log)
-                results.append({"status": "success", "call_id": call_id})
+    @staticmethod
+    async def _last_calls(session: AsyncSession, campaign_id: UUID, lead_ids: List[UUID]) -> Dict[UUID, CallLog]:
+        """Latest CallLog per lead in this campaign (DISTINCT ON), for follow-up context."""
+        if not lead_ids:
+            return {}
+        try:
+            statement = (
+                select(CallLog)
+                .where(CallLog.campaign_id == campaign_id)
+                .where(CallLog.lead_id.in_(lead_ids))
+                .ext(distinct_on(CallLog.lead_id))
+                .order_by(CallLog.lead_id, desc(CallLog.created_at))
+            )
+            return {log.lead_id: log for log in (await session.execute(statement)).scalars().all()}
+        except Exception as e:
+            print(f"[BolnaCaller] Error fetching previous context: {e}")
+            return {}
 
-        await session.flush() # Replaced commit with flush
-        return {"results": results, "count": len(results)}
+    @staticmethod
+    def _dial_number(raw_number: Optional[str]) -> str:
+        """Normalizes a lead's number to E.164, assuming India (+91) for bare 10-digit numbers."""
+        # Remove all non-numeric characters except +
+        clean_number = "".join(filter(lambda x: x.isdigit() or x == '+', raw_number or ""))
+        
+        # Logic: If it's a 10 digit number, assume +91
+        if len(clean_number) == 10 and clean_number.isdigit():
+            clean_number = f"+91{clean_number}"
+        # If it starts with 0 and followed by 10 digits
+        elif len(clean_number) == 11 and clean_number.startswith('0'):
+            clean_number = f"+91{clean_number[1:]}"
+        # If it doesn't start with +, add it
+        elif not clean_number.startswith('+'):
+            clean_number = f"+{clean_number}"
+        return clean_number
 
     @staticmethod
     def _human_readable_duration(seconds: int) -> str:
@@ -0,0 +1,156 @@
+"""
+Outbound call dispatch to the Bolna API.
+
+One dialer per process holds a pooled, keep-alive HTTP client, so batches of any
+size reuse the same connections. Every request passes a concurrency semaphore
+(BOLNA_DIAL_CONCURRENCY) and a token bucket (BOLNA_DIAL_RATE_PER_SECOND /
+BOLNA_DIAL_BURST), so a large batch is spread out instead of stampeding the
+provider. Latency and failures are exported as Prometheus metrics.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import bolna_call_duration, bolna_call_errors
+
+# Dev only: the local ngrok agent API, probed for a public webhook URL
+NGROK_API_URL = "http://localhost:4040/api/tunnels"
+WEBHOOK_PROBE_TTL_SECONDS = 300
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in arrival order. A rate <= 0 disables it."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class BolnaDialer:
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(max(1, settings.BOLNA_DIAL_CONCURRENCY))
+        self._bucket = TokenBucket(settings.BOLNA_DIAL_RATE_PER_SECOND, settings.BOLNA_DIAL_BURST)
+        self._webhook_url: Optional[str] = None
+        self._webhook_probed_at: Optional[float] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            pool_size = max(1, settings.BOLNA_DIAL_CONCURRENCY)
+            self._client = httpx.AsyncClient(
+                base_url=settings.BOLNA_API_BASE_URL,
+                timeout=settings.BOLNA_HTTP_TIMEOUT_S,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def webhook_url(self) -> Optional[str]:
+        """
+        Auto-detects an ngrok tunnel so real-time updates work in development without
+        manual config. Cached for a few minutes; never probed in production.
+        """
+        if settings.is_production:
+            return None
+        now = time.monotonic()
+        if self._webhook_probed_at is not None and now - self._webhook_probed_at < WEBHOOK_PROBE_TTL_SECONDS:
+            return self._webhook_url
+
+        self._webhook_probed_at = now
+        self._webhook_url = None
+        try:
+            async with httpx.AsyncClient() as probe:
+                ngrok_res = await probe.get(NGROK_API_URL, timeout=0.5)
+            if ngrok_res.status_code == 200:
+                tunnels = ngrok_res.json().get("tunnels", [])
+                public_url = next((t["public_url"] for t in tunnels if t["proto"] == "https"), None)
+                if public_url:
+                    self._webhook_url = f"{public_url}/api/v1/integrations/webhook/bolna"
+                    print(f"[BolnaDialer] Auto-detected Ngrok Webhook URL: {self._webhook_url}")
+        except Exception:
+            # ngrok API not running
+            pass
+        return self._webhook_url
+
+    async def dial_many(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Places every call; results are in task order."""
+        return list(await asyncio.gather(*(self.dial(task) for task in tasks)))
+
+    async def dial(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Triggers one call. Returns {"status": "success", "data": ...} or
+        {"status": "error", "error": ...}; never raises.
+        """
+        current_number = task["recipient_phone_number"]
+        headers = {"Authorization": f"Bearer {settings.BOLNA_API_KEY}"}
+
+        async with self._semaphore:
+            await self._bucket.acquire()
+            started = time.monotonic()
+            try:
+                print(f"[BolnaDialer] Triggering call to {current_number}")
+                response = await self.client.post("/call", json=task, headers=headers)
+                if response.status_code >= 400:
+                    print(f"[BolnaDialer] API Error for {current_number} ({response.status_code}): {response.text}")
+                response.raise_for_status()
+                data = response.json()
+                bolna_call_duration.labels(outcome="success").observe(time.monotonic() - started)
+                print(f"[BolnaDialer] Success response for {current_number}: {data}")
+                return {"status": "success", "data": data}
+            except Exception as e:
+                bolna_call_duration.labels(outcome="error").observe(time.monotonic() - started)
+                bolna_call_errors.labels(reason=self._error_reason(e)).inc()
+                error_msg = self._error_message(e)
+                print(f"[BolnaDialer] Failed to trigger call for {current_number}: {error_msg}")
+                # Surfaced as the queue item's FAILED outcome by QueueWarmer
+                return {"status": "error", "error": error_msg}
+
+    @staticmethod
+    def _error_reason(error: Exception) -> str:
+        if isinstance(error, httpx.HTTPStatusError):
+            return f"http_{error.response.status_code}"
+        if isinstance(error, httpx.TimeoutException):
+            return "timeout"
+        if isinstance(error, httpx.TransportError):
+            return "transport"
+        return "other"
+
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 400:
+            try:
+                bolna_msg = error.response.json().get("message", "")
+                if "verified phone numbers" in bolna_msg:
+                    return "Unverified Phone Number (Telephony Error)"
+                return f"Bolna API Error: {bolna_msg}"
+            except Exception:
+                pass
+        return str(error)
+
+
+bolna_dialer = BolnaDialer()
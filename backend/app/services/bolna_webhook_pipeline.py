@@ -0,0 +1,258 @@
+"""
+Fast-ack ingestion for Bolna call webhooks.
+
+The HTTP handler used to run the whole call pipeline (execution map, campaign
+events, outcome detection, retries, user queue promotion, replenishment)
+before answering, so Bolna waited on every DB round trip and a slow or failed
+step turned into a timeout or a 500. Now:
+
+- `ingest` stores the raw payload in call_raw_data (one INSERT) and queues it;
+  the handler returns as soon as that commit lands.
+- Events are processed by `BOLNA_WEBHOOK_WORKERS` workers, each with its own
+  queue and session. A call always hashes to the same worker, so its events
+  are applied in arrival order and never concurrently.
+- Intermediate events (ringing, in-progress, ...) carry the cumulative
+  transcript, so a newer one replaces an older one of the same call that is
+  still waiting. Terminal events are never coalesced.
+- Processed rows get `processed_at`. Rows left unprocessed by a restart or a
+  full queue are re-queued by `recover` (scheduler job, every 5 minutes).
+  Recovery leases rows through `claimed_at`, so a claim lost to a crash is
+  picked up again once the lease expires; rows still queued in this process
+  are left to their worker, and a row older than one already processed for
+  the same call is marked processed without being applied.
+"""
+import asyncio
+import logging
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID, uuid4
+
+from sqlalchemy import exists, insert, or_, select, update
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.core.metrics import bolna_webhook_events, bolna_webhook_processing_duration
+from app.models.bolna_execution_map import BolnaExecutionMap
+from app.models.call_raw_data import CallRawData
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = ("completed", "failed", "call-disconnected", "voicemail_detected", "no-answer", "busy", "canceled")
+RECOVERY_BATCH_SIZE = 500
+# Graceful shutdown: how long to let workers drain their queues
+DRAIN_TIMEOUT_S = 5.0
+
+
+def extract_call_id(payload: Dict[str, Any]) -> Optional[str]:
+    return payload.get("execution_id") or payload.get("run_id") or payload.get("call_id") or payload.get("id")
+
+
+def is_terminal_event(payload: Dict[str, Any]) -> bool:
+    current_status = (payload.get("status") or "").lower()
+    return current_status in TERMINAL_STATES or bool(payload.get("answered_by_voice_mail"))
+
+
+class _QueuedEvent:
+    __slots__ = ("call_id", "payload", "raw_ids", "terminal")
+
+    def __init__(self, call_id: str, payload: Dict[str, Any], raw_ids: List[UUID]):
+        self.call_id = call_id
+        self.payload = payload
+        self.raw_ids = raw_ids
+        self.terminal = is_terminal_event(payload)
+
+
+class BolnaWebhookPipeline:
+
+    def __init__(self, session_factory=None, workers: Optional[int] = None):
+        self._session_factory = session_factory or async_session_factory
+        self._worker_count = max(1, workers or settings.BOLNA_WEBHOOK_WORKERS)
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        # call_id -> its intermediate event still waiting in a queue
+        self._pending: Dict[str, _QueuedEvent] = {}
+        # call_raw_data ids waiting in (or being processed from) a queue of this process
+        self._queued_ids: Set[UUID] = set()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        if self.running:
+            return
+        self._queues = [asyncio.Queue(maxsize=settings.BOLNA_WEBHOOK_QUEUE_SIZE) for _ in range(self._worker_count)]
+        self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self._queues]
+
+    async def stop(self):
+        """Drains briefly, then cancels. Anything left over stays unprocessed for `recover`."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self._queues)), DRAIN_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            logger.warning("BolnaWebhookPipeline: stopping with events still queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks, self._queues = [], []
+        self._pending.clear()
+        self._queued_ids.clear()
+
+    async def ingest(self, call_id: str, payload: Dict[str, Any]) -> UUID:
+        """Persists the raw payload and queues it. Returns the call_raw_data id."""
+        raw_id = uuid4()
+        campaign_id = (
+            select(BolnaExecutionMap.campaign_id)
+            .where(BolnaExecutionMap.bolna_call_id == call_id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        async with self._session_factory() as session:
+            await session.execute(
+                insert(CallRawData).values(
+                    id=raw_id,
+                    campaign_id=campaign_id,
+                    bolna_call_id=call_id,
+                    payload=payload,
+                    created_at=datetime.utcnow(),
+                )
+            )
+            await session.commit()
+
+        bolna_webhook_events.labels(outcome="accepted").inc()
+        await self.start()
+        self.enqueue(call_id, payload, [raw_id])
+        return raw_id
+
+    def enqueue(self, call_id: str, payload: Dict[str, Any], raw_ids: List[UUID]):
+        event = _QueuedEvent(call_id, payload, list(raw_ids))
+        if not event.terminal:
+            waiting = self._pending.get(call_id)
+            if waiting is not None:
+                waiting.payload = payload
+                waiting.raw_ids.extend(event.raw_ids)
+                self._queued_ids.update(event.raw_ids)
+                bolna_webhook_events.labels(outcome="coalesced").inc()
+                return
+            self._pending[call_id] = event
+        else:
+            # Later intermediates must queue behind the terminal event, not merge ahead of it
+            self._pending.pop(call_id, None)
+
+        try:
+            self._queues[self._shard(call_id)].put_nowait(event)
+            self._queued_ids.update(event.raw_ids)
+        except asyncio.QueueFull:
+            if self._pending.get(call_id) is event:
+                del self._pending[call_id]
+            bolna_webhook_events.labels(outcome="overflow").inc()
+            logger.warning(f"BolnaWebhookPipeline: queue full, {call_id} left for the recovery sweep")
+
+    def _shard(self, call_id: str) -> int:
+        return zlib.crc32(call_id.encode()) % len(self._queues)
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            event = await queue.get()
+            # From here on a newer intermediate starts a new entry instead of merging
+            if self._pending.get(event.call_id) is event:
+                del self._pending[event.call_id]
+            try:
+                await self._process(event)
+            except Exception as e:
+                bolna_webhook_events.labels(outcome="failed").inc()
+                logger.error(f"BolnaWebhookPipeline: failed to process {event.call_id}: {e}")
+            finally:
+                self._queued_ids.difference_update(event.raw_ids)
+                queue.task_done()
+
+    async def _process(self, event: _QueuedEvent):
+        from app.api.v1.endpoints.bolna_webhook import process_bolna_event
+
+        started = time.monotonic()
+        try:
+            async with self._session_factory() as session:
+                await process_bolna_event(event.payload, session)
+            bolna_webhook_events.labels(outcome="processed").inc()
+        finally:
+            bolna_webhook_processing_duration.observe(time.monotonic() - started)
+            # Failures are logged, not retried: Bolna sends the next state anyway
+            await self._mark_processed(event.raw_ids)
+
+    async def _mark_processed(self, raw_ids: List[UUID]):
+        async with self._session_factory() as session:
+            await session.execute(
+                update(CallRawData)
+                .where(CallRawData.id.in_(raw_ids), CallRawData.processed_at.is_(None))
+                .values(processed_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def recover(self) -> int:
+        """
+        Re-queues payloads stored more than BOLNA_WEBHOOK_RECOVERY_AGE_S ago but
+        never processed. Rows are leased (claimed_at) in the same statement with
+        SKIP LOCKED, so concurrent sweeps never claim the same row; processed_at
+        is only set once a worker has applied the payload, and a lease older
+        than BOLNA_WEBHOOK_RECOVERY_AGE_S can be claimed again.
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=settings.BOLNA_WEBHOOK_RECOVERY_AGE_S)
+        candidates = (
+            select(CallRawData.id)
+            .where(
+                CallRawData.processed_at.is_(None),
+                CallRawData.created_at < cutoff,
+                or_(CallRawData.claimed_at.is_(None), CallRawData.claimed_at < cutoff),
+            )
+            .order_by(CallRawData.created_at)
+            .limit(RECOVERY_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        # A newer payload of the same call was already applied: replaying this
+        # one would move call_status backwards
+        newer = aliased(CallRawData)
+        superseded = exists().where(
+            newer.bolna_call_id == CallRawData.bolna_call_id,
+            newer.processed_at.is_not(None),
+            newer.created_at > CallRawData.created_at,
+        )
+        stmt = (
+            update(CallRawData)
+            .where(CallRawData.id.in_(candidates.scalar_subquery()))
+            .values(claimed_at=now)
+            .returning(
+                CallRawData.id, CallRawData.bolna_call_id, CallRawData.payload, CallRawData.created_at,
+                superseded.label("superseded"),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        async with self._session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+            await session.commit()
+
+        # Still queued here: the worker that holds them marks them processed
+        rows = [row for row in rows if row.id not in self._queued_ids]
+        stale = [row.id for row in rows if row.superseded]
+        if stale:
+            await self._mark_processed(stale)
+            bolna_webhook_events.labels(outcome="superseded").inc(len(stale))
+        rows = [row for row in rows if not row.superseded]
+        if not rows:
+            return 0
+
+        await self.start()
+        # RETURNING order is unspecified; per-call order follows arrival
+        for row in sorted(rows, key=lambda r: r.created_at):
+            self.enqueue(row.bolna_call_id, row.payload, [row.id])
+        bolna_webhook_events.labels(outcome="recovered").inc(len(rows))
+        logger.info(f"BolnaWebhookPipeline: re-queued {len(rows)} unprocessed webhook payloads")
+        return len(rows)
+
+
+bolna_webhook_pipeline = BolnaWebhookPipeline()
@@ -0,0 +1,124 @@
+"""
+Event-driven live status for the campaign execution dashboard.
+
+`get_campaign_realtime_status_internal` is an expensive multi-join build of
+the whole dashboard. Rather than running it for every WebSocket connect and
+every poll, each campaign keeps one persisted snapshot (CampaignLiveStatus)
+that is recomputed only when something changes - Bolna webhooks, QueueWarmer
+passes and outcome endpoints call `notify_changed` / `refresh` - and
+subscribers receive only the top-level keys that changed.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
+from uuid import UUID
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import async_session_factory
+from app.models.campaign_live_status import CampaignLiveStatus
+from app.services.websocket_manager import dumps_message, manager
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignLiveStatusService:
+    # Bursts of webhook events inside this window cause a single recompute
+    coalesce_window_s = 0.25
+    # Safety net for changes made outside the notified paths (e.g. manual DB edits)
+    max_staleness = timedelta(minutes=2)
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or async_session_factory
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    async def get_snapshot(self, campaign_id: UUID, session: AsyncSession) -> Tuple[int, dict]:
+        """
+        Returns ``(version, snapshot)`` from the stored row; computes it only
+        when the campaign has never been computed or the row is too old.
+        """
+        row = await session.get(CampaignLiveStatus, campaign_id)
+        if row and row.snapshot and datetime.utcnow() - row.updated_at < self.max_staleness:
+            return row.version, row.snapshot
+        return await self.refresh(campaign_id, session)
+
+    async def refresh(self, campaign_id: UUID, session: AsyncSession) -> Tuple[int, dict]:
+        """
+        Recomputes the dashboard once, stores it as a new version and pushes
+        the changed top-level keys to every subscriber. Returns the new state.
+        """
+        from app.api.v1.endpoints.execution import get_campaign_realtime_status_internal
+
+        # Round-trip through JSON so the diff compares exactly what the stored row holds
+        data = json.loads(dumps_message(
+            await get_campaign_realtime_status_internal(campaign_id, session, trigger_warmer=False)
+        ))
+        if not data:
+            return 0, {}
+
+        # Row lock orders concurrent refreshers (any worker) so every diff has the right base
+        row = (await session.execute(
+            select(CampaignLiveStatus)
+            .where(CampaignLiveStatus.campaign_id == campaign_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )).scalars().first()
+
+        if row is None:
+            row = CampaignLiveStatus(campaign_id=campaign_id, version=0, snapshot={})
+        base_version = row.version
+        previous = row.snapshot or {}
+
+        changes = {key: value for key, value in data.items() if previous.get(key) != value}
+        removed = [key for key in previous if key not in data]
+
+        row.updated_at = datetime.utcnow()
+        if changes or removed:
+            row.version = base_version + 1
+            row.snapshot = data
+        session.add(row)
+        await session.commit()
+
+        if changes or removed:
+            try:
+                await manager.broadcast_to_campaign(str(campaign_id), {
+                    "type": "status_diff",
+                    "campaign_id": str(campaign_id),
+                    "version": row.version,
+                    "base_version": base_version,
+                    "changes": changes,
+                    "removed": removed,
+                })
+            except Exception as e:
+                logger.error(f"[LiveStatus] Diff broadcast failed for {campaign_id}: {e}")
+
+        return row.version, data
+
+    def notify_changed(self, campaign_id: UUID) -> None:
+        """
+        Fire-and-forget: schedule one coalesced refresh for the campaign.
+        Call after committing a change; never blocks the caller.
+        """
+        key = str(campaign_id)
+        if key in self._pending:
+            return
+        self._pending[key] = asyncio.create_task(self._coalesced_refresh(campaign_id))
+
+    async def _coalesced_refresh(self, campaign_id: UUID) -> None:
+        key = str(campaign_id)
+        try:
+            await asyncio.sleep(self.coalesce_window_s)
+        finally:
+            # Events arriving from here on schedule the next refresh
+            self._pending.pop(key, None)
+        try:
+            async with self._session_factory() as session:
+                await self.refresh(campaign_id, session)
+        except Exception as e:
+            logger.error(f"[LiveStatus] Refresh failed for {campaign_id}: {e}")
+
+
+campaign_live_status = CampaignLiveStatusService()
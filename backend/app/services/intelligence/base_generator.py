@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 from uuid import UUID
 
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+    from app.services.intelligence.brand_data import BrandDataFrame
+
 
 class InsightObject(BaseModel):
     id: str  # Unique slug for the insight type
@@ -18,11 +21,18 @@ class BaseInsightGenerator(ABC):
     Abstract Interface for Tier 1 Intelligence.
     All generators must implement the 'run' method.
     """
+
+    # Reads the deck's BrandDataFrame: skipped when the deck's load failed
+    # instead of each such generator loading it again
+    uses_brand_data: bool = False
     
     @abstractmethod
-    async def run(self, session, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session, brand_id: UUID, data: Optional["BrandDataFrame"] = None) -> Optional[InsightObject]:
         """
         Executes the specific insight logic.
+        `data` is the deck build's shared BrandDataFrame; generators that read
+        orders / line items / catalog use it instead of querying (and load their
+        own when called standalone).
         Returns an InsightObject if the signal is significant, else None.
         """
         pass
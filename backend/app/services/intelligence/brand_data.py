@@ -0,0 +1,363 @@
+"""
+Per-deck columnar snapshot of a brand's Shopify data.
+
+Most generators need the same orders / line items / catalog for overlapping
+30-90 day windows. Instead of every generator repeating the
+`ShopifyOrder ⋈ Integration ⋈ Workspace` scan, InsightEngine loads one
+BrandDataFrame per deck build and hands it to every generator. Columns are
+NumPy arrays (dates as datetime64, strings dictionary-encoded as int32 codes),
+so window filters and per-variant rollups are vectorized.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import func, select
+
+from app.models.company import Workspace
+from app.models.integration import Integration
+from app.models.shopify.inventory import ShopifyInventoryItem, ShopifyInventoryLevel
+from app.models.shopify.order import ShopifyLineItem, ShopifyOrder
+from app.models.shopify.product import ShopifyProduct, ShopifyProductVariant
+from app.models.shopify.velocity import ShopifyVariantVelocity
+
+# Longest window any frame-backed generator looks at (CrossSell: 60d, FrozenCash: 60d + margin)
+DEFAULT_LOOKBACK_DAYS = 90
+
+# (days, offset) sales windows served from ShopifyVariantVelocity
+MATERIALIZED_WINDOWS = {(7, 0): "units_7d", (7, 7): "units_prev_7d", (30, 0): "units_30d", (90, 0): "units_90d"}
+
+
+def _encode(values: List[Optional[str]], vocabulary: Dict[str, int], labels: List[str]) -> np.ndarray:
+    """Dictionary-encodes strings into int32 codes (-1 for NULL), growing the shared vocabulary."""
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = -1
+            continue
+        code = vocabulary.get(value)
+        if code is None:
+            code = vocabulary[value] = len(labels)
+            labels.append(value)
+        codes[i] = code
+    return codes
+
+
+@dataclass
+class BrandDataFrame:
+    brand_id: UUID
+    loaded_at: datetime
+    since: datetime
+
+    # Orders - one row per order created since `since`, ascending by created_at
+    order_created: np.ndarray        # datetime64[s]
+    order_total: np.ndarray          # float64
+    order_discounts: np.ndarray      # float64
+    order_refunded: np.ndarray       # float64 (refunded subtotal)
+    order_customer: np.ndarray       # int32 code into `customers` (-1: guest)
+    order_valid: np.ndarray          # bool: not cancelled and not voided
+    customers: List[str]             # lower-cased emails
+
+    # Line items of the orders above
+    line_order: np.ndarray           # int32 row index into the order columns
+    line_variant: np.ndarray         # int32 row index into the variant columns (-1: unknown variant)
+    line_title: np.ndarray           # int32 code into `titles`
+    line_quantity: np.ndarray        # int32
+    line_price: np.ndarray           # float64
+    titles: List[str]
+
+    # Catalog - one row per variant, inventory summed across locations
+    variant_ids: np.ndarray          # int64 Shopify variant id
+    variant_product: List[UUID]
+    variant_product_title: List[str]
+    variant_title: List[Optional[str]]
+    variant_sku: List[Optional[str]]
+    variant_product_type: List[Optional[str]]
+    variant_tags: List[Optional[str]]
+    variant_active: np.ndarray       # bool: product status is active
+    variant_price: np.ndarray        # float64
+    variant_cost: np.ndarray         # float64 (NaN: no cost recorded)
+    variant_available: np.ndarray    # int64, 0 when the variant has no inventory levels
+
+    # Materialized velocity (ShopifyVariantVelocity), aligned with the variant columns.
+    # velocity_as_of is None when the brand has no velocity rows yet; window
+    # helpers then fall back to aggregating the line items above.
+    velocity_as_of: Optional[date] = None
+    variant_units_7d: Optional[np.ndarray] = None       # int64
+    variant_units_prev_7d: Optional[np.ndarray] = None  # int64
+    variant_units_30d: Optional[np.ndarray] = None      # int64
+    variant_units_90d: Optional[np.ndarray] = None      # int64
+    variant_last_sale: Optional[np.ndarray] = None      # datetime64[D], NaT: never sold
+    variant_days_of_cover: Optional[np.ndarray] = None  # float64, inf: not selling
+
+    @classmethod
+    async def load(cls, session, brand_id: UUID, lookback_days: int = DEFAULT_LOOKBACK_DAYS) -> "BrandDataFrame":
+        """
+        Runs the brand's scans (orders, line items, catalog, materialized
+        velocity) and packs them into columns.
+        """
+        loaded_at = datetime.utcnow()
+        since = loaded_at - timedelta(days=lookback_days)
+
+        brand_integrations = select(Integration.id).join(
+            Workspace, Integration.workspace_id == Workspace.id
+        ).where(Workspace.brand_id == brand_id).scalar_subquery()
+
+        order_rows = (await session.execute(
+            select(
+                ShopifyOrder.id,
+                ShopifyOrder.shopify_created_at,
+                ShopifyOrder.total_price,
+                ShopifyOrder.total_discounts,
+                ShopifyOrder.refunded_subtotal,
+                ShopifyOrder.email,
+                ShopifyOrder.financial_status,
+                ShopifyOrder.shopify_cancelled_at,
+            ).where(
+                ShopifyOrder.integration_id.in_(brand_integrations),
+                ShopifyOrder.shopify_created_at >= since,
+            ).order_by(ShopifyOrder.shopify_created_at)
+        )).all()
+
+        line_rows = (await session.execute(
+            select(
+                ShopifyLineItem.order_id,
+                ShopifyLineItem.variant_id,
+                ShopifyLineItem.title,
+                ShopifyLineItem.quantity,
+                ShopifyLineItem.price,
+            ).join(
+                ShopifyOrder, ShopifyLineItem.order_id == ShopifyOrder.id
+            ).where(
+                ShopifyOrder.integration_id.in_(brand_integrations),
+                ShopifyOrder.shopify_created_at >= since,
+            )
+        )).all()
+
+        stock = select(
+            ShopifyInventoryLevel.integration_id,
+            ShopifyInventoryLevel.shopify_inventory_item_id,
+            func.sum(ShopifyInventoryLevel.available).label("available"),
+        ).where(
+            ShopifyInventoryLevel.integration_id.in_(brand_integrations)
+        ).group_by(
+            ShopifyInventoryLevel.integration_id,
+            ShopifyInventoryLevel.shopify_inventory_item_id,
+        ).subquery()
+
+        variant_rows = (await session.execute(
+            select(
+                ShopifyProductVariant.shopify_variant_id,
+                ShopifyProduct.id.label("product_id"),
+                ShopifyProduct.title.label("product_title"),
+                ShopifyProductVariant.title,
+                ShopifyProductVariant.sku,
+                ShopifyProduct.product_type,
+                ShopifyProduct.tags,
+                ShopifyProduct.status,
+                ShopifyProductVariant.price,
+                ShopifyInventoryItem.cost,
+                stock.c.available,
+            ).join(
+                ShopifyProduct, ShopifyProductVariant.product_id == ShopifyProduct.id
+            ).outerjoin(
+                ShopifyInventoryItem,
+                (ShopifyInventoryItem.shopify_inventory_item_id == ShopifyProductVariant.shopify_inventory_item_id)
+                & (ShopifyInventoryItem.integration_id == ShopifyProductVariant.integration_id)
+            ).outerjoin(
+                stock,
+                (stock.c.shopify_inventory_item_id == ShopifyProductVariant.shopify_inventory_item_id)
+                & (stock.c.integration_id == ShopifyProductVariant.integration_id)
+            ).where(
+                ShopifyProductVariant.integration_id.in_(brand_integrations)
+            )
+        )).all()
+
+        velocity_rows = (await session.execute(
+            select(
+                ShopifyVariantVelocity.shopify_variant_id,
+                ShopifyVariantVelocity.as_of,
+                ShopifyVariantVelocity.units_7d,
+                ShopifyVariantVelocity.units_prev_7d,
+                ShopifyVariantVelocity.units_30d,
+                ShopifyVariantVelocity.units_90d,
+                ShopifyVariantVelocity.last_sale_date,
+                ShopifyVariantVelocity.days_of_cover,
+            ).where(
+                ShopifyVariantVelocity.integration_id.in_(brand_integrations)
+            )
+        )).all()
+
+        frame = cls._from_rows(brand_id, loaded_at, since, order_rows, line_rows, variant_rows)
+        frame._attach_velocity(velocity_rows)
+        logger.debug(
+            f"BrandDataFrame: brand_id={brand_id} orders={len(order_rows)} "
+            f"lines={len(line_rows)} variants={len(variant_rows)}"
+        )
+        return frame
+
+    @classmethod
+    def _from_rows(cls, brand_id: UUID, loaded_at: datetime, since: datetime, order_rows, line_rows, variant_rows) -> "BrandDataFrame":
+        order_index = {row.id: i for i, row in enumerate(order_rows)}
+        # Orders created between the two scans have line items but no order row
+        line_rows = [row for row in line_rows if row.order_id in order_index]
+        customer_vocab: Dict[str, int] = {}
+        customers: List[str] = []
+
+        variant_index = {int(row.shopify_variant_id): i for i, row in enumerate(variant_rows)}
+        title_vocab: Dict[str, int] = {}
+        titles: List[str] = []
+
+        return cls(
+            brand_id=brand_id,
+            loaded_at=loaded_at,
+            since=since,
+            order_created=np.array([row.shopify_created_at for row in order_rows], dtype="datetime64[s]"),
+            order_total=np.array([float(row.total_price or 0) for row in order_rows], dtype=np.float64),
+            order_discounts=np.array([float(row.total_discounts or 0) for row in order_rows], dtype=np.float64),
+            order_refunded=np.array([float(row.refunded_subtotal or 0) for row in order_rows], dtype=np.float64),
+            order_customer=_encode(
+                [row.email.lower() if row.email else None for row in order_rows], customer_vocab, customers
+            ),
+            order_valid=np.array(
+                [row.shopify_cancelled_at is None and row.financial_status != "voided" for row in order_rows],
+                dtype=bool,
+            ),
+            customers=customers,
+            line_order=np.array([order_index[row.order_id] for row in line_rows], dtype=np.int32),
+            line_variant=np.array(
+                [variant_index.get(int(row.variant_id), -1) if row.variant_id is not None else -1 for row in line_rows],
+                dtype=np.int32,
+            ),
+            line_title=_encode([row.title for row in line_rows], title_vocab, titles),
+            line_quantity=np.array([row.quantity or 0 for row in line_rows], dtype=np.int32),
+            line_price=np.array([float(row.price or 0) for row in line_rows], dtype=np.float64),
+            titles=titles,
+            variant_ids=np.array([int(row.shopify_variant_id) for row in variant_rows], dtype=np.int64),
+            variant_product=[row.product_id for row in variant_rows],
+            variant_product_title=[row.product_title for row in variant_rows],
+            variant_title=[row.title for row in variant_rows],
+            variant_sku=[row.sku for row in variant_rows],
+            variant_product_type=[row.product_type for row in variant_rows],
+            variant_tags=[row.tags for row in variant_rows],
+            variant_active=np.array([row.status == "active" for row in variant_rows], dtype=bool),
+            variant_price=np.array([float(row.price or 0) for row in variant_rows], dtype=np.float64),
+            variant_cost=np.array(
+                [float(row.cost) if row.cost is not None else np.nan for row in variant_rows], dtype=np.float64
+            ),
+            variant_available=np.array([int(row.available or 0) for row in variant_rows], dtype=np.int64),
+        )
+
+    def _attach_velocity(self, velocity_rows) -> None:
+        if not velocity_rows:
+            return
+        index = {int(v): i for i, v in enumerate(self.variant_ids.tolist())}
+        n = len(self.variant_ids)
+        units = {column: np.zeros(n, dtype=np.int64) for column in MATERIALIZED_WINDOWS.values()}
+        last_sale = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+        cover = np.full(n, np.inf)
+        for row in velocity_rows:
+            i = index.get(int(row.shopify_variant_id))
+            if i is None:
+                continue
+            for column, values in units.items():
+                values[i] = getattr(row, column) or 0
+            if row.last_sale_date is not None:
+                last_sale[i] = np.datetime64(row.last_sale_date, "D")
+            if row.days_of_cover is not None:
+                cover[i] = row.days_of_cover
+
+        self.velocity_as_of = max(row.as_of for row in velocity_rows)
+        for column, values in units.items():
+            setattr(self, f"variant_{column}", values)
+        self.variant_last_sale = last_sale
+        self.variant_days_of_cover = cover
+
+    # ------------------------------------------------------------------
+    # Window helpers
+    # ------------------------------------------------------------------
+
+    @property
+    def order_day(self) -> np.ndarray:
+        return self.order_created.astype("datetime64[D]")
+
+    def days_ago(self, days: int) -> np.datetime64:
+        return np.datetime64(self.loaded_at - timedelta(days=days), "s")
+
+    def order_mask(
+        self,
+        start: Union[datetime, date, np.datetime64, None] = None,
+        end: Union[datetime, date, np.datetime64, None] = None,
+    ) -> np.ndarray:
+        """
+        Valid (not cancelled / voided) orders created in ``[start, end)``.
+        `date` bounds select whole calendar days, so ``end`` is inclusive for dates.
+        """
+        mask = self.order_valid.copy()
+        if isinstance(start, date) and not isinstance(start, datetime):
+            mask &= self.order_day >= np.datetime64(start, "D")
+        elif start is not None:
+            mask &= self.order_created >= np.datetime64(start, "s")
+        if isinstance(end, date) and not isinstance(end, datetime):
+            mask &= self.order_day <= np.datetime64(end, "D")
+        elif end is not None:
+            mask &= self.order_created < np.datetime64(end, "s")
+        return mask
+
+    def line_mask(self, start=None, end=None) -> np.ndarray:
+        """Line items whose order passes `order_mask(start, end)`."""
+        return self.order_mask(start, end)[self.line_order]
+
+    def units_by_variant(self, start=None, end=None) -> np.ndarray:
+        """Units sold per catalog variant in the window, aligned with `variant_ids`."""
+        mask = self.line_mask(start, end) & (self.line_variant >= 0)
+        return np.bincount(
+            self.line_variant[mask],
+            weights=self.line_quantity[mask],
+            minlength=len(self.variant_ids),
+        )
+
+    def units_sold(self, days: int, offset: int = 0) -> np.ndarray:
+        """
+        Units sold per variant over the ``days`` complete UTC days ending
+        ``offset`` days before yesterday. Served from the materialized velocity
+        table when available, otherwise aggregated from the frame's line items.
+        """
+        column = MATERIALIZED_WINDOWS.get((days, offset))
+        if column and self.velocity_as_of is not None:
+            return getattr(self, f"variant_{column}").astype(np.float64)
+        return self.units_by_variant(*self.window_bounds(days, offset))
+
+    def window_bounds(self, days: int, offset: int = 0) -> Tuple[date, date]:
+        """Inclusive (first, last) UTC days `units_sold(days, offset)` covers."""
+        materialized = (days, offset) in MATERIALIZED_WINDOWS and self.velocity_as_of is not None
+        as_of = self.velocity_as_of if materialized else self.loaded_at.date()
+        end = as_of - timedelta(days=1 + offset)
+        return end - timedelta(days=days - 1), end
+
+    def days_of_cover(self) -> np.ndarray:
+        """Days of stock at the 30-day velocity per variant (inf when not selling)."""
+        if self.velocity_as_of is not None:
+            return self.variant_days_of_cover
+        velocity = self.units_sold(30) / 30.0
+        with np.errstate(divide="ignore"):
+            return np.where(velocity > 0, self.variant_available / velocity, np.inf)
+
+    def last_sale_by_variant(self) -> np.ndarray:
+        """
+        Most recent valid sale per variant (NaT when never sold). Materialized
+        values cover all history; the fallback only sees the frame's lookback.
+        """
+        if self.velocity_as_of is not None:
+            return self.variant_last_sale.astype("datetime64[s]")
+        mask = self.line_mask() & (self.line_variant >= 0)
+        # NaT is the smallest int64, so an unbuffered max over the int64 view leaves unsold variants at NaT
+        last = np.full(len(self.variant_ids), np.datetime64("NaT"), dtype="datetime64[s]").view(np.int64)
+        np.maximum.at(last, self.line_variant[mask], self.order_created[self.line_order[mask]].view(np.int64))
+        return last.view("datetime64[s]")
+
+    def variant_label(self, i: int) -> str:
+        return self.variant_sku[i] or f"Product-{self.variant_product[i]}"
@@ -0,0 +1,159 @@
+"""
+Persistent, invalidation-aware cache for insight decks.
+
+A brand's deck is only regenerated when its Shopify data changed (the data
+version stamp moved) or the cached deck aged out. Stale decks are served
+immediately while a single background task per brand regenerates them.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy import or_, update
+from sqlmodel import select
+
+from app.core.db import async_session_factory
+from app.models.company import Workspace
+from app.models.insight_tracking import InsightDeckCache
+from app.models.integration import Integration
+from app.services.intelligence.insight_engine import insight_engine
+
+
+class InsightDeckCacheService:
+    # Some generators are time-relative ("no orders in 14 days"), so even unchanged data ages out
+    max_age = timedelta(hours=6)
+    # A refresh lease older than this is assumed to belong to a dead worker
+    lease_ttl = timedelta(minutes=5)
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory or async_session_factory
+        self._refreshing: Dict[UUID, asyncio.Task] = {}
+
+    async def get_deck(self, session, brand_id: UUID, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Returns the brand's deck.
+        - hit:   cached deck matches the current data version
+        - stale: cached deck is outdated; served as-is while it regenerates in the background
+        - miss:  nothing cached (or forced); generated inline
+        """
+        entry = await session.get(InsightDeckCache, brand_id)
+
+        if entry is None or not entry.deck or force_refresh:
+            deck = await self._regenerate(session, brand_id)
+            return self._with_cache_info(deck, "miss")
+
+        if self._is_fresh(entry):
+            return self._with_cache_info(entry.deck, "hit")
+
+        self._schedule_refresh(brand_id)
+        return self._with_cache_info(entry.deck, "stale")
+
+    async def mark_data_changed(self, session, integration_ids: Iterable[UUID]):
+        """
+        Bumps the data version of every brand owning one of the integrations.
+        Runs inside the caller's transaction so the stamp commits with the data.
+        """
+        integration_ids = list(set(integration_ids))
+        if not integration_ids:
+            return
+
+        brand_ids = (
+            select(Workspace.brand_id)
+            .join(Integration, Integration.workspace_id == Workspace.id)
+            .where(Integration.id.in_(integration_ids))
+        )
+        await session.execute(
+            update(InsightDeckCache)
+            .where(InsightDeckCache.brand_id.in_(brand_ids.scalar_subquery()))
+            .values(data_version=InsightDeckCache.data_version + 1)
+        )
+
+    def _is_fresh(self, entry: InsightDeckCache) -> bool:
+        if entry.deck_version != entry.data_version:
+            return False
+        return entry.generated_at is not None and datetime.utcnow() - entry.generated_at < self.max_age
+
+    def _with_cache_info(self, deck: Dict[str, Any], status: str) -> Dict[str, Any]:
+        return {**deck, "cache_status": status}
+
+    async def _regenerate(self, session, brand_id: UUID) -> Dict[str, Any]:
+        # Read the stamp *before* generating: changes landing mid-build keep the entry stale
+        version = (await session.execute(
+            select(InsightDeckCache.data_version).where(InsightDeckCache.brand_id == brand_id)
+        )).scalar_one_or_none() or 0
+
+        deck = await insight_engine.generate_full_deck(session, brand_id)
+        await self._store(session, brand_id, version, deck)
+        return deck
+
+    async def _store(self, session, brand_id: UUID, version: int, deck: Dict[str, Any]):
+        try:
+            entry = await session.get(InsightDeckCache, brand_id)
+            if entry is None:
+                entry = InsightDeckCache(brand_id=brand_id, data_version=version)
+            entry.deck_version = version
+            # Insight meta may carry datetimes/Decimals
+            entry.deck = json.loads(json.dumps(deck, default=str))
+            entry.generated_at = datetime.utcnow()
+            entry.refreshing_since = None
+            session.add(entry)
+            await session.commit()
+        except Exception as e:
+            # Another worker stored concurrently; the deck is still returned to the caller
+            logger.warning(f"Failed to cache deck for brand {brand_id}: {e}")
+            await session.rollback()
+
+    def _schedule_refresh(self, brand_id: UUID):
+        task = self._refreshing.get(brand_id)
+        if task and not task.done():
+            return
+        task = asyncio.create_task(self._refresh_in_background(brand_id))
+        self._refreshing[brand_id] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(brand_id, None))
+
+    async def _refresh_in_background(self, brand_id: UUID):
+        async with self.session_factory() as session:
+            if not await self._acquire_lease(session, brand_id):
+                return
+            try:
+                await self._regenerate(session, brand_id)
+                logger.info(f"Refreshed stale insight deck for brand {brand_id}")
+            except Exception as e:
+                logger.error(f"Background deck refresh failed for brand {brand_id}: {e}")
+                await session.rollback()
+                await self._release_lease(session, brand_id)
+
+    async def _acquire_lease(self, session, brand_id: UUID) -> bool:
+        """Cross-worker single flight: only one worker regenerates a brand at a time."""
+        now = datetime.utcnow()
+        result = await session.execute(
+            update(InsightDeckCache)
+            .where(
+                InsightDeckCache.brand_id == brand_id,
+                or_(
+                    InsightDeckCache.refreshing_since.is_(None),
+                    InsightDeckCache.refreshing_since < now - self.lease_ttl
+                )
+            )
+            .values(refreshing_since=now)
+        )
+        await session.commit()
+        return result.rowcount == 1
+
+    async def _release_lease(self, session, brand_id: UUID):
+        try:
+            await session.execute(
+                update(InsightDeckCache)
+                .where(InsightDeckCache.brand_id == brand_id)
+                .values(refreshing_since=None)
+            )
+            await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to release deck refresh lease for brand {brand_id}: {e}")
+
+
+# Singleton instance
+insight_deck_cache = InsightDeckCacheService()
@@ -11,6 +11,7 @@ from app.models.shopify.inventory import ShopifyInventoryItem, ShopifyInventoryL
 from app.models.shopify.order import ShopifyLineItem, ShopifyOrder
 from app.models.shopify.product import ShopifyProduct, ShopifyProductVariant
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class CashflowGenerator(BaseInsightGenerator):
@@ -38,7 +39,7 @@ class CashflowGenerator(BaseInsightGenerator):
     SLOW_TURNOVER_DAYS = 90  # > 90 days = slow turnover
     TREND_THRESHOLD = 0.10   # 10% change to show trend
     
-    async def run(self, session, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generates comprehensive inventory insight with trend analysis.
         """
@@ -17,6 +17,7 @@ from app.models.company import Workspace
 from app.models.integration import Integration
 from app.models.shopify.metrics import ShopifyDailyMetric
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class AdWasteGenerator(BaseInsightGenerator):
@@ -30,7 +31,7 @@ class AdWasteGenerator(BaseInsightGenerator):
     3. Fallback 2: Check global store conversion rate dips significantly below baseline.
     """
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate ad waste insight.
         """
@@ -6,20 +6,15 @@ Impact: High (7-10) - cash optimization opportunity
 Category: Financial
 """
 
-from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
+import numpy as np
 from loguru import logger
-from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.company import Workspace
-from app.models.integration import Integration
-from app.models.shopify.inventory import ShopifyInventoryItem, ShopifyInventoryLevel
-from app.models.shopify.order import ShopifyLineItem, ShopifyOrder
-from app.models.shopify.product import ShopifyProduct, ShopifyProductVariant
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class FrozenCashGenerator(BaseInsightGenerator):
@@ -33,130 +28,66 @@ class FrozenCashGenerator(BaseInsightGenerator):
     - Zero-cost items (excluded)
     - Minimum value threshold ($100)
     """
-    
+
+    uses_brand_data = True
     FROZEN_DAYS_THRESHOLD = 60
     MIN_COST_THRESHOLD = 1.0
     MIN_VALUE_THRESHOLD = 100.0
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate frozen cash insight.
         """
         logger.debug(f"FrozenCash: Starting analysis for brand_id={brand_id}")
         
+        if data is None:
+            data = await BrandDataFrame.load(session, brand_id)
+
         # Calculate cutoff date
-        cutoff_date = datetime.utcnow() - timedelta(days=self.FROZEN_DAYS_THRESHOLD)
+        cutoff = data.days_ago(self.FROZEN_DAYS_THRESHOLD)
         
-        # Query: Products with no sales since cutoff_date
-        # Join: inventory -> product -> line_items -> orders
-        stmt = select(
-            ShopifyProduct.id,
-            ShopifyProduct.title,
-            ShopifyProduct.tags,
-            ShopifyProductVariant.sku,
-            ShopifyInventoryItem.cost,
-            ShopifyInventoryLevel.available,
-            (ShopifyInventoryLevel.available * ShopifyInventoryItem.cost).label("item_value"),
-            func.max(ShopifyOrder.shopify_created_at).label("last_sale_date")
-        ).select_from(
-            ShopifyInventoryLevel
-        ).join(
-            ShopifyInventoryItem,
-            ShopifyInventoryLevel.shopify_inventory_item_id == ShopifyInventoryItem.shopify_inventory_item_id
-        ).join(
-            ShopifyProductVariant,
-            ShopifyInventoryItem.shopify_inventory_item_id == ShopifyProductVariant.shopify_inventory_item_id
-        ).join(
-            ShopifyProduct,
-            ShopifyProductVariant.product_id == ShopifyProduct.id
-        ).join(
-            Integration,
-            ShopifyInventoryLevel.integration_id == Integration.id
-        ).join(
-            Workspace,
-            Integration.workspace_id == Workspace.id
-        ).outerjoin(
-            ShopifyLineItem,
-            ShopifyProductVariant.shopify_variant_id == ShopifyLineItem.shopify_variant_id
-        ).outerjoin(
-            ShopifyOrder,
-            and_(
-                ShopifyLineItem.shopify_order_id == ShopifyOrder.shopify_order_id,
-                ShopifyOrder.financial_status != 'voided',
-                ShopifyOrder.shopify_cancelled_at == None
-            )
-        ).where(
-            Workspace.brand_id == brand_id,
-            ShopifyProduct.status == 'active',
-            ShopifyInventoryItem.cost > self.MIN_COST_THRESHOLD,
-            ShopifyInventoryLevel.available > 0,
-            # Exclude seasonal products
-            or_(
-                ShopifyProduct.tags == None,
-                ~ShopifyProduct.tags.ilike('%seasonal%')
-            ),
-            # Exclude pre-orders
-            or_(
-                ShopifyProduct.tags == None,
-                ~ShopifyProduct.tags.ilike('%preorder%')
-            ),
-            # Exclude launch holds
-            or_(
-                ShopifyProduct.tags == None,
-                ~ShopifyProduct.tags.ilike('%launch%')
-            )
-        ).group_by(
-            ShopifyProduct.id,
-            ShopifyProduct.title,
-            ShopifyProduct.tags,
-            ShopifyProductVariant.sku,
-            ShopifyInventoryItem.cost,
-            ShopifyInventoryLevel.available
-        ).having(
-            or_(
-                func.max(ShopifyOrder.shopify_created_at) < cutoff_date,
-                func.max(ShopifyOrder.shopify_created_at) == None
-            )
+        # Active, costed variants in stock, excluding seasonal / pre-order / launch holds
+        tags = [(t or "").lower() for t in data.variant_tags]
+        held = np.array(
+            [("seasonal" in t) or ("preorder" in t) or ("launch" in t) for t in tags],
+            dtype=bool
+        )
+        cost = np.nan_to_num(data.variant_cost)
+        eligible = (
+            data.variant_active
+            & (cost > self.MIN_COST_THRESHOLD)
+            & (data.variant_available > 0)
+            & ~held
         )
         
-        results = (await session.execute(stmt)).all()
+        # Products with no sales since cutoff (NaT: never sold inside the frame's window)
+        last_sale = data.last_sale_by_variant()
+        never_sold = np.isnat(last_sale)
+        stale = never_sold | (last_sale < cutoff)
+        item_value = data.variant_available * cost
         
-        if not results:
+        # Apply minimum value threshold
+        frozen = np.flatnonzero(eligible & stale & (item_value >= self.MIN_VALUE_THRESHOLD))
+        if not len(frozen):
             logger.info("FrozenCash: No frozen inventory found")
             return None
         
-        # Calculate aggregates
-        frozen_items = []
-        total_frozen_value = 0.0
-        total_days_frozen = 0
+        # Calculate days frozen (assume 90+ days if never sold)
+        now = np.datetime64(data.loaded_at, "s")
+        days_frozen = np.where(never_sold, 90, (now - last_sale).astype("timedelta64[D]").astype(np.int64))
         
-        for row in results:
-            item_value = float(row.item_value or 0)
-            
-            # Apply minimum value threshold
-            if item_value < self.MIN_VALUE_THRESHOLD:
-                continue
-            
-            # Calculate days frozen
-            if row.last_sale_date:
-                days_frozen = (datetime.utcnow() - row.last_sale_date).days
-            else:
-                days_frozen = 90  # Assume 90+ days if never sold
-            
-            frozen_items.append({
-                "sku": row.sku or f"Product-{row.id}",
-                "title": row.title,
-                "value": round(item_value, 2),
-                "days_frozen": days_frozen,
-                "quantity": int(row.available)
-            })
-            
-            total_frozen_value += item_value
-            total_days_frozen += days_frozen
-        
-        if not frozen_items:
-            logger.info("FrozenCash: All items below minimum threshold")
-            return None
+        frozen_items = [
+            {
+                "sku": data.variant_label(i),
+                "title": data.variant_product_title[i],
+                "value": round(float(item_value[i]), 2),
+                "days_frozen": int(days_frozen[i]),
+                "quantity": int(data.variant_available[i])
+            }
+            for i in frozen.tolist()
+        ]
+        total_frozen_value = float(item_value[frozen].sum())
+        total_days_frozen = int(days_frozen[frozen].sum())
         
         # Sort by value (highest first)
         frozen_items.sort(key=lambda x: x["value"], reverse=True)
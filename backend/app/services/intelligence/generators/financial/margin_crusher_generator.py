@@ -19,6 +19,7 @@ from app.models.shopify.inventory import ShopifyInventoryItem
 from app.models.shopify.order import ShopifyLineItem, ShopifyOrder
 from app.models.shopify.product import ShopifyProductVariant
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class MarginCrusherGenerator(BaseInsightGenerator):
@@ -34,7 +35,7 @@ class MarginCrusherGenerator(BaseInsightGenerator):
     
     MIN_SALES_THRESHOLD = 3
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate margin crusher insight.
         """
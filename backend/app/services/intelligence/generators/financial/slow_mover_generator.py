@@ -6,20 +6,15 @@ Impact: Medium-High (6-8) - Capital efficiency risk
 Category: Financial
 """
 
-from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
+import numpy as np
 from loguru import logger
-from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.company import Workspace
-from app.models.integration import Integration
-from app.models.shopify.inventory import ShopifyInventoryItem, ShopifyInventoryLevel
-from app.models.shopify.order import ShopifyLineItem, ShopifyOrder
-from app.models.shopify.product import ShopifyProduct, ShopifyProductVariant
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class SlowMoverGenerator(BaseInsightGenerator):
@@ -34,162 +29,61 @@ class SlowMoverGenerator(BaseInsightGenerator):
        - Velocity < 20% of category average
        - Inventory value > $500 (to avoid noise)
     """
-    
+
+    uses_brand_data = True
     MIN_INVENTORY_VALUE = 500.0
     VELOCITY_DAYS = 30
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate slow mover insight.
         """
         logger.debug(f"SlowMover: Starting analysis for brand_id={brand_id}")
         
-        # 1. Get Sales Velocity per Variant for last 30 days
-        cutoff_date = datetime.utcnow() - timedelta(days=self.VELOCITY_DAYS)
-        
-        # This query gets units sold per variant in last 30 days
-        velocity_stmt = select(
-            ShopifyLineItem.shopify_variant_id,
-            func.sum(ShopifyLineItem.quantity).label("units_sold")
-        ).join(
-            ShopifyOrder,
-            ShopifyLineItem.shopify_order_id == ShopifyOrder.shopify_order_id
-        ).join(
-            Integration,
-            ShopifyOrder.integration_id == Integration.id
-        ).join(
-            Workspace,
-            Integration.workspace_id == Workspace.id
-        ).where(
-            Workspace.brand_id == brand_id,
-            ShopifyOrder.created_at >= cutoff_date,
-            ShopifyOrder.financial_status != 'voided',
-            ShopifyOrder.shopify_cancelled_at == None
-        ).group_by(
-            ShopifyLineItem.shopify_variant_id
-        )
-        
-        velocity_results = (await session.execute(velocity_stmt)).all()
-        # Map variant_id -> units_sold
-        sales_map = {row.shopify_variant_id: float(row.units_sold) for row in velocity_results}
-        
-        # 2. Get Inventory & Product Details
-        # We need Cost, Price, Title, Type, and Available Quantity
-        inventory_stmt = select(
-            ShopifyProduct.id,
-            ShopifyProduct.title,
-            ShopifyProduct.product_type,
-            ShopifyProductVariant.shopify_variant_id,
-            ShopifyProductVariant.title.label("variant_title"),
-            ShopifyProductVariant.sku,
-            ShopifyProductVariant.price,
-            ShopifyInventoryItem.cost,
-            ShopifyInventoryLevel.available
-        ).select_from(
-            ShopifyInventoryLevel
-        ).join(
-            ShopifyInventoryItem,
-            ShopifyInventoryLevel.shopify_inventory_item_id == ShopifyInventoryItem.shopify_inventory_item_id
-        ).join(
-            ShopifyProductVariant,
-            ShopifyInventoryItem.shopify_inventory_item_id == ShopifyProductVariant.shopify_inventory_item_id
-        ).join(
-            ShopifyProduct,
-            ShopifyProductVariant.product_id == ShopifyProduct.id
-        ).join(
-            Integration,
-            ShopifyInventoryLevel.integration_id == Integration.id
-        ).join(
-            Workspace,
-            Integration.workspace_id == Workspace.id
-        ).where(
-            Workspace.brand_id == brand_id,
-            ShopifyInventoryLevel.available > 0,
-            ShopifyProduct.status == 'active'
-        )
-        
-        inventory_results = (await session.execute(inventory_stmt)).all()
-        
-        if not inventory_results:
+        if data is None:
+            data = await BrandDataFrame.load(session, brand_id)
+
+        # 1. Active variants with stock on hand
+        stocked = np.flatnonzero(data.variant_active & (data.variant_available > 0))
+        if not len(stocked):
             return None
             
-        # 3. Process Data
-        category_stats = {} # type -> {total_velocity: 0, count: 0}
-        product_metrics = []
+        # 2. Sales Velocity (units/day) per variant for last 30 days
+        velocity = data.units_sold(self.VELOCITY_DAYS)[stocked] / self.VELOCITY_DAYS
+        
+        # 3. Average velocity per category (product_type)
+        types = [data.variant_product_type[i] or "Uncategorized" for i in stocked.tolist()]
+        _, type_codes = np.unique(np.array(types, dtype=object), return_inverse=True)
+        category_averages = np.bincount(type_codes, weights=velocity) / np.bincount(type_codes)
+        avg_cat_velocity = category_averages[type_codes]
+        
+        available = data.variant_available[stocked].astype(np.float64)
+        inventory_value = np.nan_to_num(data.variant_cost[stocked]) * available
         
-        for row in inventory_results:
-            variant_id = row.shopify_variant_id
-            units_sold_30d = sales_map.get(variant_id, 0.0)
-            daily_velocity = units_sold_30d / self.VELOCITY_DAYS
-            
-            # Category Stats Accumulation
-            p_type = row.product_type or "Uncategorized"
-            if p_type not in category_stats:
-                category_stats[p_type] = {"total_velocity": 0.0, "count": 0}
-            category_stats[p_type]["total_velocity"] += daily_velocity
-            category_stats[p_type]["count"] += 1
-            
-            product_metrics.append({
-                "row": row,
-                "velocity": daily_velocity,
-                "type": p_type
-            })
-            
-        # Calculate Category Averages
-        category_averages = {}
-        for p_type, stats in category_stats.items():
-            if stats["count"] > 0:
-                category_averages[p_type] = stats["total_velocity"] / stats["count"]
-            else:
-                category_averages[p_type] = 0.0
-
         # 4. Identify Slow Movers
-        slow_movers = []
-        total_trapped_capital = 0.0
+        # Rules:
+        # 1. Velocity < 20% of category average (if category moves somewhat)
+        #    OR velocity == 0 with > 10 units while the category is dead
+        # 2. Inventory Value > Threshold
+        # 3. More than 90 days of cover ("Scary" insights); zero velocity counts as 9999 days
+        is_slow = np.where(avg_cat_velocity > 0.1, velocity < avg_cat_velocity * 0.2, (velocity == 0) & (available > 10))
+        with np.errstate(divide="ignore"):
+            days_cover = np.where(velocity > 0, available / velocity, 9999)
+        flagged = is_slow & (inventory_value >= self.MIN_INVENTORY_VALUE) & (days_cover > 90)
         
-        for item in product_metrics:
-            row = item["row"]
-            velocity = item["velocity"]
-            p_type = item["type"]
-            
-            avg_cat_velocity = category_averages.get(p_type, 0.0)
-            
-            # Rules:
-            # 1. Velocity < 20% of category average OR Velocity == 0 (if valid category avg exists)
-            # 2. Inventory Value > Threshold
-            cost = float(row.cost or 0)
-            available = float(row.available)
-            inventory_value = cost * available
-            
-            if inventory_value < self.MIN_INVENTORY_VALUE:
-                continue
-                
-            is_slow = False
-            if avg_cat_velocity > 0.1: # Only check if category moves somewhat
-                if velocity < (avg_cat_velocity * 0.2):
-                    is_slow = True
-            elif velocity == 0 and available > 10: # If category is dead, but we have stock
-                 is_slow = True
-                 
-            if is_slow:
-                # Calculate Days Coverage
-                # If velocity is 0, coverage is infinite (use 999)
-                days_cover = (available / velocity) if velocity > 0 else 9999
-                
-                # Only flag if we have TOO MUCH stock (> 60 days worth)
-                if days_cover > 90: # Increased threshold to 90 days for "Scary" insights
-                    years_to_sell = days_cover / 365.0
-                    
-                    slow_movers.append({
-                        "title": f"{row.title} - {row.variant_title}",
-                        "sku": row.sku,
-                        "value": inventory_value,
-                        "days_cover": int(days_cover),
-                        "years_to_sell": round(years_to_sell, 1),
-                        "velocity": round(velocity, 2),
-                        "cat_avg": round(avg_cat_velocity, 2)
-                    })
-                    total_trapped_capital += inventory_value
+        slow_movers = []
+        for j in np.flatnonzero(flagged).tolist():
+            i = int(stocked[j])
+            slow_movers.append({
+                "title": f"{data.variant_product_title[i]} - {data.variant_title[i]}",
+                "sku": data.variant_sku[i],
+                "value": float(inventory_value[j]),
+                "days_cover": int(days_cover[j]),
+                "years_to_sell": round(float(days_cover[j]) / 365.0, 1),
+                "velocity": round(float(velocity[j]), 2),
+                "cat_avg": round(float(avg_cat_velocity[j]), 2)
+            })
+        total_trapped_capital = float(inventory_value[flagged].sum())
 
         if not slow_movers:
             return None
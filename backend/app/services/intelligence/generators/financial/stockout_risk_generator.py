@@ -6,20 +6,15 @@ Impact: High (8-10) - revenue risk
 Category: Financial
 """
 
-from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
+import numpy as np
 from loguru import logger
-from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.company import Workspace
-from app.models.integration import Integration
-from app.models.shopify.inventory import ShopifyInventoryItem, ShopifyInventoryLevel
-from app.models.shopify.order import ShopifyLineItem, ShopifyOrder
-from app.models.shopify.product import ShopifyProduct, ShopifyProductVariant
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class StockoutRiskGenerator(BaseInsightGenerator):
@@ -33,117 +28,51 @@ class StockoutRiskGenerator(BaseInsightGenerator):
     - Requires minimum velocity (1 sale/day)
     - Checks if restocking in progress
     """
-    
+
+    uses_brand_data = True
     RISK_THRESHOLD_DAYS = 3
     MIN_VELOCITY = 1.0  # Minimum 1 sale/day to flag
     EMA_ALPHA = 0.3  # Weight for exponential moving average
     LEAD_TIME_DAYS = 7  # Default supplier lead time
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate stockout risk insight.
         """
         logger.debug(f"StockoutRisk: Starting analysis for brand_id={brand_id}")
         
-        # Get products with current inventory
-        inventory_stmt = select(
-            ShopifyProduct.id.label("product_id"),
-            ShopifyProduct.title,
-            ShopifyProductVariant.sku,
-            ShopifyProductVariant.shopify_variant_id,
-            ShopifyInventoryLevel.available,
-            ShopifyProductVariant.price
-        ).select_from(
-            ShopifyInventoryLevel
-        ).join(
-            ShopifyInventoryItem,
-            ShopifyInventoryLevel.shopify_inventory_item_id == ShopifyInventoryItem.shopify_inventory_item_id
-        ).join(
-            ShopifyProductVariant,
-            ShopifyInventoryItem.shopify_inventory_item_id == ShopifyProductVariant.shopify_inventory_item_id
-        ).join(
-            ShopifyProduct,
-            ShopifyProductVariant.product_id == ShopifyProduct.id
-        ).join(
-            Integration,
-            ShopifyInventoryLevel.integration_id == Integration.id
-        ).join(
-            Workspace,
-            Integration.workspace_id == Workspace.id
-        ).where(
-            Workspace.brand_id == brand_id,
-            ShopifyProduct.status == 'active',
-            ShopifyInventoryLevel.available > 0
-        )
-        
-        inventory_results = (await session.execute(inventory_stmt)).all()
-        
-        if not inventory_results:
+        if data is None:
+            data = await BrandDataFrame.load(session, brand_id)
+
+        # Active variants with stock on hand
+        in_stock = data.variant_active & (data.variant_available > 0)
+        if not in_stock.any():
             logger.info("StockoutRisk: No active inventory found")
             return None
         
-        # Calculate velocity for each variant
-        at_risk_products = []
+        # Precomputed sales velocity and cover for every variant (last 30 days)
+        # (simplified EMA: use the 30-day average for now)
+        avg_daily_velocity = data.units_sold(30) / 30.0
         
-        for inv in inventory_results:
-            # Calculate sales velocity (last 30 days)
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            
-            sales_stmt = select(
-                func.count(ShopifyLineItem.id).label("order_count"),
-                func.sum(ShopifyLineItem.quantity).label("total_quantity")
-            ).select_from(
-                ShopifyLineItem
-            ).join(
-                ShopifyOrder,
-                ShopifyLineItem.order_id == ShopifyOrder.id
-            ).join(
-                Integration,
-                ShopifyOrder.integration_id == Integration.id
-            ).join(
-                Workspace,
-                Integration.workspace_id == Workspace.id
-            ).where(
-                Workspace.brand_id == brand_id,
-                ShopifyLineItem.shopify_variant_id == inv.shopify_variant_id,
-                ShopifyOrder.shopify_created_at >= thirty_days_ago,
-                ShopifyOrder.financial_status != 'voided',
-                ShopifyOrder.shopify_cancelled_at == None
-            )
-            
-            sales_result = (await session.execute(sales_stmt)).first()
-            
-            if not sales_result or not sales_result.total_quantity:
-                continue
-            
-            # Calculate EMA velocity (simplified: use average for now)
-            # In production, calculate true EMA from daily sales
-            total_sold = float(sales_result.total_quantity)
-            avg_daily_velocity = total_sold / 30.0
-            
-            # Skip if velocity too low
-            if avg_daily_velocity < self.MIN_VELOCITY:
-                continue
-            
-            # Calculate days until stockout
-            days_until_stockout = inv.available / avg_daily_velocity
-            
-            # Calculate risk threshold (lead time + safety stock)
-            risk_threshold = self.LEAD_TIME_DAYS + self.RISK_THRESHOLD_DAYS
+        # Calculate risk threshold (lead time + safety stock)
+        risk_threshold = self.LEAD_TIME_DAYS + self.RISK_THRESHOLD_DAYS
+        
+        candidates = in_stock & (avg_daily_velocity >= self.MIN_VELOCITY)
+        days_until_stockout = np.where(candidates, data.days_of_cover(), np.inf)
+        
+        at_risk_products = []
+        for i in np.flatnonzero(days_until_stockout < risk_threshold).tolist():
+            # Calculate potential lost revenue
+            potential_lost_revenue = avg_daily_velocity[i] * self.LEAD_TIME_DAYS * data.variant_price[i]
             
-            # Flag if at risk
-            if days_until_stockout < risk_threshold:
-                # Calculate potential lost revenue
-                potential_lost_revenue = avg_daily_velocity * self.LEAD_TIME_DAYS * float(inv.price or 0)
-                
-                at_risk_products.append({
-                    "sku": inv.sku or f"Product-{inv.product_id}",
-                    "title": inv.title,
-                    "available": int(inv.available),
-                    "velocity": round(avg_daily_velocity, 2),
-                    "days_remaining": round(days_until_stockout, 1),
-                    "potential_lost_revenue": round(potential_lost_revenue, 2)
-                })
+            at_risk_products.append({
+                "sku": data.variant_label(i),
+                "title": data.variant_product_title[i],
+                "available": int(data.variant_available[i]),
+                "velocity": round(float(avg_daily_velocity[i]), 2),
+                "days_remaining": round(float(days_until_stockout[i]), 1),
+                "potential_lost_revenue": round(float(potential_lost_revenue), 2)
+            })
         
         if not at_risk_products:
             logger.info("StockoutRisk: No products at risk")
@@ -6,19 +6,15 @@ Impact: Medium (5-7) - Revenue expansion
 Category: Growth
 """
 
-import itertools
-from collections import defaultdict
-from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import select
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.company import Workspace
-from app.models.integration import Integration
-from app.models.shopify.order import ShopifyLineItem, ShopifyOrder
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
+from app.services.intelligence.market_basket import MarketBasketEngine
 
 
 class CrossSellGenerator(BaseInsightGenerator):
@@ -27,95 +23,45 @@ class CrossSellGenerator(BaseInsightGenerator):
     
     Logic:
     1. Analyze orders from last 60 days.
-    2. Group line items by order_id.
-    3. Count pairs of products appearing together.
-    4. Calculate 'Support' (Frequency) and 'Confidence' (Likelihood).
+    2. Build the order x product incidence matrix.
+    3. Count pairs (and triples) of products appearing together (MarketBasketEngine).
+    4. Calculate 'Support' (Frequency), 'Confidence' (Likelihood) and 'Lift'.
     """
-    
+
+    uses_brand_data = True
     ANALYSIS_DAYS = 60
     MIN_PAIR_FREQUENCY = 3  # Minimum number of times pair must appear together
+    TOP_K = 20  # Rules kept per itemset size
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate cross-sell insight.
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=self.ANALYSIS_DAYS)
-        
-        # 1. Fetch Order Lines
-        # We need product names/titles for the output
-        stmt = select(
-            ShopifyOrder.shopify_order_id,
-            ShopifyLineItem.title,
-            ShopifyLineItem.quantity
-        ).join(
-            ShopifyOrder,
-            ShopifyLineItem.order_id == ShopifyOrder.id
-        ).join(
-            Integration,
-            ShopifyOrder.integration_id == Integration.id
-        ).join(
-            Workspace,
-            Integration.workspace_id == Workspace.id
-        ).where(
-            Workspace.brand_id == brand_id,
-            ShopifyOrder.shopify_created_at >= cutoff_date,
-            ShopifyOrder.financial_status != 'voided',
-            ShopifyOrder.shopify_cancelled_at == None
-        )
-        
-        results = (await session.execute(stmt)).all()
-        
-        if not results:
+        if data is None:
+            data = await BrandDataFrame.load(session, brand_id)
+
+        # 1. Order lines in the analysis window (valid orders only)
+        lines = data.line_mask(data.days_ago(self.ANALYSIS_DAYS))
+        if not lines.any():
              return None
-             
-        # 2. Group by Order
-        orders = defaultdict(list)
-        for row in results:
-            orders[row.shopify_order_id].append(row.title)
-            
-        # 3. Count Pairs
-        pair_counts = defaultdict(int)
-        item_counts = defaultdict(int)
-        
-        for order_id, items in orders.items():
-            unique_items = sorted(list(set(items))) # Dedupe items in same order
-            
-            for item in unique_items:
-                item_counts[item] += 1
-                
-            if len(unique_items) > 1:
-                # Generate all pairs
-                for pair in itertools.combinations(unique_items, 2):
-                    pair_counts[pair] += 1
-                    
-        # 4. Find Best Pairs
-        # Filter by min frequency
-        significant_pairs = {k: v for k, v in pair_counts.items() if v >= self.MIN_PAIR_FREQUENCY}
+
+        # 2-3. Count every product pair (and triple) in one sparse pass
+        analysis = MarketBasketEngine(
+            min_count=self.MIN_PAIR_FREQUENCY, top_k=self.TOP_K
+        ).analyze(
+            data.line_order[lines], data.line_title[lines], data.titles, include_triples=True
+        )
         
-        if not significant_pairs:
+        # 4. Find Best Pairs (ranked by frequency, oriented in the stronger direction)
+        if not analysis.pairs:
             return None
             
-        # Sort by frequency
-        sorted_pairs = sorted(significant_pairs.items(), key=lambda x: x[1], reverse=True)
-        top_pair = sorted_pairs[0] # ((Item A, Item B), count)
-        
-        item_a = top_pair[0][0]
-        item_b = top_pair[0][1]
-        pair_count = top_pair[1]
-        
-        # Calculate Confidence: P(B|A) = Count(A & B) / Count(A)
-        # We calculate it both ways and take the stronger direction
-        conf_a_to_b = pair_count / item_counts[item_a]
-        conf_b_to_a = pair_count / item_counts[item_b]
-        
-        if conf_a_to_b > conf_b_to_a:
-            driver = item_a
-            accessory = item_b
-            confidence = conf_a_to_b
-        else:
-            driver = item_b
-            accessory = item_a
-            confidence = conf_b_to_a
+        top_rule = analysis.pairs[0]
+        driver = top_rule.antecedent[0]
+        accessory = top_rule.consequent
+        pair_count = top_rule.count
+        confidence = top_rule.confidence
+        attached_price = self._average_price(data, lines, accessory)
             
         # Impact Score based on frequency and confidence
         # High confidence (e.g. > 50%) is valuable
@@ -134,9 +80,34 @@ class CrossSellGenerator(BaseInsightGenerator):
                 "driver_product": driver,
                 "attached_product": accessory,
                 "frequency": pair_count,
+                "driver_orders": top_rule.antecedent_count,
+                "attached_price": attached_price,
+                "period_days": self.ANALYSIS_DAYS,
                 "confidence": round(confidence, 2),
+                "lift": round(top_rule.lift, 2),
+                "support": round(top_rule.support, 4),
+                "top_pairs": [self._rule_meta(rule) for rule in analysis.pairs[:5]],
+                "top_bundles": [self._rule_meta(rule) for rule in analysis.triples[:3]],
                 "context": f"These items appeared together in {pair_count} orders recently.",
                 "recommendation": f"Create a bundle: '{driver}' + '{accessory}' or add post-purchase upsell.",
                 "confidence_level": "medium" if confidence < 0.3 else "high"
             }
         )
+
+    @staticmethod
+    def _average_price(data: BrandDataFrame, lines: np.ndarray, title: str) -> float:
+        """Unit price the attached product actually sold at in the window (bundle_attach simulation input)."""
+        mask = lines & (data.line_title == data.titles.index(title))
+        units = data.line_quantity[mask].sum()
+        if units <= 0:
+            return 0.0
+        return round(float((data.line_price[mask] * data.line_quantity[mask]).sum() / units), 2)
+
+    @staticmethod
+    def _rule_meta(rule) -> dict:
+        return {
+            "items": list(rule.items),
+            "frequency": rule.count,
+            "confidence": round(rule.confidence, 2),
+            "lift": round(rule.lift, 2),
+        }
@@ -17,6 +17,7 @@ from app.models.company import Workspace
 from app.models.integration import Integration
 from app.models.shopify.order import ShopifyOrder
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class GeoSpikeGenerator(BaseInsightGenerator):
@@ -33,7 +34,7 @@ class GeoSpikeGenerator(BaseInsightGenerator):
     RECENT_DAYS = 7
     MIN_ORDERS_COUNTS = 5 # Minimum orders in region to consider
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate geo spike insight.
         """
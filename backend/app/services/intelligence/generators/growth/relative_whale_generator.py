@@ -18,6 +18,7 @@ from app.models.integration import Integration
 from app.models.shopify.customer import ShopifyCustomer
 from app.models.shopify.order import ShopifyOrder
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class RelativeWhaleGenerator(BaseInsightGenerator):
@@ -29,7 +30,7 @@ class RelativeWhaleGenerator(BaseInsightGenerator):
     
     PERCENTILE_THRESHOLD = 0.99  # Top 1%
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate relative whale insight.
         """
@@ -6,19 +6,15 @@ Impact: Medium-High (6-8) - opportunity to scale winners
 Category: Growth
 """
 
-from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
+import numpy as np
 from loguru import logger
-from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.company import Workspace
-from app.models.integration import Integration
-from app.models.shopify.order import ShopifyLineItem, ShopifyOrder
-from app.models.shopify.product import ShopifyProduct, ShopifyProductVariant
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class VelocityBreakoutGenerator(BaseInsightGenerator):
@@ -30,137 +26,43 @@ class VelocityBreakoutGenerator(BaseInsightGenerator):
     - Statistical significance (not just noise)
     - Minimum baseline sales required
     """
-    
+
+    uses_brand_data = True
     VELOCITY_MULTIPLIER_THRESHOLD = 3.0
     MIN_BASELINE_SALES = 5  # Require at least 5 sales in baseline period
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate velocity breakout insight.
         """
         logger.debug(f"VelocityBreakout: Starting analysis for brand_id={brand_id}")
         
-        # Define time periods (non-overlapping)
-        today = datetime.utcnow().date()
-        recent_end = today - timedelta(days=1)  # Exclude today
-        recent_start = recent_end - timedelta(days=6)  # Last 7 complete days
-        
-        baseline_end = recent_start - timedelta(days=1)
-        baseline_start = baseline_end - timedelta(days=6)  # Previous 7 complete days
-        
-        # Query: Sales by product for both periods
-        recent_stmt = select(
-            ShopifyProduct.id.label("product_id"),
-            ShopifyProduct.title,
-            ShopifyProductVariant.sku,
-            func.sum(ShopifyLineItem.quantity).label("recent_sales")
-        ).select_from(
-            ShopifyLineItem
-        ).join(
-            ShopifyProductVariant,
-            ShopifyLineItem.variant_id == ShopifyProductVariant.shopify_variant_id
-        ).join(
-            ShopifyProduct,
-            ShopifyProductVariant.product_id == ShopifyProduct.id
-        ).join(
-            ShopifyOrder,
-            ShopifyLineItem.order_id == ShopifyOrder.id
-        ).join(
-            Integration,
-            ShopifyOrder.integration_id == Integration.id
-        ).join(
-            Workspace,
-            Integration.workspace_id == Workspace.id
-        ).where(
-            Workspace.brand_id == brand_id,
-            func.date(ShopifyOrder.shopify_created_at) >= recent_start,
-            func.date(ShopifyOrder.shopify_created_at) <= recent_end,
-            ShopifyOrder.financial_status != 'voided',
-            ShopifyOrder.shopify_cancelled_at == None
-        ).group_by(
-            ShopifyProduct.id,
-            ShopifyProduct.title,
-            ShopifyProductVariant.sku
-        )
-        
-        recent_results = (await session.execute(recent_stmt)).all()
+        if data is None:
+            data = await BrandDataFrame.load(session, brand_id)
+
+        # Units per catalog variant for both periods (precomputed 7d windows)
+        recent_sales = data.units_sold(7)
+        baseline_sales = data.units_sold(7, offset=7)
         
-        if not recent_results:
+        if not recent_sales.any():
             logger.info("VelocityBreakout: No recent sales found")
             return None
         
-        # Build recent sales map
-        recent_sales_map = {
-            (r.product_id, r.sku): float(r.recent_sales)
-            for r in recent_results
-        }
-        
-        # Query baseline period
-        baseline_stmt = select(
-            ShopifyProduct.id.label("product_id"),
-            ShopifyProductVariant.sku,
-            func.sum(ShopifyLineItem.quantity).label("baseline_sales")
-        ).select_from(
-            ShopifyLineItem
-        ).join(
-            ShopifyProductVariant,
-            ShopifyLineItem.variant_id == ShopifyProductVariant.shopify_variant_id
-        ).join(
-            ShopifyProduct,
-            ShopifyProductVariant.product_id == ShopifyProduct.id
-        ).join(
-            ShopifyOrder,
-            ShopifyLineItem.order_id == ShopifyOrder.id
-        ).join(
-            Integration,
-            ShopifyOrder.integration_id == Integration.id
-        ).join(
-            Workspace,
-            Integration.workspace_id == Workspace.id
-        ).where(
-            Workspace.brand_id == brand_id,
-            func.date(ShopifyOrder.shopify_created_at) >= baseline_start,
-            func.date(ShopifyOrder.shopify_created_at) <= baseline_end,
-            ShopifyOrder.financial_status != 'voided',
-            ShopifyOrder.shopify_cancelled_at == None
-        ).group_by(
-            ShopifyProduct.id,
-            ShopifyProductVariant.sku
-        )
-        
-        baseline_results = (await session.execute(baseline_stmt)).all()
-        
-        # Build baseline sales map
-        baseline_sales_map = {
-            (r.product_id, r.sku): float(r.baseline_sales)
-            for r in baseline_results
-        }
+        # Calculate velocity multipliers (skip variants without enough baseline)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            multipliers = np.where(baseline_sales >= self.MIN_BASELINE_SALES, recent_sales / baseline_sales, 0.0)
         
-        # Calculate velocity multipliers
         breakout_products = []
-        
-        for r in recent_results:
-            key = (r.product_id, r.sku)
-            recent_sales = recent_sales_map.get(key, 0)
-            baseline_sales = baseline_sales_map.get(key, 0)
-            
-            # Skip if no baseline
-            if baseline_sales < self.MIN_BASELINE_SALES:
-                continue
-            
-            # Calculate multiplier
-            velocity_multiplier = recent_sales / baseline_sales
-            
-            # Check if breakout
-            if velocity_multiplier >= self.VELOCITY_MULTIPLIER_THRESHOLD:
-                breakout_products.append({
-                    "sku": r.sku or f"Product-{r.product_id}",
-                    "title": r.title,
-                    "recent_sales": int(recent_sales),
-                    "baseline_sales": int(baseline_sales),
-                    "velocity_multiplier": round(velocity_multiplier, 1),
-                    "recommended_stock_increase_pct": min(int((velocity_multiplier - 1) * 100), 200)
-                })
+        for i in np.flatnonzero(multipliers >= self.VELOCITY_MULTIPLIER_THRESHOLD).tolist():
+            velocity_multiplier = float(multipliers[i])
+            breakout_products.append({
+                "sku": data.variant_label(i),
+                "title": data.variant_product_title[i],
+                "recent_sales": int(recent_sales[i]),
+                "baseline_sales": int(baseline_sales[i]),
+                "velocity_multiplier": round(velocity_multiplier, 1),
+                "recommended_stock_increase_pct": min(int((velocity_multiplier - 1) * 100), 200)
+            })
         
         if not breakout_products:
             logger.info("VelocityBreakout: No breakout products found")
@@ -203,8 +105,8 @@ class VelocityBreakoutGenerator(BaseInsightGenerator):
                 "velocity_multiplier": round(avg_multiplier, 1),
                 "top_breakout_skus": top_breakout_skus,
                 "top_items": breakout_products[:5],
-                "recent_period": f"{recent_start} to {recent_end}",
-                "baseline_period": f"{baseline_start} to {baseline_end}",
+                "recent_period": "{} to {}".format(*data.window_bounds(7)),
+                "baseline_period": "{} to {}".format(*data.window_bounds(7, offset=7)),
                 "context": context,
                 "recommendation": recommendation,
                 "confidence": "high",
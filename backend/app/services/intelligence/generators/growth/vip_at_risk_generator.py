@@ -11,7 +11,7 @@ from typing import Optional
 from uuid import UUID
 
 from loguru import logger
-from sqlalchemy import func, select
+from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.company import Workspace
@@ -19,6 +19,7 @@ from app.models.integration import Integration
 from app.models.shopify.customer import ShopifyCustomer
 from app.models.shopify.order import ShopifyOrder
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class VIPAtRiskGenerator(BaseInsightGenerator):
@@ -35,26 +36,32 @@ class VIPAtRiskGenerator(BaseInsightGenerator):
     VIP_LTV_THRESHOLD = 1000.0  # $1000+ = VIP
     OVERDUE_MULTIPLIER = 1.5  # 50% past expected cycle = at risk
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate VIP at risk insight using RFM model.
         """
         logger.debug(f"VIPAtRisk: Starting analysis for brand_id={brand_id}")
         
-        # Step 1: Get all customers with LTV > threshold
-        vip_stmt = select(
-            ShopifyCustomer.id,
-            ShopifyCustomer.email,
-            ShopifyCustomer.first_name,
-            ShopifyCustomer.last_name,
-            func.sum(ShopifyOrder.total_price).label("ltv"),
-            func.count(ShopifyOrder.id).label("order_count"),
-            func.max(ShopifyOrder.shopify_created_at).label("last_order_date")
+        now = datetime.utcnow()
+        ninety_days_ago = now - timedelta(days=90)
+        one_eighty_days_ago = now - timedelta(days=180)
+        
+        # Step 1: Per-order gap to the customer's previous order (one window pass over the brand's orders)
+        gap_days = func.extract(
+            'epoch',
+            ShopifyOrder.shopify_created_at - func.lag(ShopifyOrder.shopify_created_at).over(
+                partition_by=ShopifyOrder.customer_id,
+                order_by=ShopifyOrder.shopify_created_at
+            )
+        ) / 86400  # Convert to days
+        
+        orders_cte = select(
+            ShopifyOrder.customer_id.label("customer_id"),
+            ShopifyOrder.total_price.label("total_price"),
+            ShopifyOrder.shopify_created_at.label("created_at"),
+            gap_days.label("gap_days")
         ).select_from(
-            ShopifyCustomer
-        ).join(
-            ShopifyOrder,
-            ShopifyCustomer.id == ShopifyOrder.customer_id
+            ShopifyOrder
         ).join(
             Integration,
             ShopifyOrder.integration_id == Integration.id
@@ -63,15 +70,42 @@ class VIPAtRiskGenerator(BaseInsightGenerator):
             Integration.workspace_id == Workspace.id
         ).where(
             Workspace.brand_id == brand_id,
+            ShopifyOrder.customer_id != None,
             ShopifyOrder.financial_status != 'voided',
             ShopifyOrder.shopify_cancelled_at == None
+        ).cte("customer_orders")
+        
+        # Step 2: RFM + purchase cycle for every VIP in a single aggregate
+        vip_stmt = select(
+            ShopifyCustomer.id,
+            ShopifyCustomer.email,
+            ShopifyCustomer.first_name,
+            ShopifyCustomer.last_name,
+            func.sum(orders_cte.c.total_price).label("ltv"),
+            func.count().label("order_count"),
+            func.max(orders_cte.c.created_at).label("last_order_date"),
+            func.avg(orders_cte.c.gap_days).label("avg_cycle_days"),
+            func.count().filter(
+                orders_cte.c.created_at >= ninety_days_ago
+            ).label("recent_orders"),
+            func.count().filter(
+                and_(
+                    orders_cte.c.created_at >= one_eighty_days_ago,
+                    orders_cte.c.created_at < ninety_days_ago
+                )
+            ).label("prev_orders")
+        ).select_from(
+            orders_cte
+        ).join(
+            ShopifyCustomer,
+            ShopifyCustomer.id == orders_cte.c.customer_id
         ).group_by(
             ShopifyCustomer.id,
             ShopifyCustomer.email,
             ShopifyCustomer.first_name,
             ShopifyCustomer.last_name
         ).having(
-            func.sum(ShopifyOrder.total_price) >= self.VIP_LTV_THRESHOLD
+            func.sum(orders_cte.c.total_price) >= self.VIP_LTV_THRESHOLD
         )
         
         vip_results = (await session.execute(vip_stmt)).all()
@@ -80,83 +114,23 @@ class VIPAtRiskGenerator(BaseInsightGenerator):
             logger.info("VIPAtRisk: No VIP customers found")
             return None
         
-        # Step 2: Calculate churn risk for each VIP
+        # Step 3: Score churn risk for each VIP (pure Python, no further queries)
         at_risk_vips = []
         
         for vip in vip_results:
-            # Calculate average purchase cycle
-            cycle_stmt = select(
-                func.avg(
-                    func.extract('epoch', 
-                        func.lead(ShopifyOrder.shopify_created_at).over(
-                            order_by=ShopifyOrder.shopify_created_at
-                        ) - ShopifyOrder.shopify_created_at
-                    ) / 86400  # Convert to days
-                ).label("avg_cycle_days")
-            ).select_from(
-                ShopifyOrder
-            ).join(
-                Integration,
-                ShopifyOrder.integration_id == Integration.id
-            ).join(
-                Workspace,
-                Integration.workspace_id == Workspace.id
-            ).where(
-                Workspace.brand_id == brand_id,
-                ShopifyOrder.customer_id == vip.id,
-                ShopifyOrder.financial_status != 'voided'
-            )
-            
-            cycle_result = (await session.execute(cycle_stmt)).scalar()
-            avg_cycle_days = float(cycle_result) if cycle_result else 30.0  # Default 30 days
+            avg_cycle_days = float(vip.avg_cycle_days) if vip.avg_cycle_days else 30.0  # Default 30 days
             
             # Calculate days since last order
-            days_since_last_order = (datetime.utcnow() - vip.last_order_date).days
+            days_since_last_order = (now - vip.last_order_date).days
             
             # Calculate expected next order date
             expected_days = avg_cycle_days * self.OVERDUE_MULTIPLIER
             
             # Check if overdue
             if days_since_last_order > expected_days:
-                # Calculate frequency drop (last 90d vs prev 90d)
-                ninety_days_ago = datetime.utcnow() - timedelta(days=90)
-                one_eighty_days_ago = datetime.utcnow() - timedelta(days=180)
-                
-                recent_orders_stmt = select(
-                    func.count(ShopifyOrder.id)
-                ).select_from(
-                    ShopifyOrder
-                ).join(
-                    Integration,
-                    ShopifyOrder.integration_id == Integration.id
-                ).join(
-                    Workspace,
-                    Integration.workspace_id == Workspace.id
-                ).where(
-                    Workspace.brand_id == brand_id,
-                    ShopifyOrder.shopify_customer_id == vip.id,
-                    ShopifyOrder.shopify_created_at >= ninety_days_ago
-                )
-                
-                prev_orders_stmt = select(
-                    func.count(ShopifyOrder.id)
-                ).select_from(
-                    ShopifyOrder
-                ).join(
-                    Integration,
-                    ShopifyOrder.integration_id == Integration.id
-                ).join(
-                    Workspace,
-                    Integration.workspace_id == Workspace.id
-                ).where(
-                    Workspace.brand_id == brand_id,
-                    ShopifyOrder.shopify_customer_id == vip.id,
-                    ShopifyOrder.shopify_created_at >= one_eighty_days_ago,
-                    ShopifyOrder.shopify_created_at < ninety_days_ago
-                )
-                
-                recent_orders = (await session.execute(recent_orders_stmt)).scalar() or 0
-                prev_orders = (await session.execute(prev_orders_stmt)).scalar() or 0
+                # Frequency drop (last 90d vs prev 90d)
+                recent_orders = vip.recent_orders or 0
+                prev_orders = vip.prev_orders or 0
                 
                 # Calculate churn probability
                 recency_score = min(days_since_last_order / avg_cycle_days, 3.0)  # Cap at 3x
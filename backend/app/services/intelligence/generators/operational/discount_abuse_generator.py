@@ -6,17 +6,13 @@ Impact: Medium (5-7) - Margin erosion
 Category: Operational
 """
 
-from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.company import Workspace
-from app.models.integration import Integration
-from app.models.shopify.order import ShopifyOrder
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class DiscountAbuseGenerator(BaseInsightGenerator):
@@ -28,36 +24,19 @@ class DiscountAbuseGenerator(BaseInsightGenerator):
     2. Calculate Total Discount / Total Revenue ratio.
     3. Flag if Ratio > 20% (Margin Erosion Warning).
     """
+
+    uses_brand_data = True
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate discount abuse insight.
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=30)
-        
-        stmt = select(
-             func.sum(ShopifyOrder.total_price),
-             func.sum(ShopifyOrder.total_discounts)
-        ).join(
-            Integration,
-            ShopifyOrder.integration_id == Integration.id
-        ).join(
-            Workspace,
-            Integration.workspace_id == Workspace.id
-        ).where(
-            Workspace.brand_id == brand_id,
-            ShopifyOrder.shopify_created_at >= cutoff_date,
-            ShopifyOrder.financial_status != 'voided',
-            ShopifyOrder.shopify_cancelled_at == None
-        )
-        
-        row = (await session.execute(stmt)).first()
-        
-        if not row:
-            return None
-            
-        total_sales = float(row[0] or 0)
-        total_discounts = float(row[1] or 0)
+        if data is None:
+            data = await BrandDataFrame.load(session, brand_id)
+
+        orders = data.order_mask(data.days_ago(30))
+        total_sales = float(data.order_total[orders].sum())
+        total_discounts = float(data.order_discounts[orders].sum())
         
         if total_sales < 1000: # Ignore low volume
             return None
@@ -17,6 +17,7 @@ from app.models.company import Workspace
 from app.models.integration import Integration
 from app.models.shopify.order import ShopifyOrder
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class FulfillmentBottleneckGenerator(BaseInsightGenerator):
@@ -31,7 +32,7 @@ class FulfillmentBottleneckGenerator(BaseInsightGenerator):
     
     THRESHOLD_HOURS = 72 # 3 Days
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate fulfillment bottleneck insight.
         """
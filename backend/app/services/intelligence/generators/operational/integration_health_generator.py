@@ -18,6 +18,7 @@ from app.models.company import Workspace
 from app.models.datasource import DataSource
 from app.models.integration import Integration
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class IntegrationHealthGenerator(BaseInsightGenerator):
@@ -29,7 +30,7 @@ class IntegrationHealthGenerator(BaseInsightGenerator):
     
     STALENESS_THRESHOLD_HOURS = 6
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate integration health insight.
         """
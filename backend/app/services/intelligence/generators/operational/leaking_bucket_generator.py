@@ -19,6 +19,7 @@ from app.models.shopify.order import ShopifyLineItem, ShopifyOrder
 from app.models.shopify.product import ShopifyProduct, ShopifyProductVariant
 from app.models.shopify.refund import ShopifyRefund
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class LeakingBucketGenerator(BaseInsightGenerator):
@@ -34,7 +35,7 @@ class LeakingBucketGenerator(BaseInsightGenerator):
     MIN_ORDER_COUNT = 10
     SIGMA_THRESHOLD = 2.0
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate leaking bucket insight.
         """
@@ -18,6 +18,7 @@ from app.models.company import Workspace
 from app.models.integration import Integration
 from app.models.shopify.refund import ShopifyRefund
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class RefundAnomalyGenerator(BaseInsightGenerator):
@@ -29,7 +30,7 @@ class RefundAnomalyGenerator(BaseInsightGenerator):
     
     SPIKE_THRESHOLD = 1.5  # 50% increase
     
-    async def run(self, session: AsyncSession, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session: AsyncSession, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generate refund anomaly insight.
         """
@@ -8,6 +8,7 @@ from sqlalchemy import func, select
 
 from app.models.integration_analytics import IntegrationDailyMetric
 from app.services.intelligence.base_generator import BaseInsightGenerator, InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 
 
 class VelocityGenerator(BaseInsightGenerator):
@@ -33,7 +34,7 @@ class VelocityGenerator(BaseInsightGenerator):
     HIGH_VARIANCE_PENALTY = 0.3    # Reduce impact score by 30% for volatile data
     VOLATILITY_THRESHOLD = 0.5     # StdDev > 50% of mean = high volatility
     
-    async def run(self, session, brand_id: UUID) -> Optional[InsightObject]:
+    async def run(self, session, brand_id: UUID, data: Optional[BrandDataFrame] = None) -> Optional[InsightObject]:
         """
         Generates sales velocity insight with statistical rigor.
         Returns None if data is insufficient or signal is below threshold.
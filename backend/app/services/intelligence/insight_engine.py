@@ -1,10 +1,13 @@
+import asyncio
 import time
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from loguru import logger
 
+from app.core.config import settings
+from app.core.db import async_session_factory
 from app.core.feature_flags import feature_flags
 from app.core.metrics import (
     generator_errors,
@@ -13,6 +16,7 @@ from app.core.metrics import (
 )
 from app.models.insight_tracking import InsightGenerationLog
 from app.services.intelligence.base_generator import InsightObject
+from app.services.intelligence.brand_data import BrandDataFrame
 from app.services.intelligence.llm_service import llm_service
 from app.services.intelligence.validators import (
     fallback_library,
@@ -35,8 +39,14 @@ class InsightEngine:
     6. Log generation history
     """
     
-    def __init__(self):
+    # Per-generator deadline; slower generators are dropped from the deck
+    generator_timeout_s: float = 8.0
+    # Bounded so a deck build never holds more than this many pooled connections
+    max_parallel_generators: int = 8
+
+    def __init__(self, session_factory=None):
         self.generators = []
+        self.session_factory = session_factory or async_session_factory
         self._load_generators()
 
     def _load_generators(self):
@@ -150,8 +160,9 @@ class InsightEngine:
         start_time = time.time()
         logger.info(f"Generating full insight deck for brand_id={brand_id}")
         
-        # Step 1: Run all generators
-        raw_insights = await self._run_generators(session, brand_id)
+        # Step 1: Run all generators over one shared scan of the brand's data
+        data = await self._load_brand_data(session, brand_id)
+        raw_insights = await self._run_generators(session, brand_id, data, skip_frame_generators=data is None)
         
         # Calculate health metrics
         total_gens = len(self.generators)
@@ -219,43 +230,102 @@ class InsightEngine:
             }
         }
     
-    async def _run_generators(self, session, brand_id: UUID) -> List[InsightObject]:
+    async def _load_brand_data(self, session, brand_id: UUID) -> Optional[BrandDataFrame]:
         """
-        Step 1: Run all generators and collect insights.
+        Loads the brand's orders, line items and catalog once for the whole deck.
+        On failure the session is rolled back (quality scoring and generation
+        logging still use it) and the deck is built without frame generators.
         """
-        insights = []
-        
-        for gen in self.generators:
-            gen_start = time.time()
+        start = time.time()
+        try:
+            data = await BrandDataFrame.load(session, brand_id)
+        except Exception as e:
+            logger.error(f"Brand data load failed, skipping generators that need it: {e}")
+            await session.rollback()
+            return None
+        insight_generation_duration.labels(brand_id=str(brand_id), generator="brand_data").observe(time.time() - start)
+        return data
+
+    async def _run_generators(
+        self,
+        session,
+        brand_id: UUID,
+        data: Optional[BrandDataFrame] = None,
+        skip_frame_generators: bool = False,
+    ) -> List[InsightObject]:
+        """
+        Step 1: Run all generators concurrently and collect insights.
+        With `skip_frame_generators` (the deck's frame failed to load),
+        generators that need the frame are left out rather than each
+        repeating the failed load.
+
+        Each generator gets its own pooled session (one AsyncSession cannot serve
+        concurrent queries) and a hard deadline; a generator that misses it is
+        cancelled and left out of the deck instead of holding it back. All of
+        them read the same in-memory BrandDataFrame, which is never mutated.
+        """
+        semaphore = asyncio.Semaphore(self.max_parallel_generators)
+
+        async def run_one(gen) -> Optional[InsightObject]:
             gen_name = gen.__class__.__name__
-            
-            try:
-                insight = await gen.run(session, brand_id)
-                gen_duration = time.time() - gen_start
-                
-                if insight:
-                    insights.append(insight)
-                    logger.debug(
-                        f"Generator {gen_name} produced insight",
-                        extra={
-                            "brand_id": str(brand_id),
-                            "insight_id": insight.id,
-                            "impact_score": insight.impact_score,
-                            "duration_ms": gen_duration * 1000
-                        }
+            async with semaphore:
+                gen_start = time.time()
+                try:
+                    async with self.session_factory() as gen_session:
+                        insight = await asyncio.wait_for(
+                            gen.run(gen_session, brand_id, data=data),
+                            timeout=self.generator_timeout_s
+                        )
+                except asyncio.TimeoutError:
+                    generator_errors.labels(generator=gen_name, error_type="timeout").inc()
+                    logger.warning(
+                        f"Generator {gen_name} exceeded {self.generator_timeout_s}s, dropped from deck",
+                        extra={"brand_id": str(brand_id)}
                     )
-                else:
-                    logger.debug(f"Generator {gen_name} returned None")
-                    
-            except Exception as e:
-                error_type = type(e).__name__
-                generator_errors.labels(generator=gen_name, error_type=error_type).inc()
-                logger.error(
-                    f"Generator {gen_name} failed: {e}",
-                    extra={"brand_id": str(brand_id), "error_type": error_type}
+                    return None
+                except asyncio.CancelledError:
+                    generator_errors.labels(generator=gen_name, error_type="cancelled").inc()
+                    raise
+                except Exception as e:
+                    error_type = type(e).__name__
+                    generator_errors.labels(generator=gen_name, error_type=error_type).inc()
+                    logger.error(
+                        f"Generator {gen_name} failed: {e}",
+                        extra={"brand_id": str(brand_id), "error_type": error_type}
+                    )
+                    return None
+                finally:
+                    gen_duration = time.time() - gen_start
+                    insight_generation_duration.labels(brand_id=str(brand_id), generator=gen_name).observe(gen_duration)
+
+            if insight:
+                logger.debug(
+                    f"Generator {gen_name} produced insight",
+                    extra={
+                        "brand_id": str(brand_id),
+                        "insight_id": insight.id,
+                        "impact_score": insight.impact_score,
+                        "duration_ms": gen_duration * 1000
+                    }
                 )
-        
-        return insights
+            else:
+                logger.debug(f"Generator {gen_name} returned None")
+            return insight
+
+        generators = self.generators
+        if skip_frame_generators:
+            skipped = [gen for gen in generators if getattr(type(gen), "uses_brand_data", False)]
+            for gen in skipped:
+                generator_errors.labels(generator=gen.__class__.__name__, error_type="brand_data_unavailable").inc()
+            if skipped:
+                logger.warning(
+                    f"Brand data unavailable, skipping {len(skipped)} generators",
+                    extra={"brand_id": str(brand_id)}
+                )
+            generators = [gen for gen in generators if gen not in skipped]
+
+        results = await asyncio.gather(*(run_one(gen) for gen in generators))
+        return [insight for insight in results if insight]
     
     async def _validate_insights(self, insights: List[InsightObject]) -> List[InsightObject]:
         """
@@ -312,10 +382,19 @@ class InsightEngine:
 
     async def _enrich_insights(self, insights: List[InsightObject]) -> List[InsightObject]:
         """
-        Step 3: Enrich insights with LLM Context and Recommendations (Parallel).
+        Step 3: Enrich insights with LLM Context and Recommendations.
+        Batched (one prompt per LLM_ENRICH_BATCH_SIZE insights) unless
+        LLM_BATCH_ENRICHMENT is off, then two parallel calls per insight.
         """
-        import asyncio
-        
+        if settings.LLM_BATCH_ENRICHMENT:
+            results = await llm_service.enrich_batch(insights)
+            for insight, (context, recs) in zip(insights, results):
+                if context:
+                    insight.meta["llm_context"] = context
+                if recs:
+                    insight.meta["llm_recommendations"] = recs
+            return list(insights)
+
         # We process all insights in parallel to minimize latency
         async def enrich_one(insight):
             try:
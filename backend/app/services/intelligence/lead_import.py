@@ -0,0 +1,311 @@
+"""
+Streaming lead import for large campaign uploads.
+
+`create-from-csv` takes the whole lead list as one JSON body, dedupes it in a
+Python dict and inserts it with a single multi-row INSERT, so memory and the
+statement's bind parameters grow with the file. This path instead:
+
+- parses raw CSV or NDJSON incrementally as request chunks arrive
+  (`LeadRecordParser`);
+- normalizes phone numbers (digits only, as QueueWarmer compares them) and
+  COPYs leads into a transaction-local staging table in chunks of
+  LEAD_IMPORT_CHUNK_ROWS;
+- merges staging into campaign_leads with one INSERT ... SELECT: latest row per
+  normalized number wins, and a cohort change against the previous duplicate
+  is recorded in meta_data.duplicate_history (same rule as create-from-csv);
+- records progress in `lead_imports` from a separate session, so it can be
+  polled while the import transaction is still open.
+
+Memory stays bounded by the chunk size, whatever the file size. The staging
+table lives in the request's transaction, so a pooled connection is held for
+as long as the upload runs; a client that stalls for more than
+LEAD_IMPORT_IDLE_TIMEOUT_S between chunks fails the import (`UploadStalled`),
+with idle_in_transaction_session_timeout as the server-side backstop.
+"""
+import asyncio
+import codecs
+import csv
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import text, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.core.lead_utils import normalize_phone_number
+from app.models.lead_import import LeadImport
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "campaign_lead_import"
+STAGING_COLUMNS = ("seq", "customer_name", "contact_number", "normalized_number", "cohort", "meta_data")
+
+CREATE_STAGING_SQL = text(f"""
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        seq bigint NOT NULL,
+        customer_name text NOT NULL,
+        contact_number text NOT NULL,
+        normalized_number text NOT NULL,
+        cohort text NOT NULL,
+        meta_data text NOT NULL
+    ) ON COMMIT DROP
+""")
+
+# Latest row per normalized number wins; lag() sees the duplicate it replaced
+MERGE_SQL = text(f"""
+    INSERT INTO campaign_leads (id, campaign_id, customer_name, contact_number, cohort, meta_data, status, created_at)
+    SELECT
+        gen_random_uuid(), :campaign_id, customer_name, contact_number, cohort,
+        (CASE WHEN prev_cohort IS NOT NULL AND prev_cohort <> cohort THEN
+            jsonb_set(meta, '{{duplicate_history}}', COALESCE(meta -> 'duplicate_history', '[]'::jsonb) || jsonb_build_array(
+                jsonb_build_object(
+                    'timestamp', CAST(:merged_at AS text), 'action', 'merged', 'field', 'cohort',
+                    'old_value', prev_cohort, 'new_value', cohort
+                )
+            ))
+        ELSE meta END)::json,
+        'PENDING', :created_at
+    FROM (
+        SELECT
+            customer_name, contact_number, cohort, meta_data::jsonb AS meta,
+            lag(cohort) OVER (PARTITION BY normalized_number ORDER BY seq) AS prev_cohort,
+            row_number() OVER (PARTITION BY normalized_number ORDER BY seq DESC) AS recency
+        FROM {STAGING_TABLE}
+    ) ranked
+    WHERE recency = 1
+    ON CONFLICT (campaign_id, contact_number) DO NOTHING
+""")
+
+# Header auto-detection, same heuristics as the CSV upload card
+NAME_HINTS = ("name",)
+PHONE_HINTS = ("phone", "number", "contact", "mobile")
+COHORT_HINTS = ("cohort", "segment", "group")
+
+
+def _detect_column(headers: List[str], hints: Tuple[str, ...], exclude: Tuple[Optional[str], ...] = ()) -> Optional[str]:
+    for header in headers:
+        if header in exclude:
+            continue
+        if any(hint in header.lower() for hint in hints):
+            return header
+    return None
+
+
+class LeadRecordParser:
+    """
+    Incremental CSV / NDJSON parser. `feed` takes decoded text as it arrives and
+    returns the leads completed so far as (customer_name, contact_number,
+    cohort, meta_data) tuples; `close` flushes the last line.
+
+    CSV needs a header row. Columns are auto-detected unless given; every
+    original column is kept in meta_data, as the upload card does. NDJSON lines
+    are lead objects ({customer_name, contact_number, cohort, meta_data}).
+    """
+
+    def __init__(
+        self,
+        fmt: str = "csv",
+        name_column: Optional[str] = None,
+        phone_column: Optional[str] = None,
+        cohort_column: Optional[str] = None,
+    ):
+        if fmt not in ("csv", "ndjson"):
+            raise ValueError(f"Unsupported lead format: {fmt}")
+        self.fmt = fmt
+        self.name_column = name_column
+        self.phone_column = phone_column
+        self.cohort_column = cohort_column
+        self.headers: Optional[List[str]] = None
+        self._tail = ""
+        # CSV record still open inside a quoted field
+        self._record: List[str] = []
+        self._quotes = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, str, Dict[str, Any]]]:
+        lines = (self._tail + chunk).split("\n")
+        self._tail = lines.pop()
+        return self._parse_lines(lines)
+
+    def close(self) -> List[Tuple[str, str, str, Dict[str, Any]]]:
+        lines, self._tail = [self._tail], ""
+        leads = self._parse_lines(lines)
+        if self._record:
+            raise ValueError("CSV ends inside a quoted field")
+        return leads
+
+    def _parse_lines(self, lines: List[str]) -> List[Tuple[str, str, str, Dict[str, Any]]]:
+        if self.fmt == "ndjson":
+            return [self._ndjson_lead(line) for line in lines if line.strip()]
+
+        records = []
+        for line in lines:
+            self._record.append(line.rstrip("\r"))
+            self._quotes += line.count('"')
+            if self._quotes % 2 == 0:
+                records.append("\n".join(self._record))
+                self._record, self._quotes = [], 0
+
+        leads = []
+        for values in csv.reader(records):
+            if not values or not any(v.strip() for v in values):
+                continue
+            if self.headers is None:
+                self._set_headers([v.strip() for v in values])
+                continue
+            leads.append(self._csv_lead(dict(zip(self.headers, values))))
+        return leads
+
+    def _set_headers(self, headers: List[str]):
+        self.headers = headers
+        self.name_column = self.name_column or _detect_column(headers, NAME_HINTS)
+        self.phone_column = self.phone_column or _detect_column(headers, PHONE_HINTS, exclude=(self.name_column,))
+        self.cohort_column = self.cohort_column or _detect_column(headers, COHORT_HINTS, exclude=(self.name_column, self.phone_column))
+        if not self.phone_column or self.phone_column not in headers:
+            raise ValueError(f"No contact number column found in CSV header: {headers}")
+
+    def _csv_lead(self, row: Dict[str, str]) -> Tuple[str, str, str, Dict[str, Any]]:
+        name = row.get(self.name_column) if self.name_column else None
+        cohort = row.get(self.cohort_column) if self.cohort_column else None
+        return (name or "Unknown", (row.get(self.phone_column) or "").strip(), cohort or "Default", row)
+
+    def _ndjson_lead(self, line: str) -> Tuple[str, str, str, Dict[str, Any]]:
+        try:
+            lead = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid NDJSON line: {e}")
+        if not isinstance(lead, dict):
+            raise ValueError("Each NDJSON line must be a lead object")
+        meta = lead.get("meta_data")
+        return (
+            lead.get("customer_name") or "Unknown",
+            str(lead.get("contact_number") or "").strip(),
+            lead.get("cohort") or "Default",
+            meta if isinstance(meta, dict) else {},
+        )
+
+
+class UploadStalled(Exception):
+    """The client sent no body data for LEAD_IMPORT_IDLE_TIMEOUT_S."""
+
+
+@dataclass
+class StagedLeads:
+    bytes_read: int = 0
+    rows_read: int = 0
+    rows_skipped: int = 0
+    source_hash: str = ""
+
+
+class LeadImporter:
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or async_session_factory
+
+    async def begin(self, import_id: UUID, company_id: UUID, user_id: str) -> LeadImport:
+        async with self._session_factory() as session:
+            lead_import = LeadImport(id=import_id, company_id=company_id, user_id=user_id)
+            session.add(lead_import)
+            await session.commit()
+            return lead_import
+
+    async def record(self, import_id: UUID, **values):
+        """Progress / final state of an import, committed immediately."""
+        async with self._session_factory() as session:
+            await session.execute(
+                update(LeadImport)
+                .where(LeadImport.id == import_id)
+                .values(updated_at=datetime.utcnow(), **values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def stage(
+        self,
+        session: AsyncSession,
+        chunks: AsyncIterator[bytes],
+        parser: LeadRecordParser,
+        import_id: Optional[UUID] = None,
+    ) -> StagedLeads:
+        """
+        Streams the body into the staging table. Lives until `session`'s
+        transaction ends; `merge` must run in the same transaction.
+        """
+        await session.execute(CREATE_STAGING_SQL)
+        idle_timeout = settings.LEAD_IMPORT_IDLE_TIMEOUT_S
+        # Backstop if this process stops reading without rolling back; SET takes no bind parameters
+        await session.execute(text(f"SET LOCAL idle_in_transaction_session_timeout = {int((idle_timeout + 10) * 1000)}"))
+        chunk_rows = max(1, settings.LEAD_IMPORT_CHUNK_ROWS)
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        digest = hashlib.sha256()
+        staged = StagedLeads()
+        buffer: List[Tuple] = []
+
+        async def flush():
+            await self._copy(session, buffer)
+            buffer.clear()
+            if import_id:
+                await self.record(
+                    import_id, bytes_read=staged.bytes_read,
+                    rows_read=staged.rows_read, rows_skipped=staged.rows_skipped,
+                )
+
+        def add(leads):
+            for customer_name, contact_number, cohort, meta in leads:
+                staged.rows_read += 1
+                normalized = normalize_phone_number(contact_number)
+                if not normalized:
+                    staged.rows_skipped += 1
+                    continue
+                buffer.append((
+                    staged.rows_read, str(customer_name), contact_number, normalized,
+                    str(cohort), json.dumps(meta, default=str),
+                ))
+
+        async for chunk in self._until_stalled(chunks, idle_timeout):
+            staged.bytes_read += len(chunk)
+            digest.update(chunk)
+            add(parser.feed(decoder.decode(chunk)))
+            if len(buffer) >= chunk_rows:
+                await flush()
+
+        add(parser.feed(decoder.decode(b"", final=True)))
+        add(parser.close())
+        if buffer:
+            await flush()
+
+        staged.source_hash = digest.hexdigest()
+        return staged
+
+    @staticmethod
+    async def _until_stalled(chunks: AsyncIterator[bytes], idle_timeout: float) -> AsyncIterator[bytes]:
+        iterator = chunks.__aiter__()
+        while True:
+            try:
+                yield await asyncio.wait_for(iterator.__anext__(), idle_timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise UploadStalled(f"No upload data received for {idle_timeout}s")
+
+    async def merge(self, session: AsyncSession, campaign_id: UUID) -> int:
+        """Staging -> campaign_leads in one statement. Returns the number of leads created."""
+        now = datetime.utcnow()
+        result = await session.execute(
+            MERGE_SQL,
+            {"campaign_id": campaign_id, "merged_at": now.isoformat(), "created_at": now},
+        )
+        return result.rowcount
+
+    async def _copy(self, session: AsyncSession, records: List[Tuple]):
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(STAGING_TABLE, records=records, columns=STAGING_COLUMNS)
+
+
+lead_importer = LeadImporter()
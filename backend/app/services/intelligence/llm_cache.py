@@ -0,0 +1,170 @@
+"""
+Response cache for LLMService.
+
+- Keys are SHA-256 content hashes (`stable_key`), identical in every process,
+  unlike Python's per-process randomized `hash()`.
+- Memory tier: size-bounded LRU with per-entry TTL (LLM_CACHE_MAX_ENTRIES).
+- Optional SQLite tier (LLM_CACHE_SQLITE_PATH) shared by all workers on a host;
+  hits are promoted to memory. Expired rows are pruned as writes happen.
+- Single-flight: concurrent callers of the same key share one in-flight
+  generation instead of each calling the model. Failures are not cached.
+
+Every lookup counts toward the `cache_hits` / `cache_misses` Prometheus
+counters; a coalesced waiter counts as a hit since it makes no model call.
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.core.ttl_cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import cache_hits, cache_misses
+
+DEFAULT_TTL_SECONDS = 86400
+# Expired SQLite rows are deleted every this many writes
+PRUNE_EVERY_WRITES = 100
+
+
+def stable_key(namespace: str, *parts: Any) -> str:
+    """Process-independent cache key from JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return f"{namespace}_{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+class LLMGenerationAbandoned(Exception):
+    """The caller running a shared generation was cancelled before it finished."""
+
+
+class SQLiteCacheTier:
+    """Blocking key/value store; LLMResponseCache calls it from a worker thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(value, expires_at) of a live entry."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl_seconds),
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY_WRITES == 0:
+                conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+
+
+class LLMResponseCache:
+
+    def __init__(self, max_entries: Optional[int] = None, sqlite_path: Optional[str] = None):
+        self._memory = TTLCache(max_entries or settings.LLM_CACHE_MAX_ENTRIES, DEFAULT_TTL_SECONDS)
+        self._disk: Optional[SQLiteCacheTier] = None
+        if sqlite_path:
+            try:
+                self._disk = SQLiteCacheTier(sqlite_path)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache: SQLite tier disabled ({sqlite_path}): {e}")
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._memory.get(key)
+        if value is not None or self._disk is None:
+            return value
+        try:
+            entry = await asyncio.to_thread(self._disk.get, key)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache: SQLite read failed: {e}")
+            return None
+        if entry is None:
+            return None
+        value, expires_at = entry
+        # Promoted with the lifetime it has left, not the default TTL
+        self._memory.set(key, value, ttl_seconds=max(0.0, expires_at - time.time()))
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self._memory.set(key, value, ttl_seconds=ttl_seconds)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.set, key, value, ttl_seconds)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache: SQLite write failed: {e}")
+
+    async def get_or_create(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ) -> Any:
+        """
+        Cached value, or the result of `factory()` (stored on success). While a
+        generation for `key` is running, other callers await it instead of
+        starting their own. Exceptions propagate to every waiter; if the caller
+        running the generation is cancelled, waiters get LLMGenerationAbandoned
+        (an Exception, so callers' fallbacks apply) rather than CancelledError.
+        """
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            cache_hits.inc()
+            return await asyncio.shield(inflight)
+
+        cached = await self.get(key)
+        if cached is not None:
+            cache_hits.inc()
+            return cached
+
+        # A concurrent caller may have started while we read the disk tier
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            cache_hits.inc()
+            return await asyncio.shield(inflight)
+
+        cache_misses.inc()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await factory()
+            await self.set(key, value, ttl_seconds)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # Waiters were not cancelled themselves; fail them with something they can catch
+            future.set_exception(LLMGenerationAbandoned(f"Generation for {key} was cancelled"))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure does not warn
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._memory.clear()
+
+
+llm_cache = LLMResponseCache(sqlite_path=settings.LLM_CACHE_SQLITE_PATH)
@@ -2,16 +2,21 @@
 import asyncio
 import json
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import google.generativeai as genai
 from loguru import logger
 
 from app.core.config import settings
+from app.core.metrics import llm_enrichment_insights
+from app.services.intelligence.llm_cache import llm_cache, stable_key
+
+DEFAULT_RECOMMENDATIONS = ["Review inventory levels", "Monitor sales trend", "Check supplier lead times"]
+
+
+class InvalidBatchResponse(ValueError):
+    """A batched enrichment response with no usable entry; never cached."""
 
-# In-memory cache for simplicity and speed
-# Structure: {cache_key: {"data": response, "expires_at": timestamp}}
-insight_cache = {}
 
 class LLMService:
     """
@@ -26,9 +31,11 @@ class LLMService:
     Constraints:
     - NEVER calculates numbers.
     - Uses caching to minimize latency and cost.
+    - At most LLM_MAX_CONCURRENCY requests in flight per process.
     """
     
     def __init__(self):
+        self._semaphore = asyncio.Semaphore(max(1, settings.LLM_MAX_CONCURRENCY))
         self.api_key = settings.GEMINI_API_KEY
         if not self.api_key:
             logger.warning("GEMINI_API_KEY not found. LLM features will be disabled.")
@@ -46,9 +53,7 @@ class LLMService:
         if not self.model:
             return ""
 
-        cache_key = f"context_{insight.id}_{hash(json.dumps(insight.meta, sort_keys=True))}"
-        if cached := self._get_from_cache(cache_key):
-            return cached
+        cache_key = stable_key("context", insight.id, insight.meta)
 
         prompt = f"""
         You are a retail operations expert. 
@@ -64,9 +69,7 @@ class LLMService:
         """
         
         try:
-            response = await self._generate(prompt)
-            self._set_cache(cache_key, response)
-            return response
+            return await llm_cache.get_or_create(cache_key, lambda: self._generate(prompt))
         except Exception as e:
             logger.error(f"LLM Enrichment failed: {e}")
             return ""
@@ -78,9 +81,7 @@ class LLMService:
         if not self.model:
             return []
 
-        cache_key = f"recs_{insight.id}_{hash(json.dumps(insight.meta, sort_keys=True))}"
-        if cached := self._get_from_cache(cache_key):
-            return cached
+        cache_key = stable_key("recs", insight.id, insight.meta)
 
         prompt = f"""
         You are a retail strategist.
@@ -92,16 +93,143 @@ class LLMService:
         Format: Return ONLY a JSON array of strings. Example: ["Run a flash sale", "Contact supplier"]
         """
         
-        try:
+        async def generate() -> List[str]:
             text = await self._generate(prompt)
             # Clean up potential markdown code blocks
             text = text.replace("```json", "").replace("```", "").strip()
-            recs = json.loads(text)
-            self._set_cache(cache_key, recs)
-            return recs
+            return json.loads(text)
+
+        try:
+            return await llm_cache.get_or_create(cache_key, generate)
         except Exception as e:
             logger.error(f"LLM Recs failed: {e}")
-            return ["Review inventory levels", "Monitor sales trend", "Check supplier lead times"]
+            return list(DEFAULT_RECOMMENDATIONS)
+
+    async def enrich_batch(self, insights: List[Any]) -> List[Tuple[str, List[str]]]:
+        """
+        (context, recommendations) per insight, with one prompt per
+        LLM_ENRICH_BATCH_SIZE insights instead of two calls each. Shares the
+        enrich_context / generate_recommendations cache entries; insights the
+        batched response leaves out or malforms fall back to those calls.
+        """
+        if not self.model:
+            return [("", []) for _ in insights]
+
+        results: List[Optional[Tuple[str, List[str]]]] = [None] * len(insights)
+        pending = []
+        # Lookups may each hop to the SQLite tier's thread, so run them together
+        cached = await asyncio.gather(*(
+            llm_cache.get(stable_key(namespace, insight.id, insight.meta))
+            for insight in insights
+            for namespace in ("context", "recs")
+        ))
+        for index in range(len(insights)):
+            context, recs = cached[2 * index], cached[2 * index + 1]
+            if context is not None and recs is not None:
+                results[index] = (context, recs)
+            else:
+                pending.append(index)
+        llm_enrichment_insights.labels(path="cached").inc(len(insights) - len(pending))
+
+        size = max(1, settings.LLM_ENRICH_BATCH_SIZE)
+        chunks = [pending[start:start + size] for start in range(0, len(pending), size)]
+        batches = await asyncio.gather(*(
+            self._enrich_chunk([insights[index] for index in chunk]) for chunk in chunks
+        ))
+
+        fallback = []
+        for chunk, parsed in zip(chunks, batches):
+            for index, entry in zip(chunk, parsed):
+                if entry is None:
+                    fallback.append(index)
+                else:
+                    results[index] = entry
+        llm_enrichment_insights.labels(path="batched").inc(len(pending) - len(fallback))
+
+        if fallback:
+            llm_enrichment_insights.labels(path="fallback").inc(len(fallback))
+            singles = await asyncio.gather(*(
+                asyncio.gather(self.enrich_context(insights[index]), self.generate_recommendations(insights[index]))
+                for index in fallback
+            ))
+            for index, (context, recs) in zip(fallback, singles):
+                results[index] = (context, recs)
+
+        return results
+
+    async def _enrich_chunk(self, insights: List[Any]) -> List[Optional[Tuple[str, List[str]]]]:
+        """
+        One batched prompt. None marks an insight to retry on its own; a failed
+        call (timeout, quota) gets the same defaults the per-insight path returns.
+        Only validated entries are cached, so a malformed response is not replayed.
+        """
+        payload = [
+            {"key": key, "title": insight.title, "description": insight.description, "metadata": insight.meta}
+            for key, insight in enumerate(insights)
+        ]
+        prompt = f"""
+        You are a retail operations expert and strategist.
+        Insights: {json.dumps(payload, indent=2, default=str)}
+        
+        Task: For EACH insight:
+        1. "context": Explain in 1-2 sentences WHY this situation is happening.
+           Be professional but conversational, do NOT repeat numbers from the description,
+           and focus on potential root causes (seasonality, market trends, operational bottlenecks).
+        2. "recommendations": Suggest 3 specific, actionable steps to address it.
+        Format: Return ONLY a JSON array with one object per insight, using its key. Example:
+        [{{"key": 0, "context": "...", "recommendations": ["Run a flash sale", "Contact supplier", "..."]}}]
+        """
+
+        # Same chunk from concurrent deck builds: one model call (single-flight)
+        cache_key = stable_key("enrich_batch", [(insight.id, insight.meta) for insight in insights])
+
+        async def generate_parsed():
+            return self._parse_batch(await self._generate(prompt), len(insights))
+
+        try:
+            cached = await llm_cache.get_or_create(cache_key, generate_parsed)
+        except InvalidBatchResponse as e:
+            logger.warning(f"LLM batched enrichment unusable, falling back per insight: {e}")
+            return [None] * len(insights)
+        except Exception as e:
+            logger.error(f"LLM batched enrichment failed: {e}")
+            llm_enrichment_insights.labels(path="failed").inc(len(insights))
+            return [("", list(DEFAULT_RECOMMENDATIONS)) for _ in insights]
+
+        # Entries come back as lists once they round-trip through the SQLite tier
+        parsed = [(entry[0], entry[1]) if entry else None for entry in cached]
+        for insight, entry in zip(insights, parsed):
+            if entry is not None:
+                context, recs = entry
+                await llm_cache.set(stable_key("context", insight.id, insight.meta), context)
+                await llm_cache.set(stable_key("recs", insight.id, insight.meta), recs)
+        return parsed
+
+    def _parse_batch(self, text: str, count: int) -> List[Optional[Tuple[str, List[str]]]]:
+        """Validated entries by key; raises InvalidBatchResponse if none is usable."""
+        parsed: List[Optional[Tuple[str, List[str]]]] = [None] * count
+        # Clean up potential markdown code blocks
+        text = text.replace("```json", "").replace("```", "").strip()
+        try:
+            entries = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise InvalidBatchResponse(f"invalid JSON: {e}") from e
+        if not isinstance(entries, list):
+            raise InvalidBatchResponse("expected a JSON array")
+
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            key, context, recs = entry.get("key"), entry.get("context"), entry.get("recommendations")
+            if (
+                isinstance(key, int) and 0 <= key < count
+                and isinstance(context, str) and context.strip()
+                and isinstance(recs, list) and recs and all(isinstance(r, str) for r in recs)
+            ):
+                parsed[key] = (context.strip(), recs)
+        if not any(parsed):
+            raise InvalidBatchResponse("no valid entries")
+        return parsed
 
     async def chat_about_insight(self, context: Dict[str, Any], message: str) -> str:
         """
@@ -142,11 +270,8 @@ class LLMService:
             return f"Good morning, {user_name}. You have {len(insights)} priority insights to review."
 
         # Cache key based on insight IDs to avoid regenerating for same state
-        insight_ids = sorted([i.id for i in insights])
-        cache_key = f"briefing_{user_name}_{hash(tuple(insight_ids))}"
-        # Shorter cache for briefing (e.g., 1 hour)
-        if cached := self._get_from_cache(cache_key):
-             return cached
+        insight_ids = sorted(str(i.id) for i in insights)
+        cache_key = stable_key("briefing", user_name, insight_ids)
 
         insight_summaries = [
             f"- [{i.meta.get('category', 'operational').upper()}] {i.title}: {i.description} (Impact: {i.impact_score}/10)"
@@ -174,9 +299,10 @@ class LLMService:
 
         try:
             # Use Pro model for better synthesis
-            response = await self._generate(prompt, model_type="flash")
-            self._set_cache(cache_key, response, ttl=3600)
-            return response
+            # Shorter cache for briefing (1 hour)
+            return await llm_cache.get_or_create(
+                cache_key, lambda: self._generate(prompt, model_type="flash"), ttl_seconds=3600
+            )
         except Exception as e:
             logger.error(f"LLM Briefing failed: {e}")
             return f"Good morning, {user_name}. Here is your daily intelligence deck."
@@ -193,9 +319,7 @@ class LLMService:
             return "Lead found by AI (Short call)."
 
         # Cache key based on transcript hash
-        cache_key = f"convex_summary_{hash(transcript)}"
-        if cached := self._get_from_cache(cache_key):
-            return cached
+        cache_key = stable_key("convex_summary", transcript)
 
         prompt = f"""
         You are a sales assistant. 
@@ -209,14 +333,15 @@ class LLMService:
         Example: "Interested in premium plan, wants demo Tuesday. Budget approved."
         """
 
-        try:
+        async def generate() -> str:
             summary = await self._generate(prompt, model_type="flash")
             # Enforce length just in case
             if len(summary.split()) > 25:
                  summary = " ".join(summary.split()[:25]) + "..."
-            
-            self._set_cache(cache_key, summary, ttl=86400) # 24h cache
             return summary
+
+        try:
+            return await llm_cache.get_or_create(cache_key, generate, ttl_seconds=86400) # 24h cache
         except Exception as e:
             logger.error(f"LLM Summary generation failed: {e}")
             return "Lead found by AI. Check transcript."
@@ -262,15 +387,17 @@ class LLMService:
             # Set timeout based on model type
             timeout = 90.0 if model_type == "pro" else 60.0
             
-            logger.info(f"LLM Generation starting (model: {model_type}, timeout: {timeout}s)")
-            start_time = time.time()
-            
-            response = await asyncio.wait_for(
-                model.generate_content_async(prompt),
-                timeout=timeout
-            )
-            
-            duration = time.time() - start_time
+            # Timeout covers the call itself, not the wait for a slot
+            async with self._semaphore:
+                logger.info(f"LLM Generation starting (model: {model_type}, timeout: {timeout}s)")
+                start_time = time.time()
+                
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt),
+                    timeout=timeout
+                )
+                
+                duration = time.time() - start_time
             logger.info(f"LLM Generation completed in {duration:.2f}s")
             
             return response.text.strip()
@@ -330,20 +457,5 @@ class LLMService:
             logger.error(f"LLM Extraction failed: {e}")
             return {}
 
-    def _get_from_cache(self, key: str) -> Any:
-        if key in insight_cache:
-            entry = insight_cache[key]
-            if time.time() < entry["expires_at"]:
-                return entry["data"]
-            else:
-                del insight_cache[key]
-        return None
-
-    def _set_cache(self, key: str, value: Any, ttl: int = 86400): # Default 24h
-        insight_cache[key] = {
-            "data": value,
-            "expires_at": time.time() + ttl
-        }
-
 # Singleton instance
 llm_service = LLMService()
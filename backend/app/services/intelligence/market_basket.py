@@ -0,0 +1,171 @@
+"""
+Vectorized market-basket analysis (association rules) over sparse incidence matrices.
+
+Baskets are encoded as an orders x items 0/1 CSR matrix X. Pair co-occurrence
+counts are the off-diagonal of XᵀX, computed in one sparse product instead of
+enumerating every pair in every basket. Triples extend only the frequent pairs
+(Apriori pruning): for each kept pair (a, b) the column product X[:, a] ∘ X[:, b]
+marks the orders containing both, and one more sparse product against X counts
+every third item. Items below the minimum count are dropped before any product.
+
+Stateless and DB-free: callers hand in parallel (basket, item) code arrays, e.g.
+BrandDataFrame line columns, and get back ranked rules.
+"""
+from dataclasses import dataclass, field
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+@dataclass
+class AssociationRule:
+    antecedent: Tuple[str, ...]
+    consequent: str
+    count: int          # orders containing every item of the rule
+    antecedent_count: int  # orders containing the antecedent
+    support: float      # count / number of orders
+    confidence: float   # P(consequent | antecedent)
+    lift: float         # confidence / P(consequent)
+
+    @property
+    def items(self) -> Tuple[str, ...]:
+        return self.antecedent + (self.consequent,)
+
+
+@dataclass
+class BasketAnalysis:
+    n_orders: int
+    pairs: List[AssociationRule] = field(default_factory=list)
+    triples: List[AssociationRule] = field(default_factory=list)
+
+
+class MarketBasketEngine:
+    """
+    min_count:        minimum number of orders an itemset must appear in
+    top_k:            rules kept per itemset size (ranked by `rank_by`)
+    max_triple_pairs: frequent pairs (by count) extended to triples
+    """
+
+    RANK_KEYS = ("count", "confidence", "lift")
+
+    def __init__(self, min_count: int = 3, top_k: int = 20, max_triple_pairs: int = 200, rank_by: str = "count"):
+        if rank_by not in self.RANK_KEYS:
+            raise ValueError(f"rank_by must be one of {self.RANK_KEYS}")
+        self.min_count = min_count
+        self.top_k = top_k
+        self.max_triple_pairs = max_triple_pairs
+        self.rank_by = rank_by
+
+    def analyze(
+        self,
+        baskets: np.ndarray,
+        items: np.ndarray,
+        labels: Sequence[str],
+        include_triples: bool = False,
+    ) -> BasketAnalysis:
+        """
+        baskets / items: parallel integer arrays (one entry per line item);
+        duplicates of an item within a basket count once. labels[item] names an item.
+        """
+        baskets = np.asarray(baskets, dtype=np.int64)
+        items = np.asarray(items, dtype=np.int64)
+        if not len(baskets):
+            return BasketAnalysis(n_orders=0)
+
+        _, basket_rows = np.unique(baskets, return_inverse=True)
+        n_orders = int(basket_rows.max()) + 1
+
+        X = sparse.csr_matrix(
+            (np.ones(len(items), dtype=np.int32), (basket_rows, items)),
+            shape=(n_orders, max(len(labels), int(items.max()) + 1)),
+        )
+        X.sum_duplicates()
+        X.data[:] = 1
+
+        item_counts = np.asarray(X.sum(axis=0)).ravel()
+        # An itemset can never be more frequent than its rarest item
+        frequent = np.flatnonzero(item_counts >= self.min_count)
+        if len(frequent) < 2:
+            return BasketAnalysis(n_orders=n_orders)
+        X = X[:, frequent].tocsc()
+        counts = item_counts[frequent].astype(np.float64)
+
+        analysis = BasketAnalysis(n_orders=n_orders)
+        pair_a, pair_b, pair_n = self._frequent_pairs(X)
+        analysis.pairs = self._pair_rules(pair_a, pair_b, pair_n, counts, n_orders, frequent, labels)
+        if include_triples and len(pair_n):
+            analysis.triples = self._triple_rules(X, pair_a, pair_b, pair_n, counts, n_orders, frequent, labels)
+        return analysis
+
+    def _frequent_pairs(self, X: sparse.csc_matrix) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        co = sparse.triu(X.T @ X, k=1).tocoo()
+        keep = co.data >= self.min_count
+        return co.row[keep], co.col[keep], co.data[keep].astype(np.float64)
+
+    def _pair_rules(self, a, b, n, counts, n_orders, frequent, labels) -> List[AssociationRule]:
+        # Orient each pair in its stronger direction: antecedent is the rarer item
+        conf_ab = n / counts[a]
+        conf_ba = n / counts[b]
+        forward = conf_ab >= conf_ba
+        antecedent = np.where(forward, a, b)
+        consequent = np.where(forward, b, a)
+        confidence = np.maximum(conf_ab, conf_ba)
+        lift = n * n_orders / (counts[a] * counts[b])
+
+        order = self._top(n, confidence, lift)
+        return [
+            AssociationRule(
+                antecedent=(labels[frequent[antecedent[i]]],),
+                consequent=labels[frequent[consequent[i]]],
+                count=int(n[i]),
+                antecedent_count=int(counts[antecedent[i]]),
+                support=float(n[i] / n_orders),
+                confidence=float(confidence[i]),
+                lift=float(lift[i]),
+            )
+            for i in order
+        ]
+
+    def _triple_rules(self, X, pair_a, pair_b, pair_n, counts, n_orders, frequent, labels) -> List[AssociationRule]:
+        seeds = np.argsort(-pair_n, kind="stable")[: self.max_triple_pairs]
+        a, b, n_ab = pair_a[seeds], pair_b[seeds], pair_n[seeds]
+
+        # Orders containing both items of each seed pair (orders x seeds)
+        both = X[:, a].multiply(X[:, b]).tocsc()
+        co = (both.T @ X).tocoo()  # seeds x items: orders containing {a, b, c}
+
+        seed, c, n = co.row, co.col, co.data.astype(np.float64)
+        # Each triple once: consequent must come after b (and therefore after a)
+        keep = (n >= self.min_count) & (c > b[seed])
+        seed, c, n = seed[keep], c[keep], n[keep]
+        if not len(n):
+            return []
+
+        confidence = n / n_ab[seed]
+        lift = confidence * n_orders / counts[c]
+
+        order = self._top(n, confidence, lift)
+        return [
+            AssociationRule(
+                antecedent=(labels[frequent[a[seed[i]]]], labels[frequent[b[seed[i]]]]),
+                consequent=labels[frequent[c[i]]],
+                count=int(n[i]),
+                antecedent_count=int(n_ab[seed[i]]),
+                support=float(n[i] / n_orders),
+                confidence=float(confidence[i]),
+                lift=float(lift[i]),
+            )
+            for i in order
+        ]
+
+    def _top(self, count: np.ndarray, confidence: np.ndarray, lift: np.ndarray) -> List[int]:
+        key = {"count": count, "confidence": confidence, "lift": lift}[self.rank_by]
+        k = min(self.top_k, len(key))
+        if k < len(key):
+            candidates = np.argpartition(-key, k - 1)[:k]
+        else:
+            candidates = np.arange(len(key))
+        # Ties broken by count so results are stable across runs
+        return candidates[np.lexsort((-count[candidates], -key[candidates]))].tolist()
+
@@ -62,6 +62,27 @@ class PlaybookService:
                 "inputs": ["conversion_drop_buffer"]
             }
         },
+        "cross_sell_opportunity": {
+            "title": "Launch a Bundle",
+            "steps": [
+                PlaybookStep(id="1", text="Review the products that are bought together most often.", type="link", link="https://admin.shopify.com/store/{store_domain}/products", action_label="Open Products"),
+                PlaybookStep(id="2", text="Create a bundle of the driver and attached product at a small discount.", type="instruction"),
+                PlaybookStep(id="3", text="Add the attached product as a post-purchase upsell on the driver product.", type="instruction"),
+                PlaybookStep(id="4", text="Compare the attach rate after 30 days against the insight's confidence.", type="instruction")
+            ],
+            "simulation_params": {
+                "type": "bundle_attach",
+                "inputs": ["driver_orders", "confidence", "attached_price", "target_confidence", "bundle_discount", "period_days"],
+                "ui_config": {
+                    "label": "Bundle Discount",
+                    "unit": "%",
+                    "min": 0,
+                    "max": 50,
+                    "default": 10,
+                    "impact_label": "Incremental Revenue"
+                }
+            }
+        },
         "geo_spike": {
             "title": "Capitalize on Regional Spike",
             "steps": [
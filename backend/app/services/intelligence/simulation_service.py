@@ -14,6 +14,8 @@ class SimulationService:
             return self._sim_inventory_clearance(inputs)
         elif scenario_type == "return_reduction":
             return self._sim_return_reduction(inputs)
+        elif scenario_type == "bundle_attach":
+            return self._sim_bundle_attach(inputs)
         
         return {"error": "Unknown scenario type"}
 
@@ -52,4 +54,30 @@ class SimulationService:
             "projected_annual_savings": saved_revenue * 52
         }
 
+    def _sim_bundle_attach(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calculate revenue from lifting the attach rate of a cross-sell pair.
+        Inputs come from the cross_sell_opportunity insight (MarketBasketEngine rule):
+        driver_orders, confidence (current attach rate), attached_price,
+        target_confidence, bundle_discount (0.0-1.0), period_days
+        """
+        driver_orders = float(inputs.get("driver_orders", 0))
+        current_rate = float(inputs.get("confidence", 0))
+        target_rate = min(1.0, float(inputs.get("target_confidence", current_rate * 1.5)))
+        price = float(inputs.get("attached_price", 0))
+        discount = float(inputs.get("bundle_discount", 0.1))
+        period_days = float(inputs.get("period_days", 60)) or 60.0
+        
+        extra_attachments = driver_orders * max(0.0, target_rate - current_rate)
+        # The discount applies to every bundled accessory, including those that would attach anyway
+        discount_cost = driver_orders * target_rate * price * discount
+        incremental_revenue = extra_attachments * price - discount_cost
+        
+        return {
+            "extra_attachments": round(extra_attachments, 1),
+            "incremental_revenue": round(incremental_revenue, 2),
+            "discount_cost": round(discount_cost, 2),
+            "projected_annual_revenue": round(incremental_revenue * 365.0 / period_days, 2)
+        }
+
 simulation_service = SimulationService()
@@ -2,10 +2,11 @@ from datetime import datetime, timedelta
 from typing import Dict, Optional
 from uuid import UUID
 
+from sqlalchemy import case, delete, exists, literal, literal_column, union, update
+from sqlalchemy.dialects.postgresql import distinct_on, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import and_, func, or_, select
 
-from app.core.lead_utils import normalize_phone_number
 from app.models.bolna_execution_map import BolnaExecutionMap
 from app.models.campaign import Campaign
 from app.models.campaign_lead import CampaignLead
@@ -14,6 +15,20 @@ from app.models.queue_item import QueueItem
 from app.services.bolna_caller import BolnaCaller
 
 
+# Live Bolna call states (stored case varies by webhook source)
+INITIATED_CALL_STATUS = "initiated"
+ACTIVE_CALL_STATUSES = ["ringing", "connected", "speaking", "listening", "processing", "in-progress"]
+
+
+def normalized_number(column):
+    """
+    SQL twin of normalize_phone_number (digits only). Matches the expression
+    index ix_campaign_leads_normalized_number: the pattern and flags are inline
+    literals, since bind params in a generic prepared plan don't match the index.
+    """
+    return func.regexp_replace(column, literal_column(r"'\D'"), literal_column("''"), literal_column("'g'"))
+
+
 class QueueWarmer:
     
     @staticmethod
@@ -24,48 +39,28 @@ class QueueWarmer:
         rather than processing stale items that were queued hours ago.
         """
         try:
-            # Delete only READY items (orphaned waiting items)
-            stmt = (
-                select(QueueItem)
+            from app.models.user_queue_item import UserQueueItem
+            
+            # Delete only READY items (orphaned waiting items), except those a UserQueueItem
+            # still references (PROTECTED)
+            clearable = (
+                select(QueueItem.id)
                 .where(QueueItem.campaign_id == campaign_id)
                 .where(QueueItem.status == "READY")
+                .where(~exists().where(UserQueueItem.original_queue_item_id == QueueItem.id))
             )
-            result = await session.execute(stmt)
-            items = result.scalars().all()
-            
-            if not items:
-                return
-                
-            item_ids = [item.id for item in items]
             
             # [FIX] Delete associated BolnaExecutionMap records first to avoid ForeignKeyViolationError
             # Although READY items shouldn't have maps, this provides a safety layer for stale/resumed state.
-            from sqlalchemy import delete
-            from app.models.user_queue_item import UserQueueItem
-            
-            # 1. Identify which items are referenced by UserQueueItems (PROTECTED)
-            protected_stmt = select(UserQueueItem.original_queue_item_id).where(
-                UserQueueItem.original_queue_item_id.in_(item_ids)
-            )
-            protected_result = await session.execute(protected_stmt)
-            protected_ids = set(protected_result.scalars().all())
-            
-            # 2. Filter out protected items
-            items_to_delete = [item for item in items if item.id not in protected_ids]
-            ids_to_delete = [item.id for item in items_to_delete]
-            
-            if not ids_to_delete:
-                print(f"[QueueWarmer] All {len(items)} READY items are protected by UserQueue. Skipping cleanup.")
-                return
-
-            # 3. Delete Execution Maps for the items we ARE deleting
             await session.execute(
-                delete(BolnaExecutionMap).where(BolnaExecutionMap.queue_item_id.in_(ids_to_delete))
+                delete(BolnaExecutionMap).where(BolnaExecutionMap.queue_item_id.in_(clearable.scalar_subquery()))
             )
-                
-            print(f"[QueueWarmer] Clearing {len(items_to_delete)} READY items (Protected: {len(protected_ids)})...")
-            for item in items_to_delete:
-                await session.delete(item)
+            result = await session.execute(
+                delete(QueueItem)
+                .where(QueueItem.id.in_(clearable.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            )
+            print(f"[QueueWarmer] Cleared {result.rowcount or 0} READY items for campaign {campaign_id}.")
                 
             # Flush to ensure deletions happen before we try to create new ones
             await session.flush()
@@ -168,178 +163,154 @@ class QueueWarmer:
         """
         try:
             stale_cutoff = datetime.utcnow() - timedelta(minutes=5)
+            # Allow retry if rules permit: reset for retry instead of hard fail
+            retryable = QueueItem.execution_count < 2
             
-            stmt = (
-                select(QueueItem)
+            result = await session.execute(
+                update(QueueItem)
                 .where(QueueItem.campaign_id == campaign.id)
                 .where(QueueItem.status == "DIALING_INTENT")
                 .where(QueueItem.updated_at < stale_cutoff)
+                .values(
+                    status=case((retryable, "READY"), else_="FAILED"),
+                    outcome=case((retryable, "Retry Pending (Timeout)"), else_="System Timeout (Stale)"),
+                    priority_score=case((retryable, QueueItem.priority_score + 50), else_=QueueItem.priority_score),  # Boost priority for retry
+                    updated_at=datetime.utcnow()  # [FIX] Refresh timestamp
+                )
+                .execution_options(synchronize_session=False)
             )
-            result = await session.execute(stmt)
-            stale_items = result.scalars().all()
-            
-            if not stale_items:
-                return
-
-            print(f"[QueueWarmer] Found {len(stale_items)} stale DIALING_INTENT items. Cleaning up...")
-            
-            for item in stale_items:
-                print(f"[QueueWarmer] Failing stale item {item.id} (Lead {item.lead_id})")
-                item.status = "FAILED"
-                item.outcome = "System Timeout (Stale)"
-                # Allow retry if rules permit
-                if item.execution_count < 2:
-                     # Reset for retry instead of hard fail
-                     item.status = "READY"
-                     item.outcome = "Retry Pending (Timeout)"
-                     item.priority_score += 50 # Boost priority for retry
-                
-                item.updated_at = datetime.utcnow() # [FIX] Refresh timestamp
-                session.add(item)
-            
-            await session.flush()    
+            if result.rowcount:
+                print(f"[QueueWarmer] Cleaned up {result.rowcount} stale DIALING_INTENT items.")
         except Exception as e:
             print(f"[QueueWarmer] Error cleaning stale items: {e}")
 
     @staticmethod
-    async def _get_busy_phone_numbers(session: AsyncSession, campaign_id: UUID) -> set:
+    def _busy_numbers_query(campaign_id: UUID):
         """
-        Returns a set of normalized phone numbers that are currently actively being called.
+        Normalized phone numbers currently being called in this campaign: items in
+        DIALING_INTENT, plus live Bolna calls (only maps touched within the active
+        window are considered, so the scan stays small however many calls were made).
         """
         # Timeouts for stale calls (matching execution.py)
         initiated_cutoff = datetime.utcnow() - timedelta(minutes=5)
         active_cutoff = datetime.utcnow() - timedelta(minutes=30)
+        call_status = func.lower(BolnaExecutionMap.call_status)
 
-        # Query active execution maps and dialing intent items
-        statement = (
-            select(CampaignLead.contact_number)
+        dialing = (
+            select(normalized_number(CampaignLead.contact_number).label("number"))
             .join(QueueItem, CampaignLead.id == QueueItem.lead_id)
-            .outerjoin(BolnaExecutionMap, QueueItem.id == BolnaExecutionMap.queue_item_id)
             .where(QueueItem.campaign_id == campaign_id)
+            .where(QueueItem.status == "DIALING_INTENT")
+        )
+        live_calls = (
+            select(normalized_number(CampaignLead.contact_number).label("number"))
+            .select_from(BolnaExecutionMap)
+            .join(QueueItem, QueueItem.id == BolnaExecutionMap.queue_item_id)
+            .join(CampaignLead, CampaignLead.id == QueueItem.lead_id)
+            .where(BolnaExecutionMap.campaign_id == campaign_id)
+            .where(BolnaExecutionMap.updated_at > active_cutoff)
             .where(
                 or_(
-                    QueueItem.status == "DIALING_INTENT",
-                    and_(
-                        func.lower(BolnaExecutionMap.call_status).in_(["initiated", "ringing", "connected", "speaking", "listening", "processing", "in-progress"]),
-                        or_(
-                            and_(
-                                func.lower(BolnaExecutionMap.call_status) == "initiated",
-                                BolnaExecutionMap.updated_at > initiated_cutoff
-                            ),
-                            and_(
-                                func.lower(BolnaExecutionMap.call_status).in_(["ringing", "connected", "speaking", "listening", "processing", "in-progress"]),
-                                BolnaExecutionMap.updated_at > active_cutoff
-                            )
-                        )
-                    )
+                    and_(call_status == INITIATED_CALL_STATUS, BolnaExecutionMap.updated_at > initiated_cutoff),
+                    call_status.in_(ACTIVE_CALL_STATUSES)
                 )
             )
         )
-        
-        result = await session.execute(statement)
-        numbers = result.scalars().all()
-        return {normalize_phone_number(n) for n in numbers if n}
+        return union(dialing, live_calls)
+
+    @staticmethod
+    async def _get_busy_phone_numbers(session: AsyncSession, campaign_id: UUID) -> set:
+        """
+        Returns a set of normalized phone numbers that are currently actively being called.
+        """
+        result = await session.execute(QueueWarmer._busy_numbers_query(campaign_id))
+        return {number for number in result.scalars().all() if number}
 
     @staticmethod
     async def _promote_buffer(session: AsyncSession, campaign: Campaign, slots: int):
         """
         Moves top priority items from READY -> DIALING_INTENT and triggers calls.
         Deduplicates by phone number to prevent parallel calls to the same person.
+        
+        Selection and the status flip are one UPDATE ... RETURNING: per normalized
+        number the best READY item, minus numbers already busy, top `slots` by priority.
         """
-        # 1. Get currently busy phone numbers
-        busy_numbers = await QueueWarmer._get_busy_phone_numbers(session, campaign.id)
+        now = datetime.utcnow()
+        
+        # [HARD GUARDRAIL] Max 2 calls per session
+        exhausted = await session.execute(
+            update(QueueItem)
+            .where(QueueItem.campaign_id == campaign.id)
+            .where(QueueItem.status == "READY")
+            .where(QueueItem.promoted_to_user_queue == False)
+            .where(QueueItem.execution_count >= 2)
+            .values(status="FAILED", outcome="Max Retries Exceeded", updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if exhausted.rowcount:
+            print(f"[QueueWarmer] HARD GUARDRAIL: Marked {exhausted.rowcount} READY items FAILED - Max 2 calls reached.")
+        
+        number = normalized_number(CampaignLead.contact_number)
+        busy = QueueWarmer._busy_numbers_query(campaign.id).subquery()
         
-        # 2. Pick top priority READY items (fetch more than slots to account for busy numbers)
-        stmt = (
-            select(QueueItem, CampaignLead)
+        # One candidate per phone number (its best item); skip invalid and busy numbers
+        best_per_number = (
+            select(QueueItem.id, QueueItem.priority_score, QueueItem.created_at)
             .join(CampaignLead, QueueItem.lead_id == CampaignLead.id)
             .where(QueueItem.campaign_id == campaign.id)
             .where(QueueItem.status == "READY")
             # [FIX] Do not dial items that are already promoted to the User Queue
-            .where(QueueItem.promoted_to_user_queue == False) 
-            .order_by(QueueItem.priority_score.desc(), QueueItem.created_at.asc())
-            .limit(slots * 5) # Fetch plenty of candidates
+            .where(QueueItem.promoted_to_user_queue == False)
+            .where(number != "")
+            .where(number.not_in(select(busy.c.number)))
+            .ext(distinct_on(number))
+            .order_by(number, QueueItem.priority_score.desc(), QueueItem.created_at.asc())
+            .subquery()
+        )
+        picked = (
+            select(best_per_number.c.id)
+            .order_by(best_per_number.c.priority_score.desc(), best_per_number.c.created_at.asc())
+            .limit(slots)
         )
-        result = await session.execute(stmt)
-        candidates = result.all()
         
-        if not candidates:
-            print("[QueueWarmer] No candidates found for promotion. Buffer empty or no READY items.")
-            return
-            
-        items_to_promote = []
-        promoted_numbers = set()
+        # [FIX] Refresh updated_at to avoid immediate stale cleanup
+        result = await session.execute(
+            update(QueueItem)
+            .where(QueueItem.id.in_(picked.scalar_subquery()))
+            .where(QueueItem.status == "READY")
+            .values(status="DIALING_INTENT", execution_count=QueueItem.execution_count + 1, updated_at=now)
+            .returning(QueueItem.id, QueueItem.lead_id, QueueItem.priority_score, QueueItem.created_at)
+            .execution_options(synchronize_session=False)
+        )
+        # RETURNING order is unspecified; dial in priority order
+        promoted = sorted(result.all(), key=lambda row: (-row.priority_score, row.created_at))
         
-        print(f"[QueueWarmer] Found {len(candidates)} candidates. Inspecting...")
-
-        for q_item, lead in candidates:
-            if len(items_to_promote) >= slots:
-                break
-                
-            norm_num = normalize_phone_number(lead.contact_number)
-            if not norm_num:
-                print(f"[QueueWarmer] Skipping lead {lead.id} - Invalid number.")
-                continue # Safety
-                
-            # Skip if number is already busy or already in this promotion batch
-            if norm_num in busy_numbers or norm_num in promoted_numbers:
-                print(f"[QueueWarmer] Skipping lead {lead.id} ({norm_num}) - Phone number is already busy (in busy_numbers={norm_num in busy_numbers}, in promoted={norm_num in promoted_numbers}).")
-                continue
-                
-            # [HARD GUARDRAIL] Max 2 calls per session
-            if q_item.execution_count >= 2:
-                print(f"[QueueWarmer] HARD GUARDRAIL: Skipping lead {lead.id} - Max 2 calls reached (count={q_item.execution_count}). Marking FAILED.")
-                q_item.status = "FAILED"
-                q_item.outcome = "Max Retries Exceeded"
-                session.add(q_item)
-                continue
-            
-            print(f"[QueueWarmer] Promoting lead {lead.id} (Count={q_item.execution_count} -> {q_item.execution_count + 1})")
-
-                
-            items_to_promote.append(q_item)
-            promoted_numbers.add(norm_num)
-            
-        if not items_to_promote:
-            # print("[QueueWarmer] No items selected for promotion after filtering busy numbers.")
+        if not promoted:
+            print("[QueueWarmer] No candidates found for promotion. Buffer empty, no READY items or all numbers busy.")
             return
             
-        # Update status and collect IDs
-        lead_ids = []
-        queue_item_ids = []
-        
-        for item in items_to_promote:
-            item.status = "DIALING_INTENT"
-            item.execution_count += 1
-            item.updated_at = datetime.utcnow() # [FIX] Refresh timestamp to avoid immediate stale cleanup
-            session.add(item)
-            lead_ids.append(item.lead_id)
-            queue_item_ids.append(item.id)
+        lead_ids = [row.lead_id for row in promoted]
+        queue_item_ids = [row.id for row in promoted]
             
         # [CRITICAL FIX] Commit the "Intent to Call" state BEFORE making the external side-effect (Bolna API call).
         # This ensures that even if the API call fails or the process crashes later, the system 
         # "remembers" it attempted the call, preventing an immediate retry (spam loop).
         await session.commit()
         
-        # Refresh objects after commit to avoid DetachedInstanceError or stale data
+        # Refresh campaign after commit to avoid DetachedInstanceError or stale data
         await session.refresh(campaign)
-        for item in items_to_promote:
-            await session.refresh(item)
         
         # [NEW] Broadcast the 'DIALING_INTENT' state immediately to the UI
         # This ensures the user sees "Dialing..." while the Bolna API request is in flight.
         try:
-            from app.api.v1.endpoints.execution import (
-                get_campaign_realtime_status_internal,
-            )
-            from app.services.websocket_manager import manager
-            status_data = await get_campaign_realtime_status_internal(campaign.id, session, trigger_warmer=False)
-            await manager.broadcast_status_update(str(campaign.id), status_data)
+            from app.services.campaign_live_status import campaign_live_status
+            # Non-blocking: the recompute runs beside the Bolna request, not before it
+            campaign_live_status.notify_changed(campaign.id)
         except Exception as broadcast_err:
             print(f"[QueueWarmer] Early broadcast failed: {broadcast_err}")
         
         # Trigger Bolna
-        print(f"[QueueWarmer] Promoting {len(items_to_promote)} items to Active Dialing...")
+        print(f"[QueueWarmer] Promoting {len(promoted)} items to Active Dialing...")
         try:
             call_results = await BolnaCaller.create_and_schedule_batch(
                 session=session,
@@ -358,31 +329,24 @@ class QueueWarmer:
                     campaign.meta_data = meta
                     session.add(campaign)
                 
-                for item in items_to_promote:
-                    item.status = "FAILED"
-                    session.add(item)
+                await QueueWarmer._fail_items(session, {item_id: None for item_id in queue_item_ids})
                 return
 
             if call_results and "results" in call_results:
-                for i, res in enumerate(call_results["results"]):
-                    if i < len(items_to_promote) and res.get("status") == "error":
-                        items_to_promote[i].status = "FAILED"
-                        items_to_promote[i].outcome = res.get("error") or "Unknown Error"
-                        session.add(items_to_promote[i])
+                failed = {
+                    queue_item_ids[i]: res.get("error") or "Unknown Error"
+                    for i, res in enumerate(call_results["results"])
+                    if i < len(queue_item_ids) and res.get("status") == "error"
+                }
+                await QueueWarmer._fail_items(session, failed)
             
                 # Broadcast the new state to the UI via WebSocket
                 try:
-                    from app.api.v1.endpoints.execution import (
-                        get_campaign_realtime_status_internal,
-                    )
-                    from app.services.websocket_manager import manager
+                    from app.services.campaign_live_status import campaign_live_status
                     
-                    # Fetch full state
-                    status_data = await get_campaign_realtime_status_internal(campaign.id, session, trigger_warmer=False)
-                    
-                    # Broadcast
-                    await manager.broadcast_status_update(str(campaign.id), status_data)
-                    print(f"[QueueWarmer] Broadcasted state update for campaign {campaign.id}")
+                    # Coalesced recompute; subscribers get only the changed keys
+                    campaign_live_status.notify_changed(campaign.id)
+                    print(f"[QueueWarmer] Queued live status update for campaign {campaign.id}")
                 except Exception as broadcast_err:
                     print(f"[QueueWarmer] Failed to broadcast state update: {broadcast_err}")
                     
@@ -393,12 +357,26 @@ class QueueWarmer:
             with open("critical_error.log", "a") as f:
                 f.write(f"\n[{datetime.utcnow()}] {error_msg}\n")
             
-            for item in items_to_promote:
-                item.status = "FAILED"
-                item.outcome = f"Promotion Error: {str(e)[:100]}"
-                session.add(item)
+            await QueueWarmer._fail_items(
+                session, {item_id: f"Promotion Error: {str(e)[:100]}" for item_id in queue_item_ids}
+            )
             await session.flush()
 
+    @staticmethod
+    async def _fail_items(session: AsyncSession, outcomes: Dict[UUID, Optional[str]]):
+        """Marks queue items FAILED in one statement; a None outcome keeps the current one."""
+        if not outcomes:
+            return
+        outcome = QueueItem.outcome
+        messages = {item_id: message for item_id, message in outcomes.items() if message is not None}
+        if messages:
+            outcome = case(*((QueueItem.id == item_id, message) for item_id, message in messages.items()), else_=QueueItem.outcome)
+        await session.execute(
+            update(QueueItem)
+            .where(QueueItem.id.in_(list(outcomes)))
+            .values(status="FAILED", outcome=outcome)
+            .execution_options(synchronize_session=False)
+        )
 
     @staticmethod
     async def _get_cohort_progress(session: AsyncSession, campaign_id: UUID) -> Dict[str, int]:
@@ -445,39 +423,31 @@ class QueueWarmer:
         if not scores:
             return
 
-        # Fetch all READY items (joined with CampaginLead to get cohort)
+        # Base Priority: 0
+        # Dynamic Boost: score * 100 (e.g. 0.5 -> 50)
+        # This physically moves them ahead in the queue
+        new_priority = case(
+            {cohort: int(score * 100) for cohort, score in scores.items()},
+            value=CampaignLead.cohort,
+            else_=0
+        )
+        
         # Note: We only touch READY items. SCHEDULED (999) are sacred.
-        stmt = (
-            select(QueueItem, CampaignLead)
-            .join(CampaignLead, QueueItem.lead_id == CampaignLead.id)
+        result = await session.execute(
+            update(QueueItem)
+            .where(QueueItem.lead_id == CampaignLead.id)
             .where(QueueItem.campaign_id == campaign_id)
             .where(QueueItem.status == "READY")
-        )
-        result = await session.execute(stmt)
-        items = result.all()
-        
-        updated_count = 0
-        for q_item, lead in items:
-            cohort_score = scores.get(lead.cohort, 0.0)
-            
-            # Base Priority: 0
-            # Dynamic Boost: score * 100 (e.g. 0.5 -> 50)
-            # This physically moves them ahead in the queue
-            new_priority = int(cohort_score * 100)
-            
             # [FIX] Skip rebalancing for High Priority items (e.g. Scheduled Wakeups = 999, Manual Promotes)
             # This prevents them from being downgraded back to cohort-based scores
-            if q_item.priority_score >= 500:
-                continue
-
-            if q_item.priority_score != new_priority:
-                q_item.priority_score = new_priority
-                session.add(q_item)
-                updated_count += 1
+            .where(QueueItem.priority_score < 500)
+            .where(QueueItem.priority_score != new_priority)
+            .values(priority_score=new_priority)
+            .execution_options(synchronize_session=False)
+        )
         
-        if updated_count > 0:
-            print(f"[QueueWarmer] Rebalanced {updated_count} items in buffer based on latest yield gaps.")
-            await session.flush()
+        if result.rowcount:
+            print(f"[QueueWarmer] Rebalanced {result.rowcount} items in buffer based on latest yield gaps.")
 
     @staticmethod
     async def _replenish_buffer_strategy(session: AsyncSession, campaign: Campaign, count: int):
@@ -566,63 +536,57 @@ class QueueWarmer:
     async def _fetch_and_queue(session: AsyncSession, campaign: Campaign, cohort_name: Optional[str], count: int):
         """
         Moves Fresh leads -> READY status.
-        """
-        existing_q = select(QueueItem.lead_id).where(QueueItem.campaign_id == campaign.id)
-        
-        query = select(CampaignLead).where(CampaignLead.campaign_id == campaign.id)
-        query = query.where(CampaignLead.id.not_in(existing_q))
         
+        One INSERT ... SELECT: leads without a queue item become READY items.
+        ON CONFLICT on (campaign_id, lead_id) covers a concurrent run queueing
+        the same lead (race condition protection).
+        """
+        now = datetime.utcnow()
+        columns = {
+            "id": func.gen_random_uuid(),
+            "campaign_id": literal(campaign.id),
+            "lead_id": CampaignLead.id,
+            "status": literal("READY"),  # Staged for promotion
+            "priority_score": literal(0),
+            "promoted_to_user_queue": literal(False),
+            "execution_count": literal(0),
+            "created_at": literal(now),
+            "updated_at": literal(now),
+        }
+        
+        source = (
+            select(CampaignLead.id)
+            .where(CampaignLead.campaign_id == campaign.id)
+            .where(~exists().where(QueueItem.campaign_id == campaign.id, QueueItem.lead_id == CampaignLead.id))
+        )
         if cohort_name:
-             query = query.where(CampaignLead.cohort == cohort_name)
+            source = source.where(CampaignLead.cohort == cohort_name)
+            columns["cohort_id"] = (
+                select(Cohort.id)
+                .where(Cohort.campaign_id == campaign.id, Cohort.name == cohort_name)
+                .limit(1)
+                .scalar_subquery()
+            )
         
         # Optimization: Sort by something? created_at?
-        query = query.limit(count)
+        source = source.with_only_columns(*columns.values()).limit(count)
         print(f"[QueueWarmer] Fetching up to {count} leads for cohort '{cohort_name}'...")
         
-        candidates_result = await session.execute(query)
-        candidates = candidates_result.scalars().all()
+        result = await session.execute(
+            pg_insert(QueueItem)
+            .from_select(list(columns), source)
+            .on_conflict_do_nothing(constraint="uq_campaign_lead_queue")
+            .returning(QueueItem.id)
+        )
+        queued = len(result.all())
         
-        if not candidates:
-             if cohort_name:
-                 # Fallback to any cohort if target is empty
-                 await QueueWarmer._fetch_and_queue(session, campaign, None, count)
-             return
+        if not queued:
+            if cohort_name:
+                # Fallback to any cohort if target is empty
+                await QueueWarmer._fetch_and_queue(session, campaign, None, count)
+            return
 
-        print(f"[QueueWarmer] Queueing {len(candidates)} leads (Backlog -> READY)...")
-        
-        # Resolve cohort_id
-        cohort_id = None
-        if cohort_name:
-             cohort_obj = (await session.execute(select(Cohort).where(Cohort.campaign_id == campaign.id, Cohort.name == cohort_name))).scalars().first()
-             if cohort_obj: cohort_id = cohort_obj.id
-
-        # CRITICAL FIX: Check for existing queue items before creating new ones
-        # This prevents race conditions and duplicate entries
-        for lead in candidates:
-            # Double-check that this lead doesn't already have a queue item
-            # (race condition protection)
-            existing_check = await session.execute(
-                select(QueueItem)
-                .where(QueueItem.campaign_id == campaign.id)
-                .where(QueueItem.lead_id == lead.id)
-            )
-            existing_item = existing_check.scalars().first()
-            
-            if existing_item:
-                print(f"[QueueWarmer] Skipping lead {lead.id} - already has queue item (status: {existing_item.status})")
-                continue
-            
-            item = QueueItem(
-                campaign_id=campaign.id,
-                lead_id=lead.id,
-                status="READY", # Staged for promotion
-                cohort_id=cohort_id,
-                priority_score=0 
-            )
-            session.add(item)
-            
-            
-        await session.flush()
+        print(f"[QueueWarmer] Queued {queued} leads (Backlog -> READY).")
 
     @staticmethod
     async def _wake_scheduled_items(session: AsyncSession, campaign: Campaign):
@@ -632,26 +596,16 @@ class QueueWarmer:
         """
         now = datetime.now()
         
-        stmt = (
-            select(QueueItem)
+        result = await session.execute(
+            update(QueueItem)
             .where(QueueItem.campaign_id == campaign.id)
             .where(QueueItem.status == "SCHEDULED")
             .where(QueueItem.scheduled_for <= now)
+            .values(status="READY", priority_score=999)  # Highest priority to ensure immediate pickup
+            .execution_options(synchronize_session=False)
         )
-        result = await session.execute(stmt)
-        items = result.scalars().all()
-        
-        if not items:
-            return
-
-        print(f"[QueueWarmer] Waking up {len(items)} scheduled calls...")
-        
-        for item in items:
-            item.status = "READY"
-            item.priority_score = 999 # Highest priority to ensure immediate pickup
-            session.add(item)
-            
-        await session.flush()
+        if result.rowcount:
+            print(f"[QueueWarmer] Woke up {result.rowcount} scheduled calls.")
 
 
     @staticmethod
@@ -660,26 +614,15 @@ class QueueWarmer:
         Checks for items stuck in PENDING status (usually from migration or data cleaning).
         Promotes them to READY so they can be processed.
         """
-        stmt = (
-            select(QueueItem)
+        result = await session.execute(
+            update(QueueItem)
             .where(QueueItem.campaign_id == campaign.id)
             .where(QueueItem.status == "PENDING")
+            .values(status="READY")
+            .execution_options(synchronize_session=False)
         )
-        result = await session.execute(stmt)
-        items = result.scalars().all()
-        
-        if not items:
-            return
-
-        print(f"[QueueWarmer] Recovering {len(items)} items from PENDING status...")
-        
-        for item in items:
-            item.status = "READY"
-            session.add(item)
-            
-            session.add(item)
-            
-        await session.flush()
+        if result.rowcount:
+            print(f"[QueueWarmer] Recovered {result.rowcount} items from PENDING status.")
 
     @staticmethod
     async def _check_completion(session: AsyncSession, campaign: Campaign):
@@ -782,9 +725,8 @@ class QueueWarmer:
         
         # Broadcast Completion
         try:
-            from app.services.websocket_manager import manager
-            # Minimal payload for completion
-            await manager.broadcast_status_update(str(campaign.id), {"status": "COMPLETED", "progress": 100})
+            from app.services.campaign_live_status import campaign_live_status
+            campaign_live_status.notify_changed(campaign.id)
         except Exception:
             pass
 
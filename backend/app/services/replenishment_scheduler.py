@@ -0,0 +1,158 @@
+"""
+Concurrent, change-driven campaign replenishment.
+
+The per-minute tick used to run QueueWarmer.check_and_replenish for every live
+campaign one after another on a single session. Now each tick:
+
+- reads a fingerprint of every live campaign in two queries (campaign row +
+  one grouped pass over its queue items: status counts, due SCHEDULED items,
+  stale DIALING_INTENT items);
+- skips campaigns whose fingerprint has not moved since their last successful
+  run, except on every `REPLENISH_FULL_PASS_TICKS`-th tick, which covers state
+  the fingerprint cannot see (a number freed up by another campaign). A run's
+  own writes move the fingerprint, so a campaign settles one tick later;
+- runs the rest concurrently, each in its own session, bounded by
+  `REPLENISH_CONCURRENCY`. A transaction-scoped advisory lock per campaign
+  makes overlapping ticks / other workers skip a campaign already in progress.
+
+Workers can split campaigns with REPLENISH_SHARD_COUNT / REPLENISH_SHARD_INDEX.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy import and_, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.core.metrics import replenishment_tick_duration, replenishment_ticks_total
+from app.models.campaign import Campaign
+from app.models.queue_item import QueueItem
+
+LIVE_STATUSES = ("ACTIVE", "IN_PROGRESS")
+# Matches QueueWarmer._cleanup_stale_items
+STALE_DIALING_AFTER = timedelta(minutes=5)
+
+
+class CampaignReplenishmentScheduler:
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or async_session_factory
+        self._fingerprints: Dict[UUID, Tuple] = {}
+        self._ticks = 0
+
+    async def tick(self) -> Dict[str, int]:
+        """One scheduler pass. Returns outcome counts (replenished / unchanged / locked / error)."""
+        self._ticks += 1
+        full_pass = (self._ticks - 1) % max(1, settings.REPLENISH_FULL_PASS_TICKS) == 0
+
+        async with self._session_factory() as session:
+            fingerprints = await self.fingerprints(session)
+
+        # Forget campaigns that stopped being live
+        self._fingerprints = {cid: fp for cid, fp in self._fingerprints.items() if cid in fingerprints}
+
+        stats = {"replenished": 0, "unchanged": 0, "locked": 0, "error": 0}
+        due: List[Tuple[UUID, Tuple]] = []
+        for campaign_id, fingerprint in fingerprints.items():
+            if not full_pass and self._fingerprints.get(campaign_id) == fingerprint:
+                stats["unchanged"] += 1
+                replenishment_ticks_total.labels(outcome="unchanged").inc()
+                continue
+            due.append((campaign_id, fingerprint))
+
+        semaphore = asyncio.Semaphore(max(1, settings.REPLENISH_CONCURRENCY))
+        outcomes = await asyncio.gather(*(self._replenish(semaphore, cid, fp) for cid, fp in due))
+        for outcome in outcomes:
+            stats[outcome] += 1
+
+        logger.info(f"[Replenishment] tick {self._ticks} ({'full' if full_pass else 'changed only'}): {stats}")
+        return stats
+
+    async def fingerprints(self, session: AsyncSession) -> Dict[UUID, Tuple]:
+        """Cheap per-campaign state summary for this worker's shard of the live campaigns."""
+        campaigns = (await session.execute(
+            select(Campaign.id, Campaign.status, Campaign.updated_at)
+            .where(Campaign.status.in_(LIVE_STATUSES))
+        )).all()
+        campaigns = [row for row in campaigns if self._in_shard(row.id)]
+        if not campaigns:
+            return {}
+
+        now = datetime.utcnow()
+
+        def status_count(status: str):
+            return func.count().filter(QueueItem.status == status)
+
+        queue_rows = (await session.execute(
+            select(
+                QueueItem.campaign_id,
+                func.count(),
+                status_count("READY"),
+                status_count("DIALING_INTENT"),
+                status_count("PENDING"),
+                status_count("SCHEDULED"),
+                # Time-driven transitions the warmer would act on this tick
+                # (scheduled_for is compared in local time, as in QueueWarmer._wake_scheduled_items)
+                func.count().filter(and_(QueueItem.status == "SCHEDULED", QueueItem.scheduled_for <= datetime.now())),
+                func.count().filter(and_(
+                    QueueItem.status == "DIALING_INTENT", QueueItem.updated_at < now - STALE_DIALING_AFTER
+                )),
+                func.max(QueueItem.updated_at),
+            )
+            .where(QueueItem.campaign_id.in_([row.id for row in campaigns]))
+            .group_by(QueueItem.campaign_id)
+        )).all()
+        queue_state = {row[0]: tuple(row[1:]) for row in queue_rows}
+
+        return {
+            row.id: (row.status, row.updated_at, queue_state.get(row.id))
+            for row in campaigns
+        }
+
+    async def _replenish(self, semaphore: asyncio.Semaphore, campaign_id: UUID, fingerprint: Tuple) -> str:
+        from app.services.queue_warmer import QueueWarmer
+
+        async with semaphore:
+            started = time.monotonic()
+            outcome = "replenished"
+            try:
+                async with self._session_factory() as session:
+                    if not await self._try_lock(session, campaign_id):
+                        outcome = "locked"
+                        await session.rollback()
+                        return outcome
+                    await QueueWarmer.check_and_replenish(campaign_id, session)
+                self._fingerprints[campaign_id] = fingerprint
+            except Exception as e:
+                outcome = "error"
+                logger.error(f"[Replenishment] Campaign {campaign_id} failed: {e}")
+            finally:
+                replenishment_ticks_total.labels(outcome=outcome).inc()
+                if outcome != "locked":
+                    replenishment_tick_duration.labels(outcome=outcome).observe(time.monotonic() - started)
+            return outcome
+
+    @staticmethod
+    async def _try_lock(session: AsyncSession, campaign_id: UUID) -> bool:
+        """
+        Transaction-scoped, so it is safe behind a transaction pooler; held until
+        check_and_replenish commits its replenishment + promotion block.
+        """
+        if session.get_bind().dialect.name != "postgresql":
+            return True
+        key = int.from_bytes(campaign_id.bytes[:8], "big", signed=True)
+        return bool((await session.execute(select(func.pg_try_advisory_xact_lock(key)))).scalar())
+
+    @staticmethod
+    def _in_shard(campaign_id: UUID, shard_count: Optional[int] = None, shard_index: Optional[int] = None) -> bool:
+        shard_count = shard_count or settings.REPLENISH_SHARD_COUNT
+        shard_index = settings.REPLENISH_SHARD_INDEX if shard_index is None else shard_index
+        return shard_count <= 1 or campaign_id.int % shard_count == shard_index
+
+
+campaign_replenisher = CampaignReplenishmentScheduler()
@@ -1,5 +1,5 @@
 import asyncio
-from datetime import datetime, timezone
+from datetime import datetime
 
 import pytz
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -67,69 +67,60 @@ async def check_and_trigger_nightly_sweeps():
 async def prune_old_raw_payloads():
     """
     Runs daily.
-    Clears raw_payload from Order/Inventory tables for records older than 90 days.
-    Does NOT delete the record, just the heavy JSON blob.
+    Moves expired raw ingest payloads (per-object_type retention) into the
+    partitioned archive, blanks old raw_payload blobs on refined tables and
+    drops expired archive partitions. Batched and time-boxed; resumes next run.
     """
     logger.info("Scheduler: Pruning old raw payloads...")
-    from datetime import timedelta
-
-    from sqlalchemy import text
-    
-    session_gen = get_session()
-    session = await session_gen.__anext__()
+    from app.services.shopify.raw_retention import shopify_raw_retention
     
     try:
-        # Define 90 days ago
-        cutoff = datetime.now(timezone.utc) - timedelta(days=90)
-        
-        # 1. Orders
-        stmt = text("UPDATE shopify_order SET raw_payload = '{}'::jsonb WHERE shopify_created_at < :cutoff")
-        await session.execute(stmt, {"cutoff": cutoff})
-        
-        # 2. Inventory Items (Updated At)
-        # Note: Inventory doesn't have created_at usually, we use updated_at
-        stmt2 = text("UPDATE shopify_inventory_item SET raw_payload = '{}'::jsonb WHERE updated_at < :cutoff")
-        await session.execute(stmt2, {"cutoff": cutoff})
-        
-        # 3. Inventory Levels
-        stmt3 = text("UPDATE shopify_inventory_level SET raw_payload = '{}'::jsonb WHERE updated_at < :cutoff")
-        await session.execute(stmt3, {"cutoff": cutoff})
-        
-        await session.commit()
-        logger.info("Scheduler: Pruning complete.")
-        
+        stats = await shopify_raw_retention.run()
+        logger.info(f"Scheduler: Pruning complete. {stats}")
     except Exception as e:
         logger.error(f"Pruning failed: {e}")
-    finally:
-        await session.close()
+
+async def refresh_variant_velocity():
+    """
+    Runs daily.
+    Rolls every variant's 7/30/90-day sales windows and stock cover forward
+    (refinement only refreshes the variants it touches), backfilling the
+    per-variant daily sales of integrations that have none yet.
+    """
+    logger.info("Scheduler: Refreshing variant velocity...")
+    from app.services.shopify.velocity_service import shopify_velocity_service
+
+    try:
+        stats = await shopify_velocity_service.refresh_all()
+        logger.info(f"Scheduler: Velocity refresh complete. {stats}")
+    except Exception as e:
+        logger.error(f"Velocity refresh failed: {e}")
 
 async def run_campaign_replenishment_job():
     """
     Runs every minute.
-    Iterates through all ACTIVE campaigns and triggers QueueWarmer.
+    Replenishes ACTIVE campaigns whose queue state changed, concurrently.
     """
-    from app.models.campaign import Campaign
-    from app.services.queue_warmer import QueueWarmer
+    from app.services.replenishment_scheduler import campaign_replenisher
     
     logger.info("Scheduler: Running campaign replenishment job...")
-    
-    session_gen = get_session()
-    session = await session_gen.__anext__()
-    
     try:
-        stmt = select(Campaign).where(Campaign.status.in_(["ACTIVE", "IN_PROGRESS"]))
-        result = await session.execute(stmt)
-        active_campaigns = result.scalars().all()
-        
-        for campaign in active_campaigns:
-            try:
-                # Trigger warmer sequentially to avoid session conflicts
-                await QueueWarmer.check_and_replenish(campaign.id, session)
-            except Exception as e:
-                logger.error(f"Scheduler: Replenishment failed for campaign {campaign.id}: {e}")
-                
-    finally:
-        await session.close()
+        await campaign_replenisher.tick()
+    except Exception as e:
+        logger.error(f"Scheduler: Replenishment tick failed: {e}")
+
+async def recover_bolna_webhooks():
+    """
+    Runs every 5 minutes.
+    Re-queues Bolna webhook payloads that were stored but never processed
+    (worker restart, full queue).
+    """
+    from app.services.bolna_webhook_pipeline import bolna_webhook_pipeline
+
+    try:
+        await bolna_webhook_pipeline.recover()
+    except Exception as e:
+        logger.error(f"Scheduler: Bolna webhook recovery failed: {e}")
 
 def start_scheduler():
     if not scheduler.running:
@@ -139,14 +130,28 @@ def start_scheduler():
         
         # Run replenishment every minute
         replenish_trigger = CronTrigger(second=0) # Every minute at 00s
-        scheduler.add_job(run_campaign_replenishment_job, replenish_trigger, id="campaign_replenishment", replace_existing=True)
+        scheduler.add_job(
+            run_campaign_replenishment_job, replenish_trigger, id="campaign_replenishment",
+            replace_existing=True, max_instances=1, coalesce=True
+        )
         
         # Run pruning every day at 04:30 AM UTC
         prune_trigger = CronTrigger(hour=4, minute=30)
         scheduler.add_job(prune_old_raw_payloads, prune_trigger, id="prune_payloads", replace_existing=True)
         
+        # Roll velocity windows forward just after the UTC day boundary
+        velocity_trigger = CronTrigger(hour=0, minute=15)
+        scheduler.add_job(refresh_variant_velocity, velocity_trigger, id="variant_velocity", replace_existing=True)
+        
+        # Pick up webhook payloads a restart left unprocessed
+        webhook_recovery_trigger = CronTrigger(minute="*/5")
+        scheduler.add_job(
+            recover_bolna_webhooks, webhook_recovery_trigger, id="bolna_webhook_recovery",
+            replace_existing=True, max_instances=1, coalesce=True
+        )
+        
         scheduler.start()
-        logger.info("Scheduler started. Jobs: 'nightly_sweep' (Hourly), 'campaign_replenishment' (Minute), 'prune_payloads' (Daily).")
+        logger.info("Scheduler started. Jobs: 'nightly_sweep' (Hourly), 'campaign_replenishment' (Minute), 'prune_payloads' (Daily), 'variant_velocity' (Daily), 'bolna_webhook_recovery' (5 min).")
 
 def shutdown_scheduler():
     if scheduler.running:
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from loguru import logger
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.services.shopify.sync_service import shopify_sync_service
+
+StreamFn = Callable[[AsyncSession], Awaitable[Dict[str, Any]]]
+ProgressCallback = Callable[[str, int, int], Awaitable[None]]
+
+
+class ShopifyBackfillScheduler:
+    """
+    Runs the independent resource streams of a Shopify backfill concurrently.
+
+    Each stream gets its own DB session (AsyncSession is not concurrency safe) and
+    all of them share the per-shop leaky-bucket budget enforced in
+    `ShopifySyncService._make_request`, so adding streams raises throughput up to
+    the shop's API limit without tripping 429s. Paginated streams checkpoint their
+    cursors, so re-running after a crash resumes instead of starting over.
+    """
+
+    def __init__(self, max_concurrent_streams: Optional[int] = None):
+        self.max_concurrent_streams = max_concurrent_streams or settings.SHOPIFY_BACKFILL_CONCURRENCY
+
+    def _independent_streams(self, integration_id: UUID, start_date: Optional[datetime]) -> List[Tuple[str, StreamFn]]:
+        svc = shopify_sync_service
+
+        async def financials(session: AsyncSession) -> Dict[str, Any]:
+            return {
+                "payouts": await svc.fetch_and_ingest_payouts(session, integration_id, start_date=start_date),
+                "disputes": await svc.fetch_and_ingest_disputes(session, integration_id, start_date=start_date),
+                "balance_transactions": await svc.fetch_and_ingest_balance_transactions(session, integration_id),
+            }
+
+        return [
+            ("products", lambda s: svc.fetch_and_ingest_products(s, integration_id, start_date=start_date)),
+            ("inventory", lambda s: svc.fetch_and_ingest_inventory(s, integration_id)),
+            ("customers", lambda s: svc.fetch_and_ingest_customers(s, integration_id, start_date=start_date)),
+            ("reports", lambda s: svc.fetch_and_ingest_reports(s, integration_id)),
+            ("refunds", lambda s: svc.fetch_and_ingest_refunds(s, integration_id, start_date=start_date)),
+            ("financials", financials),
+            ("checkouts", lambda s: svc.fetch_and_ingest_checkouts(s, integration_id, start_date=start_date)),
+            ("marketing_events", lambda s: svc.fetch_and_ingest_marketing_events(s, integration_id)),
+            ("price_rules", lambda s: svc.fetch_and_ingest_price_rules(s, integration_id)),
+        ]
+
+    async def run(
+        self,
+        integration_id: UUID,
+        start_date: Optional[datetime] = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Executes every stream and returns their stats keyed by stream name.
+        Orders run first in their own lane; transactions and fulfillments
+        (sub-resources of the fetched orders) follow it while the rest proceed.
+        """
+        svc = shopify_sync_service
+        semaphore = asyncio.Semaphore(self.max_concurrent_streams)
+        progress_lock = asyncio.Lock()
+        results: Dict[str, Dict[str, Any]] = {}
+        independent = self._independent_streams(integration_id, start_date)
+        total = len(independent) + 3  # + orders, transactions, fulfillments
+
+        async def run_stream(name: str, fn: StreamFn) -> Dict[str, Any]:
+            started = asyncio.get_running_loop().time()
+            async with semaphore:
+                async with async_session_factory() as session:
+                    try:
+                        result = await fn(session)
+                        await session.commit()
+                    except Exception as e:
+                        logger.error(f"Backfill stream '{name}' failed for {integration_id}: {e}")
+                        await session.rollback()
+                        result = {"ingested": 0, "errors": 1}
+
+            results[name] = result
+            elapsed = asyncio.get_running_loop().time() - started
+            logger.info(f"Backfill stream '{name}' finished in {elapsed:.1f}s for {integration_id}")
+            if on_progress:
+                # Serialized: the callback typically writes through a single shared session
+                async with progress_lock:
+                    await on_progress(name, len(results), total)
+            return result
+
+        async def fetch_orders(session: AsyncSession) -> Dict[str, Any]:
+            stats, order_ids = await svc.fetch_and_ingest_orders(session, integration_id, start_date=start_date)
+            return {**stats, "order_ids": order_ids}
+
+        async def orders_lane():
+            order_stats = await run_stream("orders", fetch_orders)
+            order_ids = order_stats.get("order_ids", [])
+            if not order_ids:
+                for name in ("transactions", "fulfillments"):
+                    results[name] = {"ingested": 0}
+                return
+            await asyncio.gather(
+                run_stream("transactions", lambda s: svc.fetch_and_ingest_transactions(s, integration_id, order_ids)),
+                run_stream("fulfillments", lambda s: svc.fetch_and_ingest_fulfillments(s, integration_id, order_ids)),
+            )
+
+        await asyncio.gather(
+            orders_lane(),
+            *(run_stream(name, fn) for name, fn in independent),
+        )
+        return results
+
+
+shopify_backfill_scheduler = ShopifyBackfillScheduler()
@@ -1,9 +1,10 @@
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
 from decimal import Decimal
-from typing import Dict
+from typing import Any, Dict, Iterable, List, Sequence
 from uuid import UUID
 
 from loguru import logger
+from sqlalchemy import Date, DateTime, case, cast
 from sqlmodel import func, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -11,6 +12,8 @@ from app.models.integration import Integration
 from app.models.shopify.customer import ShopifyCustomer
 from app.models.shopify.metrics import ShopifyDailyMetric
 from app.models.shopify.order import ShopifyOrder
+from app.models.shopify.raw_ingest import ShopifyRawIngest
+from app.models.shopify.transaction import ShopifyTransaction
 
 
 class ShopifyMetricsService:
@@ -19,6 +22,214 @@ class ShopifyMetricsService:
     Supports real-time overview and historical snapshots.
     """
 
+    async def touched_dates(
+        self,
+        session: AsyncSession,
+        integration_id: UUID,
+        since: datetime
+    ) -> List[date]:
+        """
+        Returns the UTC calendar days affected by orders, transactions and customers
+        refined since ``since`` (naive UTC), computed in SQL from the raw ingest log.
+        Orders and customers dirty their creation day, refunds their processing day.
+        """
+        payload = ShopifyRawIngest.payload
+        event_at = case(
+            (ShopifyRawIngest.object_type == "transaction", payload["processed_at"].as_string()),
+            else_=payload["created_at"].as_string()
+        )
+        # Shopify timestamps carry the shop offset; bucket by UTC like the refined columns
+        event_day = cast(func.timezone("UTC", cast(event_at, DateTime(timezone=True))), Date)
+
+        stmt = select(event_day).where(
+            ShopifyRawIngest.integration_id == integration_id,
+            ShopifyRawIngest.processing_status == "processed",
+            ShopifyRawIngest.processed_at >= since,
+            ShopifyRawIngest.object_type.in_(("order", "transaction", "customer")),
+            event_at != None
+        ).distinct()
+        return sorted((await session.execute(stmt)).scalars().all())
+
+    async def order_totals_by_day(
+        self,
+        session: AsyncSession,
+        integration_id: UUID,
+        days: Sequence[date],
+        exclude_cancelled: bool = True
+    ) -> Dict[date, Any]:
+        """
+        Aggregates order financials for each of ``days`` in one grouped query.
+        Returns ``{day: row}`` with gross_sales, total_discounts, total_tax,
+        total_shipping, order_count and currency; days without orders are absent.
+        """
+        if not days:
+            return {}
+        order_day = cast(ShopifyOrder.shopify_created_at, Date)
+        stmt = select(
+            order_day.label("day"),
+            func.coalesce(func.sum(ShopifyOrder.subtotal_price + ShopifyOrder.total_discounts), 0).label("gross_sales"),
+            func.coalesce(func.sum(ShopifyOrder.total_discounts), 0).label("total_discounts"),
+            func.coalesce(func.sum(ShopifyOrder.total_tax), 0).label("total_tax"),
+            func.coalesce(func.sum(ShopifyOrder.total_shipping), 0).label("total_shipping"),
+            func.count(ShopifyOrder.id).label("order_count"),
+            func.max(ShopifyOrder.currency).label("currency")
+        ).where(
+            ShopifyOrder.integration_id == integration_id,
+            *self._day_bounds(ShopifyOrder.shopify_created_at, days),
+            order_day.in_(days)
+        ).group_by(order_day)
+        if exclude_cancelled:
+            stmt = stmt.where(
+                ShopifyOrder.shopify_cancelled_at == None, # Exclude Cancelled
+                ShopifyOrder.financial_status != "voided"   # Exclude Voided
+            )
+        return {row.day: row for row in (await session.execute(stmt)).all()}
+
+    async def refunds_by_day(
+        self,
+        session: AsyncSession,
+        integration_id: UUID,
+        days: Sequence[date]
+    ) -> Dict[date, Decimal]:
+        """
+        Successful refunds per processing day, regardless of when the order was placed.
+        """
+        if not days:
+            return {}
+        refund_day = cast(ShopifyTransaction.shopify_processed_at, Date)
+        stmt = select(
+            refund_day.label("day"),
+            func.sum(ShopifyTransaction.amount).label("total_refunds")
+        ).where(
+            ShopifyTransaction.integration_id == integration_id,
+            ShopifyTransaction.kind == "refund",
+            ShopifyTransaction.status == "success",
+            *self._day_bounds(ShopifyTransaction.shopify_processed_at, days),
+            refund_day.in_(days)
+        ).group_by(refund_day)
+        return {
+            row.day: Decimal(str(row.total_refunds or 0))
+            for row in (await session.execute(stmt)).all()
+        }
+
+    async def new_customers_by_day(
+        self,
+        session: AsyncSession,
+        integration_id: UUID,
+        days: Sequence[date]
+    ) -> Dict[date, int]:
+        """
+        Count of customers created on each day.
+        """
+        if not days:
+            return {}
+        customer_day = cast(ShopifyCustomer.shopify_created_at, Date)
+        stmt = select(
+            customer_day.label("day"),
+            func.count(ShopifyCustomer.id).label("customer_count")
+        ).where(
+            ShopifyCustomer.integration_id == integration_id,
+            *self._day_bounds(ShopifyCustomer.shopify_created_at, days),
+            customer_day.in_(days)
+        ).group_by(customer_day)
+        return {row.day: row.customer_count for row in (await session.execute(stmt)).all()}
+
+    async def rollup_days(
+        self,
+        session: AsyncSession,
+        integration: Integration,
+        days: Iterable[date]
+    ) -> List[ShopifyDailyMetric]:
+        """
+        Recomputes and UPSERTS ShopifyDailyMetric for exactly ``days``.
+        Every KPI is derived from grouped SQL aggregates (orders, refunds, new
+        customers), so the cost is a fixed number of queries however many days
+        or orders are involved.
+        """
+        days = sorted(set(days))
+        if not days:
+            return []
+
+        order_totals = await self.order_totals_by_day(session, integration.id, days)
+        refunds = await self.refunds_by_day(session, integration.id, days)
+        new_customers = await self.new_customers_by_day(session, integration.id, days)
+
+        existing_stmt = select(ShopifyDailyMetric).where(
+            ShopifyDailyMetric.integration_id == integration.id,
+            ShopifyDailyMetric.snapshot_date.in_(days)
+        )
+        existing = {
+            m.snapshot_date: m
+            for m in (await session.execute(existing_stmt)).scalars().all()
+        }
+
+        zero = Decimal("0.00")
+        metrics = []
+        for day in days:
+            totals = order_totals.get(day)
+            gross_sales = Decimal(str(totals.gross_sales)) if totals else zero
+            total_discounts = Decimal(str(totals.total_discounts)) if totals else zero
+            total_tax = Decimal(str(totals.total_tax)) if totals else zero
+            total_shipping = Decimal(str(totals.total_shipping)) if totals else zero
+            order_count = totals.order_count if totals else 0
+            total_refunds = refunds.get(day, zero)
+
+            # Net Sales = Gross Sales - Discounts - Returns (Refunds)
+            net_sales = gross_sales - total_discounts - total_refunds
+
+            # Total Sales = Net Sales + Taxes + Shipping
+            total_sales = net_sales + total_tax + total_shipping
+
+            aov = total_sales / order_count if order_count > 0 else zero
+
+            metric_data = {
+                "integration_id": integration.id,
+                "company_id": integration.company_id,
+                "snapshot_date": day,
+                "gross_sales": gross_sales,
+                "net_sales": net_sales,
+                "total_sales": total_sales,
+                "total_discounts": total_discounts,
+                "total_refunds": total_refunds,
+                "total_tax": total_tax,
+                "total_shipping": total_shipping,
+                "order_count": order_count,
+                "customer_count_new": new_customers.get(day, 0),
+                "average_order_value": aov,
+                "currency": totals.currency if totals and totals.currency else "USD",
+                "meta_data": {
+                    "sync_timestamp": datetime.now(timezone.utc).isoformat(),
+                    "accuracy_version": "2.1-aggregate"
+                }
+            }
+
+            metric = existing.get(day)
+            if metric:
+                for key, value in metric_data.items():
+                    setattr(metric, key, value)
+            else:
+                metric = ShopifyDailyMetric(**metric_data)
+            session.add(metric)
+            metrics.append(metric)
+
+        logger.info(f"Rolled up {len(metrics)} daily snapshot(s) for Integration {integration.id}")
+        return metrics
+
+    async def refresh_touched_days(
+        self,
+        session: AsyncSession,
+        integration: Integration,
+        since: datetime
+    ) -> List[date]:
+        """
+        Incremental rollup: recomputes only the days dirtied by records refined
+        since ``since``. Returns the recomputed days so callers can refresh
+        downstream snapshots for the same set.
+        """
+        days = await self.touched_dates(session, integration.id, since)
+        await self.rollup_days(session, integration, days)
+        return days
+
     async def generate_daily_snapshot(
         self, 
         session: AsyncSession, 
@@ -30,107 +241,17 @@ class ShopifyMetricsService:
         Implements 100% accurate financial filtering and arithmetic.
         """
         logger.info(f"Generating Accurate Daily Snapshot for Integration {integration.id} on {target_date}")
+        metrics = await self.rollup_days(session, integration, [target_date])
+        return metrics[0]
 
+    @staticmethod
+    def _day_bounds(column, days: Sequence[date]) -> tuple:
+        """Sargable range covering ``days`` so the timestamp index narrows the scan."""
         # --- Timezone Handling (Placeholder for store-local) ---
-        # In a real scenario, we'd fetch 'integration.config.get("timezone")'
         # For now, we remain on UTC but structured for shift.
-        start_dt = datetime.combine(target_date, datetime.min.time())
-        end_dt = start_dt + timedelta(days=1)
-
-        # 1. Fetch ORDERS (Exclude Cancelled & Voided for financial parity)
-        order_stmt = select(ShopifyOrder).where(
-            ShopifyOrder.integration_id == integration.id,
-            ShopifyOrder.shopify_created_at >= start_dt,
-            ShopifyOrder.shopify_created_at < end_dt,
-            ShopifyOrder.shopify_cancelled_at == None, # Exclude Cancelled
-            ShopifyOrder.financial_status != "voided"   # Exclude Voided
-        )
-        result = await session.execute(order_stmt)
-        orders = result.scalars().all()
-
-        # 2. Fetch REFUNDS (Processed on this date, regardless of when order was placed)
-        from app.models.shopify.transaction import ShopifyTransaction
-        refund_stmt = select(func.sum(ShopifyTransaction.amount)).where(
-            ShopifyTransaction.integration_id == integration.id,
-            ShopifyTransaction.kind == "refund",
-            ShopifyTransaction.status == "success",
-            ShopifyTransaction.shopify_processed_at >= start_dt,
-            ShopifyTransaction.shopify_processed_at < end_dt
-        )
-        total_refunds = (await session.execute(refund_stmt)).scalar() or Decimal("0.00")
-        total_refunds = Decimal(str(total_refunds))
-
-        # 3. Precision Arithmetic (Shopify Standard Reporting Definition)
-        gross_sales = Decimal("0.00")
-        total_discounts = Decimal("0.00")
-        total_tax = Decimal("0.00")
-        total_shipping = Decimal("0.00")
-        order_count = len(orders)
-
-        for order in orders:
-            # Gross Sales: Subtotal + Discounts (Original item prices before any deductions)
-            gross_sales += Decimal(str(order.subtotal_price)) + Decimal(str(order.total_discounts))
-            total_discounts += Decimal(str(order.total_discounts))
-            total_tax += Decimal(str(order.total_tax))
-            total_shipping += Decimal(str(order.total_shipping))
-
-        # Net Sales = Gross Sales - Discounts - Returns (Refunds)
-        net_sales = gross_sales - total_discounts - total_refunds
-        
-        # Total Sales = Net Sales + Taxes + Shipping
-        total_sales = net_sales + total_tax + total_shipping
-
-        aov = Decimal("0.00")
-        if order_count > 0:
-            aov = total_sales / order_count
-
-        # 4. Fetch New Customers
-        customer_stmt = select(func.count(ShopifyCustomer.id)).where(
-            ShopifyCustomer.integration_id == integration.id,
-            ShopifyCustomer.shopify_created_at >= start_dt,
-            ShopifyCustomer.shopify_created_at < end_dt
-        )
-        customer_count_new = (await session.execute(customer_stmt)).scalar() or 0
-
-        # ... (UPSERT logic continues)
-        stmt = select(ShopifyDailyMetric).where(
-            ShopifyDailyMetric.integration_id == integration.id,
-            ShopifyDailyMetric.snapshot_date == target_date
-        )
-        existing = (await session.execute(stmt)).scalars().first()
-
-        metric_data = {
-            "integration_id": integration.id,
-            "company_id": integration.company_id,
-            "snapshot_date": target_date,
-            "gross_sales": gross_sales,
-            "net_sales": net_sales,
-            "total_sales": total_sales,
-            "total_discounts": total_discounts,
-            "total_refunds": total_refunds,
-            "total_tax": total_tax,
-            "total_shipping": total_shipping,
-            "order_count": order_count,
-            "customer_count_new": customer_count_new,
-            "average_order_value": aov,
-            "currency": orders[0].currency if orders else "USD",
-            "meta_data": {
-                "sync_timestamp": datetime.now(timezone.utc).isoformat(),
-                "accuracy_version": "2.0-precision"
-            }
-        }
-
-        if existing:
-            for key, value in metric_data.items():
-                setattr(existing, key, value)
-            session.add(existing)
-            logger.info(f"Updated Daily Snapshot for {target_date}")
-            return existing
-        else:
-            new_metric = ShopifyDailyMetric(**metric_data)
-            session.add(new_metric)
-            logger.info(f"Created Daily Snapshot for {target_date}")
-            return new_metric
+        start_dt = datetime.combine(min(days), time.min)
+        end_dt = datetime.combine(max(days), time.min) + timedelta(days=1)
+        return column >= start_dt, column < end_dt
 
     async def get_overview_metrics(
         self, 
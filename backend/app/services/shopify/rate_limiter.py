@@ -0,0 +1,101 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+from loguru import logger
+
+CALL_LIMIT_HEADER = "X-Shopify-Shop-Api-Call-Limit"
+
+# Shopify REST defaults: 40 request bucket leaking 2 req/s (Plus stores: 80 @ 4 req/s).
+DEFAULT_BUCKET_SIZE = 40
+SECONDS_TO_DRAIN = 20.0
+
+
+@dataclass
+class _Bucket:
+    capacity: int = DEFAULT_BUCKET_SIZE
+    used: float = 0.0
+    updated_at: float = field(default_factory=time.monotonic)
+    blocked_until: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def leak_rate(self) -> float:
+        return self.capacity / SECONDS_TO_DRAIN
+
+    def level(self, now: float) -> float:
+        """Estimated bucket fill right now, after leaking since the last observation."""
+        return max(0.0, self.used - (now - self.updated_at) * self.leak_rate)
+
+
+class ShopifyRateBudget:
+    """
+    Process-wide, per-shop request budget mirroring Shopify's leaky bucket.
+
+    Every REST call reserves a slot via `acquire()` before it is sent and the bucket
+    is re-synced from the `X-Shopify-Shop-Api-Call-Limit` response header, so any
+    number of concurrent sync streams for the same shop share one budget and pace
+    themselves instead of tripping 429s.
+    """
+
+    def __init__(self, headroom: int = 4):
+        # Slots left free for webhooks/user-facing calls hitting the same shop
+        self.headroom = headroom
+        self._buckets: Dict[str, _Bucket] = {}
+
+    def _bucket(self, shop: str) -> _Bucket:
+        if shop not in self._buckets:
+            self._buckets[shop] = _Bucket()
+        return self._buckets[shop]
+
+    async def acquire(self, shop: str) -> None:
+        bucket = self._bucket(shop)
+        async with bucket.lock:
+            while True:
+                now = time.monotonic()
+                if now < bucket.blocked_until:
+                    await asyncio.sleep(bucket.blocked_until - now)
+                    continue
+
+                level = bucket.level(now)
+                limit = max(1, bucket.capacity - self.headroom)
+                if level + 1 <= limit:
+                    bucket.used = level + 1
+                    bucket.updated_at = now
+                    return
+
+                await asyncio.sleep((level + 1 - limit) / bucket.leak_rate)
+
+    def update(self, shop: str, headers: Mapping[str, str]) -> None:
+        """Re-syncs the local estimate with the server's view of the bucket."""
+        header = headers.get(CALL_LIMIT_HEADER)
+        if not header:
+            return
+        try:
+            used, capacity = (int(part) for part in header.split("/"))
+        except ValueError:
+            logger.debug(f"Unparseable {CALL_LIMIT_HEADER} header: {header}")
+            return
+
+        bucket = self._bucket(shop)
+        bucket.capacity = capacity
+        bucket.used = float(used)
+        bucket.updated_at = time.monotonic()
+
+    def penalize(self, shop: str, retry_after: float) -> None:
+        """Blocks all callers for the shop after a 429."""
+        bucket = self._bucket(shop)
+        now = time.monotonic()
+        bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+        bucket.used = float(bucket.capacity)
+        bucket.updated_at = now + retry_after
+
+    def snapshot(self, shop: str) -> Optional[Dict[str, float]]:
+        bucket = self._buckets.get(shop)
+        if not bucket:
+            return None
+        return {"capacity": bucket.capacity, "level": bucket.level(time.monotonic())}
+
+
+shopify_rate_budget = ShopifyRateBudget()
@@ -0,0 +1,250 @@
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import Text, and_, cast, delete, insert, literal, select, text, tuple_, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.models.shopify.inventory import ShopifyInventoryLevel
+from app.models.shopify.order import ShopifyOrder
+from app.models.shopify.raw_ingest import ShopifyRawIngest, ShopifyRawIngestArchive
+from app.models.shopify.sync_checkpoint import ShopifyPruneCursor
+
+# Columns carried over to the archive (audit/UI-only fields like headers and diffs are dropped)
+ARCHIVED_COLUMNS = (
+    "id", "fetched_at", "integration_id", "company_id", "object_type", "shopify_object_id",
+    "shopify_updated_at", "dedupe_key", "source", "topic", "processing_status", "payload",
+    "processed_at",
+)
+
+PARTITION_NAME_RE = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{ShopifyRawIngestArchive.__tablename__}_p{month:%Y%m}"
+
+
+class ShopifyRawRetentionService:
+    """
+    Keeps `shopify_raw_ingest` bounded.
+
+    Processed payloads older than their object_type's retention are moved, in
+    small committed batches, into the month-partitioned archive table; archive
+    months past the archive retention are dropped as whole partitions. Refined
+    tables get their `raw_payload` blanked through a persisted keyset cursor.
+    Every statement runs with a short lock_timeout and each run is time-boxed,
+    so a run never holds long locks and the next run resumes where it stopped.
+    """
+
+    lock_timeout = "5s"
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or async_session_factory
+
+    def retention_policies(self) -> List[Tuple[Optional[str], List[str], int]]:
+        """
+        Expands SHOPIFY_RAW_RETENTION_DAYS into ``(object_type, excluded, days)``
+        passes. The "default" entry becomes a pass over every object_type
+        without an explicit policy (``object_type=None``).
+        """
+        configured = dict(settings.SHOPIFY_RAW_RETENTION_DAYS)
+        default_days = configured.pop("default", None)
+        policies: List[Tuple[Optional[str], List[str], int]] = [
+            (object_type, [], days) for object_type, days in sorted(configured.items())
+        ]
+        if default_days is not None:
+            policies.append((None, sorted(configured), default_days))
+        return policies
+
+    async def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        now = now or datetime.utcnow()
+        deadline = time.monotonic() + settings.SHOPIFY_PRUNE_TIME_BUDGET_S
+        stats = {"archived": 0, "payloads_blanked": 0, "partitions_dropped": 0}
+
+        for object_type, excluded, days in self.retention_policies():
+            stats["archived"] += await self.archive_expired(
+                object_type, excluded, now - timedelta(days=days), deadline, now
+            )
+
+        payload_cutoff = now - timedelta(days=settings.SHOPIFY_REFINED_PAYLOAD_RETENTION_DAYS)
+        for table, ts_column in (
+            (ShopifyOrder.__table__, "shopify_created_at"),
+            (ShopifyInventoryLevel.__table__, "shopify_updated_at"),
+        ):
+            stats["payloads_blanked"] += await self.blank_refined_payloads(table, ts_column, payload_cutoff, deadline)
+
+        stats["partitions_dropped"] = await self.drop_expired_partitions(
+            now - timedelta(days=settings.SHOPIFY_RAW_ARCHIVE_RETENTION_DAYS)
+        )
+
+        if time.monotonic() >= deadline:
+            logger.warning(f"Raw retention hit its time budget; remaining rows are picked up next run. {stats}")
+        return stats
+
+    async def archive_expired(
+        self,
+        object_type: Optional[str],
+        excluded: List[str],
+        cutoff: datetime,
+        deadline: float,
+        now: datetime,
+    ) -> int:
+        """
+        Moves expired, non-pending raw rows into the archive one batch per
+        transaction (DELETE ... RETURNING feeding INSERT ... SELECT).
+        """
+        raw = ShopifyRawIngest.__table__
+        archive = ShopifyRawIngestArchive.__table__
+        batch_size = settings.SHOPIFY_PRUNE_BATCH_SIZE
+
+        expired = and_(
+            raw.c.object_type == object_type if object_type else raw.c.object_type.notin_(excluded),
+            raw.c.processing_status != "pending",
+            raw.c.fetched_at < cutoff,
+        )
+
+        async with self._session_factory() as session:
+            oldest = (await session.execute(select(raw.c.fetched_at).where(expired).order_by(raw.c.fetched_at).limit(1))).scalar()
+            if oldest is None:
+                return 0
+            await self.ensure_partitions(session, month_start(oldest), month_start(cutoff))
+            await session.commit()
+
+            victims = (
+                select(raw.c.id)
+                .where(expired)
+                .order_by(raw.c.fetched_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            moved = (
+                delete(raw)
+                .where(raw.c.id.in_(victims.scalar_subquery()))
+                .returning(*(raw.c[name] for name in ARCHIVED_COLUMNS))
+                .cte("moved")
+            )
+            move_stmt = insert(archive).from_select(
+                [*ARCHIVED_COLUMNS, "archived_at"],
+                select(*(moved.c[name] for name in ARCHIVED_COLUMNS), literal(now)),
+            )
+
+            archived = 0
+            while time.monotonic() < deadline:
+                await self._bound_locks(session)
+                result = await session.execute(move_stmt)
+                await session.commit()
+                archived += result.rowcount or 0
+                if (result.rowcount or 0) < batch_size:
+                    break
+
+        logger.info(f"Raw retention: archived {archived} '{object_type or 'default'}' payloads older than {cutoff:%Y-%m-%d}")
+        return archived
+
+    async def ensure_partitions(self, session: AsyncSession, first_month: date, last_month: date) -> None:
+        """Creates the monthly archive partitions covering [first_month, last_month]."""
+        month = first_month
+        while month <= last_month:
+            upper = next_month(month)
+            await session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(month)} "
+                f"PARTITION OF {ShopifyRawIngestArchive.__tablename__} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+            month = upper
+
+    async def drop_expired_partitions(self, cutoff: datetime) -> int:
+        """Drops archive partitions whose whole month ends before ``cutoff``."""
+        dropped = 0
+        async with self._session_factory() as session:
+            names = (await session.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :parent"
+            ), {"parent": ShopifyRawIngestArchive.__tablename__})).scalars().all()
+
+            for name in sorted(names):
+                match = PARTITION_NAME_RE.search(name)
+                if not match:
+                    continue
+                month = date(int(match.group(1)), int(match.group(2)), 1)
+                if datetime.combine(next_month(month), datetime.min.time()) > cutoff:
+                    continue
+                try:
+                    await self._bound_locks(session)
+                    await session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+                    await session.commit()
+                    dropped += 1
+                except Exception as e:
+                    await session.rollback()
+                    logger.warning(f"Raw retention: could not drop archive partition {name}: {e}")
+
+        if dropped:
+            logger.info(f"Raw retention: dropped {dropped} archive partition(s) older than {cutoff:%Y-%m-%d}")
+        return dropped
+
+    async def blank_refined_payloads(self, table, ts_column: str, cutoff: datetime, deadline: float) -> int:
+        """
+        Clears `raw_payload` on refined rows older than ``cutoff``, walking the
+        table in (timestamp, id) order from the persisted cursor.
+        """
+        target = f"{table.name}.raw_payload"
+        ts = table.c[ts_column]
+        batch_size = settings.SHOPIFY_PRUNE_BATCH_SIZE
+        blanked = 0
+
+        async with self._session_factory() as session:
+            cursor = await session.get(ShopifyPruneCursor, target) or ShopifyPruneCursor(target=target)
+
+            while time.monotonic() < deadline:
+                page = select(ts, table.c.id).where(ts < cutoff).order_by(ts, table.c.id).limit(batch_size)
+                if cursor.last_ts is not None:
+                    page = page.where(tuple_(ts, table.c.id) > tuple_(cursor.last_ts, cursor.last_id))
+                rows = (await session.execute(page)).all()
+
+                if rows:
+                    await self._bound_locks(session)
+                    result = await session.execute(
+                        update(table)
+                        .where(
+                            table.c.id.in_([row.id for row in rows]),
+                            table.c.raw_payload != None,
+                            cast(table.c.raw_payload, Text) != "{}",  # Already blank: skip the write
+                        )
+                        .values(raw_payload={})
+                    )
+                    blanked += result.rowcount or 0
+                    cursor.last_ts, cursor.last_id = rows[-1][0], rows[-1][1]
+                    cursor.rows_processed += len(rows)
+
+                if len(rows) < batch_size:
+                    # Pass complete: the next run starts a fresh sweep, which also
+                    # catches rows backfilled with timestamps behind the cursor
+                    cursor.last_ts, cursor.last_id = None, None
+                cursor.updated_at = datetime.utcnow()
+                session.add(cursor)
+                await session.commit()
+
+                if len(rows) < batch_size:
+                    break
+
+        return blanked
+
+    async def _bound_locks(self, session: AsyncSession) -> None:
+        # Fail fast instead of queueing behind (and blocking) live ingest traffic
+        await session.execute(text(f"SET LOCAL lock_timeout = '{self.lock_timeout}'"))
+
+
+shopify_raw_retention = ShopifyRawRetentionService()
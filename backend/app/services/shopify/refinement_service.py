@@ -1,10 +1,13 @@
-from datetime import datetime, timezone
+from collections import defaultdict
+from datetime import date, datetime, timezone
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
-from uuid import UUID
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
 
 from loguru import logger
 from prometheus_client import Counter, Histogram
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -43,6 +46,9 @@ ANALYTICS_BATCH_PROCESS_DURATION = Histogram(
     ["report_name"]
 )
 
+# Rows per multi-row upsert statement (keeps bind params well under asyncpg's 32767 limit)
+BULK_UPSERT_CHUNK_SIZE = 500
+
 class ShopifyRefinementService:
     """
     ETL Processor: Raw JSON (ShopifyRawIngest) -> Structured SQL (ShopifyOrder, etc.)
@@ -101,9 +107,27 @@ class ShopifyRefinementService:
             # Not a valid number, return as-is
             return value
 
-    async def process_pending_records(self, session: AsyncSession, integration_id: Optional[UUID] = None, limit: int = 50) -> int:
+    async def process_pending_records(
+        self,
+        session: AsyncSession,
+        integration_id: Optional[UUID] = None,
+        limit: int = 50,
+        batched: bool = False,
+        source: Optional[str] = None,
+        claim: bool = False,
+    ) -> int:
         """
         Fetches 'pending' raw records and refines them.
+
+        With ``batched=True`` orders and customers are refined in bulk (one
+        multi-row ``INSERT ... ON CONFLICT DO UPDATE`` per table per batch) and
+        only the rows that fail are retried through the per-row savepoint path.
+        Other object types always use the per-row path.
+
+        ``source`` restricts the batch to one ingest source (e.g. "webhook").
+        With ``claim=True`` records are taken oldest first and locked with
+        SKIP LOCKED until the caller commits, so concurrent drainers of the
+        same integration never refine a row twice.
         """
         stmt = select(ShopifyRawIngest).where(
             ShopifyRawIngest.processing_status == "pending"
@@ -111,77 +135,452 @@ class ShopifyRefinementService:
 
         if integration_id:
             stmt = stmt.where(ShopifyRawIngest.integration_id == integration_id)
+        if source:
+            stmt = stmt.where(ShopifyRawIngest.source == source)
+        if claim:
+            stmt = stmt.order_by(ShopifyRawIngest.fetched_at).with_for_update(skip_locked=True)
 
         stmt = stmt.limit(limit)
 
         results = await session.execute(stmt)
         records = results.scalars().all()
+        integration_ids = {r.integration_id for r in records}
+        # Read before refining: a failed savepoint expires the record objects
+        velocity_targets = self._velocity_targets(records)
+        is_postgres = session.get_bind().dialect.name == "postgresql"
+
+        if batched and is_postgres:
+            await self._process_batched(session, records)
+        else:
+            for record in records:
+                await self._refine_with_savepoint(session, record)
 
+        if velocity_targets and is_postgres:
+            await self._refresh_velocity(session, velocity_targets)
+
+        if integration_ids:
+            # Invalidate cached insight decks in the same transaction as the refined rows
+            from app.services.intelligence.deck_cache import insight_deck_cache
+            await insight_deck_cache.mark_data_changed(session, integration_ids)
+
+        await session.flush()
+        return len(records)
+
+    def _velocity_targets(self, records: List[ShopifyRawIngest]) -> Dict[UUID, Tuple[Set[date], Set[int]]]:
+        """
+        Per integration: the UTC days whose per-variant sales the batch's orders
+        can change, and the inventory items whose stock its levels can change.
+        """
+        targets: Dict[UUID, Tuple[Set[date], Set[int]]] = defaultdict(lambda: (set(), set()))
         for record in records:
-            record_id = record.id
-            # Use a savepoint (nested transaction) for each record
-            # This ensures that if ONE record fails, it doesn't roll back the ENTIRE session
-            # and doesn't expire other objects like the 'Integration' instance.
+            payload = record.payload or {}
+            try:
+                if record.object_type == "order" and payload.get("created_at"):
+                    targets[record.integration_id][0].add(self._parse_iso(payload["created_at"]).date())
+                elif record.object_type == "inventory_level" and payload.get("inventory_item_id"):
+                    targets[record.integration_id][1].add(int(payload["inventory_item_id"]))
+            except (TypeError, ValueError):
+                continue
+        return dict(targets)
+
+    async def _refresh_velocity(self, session: AsyncSession, targets: Dict[UUID, Tuple[Set[date], Set[int]]]):
+        """Keeps per-variant daily sales / velocity in step with this batch (same transaction)."""
+        from app.services.shopify.velocity_service import shopify_velocity_service
+
+        # Sorted so batches spanning integrations take the daily sales locks in one order
+        for integration_id, (days, inventory_item_ids) in sorted(targets.items(), key=lambda item: str(item[0])):
             nested = await session.begin_nested()
             try:
-                if record.object_type == "order":
-                    await self._refine_order(session, record)
-                elif record.object_type == "customer":
-                    await self._upsert_customer(session, record, record.payload)
-                elif record.object_type == "product":
-                    await self._refine_product(session, record)
-                elif record.object_type == "location":
-                    await self._refine_location(session, record)
-                elif record.object_type == "inventory_level":
-                    await self._refine_inventory_level(session, record)
-                elif record.object_type == "inventory_item":
-                    await self._refine_inventory_item(session, record)
-                elif record.object_type == "transaction":
-                    await self._refine_standalone_transaction(session, record)
-                elif record.object_type == "report":
-                    await self._refine_report(session, record)
-                elif record.object_type == "report_data":
-                    await self._refine_report_data(session, record)
-                elif record.object_type == "payout":
-                    await self._refine_payout(session, record)
-                elif record.object_type == "dispute":
-                    await self._refine_dispute(session, record)
-                elif record.object_type == "refund":
-                    await self._refine_refund(session, record)
-                elif record.object_type == "fulfillment":
-                    await self._refine_fulfillment(session, record)
-                elif record.object_type == "checkout":
-                    await self._refine_checkout(session, record)
-                elif record.object_type == "marketing_event":
-                    await self._refine_marketing_event(session, record)
-                elif record.object_type == "price_rule":
-                    await self._refine_price_rule(session, record)
-                elif record.object_type == "discount_code":
-                    await self._refine_discount_code(session, record)
-
-                record.processing_status = "processed"
-                record.processed_at = datetime.utcnow()
+                await shopify_velocity_service.refresh(session, integration_id, days, inventory_item_ids)
                 await nested.commit()
-            
             except Exception as e:
-                logger.error(f"Refinement Failed for record {record_id}: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
-                try:
-                    await nested.rollback()
-                    # Re-fetch the record in fresh state to update status
-                    record = await session.get(ShopifyRawIngest, record_id)
-                    if record:
-                        record.processing_status = "failed"
-                        record.error_message = str(e)
-                        # We don't commit here, we just flush. 
-                        # The caller will commit the whole session.
-                        await session.flush()
-                except Exception as nested_e:
-                    logger.error(f"Failed to record failure for {record_id}: {nested_e}")
+                # The nightly pass re-aggregates the trailing NIGHTLY_REAGGREGATE_DAYS days;
+                # older days skipped here stay stale until a refinement touches them again
+                logger.warning(f"Velocity refresh failed for integration {integration_id}: {e}")
+                await nested.rollback()
+
+    async def _refine_record(self, session: AsyncSession, record: ShopifyRawIngest):
+        """Dispatches a single raw record to its refiner."""
+        if record.object_type == "order":
+            await self._refine_order(session, record)
+        elif record.object_type == "customer":
+            await self._upsert_customer(session, record, record.payload)
+        elif record.object_type == "product":
+            await self._refine_product(session, record)
+        elif record.object_type == "location":
+            await self._refine_location(session, record)
+        elif record.object_type == "inventory_level":
+            await self._refine_inventory_level(session, record)
+        elif record.object_type == "inventory_item":
+            await self._refine_inventory_item(session, record)
+        elif record.object_type == "transaction":
+            await self._refine_standalone_transaction(session, record)
+        elif record.object_type == "report":
+            await self._refine_report(session, record)
+        elif record.object_type == "report_data":
+            await self._refine_report_data(session, record)
+        elif record.object_type == "payout":
+            await self._refine_payout(session, record)
+        elif record.object_type == "dispute":
+            await self._refine_dispute(session, record)
+        elif record.object_type == "refund":
+            await self._refine_refund(session, record)
+        elif record.object_type == "fulfillment":
+            await self._refine_fulfillment(session, record)
+        elif record.object_type == "checkout":
+            await self._refine_checkout(session, record)
+        elif record.object_type == "marketing_event":
+            await self._refine_marketing_event(session, record)
+        elif record.object_type == "price_rule":
+            await self._refine_price_rule(session, record)
+        elif record.object_type == "discount_code":
+            await self._refine_discount_code(session, record)
+
+    async def _refine_with_savepoint(self, session: AsyncSession, record: ShopifyRawIngest):
+        record_id = record.id
+        # Use a savepoint (nested transaction) for each record
+        # This ensures that if ONE record fails, it doesn't roll back the ENTIRE session
+        # and doesn't expire other objects like the 'Integration' instance.
+        nested = await session.begin_nested()
+        try:
+            await self._refine_record(session, record)
 
-        await session.flush()
-        return len(records)
+            record.processing_status = "processed"
+            record.processed_at = datetime.utcnow()
+            await nested.commit()
+
+        except Exception as e:
+            logger.error(f"Refinement Failed for record {record_id}: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            try:
+                await nested.rollback()
+                # Re-fetch the record in fresh state to update status
+                record = await session.get(ShopifyRawIngest, record_id)
+                if record:
+                    record.processing_status = "failed"
+                    record.error_message = str(e)
+                    # We don't commit here, we just flush.
+                    # The caller will commit the whole session.
+                    await session.flush()
+            except Exception as nested_e:
+                logger.error(f"Failed to record failure for {record_id}: {nested_e}")
+
+    # --- Batched Refinement ---
+
+    async def _process_batched(self, session: AsyncSession, records: List[ShopifyRawIngest]):
+        """
+        Groups records by object_type and refines orders/customers in bulk.
+        Rows rejected by (or belonging to a failed) bulk pass are retried one by one.
+        """
+        groups: Dict[str, List[ShopifyRawIngest]] = defaultdict(list)
+        for record in records:
+            groups[record.object_type].append(record)
+
+        # Customers first so that orders in the same batch resolve their customer FK
+        bulk_handlers = [
+            ("customer", self._bulk_refine_customers),
+            ("order", self._bulk_refine_orders),
+        ]
+        for object_type, handler in bulk_handlers:
+            group = groups.pop(object_type, [])
+            if not group:
+                continue
+            for record in await self._run_bulk(session, group, handler):
+                await self._refine_with_savepoint(session, record)
+
+        for group in groups.values():
+            for record in group:
+                await self._refine_with_savepoint(session, record)
+
+    async def _run_bulk(self, session: AsyncSession, group: List[ShopifyRawIngest], handler) -> List[ShopifyRawIngest]:
+        """
+        Runs a bulk handler inside a savepoint.
+        Returns the records that still need per-row refinement.
+        """
+        record_ids = [r.id for r in group]
+        nested = await session.begin_nested()
+        try:
+            rejected = await handler(session, group)
+            rejected_ids = {r.id for r in rejected}
+            now = datetime.utcnow()
+            for record in group:
+                if record.id not in rejected_ids:
+                    record.processing_status = "processed"
+                    record.processed_at = now
+            await nested.commit()
+            return rejected
+        except Exception as e:
+            logger.warning(f"Bulk refinement of {len(group)} '{group[0].object_type}' records failed, falling back to per-row: {e}")
+            await nested.rollback()
+            # The rollback expires objects touched inside the savepoint; reload them in one go
+            stmt = select(ShopifyRawIngest).where(
+                ShopifyRawIngest.id.in_(record_ids)
+            ).execution_options(populate_existing=True)
+            return list((await session.execute(stmt)).scalars().all())
+
+    async def _bulk_upsert(self, session: AsyncSession, table, rows: List[Dict], conflict_cols: List[str], update_cols: List[str], returning=None) -> List[Any]:
+        """Multi-row INSERT ... ON CONFLICT DO UPDATE, chunked to stay under driver parameter limits."""
+        returned = []
+        for start in range(0, len(rows), BULK_UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + BULK_UPSERT_CHUNK_SIZE]
+            stmt = pg_insert(table).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_cols,
+                set_={col: stmt.excluded[col] for col in update_cols},
+            )
+            if returning is not None:
+                stmt = stmt.returning(*returning)
+                returned.extend((await session.execute(stmt)).all())
+            else:
+                await session.execute(stmt)
+        return returned
+
+    def _customer_row(self, raw: ShopifyRawIngest, customer_data: Dict) -> Dict:
+        created_at_dt = self._parse_iso(customer_data.get("created_at"))
+        updated_at_dt = self._parse_iso(customer_data.get("updated_at"))
+        return {
+            "id": uuid4(),
+            "integration_id": raw.integration_id,
+            "company_id": raw.company_id,
+            "shopify_customer_id": int(customer_data.get("id")),
+            "email": customer_data.get("email"),
+            "first_name": customer_data.get("first_name"),
+            "last_name": customer_data.get("last_name"),
+            "phone": customer_data.get("phone"),
+            "orders_count": customer_data.get("orders_count"),
+            "total_spent": self._safe_float(customer_data.get("total_spent")),
+            "currency": customer_data.get("currency"),
+            "shopify_created_at": created_at_dt or datetime.utcnow(),
+            "shopify_updated_at": updated_at_dt or datetime.utcnow(),
+            "last_order_id": int(customer_data.get("last_order_id")) if customer_data.get("last_order_id") else None,
+            "tags": customer_data.get("tags"),
+            "raw_payload": customer_data,
+            "created_by": raw.created_by or "System",
+            "updated_by": raw.created_by or "System",
+        }
+
+    def _address_row(self, raw: ShopifyRawIngest, customer_shopify_id: int, local_customer_uuid: UUID, addr: Dict, default_address_id: Optional[int]) -> Dict:
+        addr_id = int(addr.get("id"))
+        return {
+            "id": uuid4(),
+            "integration_id": raw.integration_id,
+            "company_id": raw.company_id,
+            "shopify_customer_id": customer_shopify_id,
+            "customer_id": local_customer_uuid,
+            "shopify_address_id": addr_id,
+            "first_name": addr.get("first_name"),
+            "last_name": addr.get("last_name"),
+            "company": addr.get("company"),
+            "address1": addr.get("address1"),
+            "address2": addr.get("address2"),
+            "city": addr.get("city"),
+            "province": addr.get("province"),
+            "country": addr.get("country"),
+            "zip": addr.get("zip"),
+            "phone": addr.get("phone"),
+            "name": addr.get("name"),
+            "province_code": addr.get("province_code"),
+            "country_code": addr.get("country_code"),
+            "country_name": addr.get("country_name"),
+            "default": addr_id == default_address_id,
+            "raw_payload": addr,
+            "created_by": raw.created_by or "System",
+            "updated_by": raw.created_by or "System",
+        }
+
+    def _order_row(self, raw: ShopifyRawIngest, payload: Dict, local_customer_uuid: Optional[UUID]) -> Dict:
+        return {
+            "id": uuid4(),
+            "integration_id": raw.integration_id,
+            "company_id": raw.company_id,
+            "shopify_order_id": int(payload.get("id")),
+            "shopify_order_number": int(payload.get("order_number")) if payload.get("order_number") else None,
+            "shopify_name": payload.get("name") or str(payload.get("order_number")),
+            "shopify_created_at": self._parse_iso(payload.get("created_at")) or datetime.utcnow(),
+            "shopify_updated_at": self._parse_iso(payload.get("updated_at")) or datetime.utcnow(),
+            "shopify_processed_at": self._parse_iso(payload.get("processed_at")),
+            "currency": payload.get("currency"),
+            "total_price": self._safe_float(payload.get("total_price")),
+            "subtotal_price": self._safe_float(payload.get("subtotal_price")),
+            "total_tax": self._safe_float(payload.get("total_tax")),
+            "financial_status": payload.get("financial_status") or "pending",
+            "fulfillment_status": payload.get("fulfillment_status") or "unfulfilled",
+            "customer_id": local_customer_uuid,
+            "raw_payload": payload,
+            "created_by": raw.created_by or "System",
+            "updated_by": raw.created_by or "System",
+        }
+
+    def _line_item_row(self, integration_id: UUID, company_id: UUID, target_order_id: UUID, item: Dict) -> Dict:
+        return {
+            "id": uuid4(),
+            "integration_id": integration_id,
+            "company_id": company_id,
+            "order_id": target_order_id,
+            "shopify_line_item_id": int(item.get("id")),
+            "title": item.get("title"),
+            "variant_title": item.get("variant_title"),
+            "vendor": item.get("vendor"),
+            "quantity": item.get("quantity"),
+            "price": self._safe_float(item.get("price")),
+            "sku": item.get("sku"),
+            "variant_id": int(item.get("variant_id")) if item.get("variant_id") else None,
+            "product_id": int(item.get("product_id")) if item.get("product_id") else None,
+            "total_discount": self._safe_float(item.get("total_discount") or 0),
+            "created_by": "System",
+            "updated_by": "System",
+        }
+
+    async def _bulk_upsert_customers(self, session: AsyncSession, entries: List[Tuple[ShopifyRawIngest, Dict]]) -> Dict[Tuple[UUID, int], UUID]:
+        """
+        Upserts customers (and their addresses) for a batch.
+        Returns a map of (integration_id, shopify_customer_id) -> local customer UUID.
+        """
+        # Later payloads for the same customer win; ON CONFLICT cannot touch a row twice
+        latest: Dict[Tuple[UUID, int], Tuple[ShopifyRawIngest, Dict, Dict]] = {}
+        for raw, customer_data in entries:
+            row = self._customer_row(raw, customer_data)
+            latest[(row["integration_id"], row["shopify_customer_id"])] = (raw, customer_data, row)
+        if not latest:
+            return {}
+
+        returned = await self._bulk_upsert(
+            session,
+            ShopifyCustomer.__table__,
+            [row for _, _, row in latest.values()],
+            conflict_cols=["integration_id", "shopify_customer_id"],
+            update_cols=[
+                "email", "first_name", "last_name", "phone", "orders_count", "total_spent",
+                "currency", "last_order_id", "tags", "shopify_updated_at", "raw_payload", "updated_by",
+            ],
+            returning=[
+                ShopifyCustomer.__table__.c.id,
+                ShopifyCustomer.__table__.c.integration_id,
+                ShopifyCustomer.__table__.c.shopify_customer_id,
+            ],
+        )
+        customer_ids = {(r.integration_id, r.shopify_customer_id): r.id for r in returned}
+
+        # Addresses: upsert what the payload carries, then prune local addresses it no longer lists
+        address_rows = []
+        remote_ids = set()
+        for key, (raw, customer_data, _) in latest.items():
+            addresses = customer_data.get("addresses", [])
+            default_address = customer_data.get("default_address")
+            default_address_id = int(default_address.get("id")) if default_address and default_address.get("id") else None
+            for addr in addresses:
+                if not addr.get("id"):
+                    continue
+                address_rows.append(self._address_row(raw, key[1], customer_ids[key], addr, default_address_id))
+                remote_ids.add((key[0], int(addr.get("id"))))
+
+        if address_rows:
+            deduped = {(r["integration_id"], r["shopify_address_id"]): r for r in address_rows}
+            await self._bulk_upsert(
+                session,
+                ShopifyAddress.__table__,
+                list(deduped.values()),
+                conflict_cols=["integration_id", "shopify_address_id"],
+                update_cols=[
+                    "customer_id", "first_name", "last_name", "company", "address1", "address2",
+                    "city", "province", "country", "zip", "phone", "name", "province_code",
+                    "country_code", "country_name", "default", "raw_payload", "updated_by",
+                ],
+            )
+
+        address_table = ShopifyAddress.__table__
+        local_stmt = select(address_table.c.integration_id, address_table.c.shopify_address_id).where(
+            tuple_(address_table.c.integration_id, address_table.c.shopify_customer_id).in_(list(latest.keys()))
+        )
+        local_ids = {(r[0], r[1]) for r in (await session.execute(local_stmt)).all()}
+        zombies = local_ids - remote_ids
+        if zombies:
+            logger.warning(f"🗑️ Pruning {len(zombies)} zombie addresses across {len(latest)} customers")
+            await session.execute(
+                delete(address_table).where(
+                    tuple_(address_table.c.integration_id, address_table.c.shopify_address_id).in_(list(zombies))
+                )
+            )
+
+        return customer_ids
+
+    async def _bulk_refine_customers(self, session: AsyncSession, records: List[ShopifyRawIngest]) -> List[ShopifyRawIngest]:
+        entries, rejected = [], []
+        for record in records:
+            try:
+                int(record.payload.get("id"))
+                entries.append((record, record.payload))
+            except Exception:
+                rejected.append(record)
+
+        await self._bulk_upsert_customers(session, entries)
+        return rejected
+
+    async def _bulk_refine_orders(self, session: AsyncSession, records: List[ShopifyRawIngest]) -> List[ShopifyRawIngest]:
+        accepted, rejected = [], []
+        customer_entries = []
+        for record in records:
+            payload = record.payload
+            try:
+                int(payload.get("id"))
+                customer_data = payload.get("customer")
+                if customer_data:
+                    int(customer_data.get("id"))
+                    customer_entries.append((record, customer_data))
+                for item in payload.get("line_items", []):
+                    int(item.get("id"))
+                accepted.append(record)
+            except Exception:
+                rejected.append(record)
+
+        customer_ids = await self._bulk_upsert_customers(session, customer_entries)
+
+        # Keep the most recent payload per order
+        latest: Dict[Tuple[UUID, int], Tuple[ShopifyRawIngest, Dict]] = {}
+        for record in accepted:
+            customer_data = record.payload.get("customer")
+            local_customer_uuid = None
+            if customer_data:
+                local_customer_uuid = customer_ids.get((record.integration_id, int(customer_data.get("id"))))
+            row = self._order_row(record, record.payload, local_customer_uuid)
+            key = (row["integration_id"], row["shopify_order_id"])
+            if key not in latest or row["shopify_updated_at"] >= latest[key][1]["shopify_updated_at"]:
+                latest[key] = (record, row)
+        if not latest:
+            return rejected
+
+        order_table = ShopifyOrder.__table__
+        returned = await self._bulk_upsert(
+            session,
+            order_table,
+            [row for _, row in latest.values()],
+            conflict_cols=["integration_id", "shopify_order_id"],
+            update_cols=[
+                "shopify_order_number", "shopify_name", "shopify_updated_at", "shopify_processed_at",
+                "currency", "total_price", "subtotal_price", "total_tax", "financial_status",
+                "fulfillment_status", "customer_id", "raw_payload", "updated_by",
+            ],
+            returning=[order_table.c.id, order_table.c.integration_id, order_table.c.shopify_order_id],
+        )
+        order_ids = {(r.integration_id, r.shopify_order_id): r.id for r in returned}
+
+        line_rows: Dict[Tuple[UUID, int], Dict] = {}
+        for key, (record, _) in latest.items():
+            for item in record.payload.get("line_items", []):
+                row = self._line_item_row(record.integration_id, record.company_id, order_ids[key], item)
+                line_rows[(row["integration_id"], row["shopify_line_item_id"])] = row
+
+        if line_rows:
+            await self._bulk_upsert(
+                session,
+                ShopifyLineItem.__table__,
+                list(line_rows.values()),
+                conflict_cols=["integration_id", "shopify_line_item_id"],
+                update_cols=["quantity", "price", "total_discount", "variant_title", "vendor"],
+            )
+
+        return rejected
 
     async def _refine_order(self, session: AsyncSession, raw: ShopifyRawIngest):
         """
@@ -0,0 +1,208 @@
+"""
+Background refinement of Shopify webhook payloads.
+
+The webhook handler only stores the raw payload and calls `notify`; this
+worker turns pending webhook rows into refined tables:
+
+- one drain task per integration at a time. Notifications that arrive while
+  it runs just schedule one more pass, so a storm on one shop costs one
+  in-memory entry, not one task per delivery;
+- each pass claims up to SHOPIFY_WEBHOOK_REFINE_BATCH_SIZE rows per
+  transaction (oldest first, SKIP LOCKED) for at most
+  SHOPIFY_WEBHOOK_REFINE_MAX_BATCHES batches, then goes to the back of the
+  line, so one busy shop cannot starve the others;
+- at most SHOPIFY_WEBHOOK_REFINE_CONCURRENCY integrations refine at once; the
+  backlog waits in shopify_raw_ingest, not in memory;
+- integration sync_stats and today's snapshot are recomputed once per pass
+  instead of once per webhook.
+
+Rows left pending by a restart are picked up when the worker starts.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Set, Tuple
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy.orm.attributes import flag_modified
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.core.metrics import shopify_webhook_records_refined, shopify_webhook_refine_batch_duration
+from app.models.integration import Integration
+from app.models.shopify.raw_ingest import ShopifyRawIngest
+from app.services.analytics.service import AnalyticsService
+from app.services.shopify.refinement_service import shopify_refinement_service
+
+WEBHOOK_SOURCE = "webhook"
+
+
+class ShopifyRefinementWorker:
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or async_session_factory
+        self._semaphore = asyncio.Semaphore(max(1, settings.SHOPIFY_WEBHOOK_REFINE_CONCURRENCY))
+        self._active: Set[UUID] = set()
+        self._rerun: Set[UUID] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(self):
+        """Schedules integrations that still have pending webhook rows."""
+        try:
+            async with self._session_factory() as session:
+                stmt = select(ShopifyRawIngest.integration_id).where(
+                    ShopifyRawIngest.processing_status == "pending",
+                    ShopifyRawIngest.source == WEBHOOK_SOURCE,
+                ).distinct()
+                integration_ids = (await session.execute(stmt)).scalars().all()
+        except Exception as e:
+            logger.error(f"ShopifyRefinementWorker: failed to resume pending webhooks: {e}")
+            return
+        for integration_id in integration_ids:
+            self.notify(integration_id)
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._active.clear()
+        self._rerun.clear()
+
+    def notify(self, integration_id: UUID):
+        """New webhook rows for this integration; never blocks the caller."""
+        if integration_id in self._active:
+            self._rerun.add(integration_id)
+            return
+        self._active.add(integration_id)
+        task = asyncio.create_task(self._run(integration_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, integration_id: UUID):
+        more = False
+        try:
+            async with self._semaphore:
+                _, more = await self.drain(integration_id)
+        except Exception as e:
+            # Rows stay pending; the next webhook (or restart) for this shop retries them
+            logger.error(f"ShopifyRefinementWorker: refinement failed for integration {integration_id}: {e}")
+        finally:
+            self._active.discard(integration_id)
+
+        if more or integration_id in self._rerun:
+            self._rerun.discard(integration_id)
+            self.notify(integration_id)
+
+    async def drain(self, integration_id: UUID) -> Tuple[int, bool]:
+        """
+        One pass over an integration's pending webhook rows.
+        Returns (rows refined, whether the batch cap cut the pass short).
+        """
+        batch_size = max(1, settings.SHOPIFY_WEBHOOK_REFINE_BATCH_SIZE)
+        refined = 0
+        more = False
+        async with self._session_factory() as session:
+            for _ in range(max(1, settings.SHOPIFY_WEBHOOK_REFINE_MAX_BATCHES)):
+                started = time.monotonic()
+                count = await shopify_refinement_service.process_pending_records(
+                    session,
+                    integration_id=integration_id,
+                    limit=batch_size,
+                    batched=True,
+                    source=WEBHOOK_SOURCE,
+                    claim=True,
+                )
+                await session.commit()
+                if count:
+                    shopify_webhook_refine_batch_duration.observe(time.monotonic() - started)
+                    shopify_webhook_records_refined.inc(count)
+                refined += count
+                if count < batch_size:
+                    break
+            else:
+                more = True
+
+            if refined:
+                logger.info(f"✅ Refined {refined} webhook records for integration {integration_id}")
+                await self._refresh_stats(session, integration_id)
+        return refined, more
+
+    async def _refresh_stats(self, session: AsyncSession, integration_id: UUID):
+        """
+        Real-time stats recalculation from the refined tables (source of truth).
+        Failures are logged; the next sync corrects the numbers.
+        """
+        from app.models.shopify.customer import ShopifyCustomer
+        from app.models.shopify.inventory import ShopifyInventoryLevel, ShopifyLocation
+        from app.models.shopify.order import ShopifyOrder
+        from app.models.shopify.product import ShopifyProduct
+
+        try:
+            integration = await session.get(Integration, integration_id)
+            if not integration:
+                return
+
+            orders_count = (await session.execute(
+                select(func.count(ShopifyOrder.id)).where(ShopifyOrder.integration_id == integration_id)
+            )).scalar_one() or 0
+            products_count = (await session.execute(
+                select(func.count(ShopifyProduct.id)).where(ShopifyProduct.integration_id == integration_id)
+            )).scalar_one() or 0
+            customers_count = (await session.execute(
+                select(func.count(ShopifyCustomer.id)).where(ShopifyCustomer.integration_id == integration_id)
+            )).scalar_one() or 0
+            locations_count = (await session.execute(
+                select(func.count(ShopifyLocation.id)).where(ShopifyLocation.integration_id == integration_id)
+            )).scalar_one() or 0
+            # Inventory total (sum of available across all locations)
+            inventory_count = (await session.execute(
+                select(func.sum(ShopifyInventoryLevel.available)).where(ShopifyInventoryLevel.integration_id == integration_id)
+            )).scalar_one() or 0
+
+            # Revenue calculation (matching Shopify's definition)
+            # Total Sales = Gross Sales - Returns + Net Tax
+            revenue_stmt = select(
+                func.sum(ShopifyOrder.subtotal_price - ShopifyOrder.refunded_subtotal + ShopifyOrder.total_tax - ShopifyOrder.refunded_tax)
+            ).where(
+                ShopifyOrder.integration_id == integration_id,
+                ShopifyOrder.financial_status != "unknown",
+                ShopifyOrder.shopify_order_number != 1070  # Exclude test orders
+            )
+            total_revenue = (await session.execute(revenue_stmt)).scalar_one() or 0.0
+
+            current_meta = integration.metadata_info or {}
+            sync_stats = current_meta.get("sync_stats", {})
+            sync_stats.update({
+                "orders_count": orders_count,
+                "products_count": products_count,
+                "customers_count": customers_count,
+                "locations_count": locations_count,
+                "inventory_count": int(inventory_count),
+                "total_revenue": float(total_revenue),
+                "last_updated": datetime.now(timezone.utc).isoformat()
+            })
+            current_meta["sync_stats"] = sync_stats
+            integration.metadata_info = current_meta
+            integration.last_sync_at = datetime.now(timezone.utc)
+            flag_modified(integration, "metadata_info")
+            session.add(integration)
+            await session.commit()
+
+            # --- Historical Metrics Snapshot (Module 6) ---
+            try:
+                today = datetime.now(timezone.utc).date()
+                await AnalyticsService.refresh_snapshot(session, integration, today)
+                await session.commit()
+            except Exception as metric_err:
+                logger.error(f"Failed to update daily snapshot: {metric_err}")
+
+            logger.info(f"Real-time stats updated: Orders={orders_count}, Products={products_count}, Inventory={inventory_count}")
+        except Exception as stats_error:
+            logger.error(f"Stats recalculation failed: {stats_error}")
+            await session.rollback()
+
+
+shopify_refinement_worker = ShopifyRefinementWorker()
@@ -0,0 +1,62 @@
+"""
+Shop domain -> integration lookup for the webhook ack path.
+
+Resolved through the ix_integration_shop_domain expression index and kept in
+an in-process TTL cache, so a webhook storm does not re-query the integration
+table per delivery. Integration writes drop their shop's entry (listener in
+app.models.integration); other workers converge within SHOP_DIRECTORY_TTL_S.
+"""
+import uuid
+from typing import NamedTuple, Optional
+
+from sqlalchemy import literal_column, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.ttl_cache import TTLCache
+from app.core.config import settings
+from app.models.integration import Integration
+
+# Must match the ix_integration_shop_domain expression for the planner to use it
+SHOP_DOMAIN_EXPR = literal_column("(integration.metadata_info ->> 'shop')")
+
+
+class ShopIntegration(NamedTuple):
+    """The integration fields raw ingestion needs (id, company_id)."""
+    id: uuid.UUID
+    company_id: uuid.UUID
+
+
+class ShopDirectory:
+
+    def __init__(self):
+        self._cache = TTLCache(settings.SHOP_DIRECTORY_CACHE_SIZE, settings.SHOP_DIRECTORY_TTL_S)
+
+    async def resolve(self, session: AsyncSession, shop_domain: Optional[str]) -> Optional[ShopIntegration]:
+        """Any integration status: webhooks are accepted in every state."""
+        if not shop_domain:
+            return None
+        cached = self._cache.get(shop_domain)
+        if cached is not None:
+            return cached
+
+        stmt = (
+            select(Integration.id, Integration.company_id)
+            .where(SHOP_DOMAIN_EXPR == shop_domain)
+            .limit(1)
+        )
+        row = (await session.execute(stmt)).first()
+        if row is None:
+            return None
+        shop = ShopIntegration(row.id, row.company_id)
+        self._cache.set(shop_domain, shop)
+        return shop
+
+    def invalidate(self, shop_domain: Optional[str] = None):
+        """Drops one shop, or everything when shop_domain is None."""
+        if shop_domain is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(shop_domain)
+
+
+shop_directory = ShopDirectory()
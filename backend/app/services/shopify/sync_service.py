@@ -1,8 +1,10 @@
 import hashlib
 import json
+import math
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
-from uuid import UUID
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from uuid import UUID, uuid4
 
 import httpx
 from loguru import logger
@@ -11,7 +13,9 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.integration import Integration, IntegrationStatus
 from app.models.shopify.raw_ingest import ShopifyRawIngest
+from app.models.shopify.sync_checkpoint import ShopifySyncCheckpoint
 from app.services.shopify.oauth_service import shopify_oauth_service
+from app.services.shopify.rate_limiter import shopify_rate_budget
 
 
 class ShopifySyncService:
@@ -20,31 +24,149 @@ class ShopifySyncService:
 
     async def _make_request(self, client: httpx.AsyncClient, url: str, headers: Dict, params: Optional[Dict] = None) -> httpx.Response:
         """
-        Executes HTTP request with explicit 429 Rate Limit handling (Leaky Bucket / Retry-After).
+        Executes HTTP request paced by the shared per-shop leaky bucket budget.
+        429s (Retry-After) are still honoured as a fallback.
         """
         retries = 3
         base_delay = 1.0
-        
+        shop = urlparse(url).netloc
+
         for attempt in range(retries):
             try:
+                await shopify_rate_budget.acquire(shop)
                 response = await client.get(url, headers=headers, params=params)
-                
+                shopify_rate_budget.update(shop, response.headers)
+
                 if response.status_code == 429:
                     retry_after = float(response.headers.get("Retry-After", base_delay * (2 ** attempt)))
                     logger.warning(f"Shopify Rate Limit Hit (429). Sleeping for {retry_after}s...")
-                    import asyncio
-                    await asyncio.sleep(retry_after)
+                    shopify_rate_budget.penalize(shop, retry_after)
                     continue
-                    
+
                 return response
-                
+
             except httpx.RequestError as e:
                 logger.warning(f"Request failed (Attempt {attempt+1}/{retries}): {e}")
                 if attempt == retries - 1:
                     raise
-        
+
         return response
 
+    async def _load_checkpoint(
+        self,
+        session: AsyncSession,
+        integration_id: UUID,
+        resource: str,
+        window_start: Optional[datetime]
+    ) -> ShopifySyncCheckpoint:
+        """
+        Returns the stream checkpoint for a resource, resetting it when the previous
+        run finished or was started for a different sync window.
+        """
+        window_start = self._naive_utc(window_start)
+        stmt = select(ShopifySyncCheckpoint).where(
+            ShopifySyncCheckpoint.integration_id == integration_id,
+            ShopifySyncCheckpoint.resource == resource
+        )
+        checkpoint = (await session.execute(stmt)).scalars().first()
+
+        if checkpoint and not checkpoint.completed and checkpoint.page_info and checkpoint.window_start == window_start:
+            logger.info(f"Resuming {resource} stream for {integration_id} after page {checkpoint.pages_synced}")
+            return checkpoint
+
+        if not checkpoint:
+            checkpoint = ShopifySyncCheckpoint(integration_id=integration_id, resource=resource)
+        checkpoint.window_start = window_start
+        checkpoint.page_info = None
+        checkpoint.pages_synced = 0
+        checkpoint.objects_synced = 0
+        checkpoint.completed = False
+        checkpoint.started_at = datetime.utcnow()
+        checkpoint.updated_at = datetime.utcnow()
+        session.add(checkpoint)
+        return checkpoint
+
+    def _advance_checkpoint(self, session: AsyncSession, checkpoint: ShopifySyncCheckpoint, next_page_info: Optional[str], objects: int):
+        """Moves the cursor forward; committed together with the page's raw rows."""
+        checkpoint.page_info = next_page_info
+        checkpoint.pages_synced += 1
+        checkpoint.objects_synced += objects
+        checkpoint.completed = next_page_info is None
+        checkpoint.updated_at = datetime.utcnow()
+        session.add(checkpoint)
+
+    async def _paginate(
+        self,
+        session: AsyncSession,
+        client: httpx.AsyncClient,
+        integration_id: UUID,
+        resource: str,
+        url: str,
+        params: Dict,
+        token: str,
+        stats: Dict[str, Any],
+        window_start: Optional[datetime] = None
+    ):
+        """
+        Yields (page_number, data) for every page of a cursor-paginated resource.
+        The `page_info` cursor is checkpointed and committed after the caller has
+        ingested each page, so an interrupted stream resumes where it stopped
+        instead of starting over. There is no page cap.
+        """
+        checkpoint = await self._load_checkpoint(session, integration_id, resource, window_start)
+        resumed = checkpoint.page_info is not None
+
+        while True:
+            request_params = {"page_info": checkpoint.page_info, "limit": 250} if checkpoint.page_info else params
+            response = await self._make_request(
+                client,
+                url,
+                headers={"X-Shopify-Access-Token": token},
+                params=request_params
+            )
+
+            if response.status_code != 200:
+                if resumed:
+                    # Cursors can expire between runs; fall back to a fresh stream once
+                    logger.warning(f"Stored {resource} cursor rejected ({response.status_code}). Restarting stream.")
+                    checkpoint.page_info = None
+                    checkpoint.pages_synced = 0
+                    checkpoint.objects_synced = 0
+                    checkpoint.started_at = datetime.utcnow()
+                    resumed = False
+                    continue
+                logger.error(f"Shopify {resource} Sync Error: {response.status_code} {response.text}")
+                stats["errors"] += 1
+                return
+
+            data = response.json()
+            objects = sum(len(v) for v in data.values() if isinstance(v, list))
+            next_page_info = self._get_next_page_info(response.headers.get("Link")) if objects else None
+
+            if objects:
+                yield checkpoint.pages_synced + 1, data
+
+            self._advance_checkpoint(session, checkpoint, next_page_info, objects)
+            await session.commit()
+
+            if not next_page_info:
+                return
+
+    async def _ingested_ids_since(self, session: AsyncSession, integration_id: UUID, object_type: str, since: datetime) -> List[int]:
+        """Shopify IDs ingested by the current (resumed) stream before it was interrupted."""
+        stmt = select(ShopifyRawIngest.shopify_object_id).where(
+            ShopifyRawIngest.integration_id == integration_id,
+            ShopifyRawIngest.object_type == object_type,
+            ShopifyRawIngest.fetched_at >= since,
+            ShopifyRawIngest.shopify_object_id.is_not(None)
+        ).distinct()
+        return list((await session.execute(stmt)).scalars().all())
+
+    def _naive_utc(self, dt: Optional[datetime]) -> Optional[datetime]:
+        if dt and dt.tzinfo:
+            return dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return dt
+
     async def fetch_and_ingest_orders(
         self,
         session: AsyncSession,
@@ -99,101 +221,52 @@ class ShopifySyncService:
                 params["updated_at_min"] = start_date.isoformat()
                 logger.info(f"Triggering delta sync for {shop_domain} since {params['updated_at_min']}")
 
-            next_page_info = None
-            page_count = 0
-            max_pages = 5 if not start_date else 2 # Delta syncs should be much smaller
-            
-            # Pagination Loop
-            while True:
-                if page_count >= max_pages:
-                    logger.warning(f"Safety limit reached: {max_pages} pages synced. Stopping.")
-                    break
-                
-                try:
-                    page_count += 1
-                    request_params = params.copy()
-                    if next_page_info:
-                         # Cursor-based pagination for older versions or Link header
-                         request_params = {"page_info": next_page_info, "limit": 250}
-                    
-                    # Update progress message
-                    current_meta = integration.metadata_info or {}
-                    sync_stats = current_meta.get("sync_stats", {})
-                    sync_stats.update({
-                        "message": f"Streaming batch {page_count} of historical data...",
-                        "progress": min(90, int((page_count / max_pages) * 100))
-                    })
-                    integration.metadata_info = dict(current_meta)
-                    session.add(integration)
-                    await session.commit()
+            checkpoint = await self._load_checkpoint(session, integration_id, "orders", start_date)
+            if checkpoint.page_info:
+                # Resumed stream: dependent streams (transactions, fulfillments) still need the earlier pages' IDs
+                stats["order_ids"] = await self._ingested_ids_since(session, integration_id, "order", checkpoint.started_at)
+            estimated_pages = max(1, math.ceil(store_stats.get("orders_count", 0) / 250))
 
-                    response = await self._make_request(
-                        client,
-                        base_url,
-                        headers={"X-Shopify-Access-Token": token},
-                        params=request_params
-                    )
-                    
-                    if response.status_code != 200:
-                        logger.error(f"Shopify Sync Error: {response.status_code} {response.text}")
-                        stats["errors"] += 1
-                        break
-                        
-                    data = response.json()
+            try:
+                async for page_count, data in self._paginate(
+                    session, client, integration_id, "orders", base_url, params, token, stats, window_start=start_date
+                ):
                     orders = data.get("orders", [])
-                    
-                    if not orders:
-                        break
-                        
+
                     # 3. Ingest Batch
-                    for order in orders:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="order",
-                            payload=order
-                        )
-                        stats["ingested"] += 1
-                    
+                    counts = await self.ingest_raw_objects(session, integration, "order", orders)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
+
                     # Store order IDs for subsequent transaction fetch
                     if "order_ids" not in stats:
                         stats["order_ids"] = []
                     stats["order_ids"].extend([o["id"] for o in orders])
-                    
+
                     stats["fetched"] += len(orders)
-                    logger.info(f"Synced batch of {len(orders)} orders for {shop_domain}")
-                    
+                    logger.info(f"Synced batch {page_count} of {len(orders)} orders for {shop_domain}")
+
                     # Update progress message (keep global counts preserved)
                     current_meta = integration.metadata_info or {}
                     sync_stats = current_meta.get("sync_stats", {})
                     sync_stats.update({
+                        "message": f"Streaming batch {page_count} of historical data...",
+                        "progress": min(90, int((page_count / estimated_pages) * 100)),
                         "session_fetched": stats["fetched"], # Internal progress
                         "last_updated": datetime.now(timezone.utc).isoformat()
                     })
                     current_meta["sync_stats"] = sync_stats
-                    
-                    # Update progress in DB for polling
+
+                    # Progress is committed together with the page checkpoint
                     from sqlalchemy.orm.attributes import flag_modified
                     integration.metadata_info = current_meta
                     flag_modified(integration, "metadata_info")
                     session.add(integration)
-                    await session.commit()
 
-                    # Check Link header for next page
-                    link_header = response.headers.get("Link")
-                    next_page_info = self._get_next_page_info(link_header)
-                    
-                    if not next_page_info:
-                        break
-                        
-                    if not next_page_info:
-                        break
-                        
-                except Exception as e:
-                    logger.error(f"Sync loop failed: {str(e)}")
-                    stats["errors"] += 1
-                    break
-                    
+            except Exception as e:
+                logger.error(f"Sync loop failed: {str(e)}")
+                stats["errors"] += 1
+
         return stats, stats.get("order_ids", []) # Returning IDs for transaction fetch
 
     async def fetch_and_ingest_customers(
@@ -222,55 +295,22 @@ class ShopifySyncService:
                     start_date = start_date.replace(tzinfo=timezone.utc)
                 params["updated_at_min"] = start_date.isoformat()
 
-            next_page_info = None
-            page_count = 0
-            
-            while True:
-                try:
-                    page_count += 1
-                    request_params = params.copy()
-                    if next_page_info:
-                         request_params = {"page_info": next_page_info, "limit": 250}
-                    
-                    response = await self._make_request(
-                        client,
-                        base_url,
-                        headers={"X-Shopify-Access-Token": token},
-                        params=request_params
-                    )
-                    
-                    if response.status_code != 200:
-                        logger.error(f"Shopify Customer Sync Error: {response.status_code} {response.text}")
-                        stats["errors"] += 1
-                        break
-                        
-                    data = response.json()
+            try:
+                async for _, data in self._paginate(
+                    session, client, integration_id, "customers", base_url, params, token, stats, window_start=start_date
+                ):
                     customers = data.get("customers", [])
-                    if not customers:
-                        break
-                        
-                    for customer in customers:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="customer",
-                            payload=customer
-                        )
-                        stats["ingested"] += 1
-                    
+                    counts = await self.ingest_raw_objects(session, integration, "customer", customers)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
+
                     stats["fetched"] += len(customers)
                     logger.info(f"Synced batch of {len(customers)} customers for {shop_domain}")
-                    
-                    link_header = response.headers.get("Link")
-                    next_page_info = self._get_next_page_info(link_header)
-                    if not next_page_info:
-                        break
-                        
-                except Exception as e:
-                    logger.error(f"Customer sync loop failed: {str(e)}")
-                    stats["errors"] += 1
-                    break
-        
+
+            except Exception as e:
+                logger.error(f"Customer sync loop failed: {str(e)}")
+                stats["errors"] += 1
+
         return stats
 
     async def fetch_and_ingest_transactions(
@@ -313,14 +353,10 @@ class ShopifySyncService:
                         # Add order_id to payload if not present (Shopify usually includes it but good to be sure)
                         if "order_id" not in txn:
                             txn["order_id"] = order_id
-                            
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="transaction",
-                            payload=txn
-                        )
-                        stats["ingested"] += 1
+
+                    counts = await self.ingest_raw_objects(session, integration, "transaction", transactions)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
                     
                     stats["fetched"] += len(transactions)
                     
@@ -353,55 +389,22 @@ class ShopifySyncService:
             if start_date:
                 params["updated_at_min"] = start_date.isoformat()
 
-            next_page_info = None
-            page_count = 0
-            
-            while True:
-                try:
-                    page_count += 1
-                    request_params = params.copy()
-                    if next_page_info:
-                         request_params = {"page_info": next_page_info, "limit": 250}
-                    
-                    response = await self._make_request(
-                        client,
-                        base_url,
-                        headers={"X-Shopify-Access-Token": token},
-                        params=request_params
-                    )
-                    
-                    if response.status_code != 200:
-                        logger.error(f"Shopify Product Sync Error: {response.status_code} {response.text}")
-                        stats["errors"] += 1
-                        break
-                        
-                    data = response.json()
+            try:
+                async for _, data in self._paginate(
+                    session, client, integration_id, "products", base_url, params, token, stats, window_start=start_date
+                ):
                     products = data.get("products", [])
-                    if not products:
-                        break
-                        
-                    for product in products:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="product",
-                            payload=product
-                        )
-                        stats["ingested"] += 1
-                    
+                    counts = await self.ingest_raw_objects(session, integration, "product", products)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
+
                     stats["fetched"] += len(products)
                     logger.info(f"Synced batch of {len(products)} products for {shop_domain}")
-                    
-                    link_header = response.headers.get("Link")
-                    next_page_info = self._get_next_page_info(link_header)
-                    if not next_page_info:
-                        break
-                        
-                except Exception as e:
-                    logger.error(f"Product sync loop failed: {str(e)}")
-                    stats["errors"] += 1
-                    break
-        
+
+            except Exception as e:
+                logger.error(f"Product sync loop failed: {str(e)}")
+                stats["errors"] += 1
+
         return stats
 
         return stats
@@ -447,14 +450,9 @@ class ShopifySyncService:
                     data = response.json()
                     items = data.get("inventory_items", [])
                     
-                    for item in items:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="inventory_item",
-                            payload=item
-                        )
-                        stats["ingested"] += 1
+                    counts = await self.ingest_raw_objects(session, integration, "inventory_item", items)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
                         
                 except Exception as e:
                     logger.error(f"Inventory item sync chunk failed: {e}")
@@ -498,14 +496,9 @@ class ShopifySyncService:
                     data = response.json()
                     reports = data.get("reports", [])
                     
-                    for report in reports:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="report",
-                            payload=report
-                        )
-                        stats["ingested"] += 1
+                    counts = await self.ingest_raw_objects(session, integration, "report", reports)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
                     
                     link_header = response.headers.get("Link")
                     next_page_info = self._get_next_page_info(link_header)
@@ -747,14 +740,9 @@ class ShopifySyncService:
                     data = response.json()
                     payouts = data.get("payouts", [])
                     
-                    for pay in payouts:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="payout",
-                            payload=pay
-                        )
-                        stats["ingested"] += 1
+                    counts = await self.ingest_raw_objects(session, integration, "payout", payouts)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
                     
                     link_header = response.headers.get("Link")
                     next_page_info = self._get_next_page_info(link_header)
@@ -805,14 +793,9 @@ class ShopifySyncService:
                     data = response.json()
                     disputes = data.get("disputes", [])
                     
-                    for dispute in disputes:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="dispute",
-                            payload=dispute
-                        )
-                        stats["ingested"] += 1
+                    counts = await self.ingest_raw_objects(session, integration, "dispute", disputes)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
                     
                     link_header = response.headers.get("Link")
                     next_page_info = self._get_next_page_info(link_header)
@@ -864,14 +847,9 @@ class ShopifySyncService:
                     data = response.json()
                     transactions = data.get("transactions", [])
                     
-                    for txn in transactions:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="balance_transaction",
-                            payload=txn
-                        )
-                        stats["ingested"] += 1
+                    counts = await self.ingest_raw_objects(session, integration, "balance_transaction", transactions)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
                     
                     link_header = response.headers.get("Link")
                     next_page_info = self._get_next_page_info(link_header)
@@ -959,20 +937,14 @@ class ShopifySyncService:
                         
                     for level in levels:
                         item_id = level.get("inventory_item_id")
-                        loc_id = level.get("location_id")
                         if item_id: collected_item_ids.add(item_id)
-                        
-                        composite_id = f"{item_id}_{loc_id}" 
-                        
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="inventory_level",
-                            payload=level,
-                            shopify_object_id=item_id, # Integer for DB column
-                            dedupe_id=composite_id # String for unique hash
-                        )
-                        stats["levels"] += 1
+
+                    counts = await self.ingest_raw_objects(
+                        session, integration, "inventory_level", levels,
+                        # Integer item ID for the DB column, item+location composite for the unique hash
+                        identity_fn=lambda lvl: (lvl.get("inventory_item_id"), f"{lvl.get('inventory_item_id')}_{lvl.get('location_id')}")
+                    )
+                    stats["levels"] += counts["new"]
                     
                     link_header = response.headers.get("Link")
                     next_page_info = self._get_next_page_info(link_header)
@@ -1034,14 +1006,9 @@ class ShopifySyncService:
                     
                     if response.status_code == 200:
                         refunds = response.json().get("refunds", [])
-                        for refund in refunds:
-                            await self.ingest_raw_object(
-                                session=session,
-                                integration=integration,
-                                object_type="refund",
-                                payload=refund
-                            )
-                            stats["ingested"] += 1
+                        counts = await self.ingest_raw_objects(session, integration, "refund", refunds)
+                        stats["ingested"] += counts["new"]
+                        stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
                         # Save progress after each order's refunds to be safe
                         await session.commit()
                     else:
@@ -1074,43 +1041,20 @@ class ShopifySyncService:
                 params["created_at_min"] = start_date.isoformat()
 
             try:
-                while True:
-                    response = await self._make_request(
-                        client,
-                        base_url,
-                        headers={"X-Shopify-Access-Token": token},
-                        params=params
-                    )
-                    
-                    if response.status_code != 200:
-                        logger.error(f"Shopify Checkouts Sync Error: {response.status_code} {response.text}")
-                        stats["errors"] += 1
-                        break
-                        
-                    data = response.json()
+                async for _, data in self._paginate(
+                    session, client, integration_id, "checkouts", base_url, params, token, stats, window_start=start_date
+                ):
                     checkouts = data.get("checkouts", [])
-                    if not checkouts:
-                        break
-                        
-                    for checkout in checkouts:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="checkout",
-                            payload=checkout
-                        )
-                        stats["ingested"] += 1
-                    
-                    link_header = response.headers.get("Link")
-                    next_page_info = self._get_next_page_info(link_header)
-                    if not next_page_info:
-                        break
-                    params = {"page_info": next_page_info, "limit": 250}
-                        
+                    counts = await self.ingest_raw_objects(session, integration, "checkout", checkouts)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
+
+                    logger.info(f"Synced batch of {len(checkouts)} checkouts for {shop_domain}")
+
             except Exception as e:
                 logger.error(f"Checkouts sync failed: {str(e)}")
                 stats["errors"] += 1
-                
+
         return stats
 
     async def fetch_and_ingest_marketing_events(
@@ -1150,14 +1094,9 @@ class ShopifySyncService:
                     if not events:
                         break
                         
-                    for event in events:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="marketing_event",
-                            payload=event
-                        )
-                        stats["ingested"] += 1
+                    counts = await self.ingest_raw_objects(session, integration, "marketing_event", events)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
                     
                     link_header = response.headers.get("Link")
                     next_page_info = self._get_next_page_info(link_header)
@@ -1278,14 +1217,9 @@ class ShopifySyncService:
                     if response.status_code == 200:
                         fulfillments = response.json().get("fulfillments", [])
                         logger.info(f"Order {order_id}: Found {len(fulfillments)} fulfillments")
-                        for fulfillment in fulfillments:
-                            await self.ingest_raw_object(
-                                session=session,
-                                integration=integration,
-                                object_type="fulfillment",
-                                payload=fulfillment
-                            )
-                            stats["ingested"] += 1
+                        counts = await self.ingest_raw_objects(session, integration, "fulfillment", fulfillments)
+                        stats["ingested"] += counts["new"]
+                        stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
                     else:
                         logger.warning(f"Failed to fetch fulfillments for order {order_id}: {response.status_code}")
                 except Exception as e:
@@ -1304,14 +1238,9 @@ class ShopifySyncService:
                 resp = await self._make_request(client, url, headers={"X-Shopify-Access-Token": token})
                 if resp.status_code == 200:
                     locations = resp.json().get("locations", [])
-                    for loc in locations:
-                        await self.ingest_raw_object(
-                            session=session,
-                            integration=integration,
-                            object_type="location",
-                            payload=loc
-                        )
-                        stats["ingested"] += 1
+                    counts = await self.ingest_raw_objects(session, integration, "location", locations)
+                    stats["ingested"] += counts["new"]
+                    stats["duplicates"] = stats.get("duplicates", 0) + counts["duplicates"]
                 else:
                     logger.error(f"Failed to fetch locations: {resp.text}")
                     stats["errors"] += 1
@@ -1348,9 +1277,8 @@ class ShopifySyncService:
 
         return stats
 
-    async def ingest_raw_object(
+    def _build_raw_record(
         self,
-        session: AsyncSession,
         integration: Integration,
         object_type: str,
         payload: Dict[str, Any],
@@ -1361,8 +1289,8 @@ class ShopifySyncService:
         dedupe_id: Optional[str] = None
     ) -> ShopifyRawIngest:
         """
-        Canonicalizes and stores the raw JSON payload.
-        Idempotent based on (integration_id, dedupe_hash_canonical).
+        Resolves identity, canonical hash and dedupe key for a payload.
+        Returns an unsaved 'pending' ShopifyRawIngest.
         """
         # 1. Identity
         if shopify_object_id is None:
@@ -1408,7 +1336,98 @@ class ShopifySyncService:
         
         # 3. Simple Hash
         dedupe_key = f"{integration.id}_{object_type}_{dedupe_id}_{updated_at}"
-        
+
+        return ShopifyRawIngest(
+            integration_id=integration.id,
+            company_id=integration.company_id,
+            object_type=object_type,
+            shopify_object_id=shopify_object_id,
+            shopify_updated_at=updated_at,
+            dedupe_key=dedupe_key,
+            dedupe_hash_canonical=dedupe_hash,
+            source=source,
+            topic=topic or f"{object_type}/backfill",
+            api_version=self.api_version,
+            payload=payload,
+            diff_summary={},
+            processing_status="pending",
+            created_by=created_by,
+            updated_by=created_by
+        )
+
+    async def ingest_raw_objects(
+        self,
+        session: AsyncSession,
+        integration: Integration,
+        object_type: str,
+        payloads: List[Dict[str, Any]],
+        source: str = "backfill",
+        topic: Optional[str] = None,
+        created_by: Optional[str] = None,
+        identity_fn: Optional[Callable[[Dict[str, Any]], Tuple[Optional[int], Optional[str]]]] = None
+    ) -> Dict[str, int]:
+        """
+        Batch variant of `ingest_raw_object` for a whole API page.
+        Hashes every payload, resolves already-stored hashes with a single IN (...)
+        query and inserts only the new rows in one flush. Diff summaries are not
+        computed (they are webhook-only, see `ingest_raw_object`).
+
+        `identity_fn` may return (shopify_object_id, dedupe_id) overrides per payload.
+        Returns {"fetched", "new", "duplicates"}.
+        """
+        counts = {"fetched": len(payloads), "new": 0, "duplicates": 0}
+        if not payloads:
+            return counts
+
+        records: Dict[str, ShopifyRawIngest] = {}
+        for payload in payloads:
+            shopify_object_id, dedupe_id = identity_fn(payload) if identity_fn else (None, None)
+            record = self._build_raw_record(
+                integration, object_type, payload,
+                source=source, topic=topic, created_by=created_by,
+                shopify_object_id=shopify_object_id, dedupe_id=dedupe_id
+            )
+            # Identical payloads within the same page collapse into one row
+            records.setdefault(record.dedupe_hash_canonical, record)
+
+        stmt = select(ShopifyRawIngest.dedupe_hash_canonical).where(
+            ShopifyRawIngest.integration_id == integration.id,
+            ShopifyRawIngest.dedupe_hash_canonical.in_(list(records.keys()))
+        )
+        existing_hashes = set((await session.execute(stmt)).scalars().all())
+
+        new_records = [r for h, r in records.items() if h not in existing_hashes]
+        session.add_all(new_records)
+        await session.flush()
+
+        counts["new"] = len(new_records)
+        counts["duplicates"] = counts["fetched"] - counts["new"]
+        return counts
+
+    async def ingest_raw_object(
+        self,
+        session: AsyncSession,
+        integration: Integration,
+        object_type: str,
+        payload: Dict[str, Any],
+        source: str = "backfill",
+        topic: Optional[str] = None,
+        created_by: Optional[str] = None,
+        shopify_object_id: Optional[int] = None,
+        dedupe_id: Optional[str] = None
+    ) -> ShopifyRawIngest:
+        """
+        Canonicalizes and stores the raw JSON payload.
+        Idempotent based on (integration_id, dedupe_hash_canonical).
+        """
+        ingest_record = self._build_raw_record(
+            integration, object_type, payload,
+            source=source, topic=topic, created_by=created_by,
+            shopify_object_id=shopify_object_id, dedupe_id=dedupe_id
+        )
+        shopify_object_id = ingest_record.shopify_object_id
+        dedupe_hash = ingest_record.dedupe_hash_canonical
+
         # 4. Check Existence (Deduplication)
         stmt = select(ShopifyRawIngest).where(
             ShopifyRawIngest.integration_id == integration.id,
@@ -1503,26 +1522,10 @@ class ShopifySyncService:
                                 diff_summary["location_change"] = {"old": latest_old_loc, "new": latest_new_loc}
 
         except Exception as e:
-            logger.warning(f"Failed to compute diff for {object_type} {shopify_id}: {e}")
+            logger.warning(f"Failed to compute diff for {object_type} {shopify_object_id}: {e}")
 
         # 6. Create
-        ingest_record = ShopifyRawIngest(
-            integration_id=integration.id,
-            company_id=integration.company_id,
-            object_type=object_type,
-            shopify_object_id=shopify_object_id,
-            shopify_updated_at=updated_at,
-            dedupe_key=dedupe_key,
-            dedupe_hash_canonical=dedupe_hash,
-            source=source,
-            topic=topic or f"{object_type}/backfill",
-            api_version=self.api_version,
-            payload=payload,
-            diff_summary=diff_summary,
-            processing_status="pending",
-            created_by=created_by,
-            updated_by=created_by
-        )
+        ingest_record.diff_summary = diff_summary
         
         session.add(ingest_record)
         return ingest_record
@@ -11,6 +11,8 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.db import engine
 from app.models.integration import Integration, IntegrationStatus
 from app.services.analytics.service import AnalyticsService
+from app.services.shopify.backfill_scheduler import shopify_backfill_scheduler
+from app.services.shopify.metrics_service import shopify_metrics_service
 from app.services.shopify.refinement_service import shopify_refinement_service
 from app.services.shopify.sync_service import shopify_sync_service
 
@@ -23,6 +25,8 @@ async def run_shopify_sync_task(integration_id: uuid.UUID, delta: bool = False,
     """
     # Calculate start_date for sync
     start_date = None
+    # Records refined after this instant define which metric days need recomputing
+    sync_started_at = datetime.utcnow()
     
     # 1. Get Integration
     async_session = sessionmaker(
@@ -95,158 +99,47 @@ async def run_shopify_sync_task(integration_id: uuid.UUID, delta: bool = False,
             session.add(integration)
             await session.commit()
             
-            # 1. Orders
-            order_stats, order_ids = await shopify_sync_service.fetch_and_ingest_orders(session, integration_id, start_date=start_date)
-            await session.commit()
-
-            # 1b. Transactions
-            if order_ids:
-                current_meta["sync_stats"].update({
-                    "message": f"Fetching payment details for {len(order_ids)} orders...",
-                    "progress": 40
-                })
-                integration.metadata_info = current_meta
-                flag_modified(integration, "metadata_info")
-                session.add(integration)
-                await session.commit()
-                transaction_stats = await shopify_sync_service.fetch_and_ingest_transactions(session, integration_id, order_ids)
-                await session.commit()
-            else:
-                transaction_stats = {"ingested": 0}
-            # 2. Products
-            current_meta["sync_stats"].update({
-                "message": "Streaming Product Catalog...",
-                "progress": 50
-            })
-            integration.metadata_info = current_meta
-            flag_modified(integration, "metadata_info")
-            session.add(integration)
-            await session.commit()
-            product_stats = await shopify_sync_service.fetch_and_ingest_products(session, integration_id, start_date=start_date)
-            await session.commit()
-
-            # 3. Inventory (Locations + Levels)
-            current_meta["sync_stats"].update({
-                "message": "Mapping Inventory across Locations...",
-                "progress": 65
-            })
-            integration.metadata_info = current_meta
-            flag_modified(integration, "metadata_info")
-            session.add(integration)
-            await session.commit()
-            inventory_stats = await shopify_sync_service.fetch_and_ingest_inventory(session, integration_id)
-            await session.commit()
-
-            # 4. Customers
-            current_meta["sync_stats"].update({
-                "message": "Unified Customer Database sync...",
-                "progress": 75
-            })
-            integration.metadata_info = current_meta
-            flag_modified(integration, "metadata_info")
-            session.add(integration)
-            await session.commit()
-            customer_sync_stats = await shopify_sync_service.fetch_and_ingest_customers(session, integration_id, start_date=start_date)
-            await session.commit()
-
-            # 5. Reports (Metadata)
-            current_meta["sync_stats"].update({
-                "message": "Cataloging Analytics Reports...",
-                "progress": 75
-            })
-            integration.metadata_info = current_meta
-            flag_modified(integration, "metadata_info")
-            session.add(integration)
-            await session.commit()
-            report_stats = await shopify_sync_service.fetch_and_ingest_reports(session, integration_id)
-            await session.commit()
-
-            # 6. Refunds
-            current_meta["sync_stats"].update({
-                "message": "Collecting refund data...",
-                "progress": 76
-            })
-            integration.metadata_info = current_meta
-            flag_modified(integration, "metadata_info")
-            session.add(integration)
-            await session.commit()
-            refund_stats = await shopify_sync_service.fetch_and_ingest_refunds(session, integration_id, start_date=start_date)
-            await session.commit()
-
-            # 7. Financials (Payouts + Disputes + Balance Transactions)
-            current_meta["sync_stats"].update({
-                "message": "Reconciling bank payouts & disputes...",
-                "progress": 77
-            })
-            integration.metadata_info = current_meta
-            flag_modified(integration, "metadata_info")
-            session.add(integration)
-            await session.commit()
-            
-            payout_stats = await shopify_sync_service.fetch_and_ingest_payouts(session, integration_id, start_date=start_date)
-            dispute_stats = await shopify_sync_service.fetch_and_ingest_disputes(session, integration_id, start_date=start_date)
-            balance_stats = await shopify_sync_service.fetch_and_ingest_balance_transactions(session, integration_id)
-            await session.commit()
-
-            # 8. Fulfillments (Requires Order IDs)
-            if order_ids:
-                current_meta["sync_stats"].update({
-                    "message": f"Mapping fulfillment logistics for {len(order_ids)} orders...",
-                    "progress": 78
+            # Resource streams run concurrently under the shared per-shop rate budget
+            async def report_stream_progress(stream: str, completed: int, total: int):
+                # Streams write to the integration row from their own sessions; re-read before updating
+                await session.refresh(integration)
+                current_meta = integration.metadata_info or {}
+                current_meta.setdefault("sync_stats", {}).update({
+                    "message": f"Streamed {stream.replace('_', ' ')} ({completed}/{total})...",
+                    "progress": 30 + int(50 * completed / total)
                 })
                 integration.metadata_info = current_meta
                 flag_modified(integration, "metadata_info")
                 session.add(integration)
                 await session.commit()
-                fulfillment_stats = await shopify_sync_service.fetch_and_ingest_fulfillments(session, integration_id, order_ids)
-                await session.commit()
-            else:
-                fulfillment_stats = {"ingested": 0}
 
-            # 9. Marketing (Abandoned Checkouts + Events)
-            current_meta["sync_stats"].update({
-                "message": "Analyzing marketing & abandonments...",
-                "progress": 79
-            })
-            integration.metadata_info = current_meta
-            flag_modified(integration, "metadata_info")
-            session.add(integration)
-            await session.commit()
-            checkout_stats = await shopify_sync_service.fetch_and_ingest_checkouts(session, integration_id, start_date=start_date)
-            marketing_stats = await shopify_sync_service.fetch_and_ingest_marketing_events(session, integration_id)
-            await session.commit()
-
-            # 10. Promotional Rules (Price Rules + Discount Codes)
-            current_meta["sync_stats"].update({
-                "message": "Harvesting promotional rules...",
-                "progress": 80
-            })
-            integration.metadata_info = current_meta
-            flag_modified(integration, "metadata_info")
-            session.add(integration)
-            await session.commit()
-            promo_stats = await shopify_sync_service.fetch_and_ingest_price_rules(session, integration_id)
-            await session.commit()
+            results = await shopify_backfill_scheduler.run(
+                integration_id, start_date=start_date, on_progress=report_stream_progress
+            )
+            await session.refresh(integration)
+            current_meta = integration.metadata_info or {}
+            current_meta["sync_stats"] = current_meta.get("sync_stats", {})
 
+            financial_stats = results.get("financials", {})
+            promo_stats = results.get("price_rules", {})
             stats = {
-                "orders": order_stats.get("ingested", 0),
-                "products": product_stats.get("ingested", 0),
-                "inventory": inventory_stats.get("levels", 0),
-                "customers": customer_sync_stats.get("ingested", 0),
-                "transactions": transaction_stats.get("ingested", 0),
-                "reports": report_stats.get("ingested", 0),
-                "refunds": refund_stats.get("ingested", 0),
-                "payouts": payout_stats.get("ingested", 0),
-                "disputes": dispute_stats.get("ingested", 0),
-                "balance_transactions": balance_stats.get("ingested", 0),
-                "fulfillments": fulfillment_stats.get("ingested", 0),
-                "checkouts": checkout_stats.get("ingested", 0),
-                "marketing_events": marketing_stats.get("ingested", 0),
+                "orders": results.get("orders", {}).get("ingested", 0),
+                "products": results.get("products", {}).get("ingested", 0),
+                "inventory": results.get("inventory", {}).get("levels", 0),
+                "customers": results.get("customers", {}).get("ingested", 0),
+                "transactions": results.get("transactions", {}).get("ingested", 0),
+                "reports": results.get("reports", {}).get("ingested", 0),
+                "refunds": results.get("refunds", {}).get("ingested", 0),
+                "payouts": financial_stats.get("payouts", {}).get("ingested", 0),
+                "disputes": financial_stats.get("disputes", {}).get("ingested", 0),
+                "balance_transactions": financial_stats.get("balance_transactions", {}).get("ingested", 0),
+                "fulfillments": results.get("fulfillments", {}).get("ingested", 0),
+                "checkouts": results.get("checkouts", {}).get("ingested", 0),
+                "marketing_events": results.get("marketing_events", {}).get("ingested", 0),
                 "price_rules": promo_stats.get("price_rules", 0),
                 "discount_codes": promo_stats.get("discount_codes", 0)
             }
 
-            
             logger.info("Sync Consumed. Starting Refinement...")
             
             # --- Refinement Phase (First Pass - Metadata) ---
@@ -290,7 +183,7 @@ async def run_shopify_sync_task(integration_id: uuid.UUID, delta: bool = False,
             while True:
                 # Process a batch
                 batch_size = max(50, total_pending // 5) if total_pending > 0 else 50
-                num_processed = await shopify_refinement_service.process_pending_records(session, integration_id=integration_id, limit=batch_size)
+                num_processed = await shopify_refinement_service.process_pending_records(session, integration_id=integration_id, limit=batch_size, batched=True)
                 
                 if num_processed == 0:
                     break
@@ -441,18 +334,20 @@ async def run_shopify_sync_task(integration_id: uuid.UUID, delta: bool = False,
                 session.add(integration)
                 await session.commit()
 
-                # --- Metrics Generation Phase (Module 6 Refactored) ---
-                logger.info(f"🚀 Starting Unified Metrics Generation for {integration_id}")
-                today = datetime.now(timezone.utc).date()
-                for i in range(31): 
-                    target_date = today - timedelta(days=i)
+                # --- Metrics Generation Phase (Incremental Rollup) ---
+                # Only the days touched by this sync's refined orders/transactions/customers
+                logger.info(f"🚀 Starting Incremental Metrics Rollup for {integration_id}")
+                touched_days = await shopify_metrics_service.refresh_touched_days(
+                    session, integration, since=sync_started_at
+                )
+                for target_date in touched_days:
                     try:
                         await AnalyticsService.refresh_snapshot(session, integration, target_date)
                     except Exception as metric_err:
                         logger.error(f"Failed to generate metrics for {target_date}: {metric_err}")
                 
                 await session.commit()
-                logger.info(f"✅ Historical Metrics baseline established for {integration_id}")
+                logger.info(f"✅ Metrics rolled up for {len(touched_days)} day(s) on {integration_id}")
                 
         except Exception as e:
             logger.error(f"Background sync failed: {e}")
@@ -0,0 +1,284 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy import Date, and_, cast, delete, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import async_session_factory
+from app.models.integration import Integration, IntegrationStatus
+from app.models.shopify.inventory import ShopifyInventoryLevel
+from app.models.shopify.order import ShopifyLineItem, ShopifyOrder
+from app.models.shopify.product import ShopifyProductVariant
+from app.models.shopify.velocity import ShopifyVariantDailySales, ShopifyVariantVelocity
+from app.services.shopify.metrics_service import ShopifyMetricsService
+
+# Rows per multi-row upsert statement (same bound as the refinement bulk path)
+UPSERT_CHUNK_SIZE = 500
+# Trailing days the nightly pass re-aggregates for every integration
+NIGHTLY_REAGGREGATE_DAYS = 3
+# Advisory lock namespace (two-key form) for per-integration daily sales rewrites
+DAILY_SALES_LOCK_CLASS = 0x5D5A
+
+
+def _daily_sales_lock_key(integration_id: UUID) -> int:
+    return int.from_bytes(integration_id.bytes[:4], "big", signed=True)
+
+
+class ShopifyVelocityService:
+    """
+    Maintains per-variant sales velocity and stock cover.
+
+    `shopify_variant_daily_sales` is kept in step with refined orders: each
+    refinement batch re-aggregates only the days its orders were created on.
+    `shopify_variant_velocity` then rolls 7/30/90-day windows for the variants
+    those days (or refined inventory levels) touched - a read of at most 90
+    small daily rows per variant. A nightly pass rolls every variant's windows
+    forward so sellers that went quiet decay too, after re-aggregating the
+    trailing NIGHTLY_REAGGREGATE_DAYS days to repair incremental refreshes that
+    failed.
+    """
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or async_session_factory
+
+    async def refresh(
+        self,
+        session: AsyncSession,
+        integration_id: UUID,
+        days: Iterable[date] = (),
+        inventory_item_ids: Iterable[int] = (),
+    ) -> int:
+        """
+        Incremental entry point used by refinement, inside its transaction.
+        Returns the number of variants whose velocity row was recomputed.
+        """
+        variant_ids: Set[int] = set()
+        days = sorted(set(days))
+        if days:
+            variant_ids |= await self.refresh_daily_sales(session, integration_id, days)
+        inventory_item_ids = list(set(inventory_item_ids))
+        if inventory_item_ids:
+            variant_ids |= await self.variants_for_inventory_items(session, integration_id, inventory_item_ids)
+        if not variant_ids:
+            return 0
+        return await self.refresh_velocity(session, integration_id, variant_ids)
+
+    async def refresh_daily_sales(
+        self,
+        session: AsyncSession,
+        integration_id: UUID,
+        days: Optional[List[date]] = None,
+    ) -> Set[int]:
+        """
+        Replaces the daily rows for ``days`` (all history when None) with a fresh
+        aggregate of the refined line items. Returns every variant id affected,
+        including variants whose sales on those days disappeared (cancellations).
+
+        Holds a per-integration advisory lock until the transaction ends, so
+        concurrent refinements (sync and the webhook worker) rewrite one
+        integration's days one at a time instead of colliding on the primary key.
+        """
+        await session.execute(
+            select(func.pg_advisory_xact_lock(DAILY_SALES_LOCK_CLASS, _daily_sales_lock_key(integration_id)))
+        )
+        daily = ShopifyVariantDailySales.__table__
+        lines = ShopifyLineItem.__table__
+        orders = ShopifyOrder.__table__
+        order_day = cast(orders.c.shopify_created_at, Date)
+
+        clear = delete(daily).where(daily.c.integration_id == integration_id)
+        source = select(
+            lines.c.integration_id,
+            lines.c.company_id,
+            lines.c.variant_id,
+            order_day,
+            func.sum(lines.c.quantity),
+            func.count(func.distinct(orders.c.id)),
+            func.coalesce(func.sum(lines.c.price * lines.c.quantity - lines.c.total_discount), 0),
+        ).select_from(
+            lines.join(orders, lines.c.order_id == orders.c.id)
+        ).where(
+            orders.c.integration_id == integration_id,
+            orders.c.shopify_cancelled_at == None,
+            orders.c.financial_status != "voided",
+            lines.c.variant_id != None,
+        ).group_by(lines.c.integration_id, lines.c.company_id, lines.c.variant_id, order_day)
+
+        if days is not None:
+            if not days:
+                return set()
+            clear = clear.where(daily.c.sales_date.in_(days))
+            source = source.where(
+                *ShopifyMetricsService._day_bounds(orders.c.shopify_created_at, days),
+                order_day.in_(days),
+            )
+
+        removed = (await session.execute(clear.returning(daily.c.shopify_variant_id))).scalars().all()
+        added = (await session.execute(
+            insert(daily).from_select(
+                ["integration_id", "company_id", "shopify_variant_id", "sales_date", "units", "order_count", "revenue"],
+                source,
+            ).returning(daily.c.shopify_variant_id)
+        )).scalars().all()
+        return set(removed) | set(added)
+
+    async def variants_for_inventory_items(
+        self, session: AsyncSession, integration_id: UUID, inventory_item_ids: List[int]
+    ) -> Set[int]:
+        variants = ShopifyProductVariant.__table__
+        stmt = select(variants.c.shopify_variant_id).where(
+            variants.c.integration_id == integration_id,
+            variants.c.shopify_inventory_item_id.in_(inventory_item_ids),
+        )
+        return set((await session.execute(stmt)).scalars().all())
+
+    async def refresh_velocity(
+        self,
+        session: AsyncSession,
+        integration_id: UUID,
+        variant_ids: Optional[Iterable[int]] = None,
+        as_of: Optional[date] = None,
+    ) -> int:
+        """
+        Recomputes rolling windows, last sale and stock cover for ``variant_ids``
+        (every variant with sales or stock when None) and upserts them.
+        """
+        as_of = as_of or datetime.utcnow().date()
+        daily = ShopifyVariantDailySales.__table__
+        variants = ShopifyProductVariant.__table__
+        levels = ShopifyInventoryLevel.__table__
+        variant_ids = list(variant_ids) if variant_ids is not None else None
+
+        def window(days: int, offset: int = 0):
+            start, end = as_of - timedelta(days=days + offset), as_of - timedelta(days=offset)
+            return func.coalesce(
+                func.sum(daily.c.units).filter(and_(daily.c.sales_date >= start, daily.c.sales_date < end)), 0
+            )
+
+        windows_stmt = select(
+            daily.c.shopify_variant_id,
+            window(7).label("units_7d"),
+            window(7, 7).label("units_prev_7d"),
+            window(30).label("units_30d"),
+            window(90).label("units_90d"),
+        ).where(
+            daily.c.integration_id == integration_id,
+            daily.c.sales_date >= as_of - timedelta(days=90),
+            daily.c.sales_date < as_of,
+        ).group_by(daily.c.shopify_variant_id)
+
+        last_sale_stmt = select(
+            daily.c.shopify_variant_id,
+            func.max(daily.c.sales_date).label("last_sale_date"),
+        ).where(
+            daily.c.integration_id == integration_id,
+            daily.c.units > 0,
+        ).group_by(daily.c.shopify_variant_id)
+
+        stock_stmt = select(
+            variants.c.shopify_variant_id,
+            func.coalesce(func.sum(levels.c.available), 0).label("available"),
+        ).select_from(
+            variants.join(levels, and_(
+                levels.c.integration_id == variants.c.integration_id,
+                levels.c.shopify_inventory_item_id == variants.c.shopify_inventory_item_id,
+            ))
+        ).where(
+            variants.c.integration_id == integration_id,
+        ).group_by(variants.c.shopify_variant_id)
+
+        if variant_ids is not None:
+            if not variant_ids:
+                return 0
+            windows_stmt = windows_stmt.where(daily.c.shopify_variant_id.in_(variant_ids))
+            last_sale_stmt = last_sale_stmt.where(daily.c.shopify_variant_id.in_(variant_ids))
+            stock_stmt = stock_stmt.where(variants.c.shopify_variant_id.in_(variant_ids))
+
+        windows = {row.shopify_variant_id: row for row in (await session.execute(windows_stmt)).all()}
+        last_sales = {row.shopify_variant_id: row.last_sale_date for row in (await session.execute(last_sale_stmt)).all()}
+        stock = {row.shopify_variant_id: int(row.available) for row in (await session.execute(stock_stmt)).all()}
+
+        company_id = (await session.execute(
+            select(Integration.__table__.c.company_id).where(Integration.__table__.c.id == integration_id)
+        )).scalar_one()
+
+        keys = set(variant_ids) if variant_ids is not None else set(windows) | set(last_sales) | set(stock)
+        now = datetime.utcnow()
+        rows = []
+        for variant_id in keys:
+            row = windows.get(variant_id)
+            units = {
+                "units_7d": int(row.units_7d) if row else 0,
+                "units_prev_7d": int(row.units_prev_7d) if row else 0,
+                "units_30d": int(row.units_30d) if row else 0,
+                "units_90d": int(row.units_90d) if row else 0,
+            }
+            velocity_30d = units["units_30d"] / 30.0
+            available = stock.get(variant_id, 0)
+            rows.append({
+                "integration_id": integration_id,
+                "shopify_variant_id": variant_id,
+                "company_id": company_id,
+                "as_of": as_of,
+                **units,
+                "velocity_7d": units["units_7d"] / 7.0,
+                "velocity_30d": velocity_30d,
+                "velocity_90d": units["units_90d"] / 90.0,
+                "last_sale_date": last_sales.get(variant_id),
+                "available": available,
+                "days_of_cover": round(available / velocity_30d, 2) if velocity_30d > 0 else None,
+                "refreshed_at": now,
+            })
+
+        table = ShopifyVariantVelocity.__table__
+        update_cols = [c for c in rows[0] if c not in ("integration_id", "shopify_variant_id")] if rows else []
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            stmt = pg_insert(table).values(rows[start:start + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["integration_id", "shopify_variant_id"],
+                set_={col: stmt.excluded[col] for col in update_cols},
+            )
+            await session.execute(stmt)
+        return len(rows)
+
+    async def refresh_all(self) -> Dict[str, int]:
+        """
+        Nightly: rolls every active Shopify integration's windows forward to today,
+        after re-aggregating its trailing NIGHTLY_REAGGREGATE_DAYS days (all
+        history for integrations with no daily rows yet). One committed
+        transaction per integration.
+        """
+        stats = {"integrations": 0, "backfilled": 0, "variants": 0}
+        today = datetime.utcnow().date()
+        trailing_days = [today - timedelta(days=offset) for offset in range(NIGHTLY_REAGGREGATE_DAYS, -1, -1)]
+        async with self._session_factory() as session:
+            integration_ids = (await session.execute(
+                select(Integration.__table__.c.id).where(Integration.__table__.c.status == IntegrationStatus.ACTIVE)
+            )).scalars().all()
+
+        for integration_id in integration_ids:
+            try:
+                async with self._session_factory() as session:
+                    daily = ShopifyVariantDailySales.__table__
+                    has_rows = (await session.execute(
+                        select(literal(1)).where(daily.c.integration_id == integration_id).limit(1)
+                    )).scalar()
+                    if not has_rows:
+                        if not await self.refresh_daily_sales(session, integration_id):
+                            continue
+                        stats["backfilled"] += 1
+                    else:
+                        await self.refresh_daily_sales(session, integration_id, trailing_days)
+                    stats["variants"] += await self.refresh_velocity(session, integration_id)
+                    await session.commit()
+                    stats["integrations"] += 1
+            except Exception as e:
+                logger.error(f"Velocity refresh failed for integration {integration_id}: {e}")
+        return stats
+
+
+shopify_velocity_service = ShopifyVelocityService()
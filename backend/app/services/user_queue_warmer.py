@@ -6,9 +6,10 @@ priority calculation, and queue rebalancing.
 """
 
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, and_, or_, func, desc
 from app.services.intelligence.llm_service import llm_service
@@ -22,9 +23,11 @@ logger = logging.getLogger(__name__)
 
 
 from app.models.campaign_event import CampaignEvent
+from app.services.campaign_live_status import campaign_live_status
 from app.services.websocket_manager import manager
 from app.models.campaign import Campaign
 from app.core.intelligence_utils import enrich_user_intent
+from app.core import queue_priority
 
 
 class UserQueueWarmer:
@@ -32,6 +35,8 @@ class UserQueueWarmer:
     
     MAX_USER_QUEUE_SIZE = 4
     RESUME_USER_QUEUE_SIZE = 3
+    LOCK_TIMEOUT_MINUTES = 15
+    MAX_CLAIM_BATCH = 20
     
     @staticmethod
     async def promote_to_user_queue(
@@ -229,47 +234,22 @@ class UserQueueWarmer:
         Returns:
             Priority score (higher = more urgent)
         """
-        score = 0
-        now = datetime.utcnow()
-        
-        # 1. Committed Time Boost (HIGHEST PRIORITY)
-        if confirmation_slot:
-            time_diff = (confirmation_slot - now).total_seconds() / 60  # minutes
-            
-            if -30 <= time_diff <= 60:
-                # Within window: -30min to +60min
-                score += 10000
-            elif time_diff < -30:
-                # Past due: increasingly urgent
-                minutes_overdue = abs(time_diff + 30)
-                score += 8000 + min(2000, int(minutes_overdue * 10))
-            elif time_diff <= 120:
-                # Within 2 hours
-                score += 5000
-            elif time_diff <= 240:
-                # Within 4 hours
-                score += 3000
-        
-        # 2. Intent Strength Boost (0-2000 points)
-        score += int(intent_strength * 2000)
-        
-        # 3. Time Decay (fresher = higher, 0-1000 points)
-        if detected_at:
-            age_minutes = (now - detected_at).total_seconds() / 60
-            # Decay over 24 hours
-            decay_factor = max(0, 1 - (age_minutes / 1440))
-            score += int(decay_factor * 1000)
-        else:
-            # If no detected_at, assume fresh
-            score += 1000
-        
-        # 4. Retry Penalty (-100 per retry)
-        score -= (retry_count * 100)
-        
-        # 5. Manual Priority Boost
-        score += manual_priority_boost
-        
-        return max(0, score)
+        static = queue_priority.static_priority(intent_strength, retry_count, manual_priority_boost)
+        return queue_priority.priority_score(static, confirmation_slot, detected_at, datetime.utcnow())
+    
+    @staticmethod
+    def current_priority(item: UserQueueItem, now: Optional[datetime] = None) -> int:
+        """Exact priority of a loaded item right now (what `priority_order` sorts by)."""
+        return queue_priority.priority_score(
+            item.static_priority, item.confirmation_slot, item.detected_at, now or datetime.utcnow()
+        )
+    
+    @staticmethod
+    def priority_order(now: datetime):
+        """SQL expression of the exact priority at `now`; sort READY items by it DESC."""
+        return queue_priority.priority_expression(
+            UserQueueItem.static_priority, UserQueueItem.confirmation_slot, UserQueueItem.detected_at, now
+        )
     
     @staticmethod
     async def rebalance_queue(
@@ -277,7 +257,11 @@ class UserQueueWarmer:
         campaign_id: UUID
     ) -> int:
         """
-        Recalculate priority for all READY items in user queue.
+        Refresh the stored (bracket) priority of READY items in user queue.
+        
+        Ordering never depends on this - claims and listings sort by the exact
+        `priority_order` - so only items whose committed-slot bracket changed
+        since they were last written are touched, in one UPDATE.
         
         Args:
             session: Database session
@@ -287,35 +271,21 @@ class UserQueueWarmer:
             Number of items rebalanced
         """
         try:
-            # Get all READY items
+            now = datetime.utcnow()
+            bracket = queue_priority.bracket_score_sql(
+                UserQueueItem.static_priority, UserQueueItem.confirmation_slot, now
+            )
             result = await session.execute(
-                select(UserQueueItem).where(
-                    and_(
-                        UserQueueItem.campaign_id == campaign_id,
-                        UserQueueItem.status == "READY"
-                    )
+                update(UserQueueItem)
+                .where(
+                    UserQueueItem.campaign_id == campaign_id,
+                    UserQueueItem.status == "READY",
+                    UserQueueItem.priority_score != bracket
                 )
+                .values(priority_score=bracket, updated_at=now)
+                .execution_options(synchronize_session=False)
             )
-            items = result.scalars().all()
-            
-            if not items:
-                return 0
-            
-            updated_count = 0
-            for item in items:
-                new_priority = UserQueueWarmer._calculate_priority_score(
-                    confirmation_slot=item.confirmation_slot,
-                    intent_strength=item.intent_strength,
-                    retry_count=item.retry_count,
-                    manual_priority_boost=item.manual_priority_boost,
-                    detected_at=item.detected_at
-                )
-                
-                if item.priority_score != new_priority:
-                    item.priority_score = new_priority
-                    item.updated_at = datetime.utcnow()
-                    session.add(item)
-                    updated_count += 1
+            updated_count = result.rowcount or 0
             
             if updated_count > 0:
                 await session.commit()
@@ -380,6 +350,80 @@ class UserQueueWarmer:
             await session.rollback()
             return 0
     
+    @staticmethod
+    async def claim_leads(
+        session: AsyncSession,
+        campaign_id: UUID,
+        user_id: str,
+        limit: int = 1
+    ) -> List[UserQueueItem]:
+        """
+        Atomically claim (lock) up to `limit` of the highest priority READY leads for a user.
+        
+        One UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING:
+        concurrent agents skip rows another claim is holding instead of racing
+        onto the same row. The partial ix_user_queue_items_ready index narrows
+        the scan to the campaign's claimable READY slice; that slice is then
+        sorted by the exact priority, which depends on `now` and is not indexable.
+        
+        Args:
+            session: Database session
+            campaign_id: Campaign ID
+            user_id: User ID (Firebase UID)
+            limit: Maximum number of leads to claim
+            
+        Returns:
+            Claimed items in priority order (empty if none are ready)
+        """
+        now = datetime.utcnow()
+        limit = max(1, min(limit, UserQueueWarmer.MAX_CLAIM_BATCH))
+        
+        # [FIX] Respect retry cooldowns or future scheduled times
+        candidates = (
+            select(UserQueueItem.id)
+            .where(
+                UserQueueItem.campaign_id == campaign_id,
+                UserQueueItem.status == "READY",
+                or_(
+                    UserQueueItem.retry_scheduled_for.is_(None),
+                    UserQueueItem.retry_scheduled_for <= now
+                )
+            )
+            .order_by(UserQueueWarmer.priority_order(now).desc(), UserQueueItem.detected_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        
+        # Lock for user; the manual priority boost is spent once the lead is handled
+        # (SET expressions see the pre-update row, so the boost is taken back out here)
+        stmt = (
+            update(UserQueueItem)
+            .where(UserQueueItem.id.in_(candidates.scalar_subquery()))
+            .values(
+                status="LOCKED",
+                locked_by_user_id=user_id,
+                locked_at=now,
+                lock_expires_at=now + timedelta(minutes=UserQueueWarmer.LOCK_TIMEOUT_MINUTES),
+                manual_priority_boost=0,
+                static_priority=UserQueueItem.static_priority - UserQueueItem.manual_priority_boost,
+                priority_score=queue_priority.bracket_score_sql(
+                    UserQueueItem.static_priority - UserQueueItem.manual_priority_boost, UserQueueItem.confirmation_slot, now
+                ),
+                updated_at=now
+            )
+            .returning(UserQueueItem)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        result = await session.execute(stmt)
+        items = list(result.scalars().all())
+        await session.commit()
+        
+        # RETURNING order is unspecified
+        items.sort(key=lambda item: (-UserQueueWarmer.current_priority(item, now), item.detected_at))
+        if items:
+            logger.info(f"Locked {len(items)} user queue item(s) for user {user_id}: {[str(i.id) for i in items]}")
+        return items
+    
     @staticmethod
     async def get_next_lead(
         session: AsyncSession,
@@ -398,72 +442,34 @@ class UserQueueWarmer:
             Locked UserQueueItem or None if queue is empty
         """
         try:
-            # Find highest priority READY item
-            # [FIX] Respect retry cooldowns or future scheduled times
-            now = datetime.utcnow()
-            result = await session.execute(
-                select(UserQueueItem).where(
+            items = await UserQueueWarmer.claim_leads(session, campaign_id, user_id, limit=1)
+            if items:
+                return items[0]
+            
+            # [FALLBACK] Check for raw QueueItems (Open Leads)
+            # If the user is asking for a lead and none are in the User Queue, 
+            # we grab from the AI/Open Queue.
+            raw_result = await session.execute(
+                select(QueueItem).where(
                     and_(
-                        UserQueueItem.campaign_id == campaign_id,
-                        UserQueueItem.status == "READY",
-                        or_(
-                            UserQueueItem.retry_scheduled_for.is_(None),
-                            UserQueueItem.retry_scheduled_for <= now
-                        )
+                        QueueItem.campaign_id == campaign_id,
+                        QueueItem.promoted_to_user_queue == False,
+                        QueueItem.status.in_(["ELIGIBLE", "READY", "COMPLETED"])
                     )
-                ).order_by(
-                    UserQueueItem.priority_score.desc(),
-                    UserQueueItem.detected_at.asc()
                 ).limit(1)
             )
-            item = result.scalar_one_or_none()
-            
-
-            if not item:
-                # [FALLBACK] Check for raw QueueItems (Open Leads)
-                # If the user is asking for a lead and none are in the User Queue, 
-                # we grab from the AI/Open Queue.
-                raw_result = await session.execute(
-                    select(QueueItem).where(
-                        and_(
-                            QueueItem.campaign_id == campaign_id,
-                            QueueItem.promoted_to_user_queue == False,
-                            QueueItem.status.in_(["ELIGIBLE", "READY", "COMPLETED"])
-                        )
-                    ).limit(1)
-                )
-                raw_item = raw_result.scalar_one_or_none()
-                
-                if raw_item:
-                    logger.info(f"Fallback: Auto-promoting raw lead {raw_item.lead_id} for user {user_id}")
-                    item = await UserQueueWarmer.promote_to_user_queue(session, raw_item.id, manual_override=True)
-                
-                if not item:
-                    return None
-            
-            # Lock for user (15 min timeout)
-            item.status = "LOCKED"
-
-            item.locked_by_user_id = user_id
-            item.locked_at = datetime.utcnow()
-            item.lock_expires_at = datetime.utcnow() + timedelta(minutes=15)
-            item.updated_at = datetime.utcnow()
+            raw_item = raw_result.scalar_one_or_none()
             
-            session.add(item)
-            await session.commit()
-            await session.refresh(item)
-            
-            logger.info(f"Locked user queue item {item.id} for user {user_id}")
-            
-            logger.info(f"Locked user queue item {item.id} for user {user_id}")
+            if not raw_item:
+                return None
             
-            # Reset manual priority boost once locked/handled
-            if item.manual_priority_boost > 0:
-                item.manual_priority_boost = 0
-                session.add(item)
-                await session.commit()
+            logger.info(f"Fallback: Auto-promoting raw lead {raw_item.lead_id} for user {user_id}")
+            if not await UserQueueWarmer.promote_to_user_queue(session, raw_item.id, manual_override=True):
+                return None
             
-            return item
+            # The promoted lead is READY like any other; another agent may claim it first
+            items = await UserQueueWarmer.claim_leads(session, campaign_id, user_id, limit=1)
+            return items[0] if items else None
             
         except Exception as e:
             logger.error(f"Error getting next lead: {e}")
@@ -517,6 +523,7 @@ class UserQueueWarmer:
                 
                 # Broadcast update
                 await manager.broadcast_status_update(str(campaign_id), {"event": "campaign_status_update", "status": "PAUSED"})
+                campaign_live_status.notify_changed(campaign_id)
 
             elif active_count <= UserQueueWarmer.RESUME_USER_QUEUE_SIZE and campaign.status == "PAUSED":
                 # AUTO-RESUME
@@ -539,6 +546,7 @@ class UserQueueWarmer:
                 
                 # Broadcast update
                 await manager.broadcast_status_update(str(campaign_id), {"event": "campaign_status_update", "status": "ACTIVE"})
+                campaign_live_status.notify_changed(campaign_id)
                 
         except Exception as e:
             logger.error(f"Error checking backpressure for campaign {campaign_id}: {e}")
@@ -3,14 +3,22 @@ WebSocket Connection Manager for Real-time Campaign Updates
 
 Manages WebSocket connections for campaign execution updates,
 providing real-time data synchronization without polling.
+Broadcasts are serialized once, fanned out to every API worker through a
+pluggable backplane (settings.WS_BACKPLANE) and written to each socket by
+its own bounded sender queue.
 """
+import asyncio
+import json
 import logging
 from datetime import date, datetime
-from typing import Dict, Set
+from typing import Dict, Optional, Set
 from uuid import UUID
 
 from fastapi import WebSocket
 
+from app.core.config import settings
+from app.services.ws_backplane import Backplane, build_backplane
+
 logger = logging.getLogger(__name__)
 
 def json_serializable(obj):
@@ -27,12 +35,73 @@ def json_serializable(obj):
         return [json_serializable(i) for i in obj]
     return obj
 
+def dumps_message(message: dict) -> str:
+    """Serialize once per message, in the same compact form as `WebSocket.send_json`."""
+    return json.dumps(json_serializable(message), separators=(",", ":"), ensure_ascii=False, default=str)
+
+class _ClientChannel:
+    """
+    Bounded outbound queue + sender task for one socket.
+
+    Broadcasts only enqueue; the sender task does the (possibly slow) network
+    write, so one stalled client never delays the rest of the room. When the
+    queue is full the oldest pending message is dropped: campaign updates are
+    state snapshots, so the newest one is what a lagging client needs.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue: int, send_timeout: float, on_dead):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.send_timeout = send_timeout
+        self.dropped = 0
+        self._on_dead = on_dead
+        self._task = asyncio.create_task(self._sender())
+
+    def offer(self, text: str) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            if self.dropped % 50 == 1:
+                logger.warning(f"Slow WebSocket consumer: dropped {self.dropped} message(s)")
+        self.queue.put_nowait(text)
+
+    async def _sender(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending to WebSocket connection: {e}")
+            self._on_dead(self.websocket)
+
+    def close(self):
+        self._task.cancel()
+
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time updates"""
     
-    def __init__(self):
-        # Map of campaign_id -> set of active WebSocket connections
+    def __init__(self, backplane: Optional[Backplane] = None):
+        # Map of campaign_id -> set of active WebSocket connections (this worker only)
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        self._channels: Dict[WebSocket, _ClientChannel] = {}
+        self._rooms: Dict[WebSocket, str] = {}
+        self.backplane = backplane or build_backplane(settings.WS_BACKPLANE, settings.DATABASE_URL)
+        self._started = False
+        
+    async def start(self):
+        """Subscribe this worker to the backplane (idempotent)."""
+        if not self._started:
+            self._started = True
+            await self.backplane.start(self._deliver_local)
+            
+    async def stop(self):
+        for channel in list(self._channels.values()):
+            channel.close()
+        await self.backplane.stop()
+        self._started = False
         
     async def connect(self, websocket: WebSocket, campaign_id: str):
         """Accept and register a new WebSocket connection"""
@@ -41,14 +110,27 @@ class ConnectionManager:
         if websocket.application_state != WebSocketState.CONNECTED:
             await websocket.accept()
         
+        await self.start()
         if campaign_id not in self.active_connections:
             self.active_connections[campaign_id] = set()
             
         self.active_connections[campaign_id].add(websocket)
+        self._rooms[websocket] = campaign_id
+        self._channels[websocket] = _ClientChannel(
+            websocket,
+            max_queue=settings.WS_SEND_QUEUE_SIZE,
+            send_timeout=settings.WS_SEND_TIMEOUT_S,
+            on_dead=self._drop_dead,
+        )
         logger.info(f"WebSocket connected for campaign {campaign_id}. Total connections: {len(self.active_connections[campaign_id])}")
         
     def disconnect(self, websocket: WebSocket, campaign_id: str):
         """Remove a WebSocket connection"""
+        channel = self._channels.pop(websocket, None)
+        if channel:
+            channel.close()
+        self._rooms.pop(websocket, None)
+        
         if campaign_id in self.active_connections:
             self.active_connections[campaign_id].discard(websocket)
             
@@ -58,36 +140,44 @@ class ConnectionManager:
                 
             logger.info(f"WebSocket disconnected from campaign {campaign_id}")
             
+    def _drop_dead(self, websocket: WebSocket):
+        campaign_id = self._rooms.get(websocket)
+        if campaign_id is not None:
+            self.disconnect(websocket, campaign_id)
+            
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Send a message to a specific WebSocket connection"""
         try:
             # Systemic Fix: Ensure all data is JSON serializable (UUIDs, datetimes, etc)
-            safe_message = json_serializable(message)
-            await websocket.send_json(safe_message)
+            text = dumps_message(message)
+            channel = self._channels.get(websocket)
+            if channel:
+                # Keep ordering with broadcasts already queued for this socket
+                channel.offer(text)
+            else:
+                await websocket.send_text(text)
         except Exception as e:
             logger.error(f"Error sending personal message: {e}")
             
     async def broadcast_to_campaign(self, campaign_id: str, message: dict):
-        """Broadcast a message to all connections subscribed to a campaign"""
-        if campaign_id not in self.active_connections:
+        """
+        Broadcast a message to all connections subscribed to a campaign, in every worker.
+        The message is serialized once and published through the backplane.
+        """
+        await self.start()
+        try:
+            text = dumps_message(message)
+        except Exception as e:
+            logger.error(f"Error serializing broadcast for campaign {campaign_id}: {e}")
             return
-            
-        # Create a copy of the set to avoid modification during iteration
-        connections = self.active_connections[campaign_id].copy()
-        disconnected = []
+        await self.backplane.publish(campaign_id, text)
         
-        for connection in connections:
-            try:
-                # Systemic Fix: Ensure all data is JSON serializable
-                safe_message = json_serializable(message)
-                await connection.send_json(safe_message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to connection: {e}")
-                disconnected.append(connection)
-                
-        # Clean up failed connections
-        for connection in disconnected:
-            self.disconnect(connection, campaign_id)
+    async def _deliver_local(self, campaign_id: str, text: str):
+        """Backplane callback: enqueue a serialized message for this worker's sockets."""
+        for connection in self.active_connections.get(campaign_id, set()).copy():
+            channel = self._channels.get(connection)
+            if channel:
+                channel.offer(text)
             
     async def broadcast_status_update(self, campaign_id: str, data: dict):
         """Broadcast a status update to all campaign subscribers"""
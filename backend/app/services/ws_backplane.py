@@ -0,0 +1,158 @@
+"""
+Backplanes for fanning campaign WebSocket messages out across API workers.
+
+A backplane carries already-serialized messages between processes. Every
+worker subscribes once at startup and hands whatever it receives to its local
+ConnectionManager, so a broadcast made in any worker reaches every socket.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# (campaign_id, serialized_message) -> local delivery
+DeliverFn = Callable[[str, str], Awaitable[None]]
+
+
+class Backplane(ABC):
+    """Interface: publish a serialized message for a campaign room."""
+
+    async def start(self, deliver: DeliverFn) -> None:
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, campaign_id: str, text: str) -> None:
+        ...
+
+
+class InProcessBackplane(Backplane):
+    """Default: single worker, messages are delivered straight to local sockets."""
+
+    def __init__(self):
+        self._deliver: Optional[DeliverFn] = None
+
+    async def publish(self, campaign_id: str, text: str) -> None:
+        if self._deliver:
+            await self._deliver(campaign_id, text)
+
+
+class PostgresNotifyBackplane(Backplane):
+    """
+    Multi-worker fan-out over PostgreSQL LISTEN/NOTIFY (no extra infrastructure).
+
+    Each worker keeps one dedicated asyncpg connection that LISTENs on the channel;
+    the publishing worker receives its own NOTIFY too, so delivery is uniform.
+    NOTIFY payloads are capped at 8000 bytes: larger messages are delivered to
+    this worker's sockets only and logged.
+
+    The LISTEN connection is watched independently of publishing: a
+    termination listener wakes the watcher as soon as asyncpg sees the
+    connection drop, and every `health_check_interval_s` it is pinged and
+    re-established if needed. Messages published while it is down are missed.
+    """
+
+    channel = "campaign_ws"
+    max_payload_bytes = 7900
+    health_check_interval_s = 15.0
+
+    def __init__(self, dsn: str):
+        # SQLAlchemy URL -> plain libpq DSN for asyncpg
+        self.dsn = dsn.replace("postgresql+asyncpg://", "postgresql://", 1)
+        self._deliver: Optional[DeliverFn] = None
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    async def start(self, deliver: DeliverFn) -> None:
+        self._deliver = deliver
+        await self._ensure_connection()
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+        await self._drop_connection()
+
+    async def publish(self, campaign_id: str, text: str) -> None:
+        payload = f"{campaign_id}|{text}"
+        if len(payload.encode()) > self.max_payload_bytes:
+            logger.warning(f"WS backplane: {len(payload)}B message for {campaign_id} exceeds NOTIFY limit; delivering locally only")
+            await self._deliver_local(campaign_id, text)
+            return
+        try:
+            conn = await self._ensure_connection()
+            async with self._lock:
+                await conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception as e:
+            logger.error(f"WS backplane publish failed, delivering locally only: {e}")
+            await self._drop_connection()
+            self._wake.set()
+            await self._deliver_local(campaign_id, text)
+
+    async def _ensure_connection(self):
+        async with self._lock:
+            if self._conn is None or self._conn.is_closed():
+                import asyncpg
+
+                self._conn = await asyncpg.connect(self.dsn)
+                await self._conn.add_listener(self.channel, self._on_notify)
+                self._conn.add_termination_listener(self._on_terminated)
+                logger.info("WS backplane: listening on PostgreSQL channel %s", self.channel)
+            return self._conn
+
+    async def _drop_connection(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.debug(f"WS backplane: closing dropped connection failed: {e}")
+
+    async def _watch(self) -> None:
+        """Keeps the LISTEN connection alive for workers that never publish."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.health_check_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                conn = await self._ensure_connection()
+                async with self._lock:
+                    await conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Retried on the next interval
+                logger.warning(f"WS backplane: LISTEN connection unavailable, reconnecting: {e}")
+                await self._drop_connection()
+
+    def _on_terminated(self, connection) -> None:
+        if connection is self._conn:
+            logger.warning("WS backplane: LISTEN connection terminated")
+            self._wake.set()
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        campaign_id, _, text = payload.partition("|")
+        asyncio.get_running_loop().create_task(self._deliver_local(campaign_id, text))
+
+    async def _deliver_local(self, campaign_id: str, text: str) -> None:
+        if self._deliver:
+            await self._deliver(campaign_id, text)
+
+
+def build_backplane(kind: str, dsn: str) -> Backplane:
+    if kind == "postgres":
+        return PostgresNotifyBackplane(dsn)
+    if kind != "memory":
+        logger.warning(f"Unknown WS_BACKPLANE '{kind}', falling back to in-process delivery")
+    return InProcessBackplane()
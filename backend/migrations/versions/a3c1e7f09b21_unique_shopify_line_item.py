@@ -0,0 +1,46 @@
+"""unique shopify_line_item per integration
+
+Revision ID: a3c1e7f09b21
+Revises: db16f65b2e80
+Create Date: 2026-10-18 09:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c1e7f09b21'
+down_revision: Union[str, Sequence[str], None] = 'db16f65b2e80'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Batched refinement upserts line items with ON CONFLICT (integration_id, shopify_line_item_id).
+    # Drop duplicates left behind by the per-row path before adding the constraint.
+    op.execute("""
+        DELETE FROM shopify_line_item a
+        USING shopify_line_item b
+        WHERE a.integration_id = b.integration_id
+          AND a.shopify_line_item_id = b.shopify_line_item_id
+          AND a.ctid < b.ctid
+    """)
+    op.create_unique_constraint(
+        'shopify_line_item_integration_id_shopify_line_item_id_key',
+        'shopify_line_item',
+        ['integration_id', 'shopify_line_item_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        'shopify_line_item_integration_id_shopify_line_item_id_key',
+        'shopify_line_item',
+        type_='unique',
+    )
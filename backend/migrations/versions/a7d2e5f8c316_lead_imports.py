@@ -0,0 +1,48 @@
+"""lead imports
+
+Revision ID: a7d2e5f8c316
+Revises: f3c7a9d2e415
+Create Date: 2026-10-18 21:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2e5f8c316'
+down_revision: Union[str, Sequence[str], None] = 'f3c7a9d2e415'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'lead_imports',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('company_id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('campaign_id', sa.Uuid(), nullable=True),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('bytes_read', sa.Integer(), nullable=False),
+        sa.Column('rows_read', sa.Integer(), nullable=False),
+        sa.Column('rows_skipped', sa.Integer(), nullable=False),
+        sa.Column('leads_count', sa.Integer(), nullable=False),
+        sa.Column('error_message', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_lead_imports_company_id'), 'lead_imports', ['company_id'], unique=False)
+    op.create_index(op.f('ix_lead_imports_user_id'), 'lead_imports', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_lead_imports_user_id'), table_name='lead_imports')
+    op.drop_index(op.f('ix_lead_imports_company_id'), table_name='lead_imports')
+    op.drop_table('lead_imports')
@@ -0,0 +1,36 @@
+"""user queue ready index
+
+Revision ID: a9c4e2f7b318
+Revises: f1b8d3e6a927
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c4e2f7b318'
+down_revision: Union[str, Sequence[str], None] = 'f1b8d3e6a927'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Partial index: claiming only ever scans the READY slice of one campaign
+    op.create_index(
+        'ix_user_queue_items_ready_priority',
+        'user_queue_items',
+        ['campaign_id', sa.text('priority_score DESC'), 'detected_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'READY'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_queue_items_ready_priority', table_name='user_queue_items')
@@ -0,0 +1,55 @@
+"""user queue static priority
+
+Revision ID: b2d7f1c5e843
+Revises: a9c4e2f7b318
+Create Date: 2026-10-18 18:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d7f1c5e843'
+down_revision: Union[str, Sequence[str], None] = 'a9c4e2f7b318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_queue_items', sa.Column('static_priority', sa.Integer(), nullable=False, server_default='0'))
+    # Same as app.core.queue_priority.static_priority; priority_score is moved to
+    # the bracket score by the next rebalance of each campaign
+    op.execute("""
+        UPDATE user_queue_items
+        SET static_priority = trunc(coalesce(intent_strength, 0) * 2000)::int
+                              - coalesce(retry_count, 0) * 100
+                              + coalesce(manual_priority_boost, 0)
+    """)
+    # Claims sort by the time-dependent exact priority, which no index can order;
+    # the index only narrows the scan to one campaign's claimable READY rows
+    op.drop_index('ix_user_queue_items_ready_priority', table_name='user_queue_items')
+    op.create_index(
+        'ix_user_queue_items_ready',
+        'user_queue_items',
+        ['campaign_id', 'retry_scheduled_for'],
+        unique=False,
+        postgresql_where=sa.text("status = 'READY'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_queue_items_ready', table_name='user_queue_items')
+    op.create_index(
+        'ix_user_queue_items_ready_priority',
+        'user_queue_items',
+        ['campaign_id', sa.text('priority_score DESC'), 'detected_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'READY'"),
+    )
+    op.drop_column('user_queue_items', 'static_priority')
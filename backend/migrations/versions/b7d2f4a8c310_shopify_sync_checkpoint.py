@@ -0,0 +1,47 @@
+"""shopify sync checkpoints
+
+Revision ID: b7d2f4a8c310
+Revises: a3c1e7f09b21
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2f4a8c310'
+down_revision: Union[str, Sequence[str], None] = 'a3c1e7f09b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('shopify_sync_checkpoint',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('integration_id', sa.Uuid(), nullable=False),
+    sa.Column('resource', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('window_start', sa.DateTime(), nullable=True),
+    sa.Column('page_info', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('pages_synced', sa.Integer(), nullable=False),
+    sa.Column('objects_synced', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['integration_id'], ['integration.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('integration_id', 'resource')
+    )
+    op.create_index(op.f('ix_shopify_sync_checkpoint_integration_id'), 'shopify_sync_checkpoint', ['integration_id'], unique=False)
+    op.create_index(op.f('ix_shopify_sync_checkpoint_resource'), 'shopify_sync_checkpoint', ['resource'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_shopify_sync_checkpoint_resource'), table_name='shopify_sync_checkpoint')
+    op.drop_index(op.f('ix_shopify_sync_checkpoint_integration_id'), table_name='shopify_sync_checkpoint')
+    op.drop_table('shopify_sync_checkpoint')
@@ -0,0 +1,29 @@
+"""call raw data claimed_at
+
+Revision ID: b9e4c1d7a352
+Revises: a7d2e5f8c316
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e4c1d7a352'
+down_revision: Union[str, Sequence[str], None] = 'a7d2e5f8c316'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('call_raw_data', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('call_raw_data', 'claimed_at')
@@ -0,0 +1,39 @@
+"""insight deck cache
+
+Revision ID: c4e9a1d2b573
+Revises: b7d2f4a8c310
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a1d2b573'
+down_revision: Union[str, Sequence[str], None] = 'b7d2f4a8c310'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('insight_deck_cache',
+    sa.Column('brand_id', sa.Uuid(), nullable=False),
+    sa.Column('data_version', sa.Integer(), nullable=False),
+    sa.Column('deck_version', sa.Integer(), nullable=False),
+    sa.Column('deck', postgresql.JSON(astext_type=sa.Text()), nullable=True),
+    sa.Column('generated_at', sa.DateTime(), nullable=True),
+    sa.Column('refreshing_since', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['brand_id'], ['brand.id'], ),
+    sa.PrimaryKeyConstraint('brand_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('insight_deck_cache')
@@ -0,0 +1,41 @@
+"""queue warmer set-based indexes
+
+Revision ID: c6e3a8d1f457
+Revises: b2d7f1c5e843
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e3a8d1f457'
+down_revision: Union[str, Sequence[str], None] = 'b2d7f1c5e843'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_campaign_leads_normalized_number',
+        'campaign_leads',
+        ['campaign_id', sa.text("regexp_replace(contact_number, '\\D', '', 'g')")],
+        unique=False,
+    )
+    op.create_index(
+        'ix_bolna_execution_maps_campaign_updated',
+        'bolna_execution_maps',
+        ['campaign_id', 'updated_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bolna_execution_maps_campaign_updated', table_name='bolna_execution_maps')
+    op.drop_index('ix_campaign_leads_normalized_number', table_name='campaign_leads')
@@ -0,0 +1,34 @@
+"""call log keyset index
+
+Revision ID: d4a9f2c6b871
+Revises: c6e3a8d1f457
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9f2c6b871'
+down_revision: Union[str, Sequence[str], None] = 'c6e3a8d1f457'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_bolna_execution_maps_campaign_created',
+        'bolna_execution_maps',
+        ['campaign_id', 'created_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bolna_execution_maps_campaign_created', table_name='bolna_execution_maps')
@@ -0,0 +1,73 @@
+"""raw ingest retention
+
+Revision ID: d8f3b6c1e245
+Revises: c4e9a1d2b573
+Create Date: 2026-10-18 13:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f3b6c1e245'
+down_revision: Union[str, Sequence[str], None] = 'c4e9a1d2b573'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Month-partitioned archive; partitions are created on demand by the prune job
+    op.create_table('shopify_raw_ingest_archive',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('fetched_at', sa.DateTime(), nullable=False),
+    sa.Column('integration_id', sa.Uuid(), nullable=False),
+    sa.Column('company_id', sa.Uuid(), nullable=False),
+    sa.Column('object_type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('shopify_object_id', sa.BigInteger(), nullable=True),
+    sa.Column('shopify_updated_at', sa.DateTime(), nullable=True),
+    sa.Column('dedupe_key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('source', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('topic', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('processing_status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'fetched_at'),
+    postgresql_partition_by='RANGE (fetched_at)'
+    )
+    op.create_index(op.f('ix_shopify_raw_ingest_archive_company_id'), 'shopify_raw_ingest_archive', ['company_id'], unique=False)
+    op.create_index(op.f('ix_shopify_raw_ingest_archive_integration_id'), 'shopify_raw_ingest_archive', ['integration_id'], unique=False)
+
+    op.create_table('shopify_prune_cursor',
+    sa.Column('target', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('last_ts', sa.DateTime(), nullable=True),
+    sa.Column('last_id', sa.Uuid(), nullable=True),
+    sa.Column('rows_processed', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('target')
+    )
+
+    # Built without blocking writes on the (large) hot table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_shopify_raw_ingest_object_type_fetched_at', 'shopify_raw_ingest',
+            ['object_type', 'fetched_at'], unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_shopify_raw_ingest_object_type_fetched_at', table_name='shopify_raw_ingest',
+            postgresql_concurrently=True
+        )
+    op.drop_table('shopify_prune_cursor')
+    op.drop_index(op.f('ix_shopify_raw_ingest_archive_integration_id'), table_name='shopify_raw_ingest_archive')
+    op.drop_index(op.f('ix_shopify_raw_ingest_archive_company_id'), table_name='shopify_raw_ingest_archive')
+    op.drop_table('shopify_raw_ingest_archive')
@@ -0,0 +1,39 @@
+"""call raw data processed_at
+
+Revision ID: e8b3f1a6c924
+Revises: d4a9f2c6b871
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3f1a6c924'
+down_revision: Union[str, Sequence[str], None] = 'd4a9f2c6b871'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('call_raw_data', sa.Column('processed_at', sa.DateTime(), nullable=True))
+    # Everything stored before the webhook pipeline was processed inline
+    op.execute("UPDATE call_raw_data SET processed_at = created_at")
+    op.create_index(
+        'ix_call_raw_data_unprocessed',
+        'call_raw_data',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("processed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_call_raw_data_unprocessed', table_name='call_raw_data')
+    op.drop_column('call_raw_data', 'processed_at')
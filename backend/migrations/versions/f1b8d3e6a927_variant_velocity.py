@@ -0,0 +1,65 @@
+"""variant velocity
+
+Revision ID: f1b8d3e6a927
+Revises: e5a2c7d94f18
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b8d3e6a927'
+down_revision: Union[str, Sequence[str], None] = 'e5a2c7d94f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('shopify_variant_daily_sales',
+    sa.Column('integration_id', sa.Uuid(), nullable=False),
+    sa.Column('shopify_variant_id', sa.BigInteger(), nullable=False),
+    sa.Column('sales_date', sa.Date(), nullable=False),
+    sa.Column('company_id', sa.Uuid(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=20, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+    sa.ForeignKeyConstraint(['integration_id'], ['integration.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('integration_id', 'shopify_variant_id', 'sales_date')
+    )
+    op.create_index(op.f('ix_shopify_variant_daily_sales_company_id'), 'shopify_variant_daily_sales', ['company_id'], unique=False)
+    op.create_table('shopify_variant_velocity',
+    sa.Column('integration_id', sa.Uuid(), nullable=False),
+    sa.Column('shopify_variant_id', sa.BigInteger(), nullable=False),
+    sa.Column('company_id', sa.Uuid(), nullable=False),
+    sa.Column('as_of', sa.Date(), nullable=False),
+    sa.Column('units_7d', sa.Integer(), nullable=False),
+    sa.Column('units_prev_7d', sa.Integer(), nullable=False),
+    sa.Column('units_30d', sa.Integer(), nullable=False),
+    sa.Column('units_90d', sa.Integer(), nullable=False),
+    sa.Column('velocity_7d', sa.Float(), nullable=False),
+    sa.Column('velocity_30d', sa.Float(), nullable=False),
+    sa.Column('velocity_90d', sa.Float(), nullable=False),
+    sa.Column('last_sale_date', sa.Date(), nullable=True),
+    sa.Column('available', sa.Integer(), nullable=False),
+    sa.Column('days_of_cover', sa.Float(), nullable=True),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+    sa.ForeignKeyConstraint(['integration_id'], ['integration.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('integration_id', 'shopify_variant_id')
+    )
+    op.create_index(op.f('ix_shopify_variant_velocity_company_id'), 'shopify_variant_velocity', ['company_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_shopify_variant_velocity_company_id'), table_name='shopify_variant_velocity')
+    op.drop_table('shopify_variant_velocity')
+    op.drop_index(op.f('ix_shopify_variant_daily_sales_company_id'), table_name='shopify_variant_daily_sales')
+    op.drop_table('shopify_variant_daily_sales')
@@ -0,0 +1,35 @@
+"""integration shop domain index
+
+Revision ID: f3c7a9d2e415
+Revises: e8b3f1a6c924
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c7a9d2e415'
+down_revision: Union[str, Sequence[str], None] = 'e8b3f1a6c924'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Expression index: webhook routing looks integrations up by shop domain
+    op.create_index(
+        'ix_integration_shop_domain',
+        'integration',
+        [sa.text("(metadata_info ->> 'shop')")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_integration_shop_domain', table_name='integration')
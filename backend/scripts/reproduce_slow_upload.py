@@ -61,5 +61,17 @@ def measure_upload_performance():
     print("  -H 'Authorization: Bearer <YOUR_TOKEN>' \\")
     print("  -d @large_payload.json")
 
+    # Same leads as CSV for the streaming endpoint (parsed and COPYed in chunks)
+    with open("large_payload.csv", "w") as f:
+        f.write("customer_name,contact_number,cohort,notes\n")
+        for lead in leads:
+            f.write(f"{lead['customer_name']},{lead['contact_number']},{lead['cohort']},{lead['meta_data']['notes']}\n")
+    print("\nGenerated 'large_payload.csv'. Compare with the streaming import:")
+    print("curl -X POST 'http://localhost:8000/api/v1/intelligence/campaigns/import-leads?force_create=true' \\")
+    print("  -H 'Content-Type: text/csv' \\")
+    print("  -H 'X-Company-ID: <YOUR_COMPANY_ID>' \\")
+    print("  -H 'Authorization: Bearer <YOUR_TOKEN>' \\")
+    print("  --data-binary @large_payload.csv")
+
 if __name__ == "__main__":
     measure_upload_performance()
@@ -0,0 +1,98 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from fastapi import HTTPException, Response
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints.execution import (
+    _decode_call_log_cursor,
+    _encode_call_log_cursor,
+    get_campaign_call_log,
+    get_campaign_call_logs,
+)
+
+
+def _row(**overrides):
+    row = MagicMock()
+    row.id = uuid4()
+    row.created_at = datetime(2026, 10, 1, 12, 0, 0)
+    row.call_outcome = None
+    row.queue_status = "INTENT_YES"
+    row.call_status = "completed"
+    row.termination_reason = None
+    row.lead_id = uuid4()
+    row.extracted_data = {"intent": "yes"}
+    row.last_webhook_payload = {"usage": {"tokens": 10}}
+    for key, value in overrides.items():
+        setattr(row, key, value)
+    return row
+
+
+def _session(rows):
+    session = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    result.first.return_value = rows[0] if rows else None
+    session.execute.return_value = result
+    return session
+
+
+def _sql(session):
+    return str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trip():
+    created_at, execution_id = datetime(2026, 10, 1, 12, 0, 0, 123456), uuid4()
+    assert _decode_call_log_cursor(_encode_call_log_cursor(created_at, execution_id)) == (created_at, execution_id)
+
+    with pytest.raises(HTTPException):
+        _decode_call_log_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_default_page_uses_keyset_and_skips_payloads():
+    rows = [_row(), _row()]
+    session = _session(rows)
+    response = Response()
+    cursor = _encode_call_log_cursor(datetime(2026, 10, 2), uuid4())
+
+    logs = await get_campaign_call_logs(
+        uuid4(), response, page=1, page_size=2, cursor=cursor,
+        session=session, current_user=MagicMock(),
+    )
+
+    sql = _sql(session)
+    assert "(bolna_execution_maps.created_at, bolna_execution_maps.id) <" in sql
+    assert "OFFSET" not in sql
+    assert "last_webhook_payload," not in sql and "full_transcript" not in sql
+    assert logs[0]["outcome"] == "Interested"
+    assert "raw_data" not in logs[0]
+    assert _decode_call_log_cursor(response.headers["X-Next-Cursor"]) == (rows[-1].created_at, rows[-1].id)
+
+
+@pytest.mark.asyncio
+async def test_short_page_has_no_next_cursor():
+    session = _session([_row()])
+    response = Response()
+
+    logs = await get_campaign_call_logs(
+        uuid4(), response, page=1, page_size=20, cursor=None, fields="full",
+        session=session, current_user=MagicMock(),
+    )
+
+    assert "X-Next-Cursor" not in response.headers
+    assert logs[0]["usage_metadata"] == {"tokens": 10}
+
+
+@pytest.mark.asyncio
+async def test_call_log_detail_returns_full_row():
+    row = _row(full_transcript="hello", transcript=None)
+    session = _session([row])
+
+    log = await get_campaign_call_log(uuid4(), row.id, session=session, current_user=MagicMock())
+
+    assert log["full_transcript"] == "hello"
+    assert log["extracted_data"] == {"intent": "yes"}
+    assert "bolna_execution_maps.id = " in _sql(session)
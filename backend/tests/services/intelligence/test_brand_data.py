@@ -0,0 +1,139 @@
+"""
+Unit tests for the shared per-deck BrandDataFrame.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services.intelligence.brand_data import BrandDataFrame
+from app.services.intelligence.generators.financial.stockout_risk_generator import StockoutRiskGenerator
+from app.services.intelligence.generators.growth.cross_sell_generator import CrossSellGenerator
+
+
+NOW = datetime.utcnow()
+
+
+def _order(days_ago, email="a@x.com", cancelled=False, status="paid", total="100.00"):
+    return SimpleNamespace(
+        id=uuid4(),
+        shopify_created_at=NOW - timedelta(days=days_ago),
+        total_price=Decimal(total),
+        total_discounts=Decimal("0"),
+        refunded_subtotal=Decimal("0"),
+        email=email,
+        financial_status=status,
+        shopify_cancelled_at=NOW if cancelled else None,
+    )
+
+
+def _line(order, variant_id, title, quantity=1):
+    return SimpleNamespace(order_id=order.id, variant_id=variant_id, title=title, quantity=quantity, price=Decimal("10"))
+
+
+def _variant(variant_id, sku, available, price="20.00", cost="5.00", status="active"):
+    return SimpleNamespace(
+        shopify_variant_id=variant_id,
+        product_id=uuid4(),
+        product_title=f"Product {sku}",
+        title="Default",
+        sku=sku,
+        product_type="Tees",
+        tags=None,
+        status=status,
+        price=Decimal(price),
+        cost=Decimal(cost) if cost is not None else None,
+        available=available,
+    )
+
+
+def _frame(orders, lines, variants):
+    return BrandDataFrame._from_rows(uuid4(), NOW, NOW - timedelta(days=90), orders, lines, variants)
+
+
+class TestBrandDataFrame:
+
+    def test_units_by_variant_skips_invalid_orders_and_unknown_variants(self):
+        recent, cancelled, voided, old = _order(2), _order(3, cancelled=True), _order(4, status="voided"), _order(40)
+        frame = _frame(
+            [old, voided, cancelled, recent],
+            [
+                _line(recent, 1, "Tee", 3),
+                _line(recent, 999, "Gift card", 1),
+                _line(cancelled, 1, "Tee", 5),
+                _line(voided, 2, "Cap", 5),
+                _line(old, 2, "Cap", 7),
+            ],
+            [_variant(1, "TEE", 10), _variant(2, "CAP", 10)],
+        )
+
+        assert frame.units_by_variant(frame.days_ago(30)).tolist() == [3.0, 0.0]
+        assert frame.units_by_variant().tolist() == [3.0, 7.0]
+
+    def test_customers_are_dictionary_encoded(self):
+        frame = _frame([_order(1, "A@x.com"), _order(2, "a@x.com"), _order(3, None)], [], [])
+
+        assert frame.customers == ["a@x.com"]
+        assert frame.order_customer.tolist() == [0, 0, -1]
+
+    def test_last_sale_by_variant(self):
+        first, second = _order(20), _order(5)
+        frame = _frame(
+            [first, second],
+            [_line(first, 1, "Tee"), _line(second, 1, "Tee")],
+            [_variant(1, "TEE", 10), _variant(2, "CAP", 10)],
+        )
+
+        last = frame.last_sale_by_variant()
+        assert last[0] == np.datetime64(second.shopify_created_at, "s")
+        assert np.isnat(last[1])
+
+    @pytest.mark.asyncio
+    async def test_generators_use_shared_frame_without_querying(self):
+        orders = [_order(d) for d in range(1, 5)]
+        lines = []
+        for order in orders:
+            lines += [_line(order, 1, "Tee", 10), _line(order, 2, "Cap")]
+        frame = _frame(orders, lines, [_variant(1, "TEE", 5), _variant(2, "CAP", 500)])
+        session = AsyncMock()
+
+        stockout = await StockoutRiskGenerator().run(session, uuid4(), data=frame)
+        cross_sell = await CrossSellGenerator().run(session, uuid4(), data=frame)
+
+        session.execute.assert_not_called()
+        assert stockout.meta["top_at_risk_skus"] == ["TEE"]
+        assert {cross_sell.meta["driver_product"], cross_sell.meta["attached_product"]} == {"Tee", "Cap"}
+        # Realized unit price of the attached product feeds the bundle_attach simulation
+        assert cross_sell.meta["attached_price"] == 10.0
+        assert cross_sell.meta["period_days"] == CrossSellGenerator.ANALYSIS_DAYS
+
+    def test_line_items_of_orders_missing_from_the_snapshot_are_dropped(self):
+        order, late_order = _order(1), _order(0)
+        frame = _frame([order], [_line(order, 1, "Tee", 2), _line(late_order, 1, "Tee", 5)], [_variant(1, "TEE", 3)])
+
+        assert frame.line_order.tolist() == [0]
+        assert frame.units_by_variant().tolist() == [2.0]
+
+    def test_units_sold_prefers_materialized_velocity(self):
+        order = _order(3)
+        frame = _frame([order, _order(0)], [_line(order, 1, "Tee", 4)], [_variant(1, "TEE", 12), _variant(2, "CAP", 10)])
+
+        # Fallback: complete days ending yesterday, from the line items
+        assert frame.units_sold(7).tolist() == [4.0, 0.0]
+        assert frame.units_sold(7, offset=7).tolist() == [0.0, 0.0]
+        assert frame.days_of_cover()[0] == pytest.approx(12 / (4 / 30))
+
+        frame._attach_velocity([SimpleNamespace(
+            shopify_variant_id=2, as_of=NOW.date(), units_7d=9, units_prev_7d=1, units_30d=30, units_90d=60,
+            last_sale_date=(NOW - timedelta(days=2)).date(), days_of_cover=10.0,
+        )])
+
+        assert frame.units_sold(7).tolist() == [0.0, 9.0]
+        assert frame.window_bounds(7) == (NOW.date() - timedelta(days=7), NOW.date() - timedelta(days=1))
+        assert frame.units_sold(7, offset=7).tolist() == [0.0, 1.0]
+        assert frame.days_of_cover().tolist() == [np.inf, 10.0]
+        assert np.isnat(frame.last_sale_by_variant()[0])
@@ -0,0 +1,80 @@
+"""
+Tests for the per-brand insight deck cache (stale-while-revalidate).
+"""
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.insight_tracking import InsightDeckCache
+from app.services.intelligence.deck_cache import InsightDeckCacheService
+
+
+def _entry(brand_id, data_version=3, deck_version=3, age=timedelta(minutes=5)):
+    return InsightDeckCache(
+        brand_id=brand_id,
+        data_version=data_version,
+        deck_version=deck_version,
+        deck={"insights": [{"id": "cached"}]},
+        generated_at=datetime.utcnow() - age,
+    )
+
+
+class TestInsightDeckCache:
+
+    @pytest.mark.asyncio
+    async def test_fresh_entry_is_served_without_generation(self):
+        service = InsightDeckCacheService()
+        brand_id = uuid4()
+        session = AsyncMock()
+        session.get.return_value = _entry(brand_id)
+
+        with patch("app.services.intelligence.deck_cache.insight_engine") as engine:
+            deck = await service.get_deck(session, brand_id)
+
+        engine.generate_full_deck.assert_not_called()
+        assert deck["cache_status"] == "hit"
+        assert deck["insights"][0]["id"] == "cached"
+
+    @pytest.mark.asyncio
+    async def test_version_bump_serves_stale_and_refreshes_in_background(self):
+        service = InsightDeckCacheService()
+        brand_id = uuid4()
+        session = AsyncMock()
+        session.get.return_value = _entry(brand_id, data_version=4, deck_version=3)
+        service._schedule_refresh = MagicMock()
+
+        deck = await service.get_deck(session, brand_id)
+
+        assert deck["cache_status"] == "stale"
+        service._schedule_refresh.assert_called_once_with(brand_id)
+
+    @pytest.mark.asyncio
+    async def test_aged_out_entry_is_stale_even_without_data_change(self):
+        service = InsightDeckCacheService()
+        brand_id = uuid4()
+        session = AsyncMock()
+        session.get.return_value = _entry(brand_id, age=service.max_age + timedelta(minutes=1))
+        service._schedule_refresh = MagicMock()
+
+        deck = await service.get_deck(session, brand_id)
+
+        assert deck["cache_status"] == "stale"
+
+    @pytest.mark.asyncio
+    async def test_missing_entry_generates_inline(self):
+        service = InsightDeckCacheService()
+        brand_id = uuid4()
+        session = AsyncMock()
+        session.get.return_value = None
+        service._store = AsyncMock()
+        version_result = MagicMock()
+        version_result.scalar_one_or_none.return_value = None
+        session.execute.return_value = version_result
+
+        with patch("app.services.intelligence.deck_cache.insight_engine") as engine:
+            engine.generate_full_deck = AsyncMock(return_value={"insights": [{"id": "fresh"}]})
+            deck = await service.get_deck(session, brand_id)
+
+        assert deck["cache_status"] == "miss"
+        service._store.assert_awaited_once_with(session, brand_id, 0, {"insights": [{"id": "fresh"}]})
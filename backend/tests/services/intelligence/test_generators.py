@@ -3,13 +3,14 @@ Unit tests for Tier 1 Intelligence Generators.
 Ensures 100% accuracy of insight calculations.
 """
 import pytest
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from uuid import uuid4
 from unittest.mock import AsyncMock, MagicMock
 
 from app.services.intelligence.generators.velocity_generator import VelocityGenerator
 from app.services.intelligence.generators.cashflow_generator import CashflowGenerator
+from app.services.intelligence.generators.growth.vip_at_risk_generator import VIPAtRiskGenerator
 from app.services.intelligence.base_generator import InsightObject
 
 
@@ -176,6 +177,54 @@ class TestCashflowGenerator:
         assert result.impact_score == pytest.approx(1.25, abs=0.1), "₹25k should give score ~1.25"
 
 
+class TestVIPAtRiskGenerator:
+    """Test suite for VIPAtRiskGenerator churn scoring."""
+    
+    @staticmethod
+    def _vip(email, ltv, days_since_last, avg_cycle_days, recent=0, prev=0):
+        return MagicMock(
+            email=email,
+            first_name="Test",
+            last_name=None,
+            ltv=Decimal(str(ltv)),
+            last_order_date=datetime.utcnow() - timedelta(days=days_since_last),
+            avg_cycle_days=avg_cycle_days,
+            recent_orders=recent,
+            prev_orders=prev
+        )
+    
+    @pytest.mark.asyncio
+    async def test_scores_all_vips_from_single_query(self):
+        """PERFORMANCE: All VIP features come from one aggregate query, not one per customer."""
+        gen = VIPAtRiskGenerator()
+        session = AsyncMock()
+        rows = [
+            self._vip("overdue@x.com", 2500, days_since_last=90, avg_cycle_days=30.0, prev=3),
+            self._vip("active@x.com", 5000, days_since_last=10, avg_cycle_days=30.0, recent=2)
+        ]
+        session.execute = AsyncMock(return_value=MagicMock(all=lambda: rows))
+        
+        result = await gen.run(session, uuid4())
+        
+        assert session.execute.await_count == 1
+        assert result is not None
+        assert result.meta["at_risk_vips"] == 1
+        assert result.meta["top_vip_emails"] == ["overdue@x.com"]
+        assert result.meta["potential_lost_ltv"] == 2500.0
+    
+    @pytest.mark.asyncio
+    async def test_defaults_cycle_for_single_order_vips(self):
+        """ACCURACY: VIPs with no repeat orders fall back to a 30-day cycle."""
+        gen = VIPAtRiskGenerator()
+        session = AsyncMock()
+        rows = [self._vip("once@x.com", 1500, days_since_last=40, avg_cycle_days=None)]
+        session.execute = AsyncMock(return_value=MagicMock(all=lambda: rows))
+        
+        result = await gen.run(session, uuid4())
+        
+        assert result is None, "40 days is within 1.5x the default 30-day cycle"
+
+
 class TestBaseInsightGenerator:
     """Test suite for BaseInsightGenerator scoring logic."""
     
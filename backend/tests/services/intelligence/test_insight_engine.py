@@ -140,3 +140,64 @@ class TestInsightEngine:
         assert insight_engine is not None
         assert isinstance(insight_engine, InsightEngine)
         assert len(insight_engine.generators) > 0, "Should have generators initialized"
+    
+    @pytest.mark.asyncio
+    async def test_slow_generator_is_dropped_after_deadline(self):
+        """LATENCY: A generator that misses its deadline must not block the deck."""
+        import asyncio
+
+        engine = InsightEngine(session_factory=MagicMock(return_value=AsyncMock()))
+        engine.generator_timeout_s = 0.05
+        brand_id = uuid4()
+
+        async def slow_run(session, brand_id, data=None):
+            await asyncio.sleep(5)
+
+        slow_gen = MagicMock()
+        slow_gen.run = slow_run
+
+        fast_gen = MagicMock()
+        fast_gen.run = AsyncMock(return_value=InsightObject(
+            id="fast",
+            title="Fast",
+            description="Test",
+            impact_score=5.0
+        ))
+
+        engine.generators = [slow_gen, fast_gen]
+
+        insights = await engine._run_generators(AsyncMock(), brand_id)
+
+        assert [i.id for i in insights] == ["fast"]
+        # Each generator got its own session
+        assert engine.session_factory.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_brand_data_load_rolls_back_and_skips_frame_generators(self):
+        """LATENCY: A failed frame load must not be repeated by every frame generator."""
+        engine = InsightEngine(session_factory=MagicMock(return_value=AsyncMock()))
+        session = AsyncMock()
+
+        class FrameGen:
+            uses_brand_data = True
+            run = AsyncMock()
+
+        query_gen = MagicMock()
+        query_gen.run = AsyncMock(return_value=InsightObject(
+            id="query", title="Query", description="Test", impact_score=5.0
+        ))
+        engine.generators = [FrameGen(), query_gen]
+
+        with patch(
+            "app.services.intelligence.insight_engine.BrandDataFrame.load",
+            AsyncMock(side_effect=RuntimeError("statement timeout")),
+        ):
+            data = await engine._load_brand_data(session, uuid4())
+
+        assert data is None
+        session.rollback.assert_awaited_once()
+
+        insights = await engine._run_generators(session, uuid4(), data, skip_frame_generators=True)
+
+        assert [i.id for i in insights] == ["query"]
+        FrameGen.run.assert_not_called()
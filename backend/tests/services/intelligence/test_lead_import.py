@@ -0,0 +1,86 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+from app.services.intelligence.lead_import import LeadImporter, LeadRecordParser, UploadStalled
+
+
+def _feed_in_pieces(parser, body, size):
+    leads = []
+    for start in range(0, len(body), size):
+        leads.extend(parser.feed(body[start:start + size]))
+    return leads + parser.close()
+
+
+def test_csv_parser_survives_arbitrary_chunk_boundaries():
+    body = 'Name,Phone Number,Segment\r\nJohn Doe,+1 415 555 1234,Alpha\r\n"Smith, Jane","+14155555678","Beta\nGroup"\r\n,,\r\nNo Phone,,Alpha'
+
+    for size in (1, 3, 7, len(body)):
+        leads = _feed_in_pieces(LeadRecordParser("csv"), body, size)
+        assert [(l[0], l[1], l[2]) for l in leads] == [
+            ("John Doe", "+1 415 555 1234", "Alpha"),
+            ("Smith, Jane", "+14155555678", "Beta\nGroup"),
+            ("No Phone", "", "Alpha"),
+        ]
+        assert leads[0][3] == {"Name": "John Doe", "Phone Number": "+1 415 555 1234", "Segment": "Alpha"}
+
+
+def test_csv_without_phone_column_is_rejected():
+    with pytest.raises(ValueError):
+        LeadRecordParser("csv").feed("Name,Cohort\nJohn,Alpha\n")
+
+
+def test_ndjson_parser():
+    body = json.dumps({"customer_name": "A", "contact_number": " 98765 ", "meta_data": {"x": 1}}) + "\n\n" + json.dumps({"contact_number": "123"})
+
+    leads = _feed_in_pieces(LeadRecordParser("ndjson"), body, 5)
+
+    assert leads == [("A", "98765", "Default", {"x": 1}), ("Unknown", "123", "Default", {})]
+
+
+@pytest.mark.asyncio
+async def test_stage_copies_in_bounded_chunks_and_skips_numberless_rows():
+    importer = LeadImporter()
+    copies = []
+    importer._copy = AsyncMock(side_effect=lambda session, records: copies.append(list(records)))
+    importer.record = AsyncMock()
+    session = AsyncMock()
+
+    rows = "".join(f"Lead {i},+91 98765-{i:05d}\n" for i in range(7))
+    body = ("name,phone\n" + rows + "Nobody,n/a\n").encode()
+
+    async def chunks():
+        for start in range(0, len(body), 16):
+            yield body[start:start + 16]
+
+    with patch("app.services.intelligence.lead_import.settings.LEAD_IMPORT_CHUNK_ROWS", 3):
+        staged = await importer.stage(session, chunks(), LeadRecordParser("csv"), uuid4())
+
+    assert "CREATE TEMP TABLE campaign_lead_import" in str(session.execute.await_args_list[0].args[0])
+    assert all(len(batch) <= 4 for batch in copies)  # a chunk may overshoot by one feed
+    staged_rows = [row for batch in copies for row in batch]
+    assert len(staged_rows) == 7
+    assert staged_rows[0][3] == "919876500000"  # normalized number
+    assert (staged.rows_read, staged.rows_skipped, staged.bytes_read) == (8, 1, len(body))
+    assert importer.record.await_count == len(copies)
+
+
+
+@pytest.mark.asyncio
+async def test_stage_fails_when_the_upload_stalls():
+    importer = LeadImporter()
+    importer._copy = AsyncMock()
+    session = AsyncMock()
+
+    async def stalled():
+        yield b"name,phone\n"
+        await asyncio.sleep(10)
+        yield b"never,1\n"
+
+    with patch("app.services.intelligence.lead_import.settings.LEAD_IMPORT_IDLE_TIMEOUT_S", 0.01):
+        with pytest.raises(UploadStalled):
+            await importer.stage(session, stalled(), LeadRecordParser("csv"))
+
+    assert "idle_in_transaction_session_timeout" in str(session.execute.await_args_list[1].args[0])
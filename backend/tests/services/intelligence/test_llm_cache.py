@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.metrics import cache_hits, cache_misses
+from app.services.intelligence.llm_cache import LLMGenerationAbandoned, LLMResponseCache, stable_key
+
+
+def test_stable_key_ignores_dict_order():
+    assert stable_key("recs", 1, {"a": 1, "b": 2}) == stable_key("recs", 1, {"b": 2, "a": 1})
+    assert stable_key("recs", 1, {"a": 1}) != stable_key("context", 1, {"a": 1})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_generation():
+    cache = LLMResponseCache(max_entries=8)
+    calls = 0
+    release = asyncio.Event()
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "insight"
+
+    hits_before, misses_before = cache_hits._value.get(), cache_misses._value.get()
+    tasks = [asyncio.create_task(cache.get_or_create("k", factory)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["insight"] * 5
+    assert calls == 1
+    assert await cache.get_or_create("k", factory) == "insight"
+    assert cache_misses._value.get() - misses_before == 1
+    assert cache_hits._value.get() - hits_before == 5
+
+
+@pytest.mark.asyncio
+async def test_failures_reach_every_waiter_and_are_not_cached():
+    cache = LLMResponseCache(max_entries=8)
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("quota")
+
+    tasks = [asyncio.create_task(cache.get_or_create("k", failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def recovered():
+        return "ok"
+
+    assert await cache.get_or_create("k", recovered) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    first = LLMResponseCache(max_entries=8, sqlite_path=path)
+    second = LLMResponseCache(max_entries=8, sqlite_path=path)
+
+    async def factory():
+        return ["Restock SKU-1", "Pause ad set 4"]
+
+    await first.get_or_create("recs", factory)
+
+    async def never():
+        raise AssertionError("should be served from the shared tier")
+
+    assert await second.get_or_create("recs", never) == ["Restock SKU-1", "Pause ad set 4"]
+    assert await second.get("expired") is None
+    await first.set("expired", "stale", ttl_seconds=-1)
+    assert await second.get("expired") is None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_waiters():
+    cache = LLMResponseCache(max_entries=8)
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    leader = asyncio.create_task(cache.get_or_create("k", slow))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_create("k", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    with pytest.raises(LLMGenerationAbandoned):
+        await waiter
+    assert leader.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_disk_hits_keep_their_remaining_lifetime(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    writer = LLMResponseCache(max_entries=8, sqlite_path=path)
+    reader = LLMResponseCache(max_entries=8, sqlite_path=path)
+    await writer.set("briefing", "Good morning", ttl_seconds=3600)
+
+    assert await reader.get("briefing") == "Good morning"
+
+    _, expires_at = reader._memory._entries["briefing"]
+    assert expires_at - time.monotonic() <= 3600
@@ -0,0 +1,129 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.intelligence.base_generator import InsightObject
+from app.services.intelligence import llm_service
+from app.services.intelligence.llm_cache import LLMResponseCache, stable_key
+from app.services.intelligence.llm_service import LLMService
+
+
+def _insights(count):
+    return [
+        InsightObject(id=f"insight_{n}", title=f"Insight {n}", description="Test", impact_score=5.0, meta={"n": n})
+        for n in range(count)
+    ]
+
+
+def _service():
+    service = LLMService()
+    service.model = MagicMock()
+    return service
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    with patch("app.services.intelligence.llm_service.llm_cache", LLMResponseCache(max_entries=64)):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_deck_is_enriched_with_one_call_and_reuses_the_cache():
+    service = _service()
+    response = [{"key": n, "context": f"Why {n}", "recommendations": [f"Do {n}"]} for n in range(3)]
+    service._generate = AsyncMock(return_value="```json\n" + json.dumps(response) + "\n```")
+    insights = _insights(3)
+
+    results = await service.enrich_batch(insights)
+
+    assert results == [(f"Why {n}", [f"Do {n}"]) for n in range(3)]
+    assert service._generate.await_count == 1
+    assert await service.enrich_batch(insights) == results
+    assert await service.enrich_context(insights[1]) == "Why 1"
+    assert service._generate.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_only_unparseable_insights_fall_back_to_single_calls():
+    service = _service()
+    batched = json.dumps([
+        {"key": 0, "context": "Why 0", "recommendations": ["Do 0"]},
+        {"key": 1, "context": "", "recommendations": ["Do 1"]},
+    ])
+    service._generate = AsyncMock(side_effect=[batched, "Single context", '["Single rec"]'])
+
+    with patch("app.services.intelligence.llm_service.settings.LLM_ENRICH_BATCH_SIZE", 10):
+        results = await service.enrich_batch(_insights(2))
+
+    assert results == [("Why 0", ["Do 0"]), ("Single context", ["Single rec"])]
+    assert service._generate.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_malformed_batch_response_is_not_cached():
+    service = _service()
+    service._generate = AsyncMock(side_effect=["not json", "Single context", '["Single rec"]'])
+    insights = _insights(1)
+
+    results = await service.enrich_batch(insights)
+
+    assert results == [("Single context", ["Single rec"])]
+    batch_key = stable_key("enrich_batch", [(insight.id, insight.meta) for insight in insights])
+    assert await llm_service.llm_cache.get(batch_key) is None
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_call_does_not_fan_out():
+    service = _service()
+    service._generate = AsyncMock(side_effect=TimeoutError("LLM generation timed out"))
+
+    results = await service.enrich_batch(_insights(4))
+
+    assert [context for context, _ in results] == [""] * 4
+    assert service._generate.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_generate_bounds_requests_in_flight():
+    with patch("app.services.intelligence.llm_service.settings.LLM_MAX_CONCURRENCY", 2):
+        service = _service()
+    in_flight = peak = 0
+
+    async def generate_content_async(prompt):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return SimpleNamespace(text=prompt)
+
+    service.model.generate_content_async = generate_content_async
+
+    results = await asyncio.gather(*(service._generate(f"prompt {n}") for n in range(6)))
+
+    assert results == [f"prompt {n}" for n in range(6)]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_deck_builds_share_one_batch_call():
+    service = _service()
+    release = asyncio.Event()
+    response = json.dumps([{"key": n, "context": f"Why {n}", "recommendations": [f"Do {n}"]} for n in range(2)])
+
+    async def generate(prompt, model_type="flash"):
+        await release.wait()
+        return response
+
+    service._generate = AsyncMock(side_effect=generate)
+    builds = [asyncio.create_task(service.enrich_batch(_insights(2))) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    release.set()
+
+    results = await asyncio.gather(*builds)
+
+    assert results[0] == results[1] == results[2] == [("Why 0", ["Do 0"]), ("Why 1", ["Do 1"])]
+    assert service._generate.await_count == 1
@@ -0,0 +1,91 @@
+"""
+Unit tests for the vectorized MarketBasketEngine.
+"""
+import itertools
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app.services.intelligence.market_basket import MarketBasketEngine
+from app.services.intelligence.simulation_service import simulation_service
+
+
+def _lines(baskets):
+    order_codes, item_codes = [], []
+    for order, items in enumerate(baskets):
+        for item in items:
+            order_codes.append(order)
+            item_codes.append(item)
+    return np.array(order_codes), np.array(item_codes)
+
+
+class TestMarketBasketEngine:
+
+    def test_counts_match_brute_force(self):
+        rng = np.random.default_rng(7)
+        baskets = [list(rng.choice(30, rng.integers(1, 6))) for _ in range(2000)]
+        labels = [f"p{i}" for i in range(30)]
+
+        analysis = MarketBasketEngine(min_count=3, top_k=10_000, max_triple_pairs=10_000).analyze(
+            *_lines(baskets), labels, include_triples=True
+        )
+
+        pairs, triples = Counter(), Counter()
+        for items in baskets:
+            unique = sorted(set(int(i) for i in items))
+            pairs.update(itertools.combinations(unique, 2))
+            triples.update(itertools.combinations(unique, 3))
+
+        def as_counts(rules):
+            return {tuple(sorted(int(label[1:]) for label in rule.items)): rule.count for rule in rules}
+
+        assert as_counts(analysis.pairs) == {k: v for k, v in pairs.items() if v >= 3}
+        assert as_counts(analysis.triples) == {k: v for k, v in triples.items() if v >= 3}
+
+    def test_pair_metrics_and_orientation(self):
+        # A in 4 orders, B in 8, together in 4; 10 orders total
+        baskets = [[0, 1]] * 4 + [[1]] * 4 + [[2]] * 2
+
+        rule = MarketBasketEngine(min_count=2).analyze(*_lines(baskets), ["A", "B", "C"]).pairs[0]
+
+        assert rule.antecedent == ("A",) and rule.consequent == "B"
+        assert rule.count == 4 and rule.antecedent_count == 4
+        assert rule.support == pytest.approx(0.4)
+        assert rule.confidence == pytest.approx(1.0)
+        assert rule.lift == pytest.approx(1.0 / 0.8)
+
+    def test_duplicate_lines_in_a_basket_count_once(self):
+        baskets = [[0, 0, 1]] * 3
+
+        analysis = MarketBasketEngine(min_count=3).analyze(*_lines(baskets), ["A", "B"])
+
+        assert [rule.count for rule in analysis.pairs] == [3]
+
+    def test_top_k_ranks_by_requested_metric(self):
+        baskets = [[0, 1]] * 10 + [[0]] * 10 + [[2, 3]] * 3
+
+        by_count = MarketBasketEngine(min_count=3, top_k=1).analyze(*_lines(baskets), list("ABCD")).pairs
+        by_lift = MarketBasketEngine(min_count=3, top_k=1, rank_by="lift").analyze(*_lines(baskets), list("ABCD")).pairs
+
+        assert set(by_count[0].items) == {"A", "B"}
+        assert set(by_lift[0].items) == {"C", "D"}
+
+    def test_empty_input(self):
+        analysis = MarketBasketEngine().analyze(np.array([]), np.array([]), [])
+        assert analysis.n_orders == 0 and analysis.pairs == []
+
+
+def test_bundle_attach_simulation():
+    result = simulation_service.simulate("bundle_attach", {
+        "driver_orders": 100,
+        "confidence": 0.2,
+        "target_confidence": 0.3,
+        "attached_price": 50,
+        "bundle_discount": 0.1,
+        "period_days": 60,
+    })
+
+    assert result["extra_attachments"] == 10.0
+    assert result["discount_cost"] == 150.0
+    assert result["incremental_revenue"] == 350.0
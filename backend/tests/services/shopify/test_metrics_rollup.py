@@ -0,0 +1,91 @@
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from app.services.shopify.metrics_service import ShopifyMetricsService
+
+
+def _integration():
+    integration = MagicMock()
+    integration.id = uuid4()
+    integration.company_id = uuid4()
+    return integration
+
+
+def _no_existing_metrics_session():
+    session = AsyncMock()
+    session.add = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    session.execute.return_value = result
+    return session
+
+
+@pytest.mark.asyncio
+async def test_rollup_days_derives_kpis_from_aggregates():
+    service = ShopifyMetricsService()
+    day = date(2024, 1, 1)
+    service.order_totals_by_day = AsyncMock(return_value={day: MagicMock(
+        gross_sales=Decimal("1100.00"),
+        total_discounts=Decimal("100.00"),
+        total_tax=Decimal("80.00"),
+        total_shipping=Decimal("20.00"),
+        order_count=4,
+        currency="INR",
+    )})
+    service.refunds_by_day = AsyncMock(return_value={day: Decimal("50.00")})
+    service.new_customers_by_day = AsyncMock(return_value={day: 2})
+    session = _no_existing_metrics_session()
+
+    [metric] = await service.rollup_days(session, _integration(), [day, day])
+
+    assert metric.net_sales == Decimal("950.00")
+    assert metric.total_sales == Decimal("1050.00")
+    assert metric.average_order_value == Decimal("262.50")
+    assert metric.order_count == 4
+    assert metric.customer_count_new == 2
+    assert metric.currency == "INR"
+
+
+@pytest.mark.asyncio
+async def test_rollup_days_zeroes_days_without_orders():
+    service = ShopifyMetricsService()
+    day = date(2024, 1, 2)
+    service.order_totals_by_day = AsyncMock(return_value={})
+    service.refunds_by_day = AsyncMock(return_value={day: Decimal("10.00")})
+    service.new_customers_by_day = AsyncMock(return_value={})
+    session = _no_existing_metrics_session()
+
+    [metric] = await service.rollup_days(session, _integration(), [day])
+
+    assert metric.order_count == 0
+    assert metric.net_sales == Decimal("-10.00")
+    assert metric.average_order_value == Decimal("0.00")
+    assert metric.currency == "USD"
+
+
+@pytest.mark.asyncio
+async def test_refresh_touched_days_only_rolls_up_dirty_days():
+    service = ShopifyMetricsService()
+    dirty = [date(2024, 3, 1), date(2024, 3, 2)]
+    service.touched_dates = AsyncMock(return_value=dirty)
+    service.rollup_days = AsyncMock(return_value=[])
+    integration = _integration()
+    since = datetime(2024, 3, 2, 12, 0)
+
+    days = await service.refresh_touched_days(AsyncMock(), integration, since=since)
+
+    assert days == dirty
+    service.touched_dates.assert_awaited_once()
+    assert service.rollup_days.await_args.args[2] == dirty
+
+
+@pytest.mark.asyncio
+async def test_rollup_days_skips_queries_when_nothing_touched():
+    service = ShopifyMetricsService()
+    session = AsyncMock()
+
+    assert await service.rollup_days(session, _integration(), []) == []
+    session.execute.assert_not_called()
@@ -0,0 +1,50 @@
+import pytest
+from unittest.mock import patch
+
+from app.services.shopify.rate_limiter import ShopifyRateBudget
+
+
+@pytest.mark.asyncio
+async def test_acquire_does_not_wait_with_free_budget():
+    budget = ShopifyRateBudget(headroom=0)
+
+    with patch("app.services.shopify.rate_limiter.asyncio.sleep") as sleep:
+        for _ in range(10):
+            await budget.acquire("shop.myshopify.com")
+
+    sleep.assert_not_called()
+    assert budget.snapshot("shop.myshopify.com")["level"] == pytest.approx(10, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_when_server_reports_full_bucket():
+    budget = ShopifyRateBudget(headroom=0)
+    budget.update("shop.myshopify.com", {"X-Shopify-Shop-Api-Call-Limit": "40/40"})
+
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        # Pretend the bucket drained while we slept
+        budget.update("shop.myshopify.com", {"X-Shopify-Shop-Api-Call-Limit": "0/40"})
+
+    with patch("app.services.shopify.rate_limiter.asyncio.sleep", side_effect=fake_sleep):
+        await budget.acquire("shop.myshopify.com")
+
+    # One slot at 2 req/s
+    assert sleeps and sleeps[0] == pytest.approx(0.5, abs=0.05)
+
+
+def test_update_learns_plus_bucket_size():
+    budget = ShopifyRateBudget()
+    budget.update("plus.myshopify.com", {"X-Shopify-Shop-Api-Call-Limit": "12/80"})
+
+    snapshot = budget.snapshot("plus.myshopify.com")
+    assert snapshot["capacity"] == 80
+    assert snapshot["level"] <= 12
+
+
+def test_update_ignores_malformed_header():
+    budget = ShopifyRateBudget()
+    budget.update("shop.myshopify.com", {"X-Shopify-Shop-Api-Call-Limit": "garbage"})
+    assert budget.snapshot("shop.myshopify.com") is None
@@ -0,0 +1,44 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.shopify.raw_retention import (
+    ShopifyRawRetentionService,
+    month_start,
+    next_month,
+    partition_name,
+)
+
+
+def test_month_helpers_roll_over_year():
+    assert month_start(datetime(2024, 12, 31, 23, 59)) == date(2024, 12, 1)
+    assert next_month(date(2024, 12, 1)) == date(2025, 1, 1)
+    assert partition_name(date(2024, 3, 1)) == "shopify_raw_ingest_archive_p202403"
+
+
+def test_default_policy_excludes_explicit_object_types():
+    service = ShopifyRawRetentionService(session_factory=AsyncMock())
+    with patch("app.services.shopify.raw_retention.settings") as settings:
+        settings.SHOPIFY_RAW_RETENTION_DAYS = {"default": 90, "order": 60, "checkout": 30}
+        policies = service.retention_policies()
+
+    assert policies == [
+        ("checkout", [], 30),
+        ("order", [], 60),
+        (None, ["checkout", "order"], 90),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_creates_one_partition_per_month():
+    service = ShopifyRawRetentionService(session_factory=AsyncMock())
+    session = AsyncMock()
+
+    await service.ensure_partitions(session, date(2024, 11, 1), date(2025, 1, 1))
+
+    ddl = [str(call.args[0]) for call in session.execute.await_args_list]
+    assert len(ddl) == 3
+    assert "shopify_raw_ingest_archive_p202411" in ddl[0]
+    assert "FROM ('2024-12-01') TO ('2025-01-01')" in ddl[1]
+    assert "shopify_raw_ingest_archive_p202501" in ddl[2]
@@ -0,0 +1,94 @@
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from app.services.shopify.refinement_service import ShopifyRefinementService
+
+
+def _raw(object_type, payload):
+    raw = MagicMock()
+    raw.id = uuid4()
+    raw.integration_id = uuid4()
+    raw.company_id = uuid4()
+    raw.created_by = None
+    raw.object_type = object_type
+    raw.payload = payload
+    return raw
+
+
+def _session(dialect_name):
+    session = AsyncMock()
+    session.get_bind = MagicMock(return_value=MagicMock(dialect=MagicMock()))
+    session.get_bind.return_value.dialect.name = dialect_name
+    return session
+
+
+@pytest.mark.asyncio
+async def test_batched_mode_falls_back_to_per_row_outside_postgres():
+    service = ShopifyRefinementService()
+    records = [_raw("order", {"id": 1}), _raw("customer", {"id": 2})]
+    session = _session("sqlite")
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = records
+    session.execute.return_value = result
+
+    service._refine_with_savepoint = AsyncMock()
+    service._process_batched = AsyncMock()
+
+    processed = await service.process_pending_records(session, limit=10, batched=True)
+
+    assert processed == 2
+    service._process_batched.assert_not_called()
+    assert service._refine_with_savepoint.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_batched_mode_only_retries_rejected_rows():
+    service = ShopifyRefinementService()
+    good_order = _raw("order", {"id": 1})
+    bad_order = _raw("order", {"id": None})
+    product = _raw("product", {"id": 3})
+    session = _session("postgresql")
+    session.begin_nested.return_value = AsyncMock()
+
+    service._bulk_refine_customers = AsyncMock(return_value=[])
+    service._bulk_refine_orders = AsyncMock(return_value=[bad_order])
+    service._refine_with_savepoint = AsyncMock()
+
+    await service._process_batched(session, [good_order, bad_order, product])
+
+    retried = [c.args[1] for c in service._refine_with_savepoint.await_args_list]
+    assert retried == [bad_order, product]
+    assert good_order.processing_status == "processed"
+
+
+def test_order_row_parses_payload():
+    service = ShopifyRefinementService()
+    raw = _raw("order", {})
+    row = service._order_row(raw, {
+        "id": "1001",
+        "order_number": "42",
+        "total_price": "$1,234.50",
+        "created_at": "2024-01-01T10:00:00Z",
+    }, None)
+
+    assert row["shopify_order_id"] == 1001
+    assert row["shopify_order_number"] == 42
+    assert row["shopify_name"] == "42"
+    assert row["total_price"] == 1234.5
+    assert row["financial_status"] == "pending"
+
+
+def test_velocity_targets_collect_order_days_and_inventory_items():
+    service = ShopifyRefinementService()
+    order = _raw("order", {"id": 1, "created_at": "2024-01-01T23:30:00-05:00"})
+    level = _raw("inventory_level", {"inventory_item_id": "77", "available": 3})
+    level.integration_id = order.integration_id
+    undated = _raw("order", {"id": 2})
+
+    targets = service._velocity_targets([order, level, undated, _raw("product", {"id": 3})])
+
+    # The order's creation day is taken in UTC
+    assert targets[order.integration_id] == ({date(2024, 1, 2)}, {77})
+    assert undated.integration_id not in targets
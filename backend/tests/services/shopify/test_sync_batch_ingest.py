@@ -0,0 +1,72 @@
+import hashlib
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from app.services.shopify.sync_service import ShopifySyncService
+
+
+def _hash(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@pytest.fixture
+def integration():
+    integration = MagicMock()
+    integration.id = uuid4()
+    integration.company_id = uuid4()
+    return integration
+
+
+@pytest.mark.asyncio
+async def test_ingest_raw_objects_inserts_only_new_payloads(integration):
+    service = ShopifySyncService()
+    seen = {"id": 1, "updated_at": "2024-01-01T10:00:00Z"}
+    fresh = {"id": 2, "updated_at": "2024-01-01T11:00:00Z"}
+
+    session = AsyncMock()
+    session.add_all = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [_hash(seen)]
+    session.execute.return_value = result
+
+    counts = await service.ingest_raw_objects(session, integration, "order", [seen, fresh, dict(fresh)])
+
+    assert counts == {"fetched": 3, "new": 1, "duplicates": 2}
+    # One existence lookup for the whole page
+    assert session.execute.await_count == 1
+    inserted = session.add_all.call_args.args[0]
+    assert [r.shopify_object_id for r in inserted] == [2]
+    assert inserted[0].processing_status == "pending"
+
+
+@pytest.mark.asyncio
+async def test_ingest_raw_objects_applies_identity_overrides(integration):
+    service = ShopifySyncService()
+    session = AsyncMock()
+    session.add_all = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    session.execute.return_value = result
+
+    level = {"inventory_item_id": 7, "location_id": 9, "available": 3}
+    await service.ingest_raw_objects(
+        session, integration, "inventory_level", [level],
+        identity_fn=lambda lvl: (lvl["inventory_item_id"], f"{lvl['inventory_item_id']}_{lvl['location_id']}")
+    )
+
+    record = session.add_all.call_args.args[0][0]
+    assert record.shopify_object_id == 7
+    assert record.dedupe_key == f"{integration.id}_inventory_level_7_9_None"
+
+
+@pytest.mark.asyncio
+async def test_ingest_raw_objects_empty_page_skips_db(integration):
+    service = ShopifySyncService()
+    session = AsyncMock()
+
+    counts = await service.ingest_raw_objects(session, integration, "order", [])
+
+    assert counts == {"fetched": 0, "new": 0, "duplicates": 0}
+    session.execute.assert_not_called()
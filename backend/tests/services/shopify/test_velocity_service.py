@@ -0,0 +1,114 @@
+import pytest
+from contextlib import asynccontextmanager
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from app.services.shopify.velocity_service import NIGHTLY_REAGGREGATE_DAYS, ShopifyVelocityService
+
+
+def _rows(rows):
+    result = MagicMock()
+    result.all.return_value = rows
+    return result
+
+
+def _scalar(value):
+    result = MagicMock()
+    result.scalar_one.return_value = value
+    return result
+
+
+@pytest.mark.asyncio
+async def test_refresh_velocity_builds_windows_and_cover():
+    service = ShopifyVelocityService()
+    company_id = uuid4()
+    session = AsyncMock()
+    session.execute.side_effect = [
+        _rows([SimpleNamespace(shopify_variant_id=1, units_7d=14, units_prev_7d=7, units_30d=60, units_90d=90)]),
+        _rows([SimpleNamespace(shopify_variant_id=1, last_sale_date=date(2024, 3, 30))]),
+        _rows([SimpleNamespace(shopify_variant_id=1, available=40), SimpleNamespace(shopify_variant_id=2, available=5)]),
+        _scalar(company_id),
+        MagicMock(),
+    ]
+
+    with patch("app.services.shopify.velocity_service.pg_insert") as pg_insert:
+        count = await service.refresh_velocity(session, uuid4(), [1, 2], as_of=date(2024, 4, 1))
+
+    assert count == 2
+    rows = {row["shopify_variant_id"]: row for row in pg_insert.return_value.values.call_args.args[0]}
+    assert rows[1]["velocity_7d"] == 2.0
+    assert rows[1]["velocity_30d"] == 2.0
+    assert rows[1]["days_of_cover"] == 20.0
+    assert rows[1]["last_sale_date"] == date(2024, 3, 30)
+    assert rows[1]["company_id"] == company_id
+    # Stocked but not selling: zero velocity, no cover estimate
+    assert rows[2]["units_30d"] == 0
+    assert rows[2]["available"] == 5
+    assert rows[2]["days_of_cover"] is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_skips_velocity_when_nothing_changed():
+    service = ShopifyVelocityService()
+    service.refresh_daily_sales = AsyncMock(return_value=set())
+    service.refresh_velocity = AsyncMock()
+
+    assert await service.refresh(AsyncMock(), uuid4(), days=[date(2024, 1, 1)]) == 0
+    service.refresh_velocity.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refresh_merges_sales_and_inventory_variants():
+    service = ShopifyVelocityService()
+    service.refresh_daily_sales = AsyncMock(return_value={1, 2})
+    service.variants_for_inventory_items = AsyncMock(return_value={2, 3})
+    service.refresh_velocity = AsyncMock(return_value=3)
+    session, integration_id = AsyncMock(), uuid4()
+
+    await service.refresh(session, integration_id, days=[date(2024, 1, 2), date(2024, 1, 1)], inventory_item_ids=[9, 9])
+
+    service.refresh_daily_sales.assert_awaited_once_with(session, integration_id, [date(2024, 1, 1), date(2024, 1, 2)])
+    service.variants_for_inventory_items.assert_awaited_once_with(session, integration_id, [9])
+    service.refresh_velocity.assert_awaited_once_with(session, integration_id, {1, 2, 3})
+
+
+@pytest.mark.asyncio
+async def test_daily_sales_rewrite_holds_the_integration_lock_first():
+    service = ShopifyVelocityService()
+    session = AsyncMock()
+    scalars = MagicMock()
+    scalars.scalars.return_value.all.return_value = []
+    session.execute.return_value = scalars
+
+    await service.refresh_daily_sales(session, uuid4(), [date(2024, 1, 1)])
+
+    statements = [str(call.args[0]) for call in session.execute.await_args_list]
+    assert "pg_advisory_xact_lock" in statements[0]
+    assert statements[1].startswith("DELETE FROM shopify_variant_daily_sales")
+
+
+@pytest.mark.asyncio
+async def test_nightly_pass_reaggregates_trailing_days_for_every_integration():
+    integration_id = uuid4()
+    session = AsyncMock()
+    ids, has_rows = MagicMock(), MagicMock()
+    ids.scalars.return_value.all.return_value = [integration_id]
+    has_rows.scalar.return_value = 1
+    session.execute.side_effect = [ids, has_rows]
+
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    service = ShopifyVelocityService(session_factory=factory)
+    service.refresh_daily_sales = AsyncMock(return_value={1})
+    service.refresh_velocity = AsyncMock(return_value=1)
+
+    stats = await service.refresh_all()
+
+    days = service.refresh_daily_sales.await_args.args[2]
+    assert len(days) == NIGHTLY_REAGGREGATE_DAYS + 1
+    assert days == sorted(days)
+    assert stats == {"integrations": 1, "backfilled": 0, "variants": 1}
@@ -0,0 +1,88 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.integration import Integration, receive_integration_change
+from app.services.shopify.refinement_worker import ShopifyRefinementWorker
+from app.services.shopify.shop_directory import ShopDirectory, shop_directory
+
+
+def _session_factory(session):
+    @asynccontextmanager
+    async def factory():
+        yield session
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_shop_lookup_uses_expression_index_and_caches():
+    row = MagicMock(id=uuid4(), company_id=uuid4())
+    session = AsyncMock()
+    session.execute.return_value.first = MagicMock(return_value=row)
+    directory = ShopDirectory()
+
+    first = await directory.resolve(session, "demo.myshopify.com")
+    second = await directory.resolve(session, "demo.myshopify.com")
+
+    assert first == second and first.id == row.id and first.company_id == row.company_id
+    session.execute.assert_awaited_once()
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "(integration.metadata_info ->> 'shop') =" in sql
+
+
+def test_integration_write_drops_cached_shop():
+    shop_directory._cache.set("demo.myshopify.com", MagicMock())
+
+    receive_integration_change(None, None, Integration(metadata_info={"shop": "demo.myshopify.com"}))
+
+    assert shop_directory._cache.get("demo.myshopify.com") is None
+
+
+@pytest.mark.asyncio
+async def test_drain_claims_webhook_rows_and_yields_after_batch_cap():
+    worker = ShopifyRefinementWorker(session_factory=_session_factory(AsyncMock()))
+    worker._refresh_stats = AsyncMock()
+    process = AsyncMock(return_value=5)
+
+    with patch("app.services.shopify.refinement_worker.shopify_refinement_service.process_pending_records", process), \
+         patch("app.services.shopify.refinement_worker.settings.SHOPIFY_WEBHOOK_REFINE_BATCH_SIZE", 5), \
+         patch("app.services.shopify.refinement_worker.settings.SHOPIFY_WEBHOOK_REFINE_MAX_BATCHES", 3):
+        refined, more = await worker.drain(uuid4())
+
+    assert (refined, more) == (15, True)
+    assert process.await_count == 3
+    assert process.await_args.kwargs["source"] == "webhook"
+    assert process.await_args.kwargs["claim"] is True
+    worker._refresh_stats.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_notifications_during_a_drain_coalesce_into_one_rerun():
+    worker = ShopifyRefinementWorker()
+    integration_id = uuid4()
+    gate = asyncio.Event()
+    runs = 0
+
+    async def drain(_):
+        nonlocal runs
+        runs += 1
+        await gate.wait()
+        return 1, False
+
+    worker.drain = drain
+    for _ in range(20):
+        worker.notify(integration_id)
+    await asyncio.sleep(0)
+    assert len(worker._tasks) == 1
+
+    gate.set()
+    for _ in range(10):
+        await asyncio.sleep(0)
+    await asyncio.gather(*worker._tasks)
+
+    assert runs == 2
+    await worker.stop()
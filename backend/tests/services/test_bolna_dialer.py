@@ -0,0 +1,76 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.services.bolna_dialer import BolnaDialer, TokenBucket
+
+
+def _dialer(handler):
+    dialer = BolnaDialer()
+    dialer._client = httpx.AsyncClient(base_url="https://bolna.test", transport=httpx.MockTransport(handler))
+    return dialer
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_requests_after_burst():
+    bucket = TokenBucket(rate=50, burst=2)
+    started = time.monotonic()
+
+    for _ in range(4):
+        await bucket.acquire()
+
+    # Two from the burst, two more at 50/s
+    assert time.monotonic() - started >= 0.035
+
+
+@pytest.mark.asyncio
+async def test_dial_many_reuses_one_client_and_keeps_order():
+    def handler(request):
+        return httpx.Response(200, json={"id": json.loads(request.content)["recipient_phone_number"]})
+
+    dialer = _dialer(handler)
+    client = dialer.client
+
+    tasks = [{"recipient_phone_number": f"+91000000000{i}"} for i in range(5)]
+    results = await dialer.dial_many(tasks)
+
+    assert dialer.client is client
+    assert [r["data"]["id"] for r in results] == [t["recipient_phone_number"] for t in tasks]
+
+
+@pytest.mark.asyncio
+async def test_dial_never_exceeds_concurrency():
+    in_flight = 0
+    peak = 0
+
+    dialer = BolnaDialer()
+    dialer._semaphore = asyncio.Semaphore(2)
+    dialer._bucket = TokenBucket(rate=0, burst=1)
+
+    async def post(*args, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={"id": "x"}, request=httpx.Request("POST", "https://bolna.test/call"))
+
+    dialer._client = httpx.AsyncClient()
+    dialer._client.post = post
+
+    await dialer.dial_many([{"recipient_phone_number": "+910000000000"}] * 6)
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_unverified_number_error_is_reported():
+    def handler(request):
+        return httpx.Response(400, json={"message": "Calls are allowed only to verified phone numbers"})
+
+    result = await _dialer(handler).dial({"recipient_phone_number": "+910000000000"})
+
+    assert result == {"status": "error", "error": "Unverified Phone Number (Telephony Error)"}
@@ -0,0 +1,118 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.bolna_webhook_pipeline import BolnaWebhookPipeline
+
+
+def _session_factory(session):
+    @asynccontextmanager
+    async def factory():
+        yield session
+    return factory
+
+
+def _pipeline(session=None, workers=2):
+    session = session or AsyncMock()
+    return BolnaWebhookPipeline(session_factory=_session_factory(session), workers=workers), session
+
+
+@pytest.mark.asyncio
+async def test_ingest_stores_raw_payload_before_queueing():
+    pipeline, session = _pipeline()
+    pipeline.enqueue = MagicMock()
+
+    raw_id = await pipeline.ingest("call-1", {"status": "ringing"})
+
+    sql = str(session.execute.await_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO call_raw_data")
+    assert "SELECT bolna_execution_maps.campaign_id" in sql
+    session.commit.assert_awaited()
+    pipeline.enqueue.assert_called_once_with("call-1", {"status": "ringing"}, [raw_id])
+    await pipeline.stop()
+
+
+@pytest.mark.asyncio
+async def test_waiting_intermediate_events_coalesce_but_terminal_does_not():
+    pipeline, _ = _pipeline(workers=1)
+    processed = []
+    gate = asyncio.Event()
+
+    async def process(payload, session):
+        await gate.wait()
+        processed.append(payload["status"])
+
+    with patch("app.api.v1.endpoints.bolna_webhook.process_bolna_event", process):
+        await pipeline.start()
+        pipeline.enqueue("call-1", {"status": "queued"}, [uuid4()])
+        await asyncio.sleep(0)  # worker picks "queued" up and blocks on the gate
+        for status in ("ringing", "in-progress", "completed", "in-progress"):
+            pipeline.enqueue("call-1", {"status": status}, [uuid4()])
+        gate.set()
+        await pipeline.stop()
+
+    assert processed == ["queued", "in-progress", "completed", "in-progress"]
+
+
+@pytest.mark.asyncio
+async def test_a_call_is_always_routed_to_the_same_worker():
+    pipeline, _ = _pipeline(workers=4)
+    await pipeline.start()
+
+    try:
+        assert len({pipeline._shard("call-42") for _ in range(10)}) == 1
+        assert len({pipeline._shard(f"call-{i}") for i in range(50)}) > 1
+    finally:
+        await pipeline.stop()
+
+
+def _claimed(rows):
+    session = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    session.execute.return_value = result
+    return session
+
+
+def _row(created_at, status, superseded=False):
+    row = MagicMock(created_at=created_at, superseded=superseded)
+    row.id, row.bolna_call_id, row.payload = uuid4(), "call-1", {"status": status}
+    return row
+
+
+@pytest.mark.asyncio
+async def test_recover_leases_unprocessed_rows_with_skip_locked():
+    older, newer = _row(1, "ringing"), _row(2, "completed")
+    session = _claimed([newer, older])
+
+    pipeline, _ = _pipeline(session)
+    pipeline.enqueue = MagicMock()
+
+    assert await pipeline.recover() == 2
+
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "call_raw_data.processed_at IS NULL" in sql
+    assert "SET claimed_at=" in sql
+    assert "processed_at=" not in sql.split("WHERE")[0]
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert [c.args[1]["status"] for c in pipeline.enqueue.call_args_list] == ["ringing", "completed"]
+    await pipeline.stop()
+
+
+@pytest.mark.asyncio
+async def test_recover_skips_locally_queued_rows_and_retires_superseded_ones():
+    queued, stale, lost = _row(1, "ringing"), _row(2, "in-progress", superseded=True), _row(3, "completed")
+    pipeline, _ = _pipeline(_claimed([queued, stale, lost]))
+    pipeline._queued_ids.add(queued.id)
+    pipeline.enqueue = MagicMock()
+    pipeline._mark_processed = AsyncMock()
+
+    assert await pipeline.recover() == 1
+
+    pipeline._mark_processed.assert_awaited_once_with([stale.id])
+    pipeline.enqueue.assert_called_once_with("call-1", {"status": "completed"}, [lost.id])
+    await pipeline.stop()
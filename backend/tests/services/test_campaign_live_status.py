@@ -0,0 +1,71 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.models.campaign_live_status import CampaignLiveStatus
+from app.services.campaign_live_status import CampaignLiveStatusService
+
+
+def _session_with_row(row):
+    session = AsyncMock()
+    session.add = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.first.return_value = row
+    session.execute.return_value = result
+    return session
+
+
+@pytest.mark.asyncio
+async def test_refresh_pushes_only_changed_keys():
+    campaign_id = uuid4()
+    row = CampaignLiveStatus(campaign_id=campaign_id, version=3, snapshot={"active_count": 1, "history": [1, 2], "stale": True})
+    session = _session_with_row(row)
+    service = CampaignLiveStatusService(session_factory=MagicMock())
+
+    with patch(
+        "app.api.v1.endpoints.execution.get_campaign_realtime_status_internal",
+        AsyncMock(return_value={"active_count": 2, "history": [1, 2]}),
+    ), patch("app.services.campaign_live_status.manager") as manager:
+        manager.broadcast_to_campaign = AsyncMock()
+        version, data = await service.refresh(campaign_id, session)
+
+    assert version == 4
+    message = manager.broadcast_to_campaign.await_args.args[1]
+    assert message["type"] == "status_diff"
+    assert message["base_version"] == 3
+    assert message["changes"] == {"active_count": 2}
+    assert message["removed"] == ["stale"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_without_changes_keeps_version_and_stays_silent():
+    campaign_id = uuid4()
+    row = CampaignLiveStatus(campaign_id=campaign_id, version=7, snapshot={"active_count": 1})
+    session = _session_with_row(row)
+    service = CampaignLiveStatusService(session_factory=MagicMock())
+
+    with patch(
+        "app.api.v1.endpoints.execution.get_campaign_realtime_status_internal",
+        AsyncMock(return_value={"active_count": 1}),
+    ), patch("app.services.campaign_live_status.manager") as manager:
+        manager.broadcast_to_campaign = AsyncMock()
+        version, _ = await service.refresh(campaign_id, session)
+
+    assert version == 7
+    manager.broadcast_to_campaign.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_notify_changed_coalesces_event_bursts():
+    service = CampaignLiveStatusService(session_factory=MagicMock())
+    service.coalesce_window_s = 0.01
+    service._coalesced_refresh = AsyncMock()
+    campaign_id = uuid4()
+
+    for _ in range(10):
+        service.notify_changed(campaign_id)
+    await asyncio.sleep(0)
+
+    assert service._coalesced_refresh.await_count == 1
@@ -0,0 +1,76 @@
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.queue_warmer import QueueWarmer
+
+
+def _recording_session():
+    session = AsyncMock()
+    session.statements = []
+    result = MagicMock()
+    result.all.return_value = []
+    result.rowcount = 0
+
+    def execute(stmt, *args, **kwargs):
+        session.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return result
+
+    session.execute.side_effect = execute
+    return session
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_queue_is_one_insert_select():
+    session = _recording_session()
+    campaign = MagicMock(id=uuid4())
+
+    await QueueWarmer._fetch_and_queue(session, campaign, None, 50)
+
+    assert len(session.statements) == 1
+    sql = session.statements[0]
+    assert sql.startswith("INSERT INTO queue_items")
+    assert "SELECT gen_random_uuid()" in sql
+    assert "ON CONFLICT ON CONSTRAINT uq_campaign_lead_queue DO NOTHING" in sql
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_queue_falls_back_to_any_cohort():
+    session = _recording_session()
+    campaign = MagicMock(id=uuid4())
+
+    await QueueWarmer._fetch_and_queue(session, campaign, "champions", 50)
+
+    assert len(session.statements) == 2
+    assert "campaign_leads.cohort" in session.statements[0]
+    assert "campaign_leads.cohort" not in session.statements[1]
+
+
+@pytest.mark.asyncio
+async def test_promote_buffer_selects_and_flips_in_one_update():
+    session = _recording_session()
+    campaign = MagicMock(id=uuid4())
+
+    await QueueWarmer._promote_buffer(session, campaign, 3)
+
+    guardrail, promote = session.statements
+    assert guardrail.startswith("UPDATE queue_items SET status")
+    assert promote.startswith("UPDATE queue_items SET status")
+    # Same text as ix_campaign_leads_normalized_number, no bind params
+    assert "DISTINCT ON (regexp_replace(campaign_leads.contact_number, '\\D', '', 'g'))" in promote
+    assert "UNION" in promote  # busy numbers: dialing intents + live calls
+    assert "RETURNING" in promote
+    # Nothing promoted: no intent to commit, no calls
+    session.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_stale_items_is_one_update():
+    session = _recording_session()
+
+    await QueueWarmer._cleanup_stale_items(session, MagicMock(id=uuid4()))
+
+    assert len(session.statements) == 1
+    assert session.statements[0].startswith("UPDATE queue_items SET status=CASE")
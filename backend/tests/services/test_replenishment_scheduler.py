@@ -0,0 +1,63 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.services.replenishment_scheduler import CampaignReplenishmentScheduler
+
+
+def _session_factory():
+    session = AsyncMock()
+    session.get_bind = MagicMock(return_value=MagicMock(dialect=MagicMock()))
+    session.get_bind.return_value.dialect.name = "sqlite"
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_tick_skips_campaigns_whose_state_did_not_change():
+    changing, idle = uuid4(), uuid4()
+    scheduler = CampaignReplenishmentScheduler(session_factory=_session_factory())
+    scheduler.fingerprints = AsyncMock(side_effect=[
+        {changing: ("ACTIVE", 1), idle: ("ACTIVE", 1)},
+        {changing: ("ACTIVE", 2), idle: ("ACTIVE", 1)},
+    ])
+
+    with patch("app.services.replenishment_scheduler.settings") as settings, \
+            patch("app.services.queue_warmer.QueueWarmer.check_and_replenish", AsyncMock()) as replenish:
+        settings.REPLENISH_FULL_PASS_TICKS = 5
+        settings.REPLENISH_CONCURRENCY = 4
+        first = await scheduler.tick()
+        second = await scheduler.tick()
+
+    assert first["replenished"] == 2
+    assert second == {"replenished": 1, "unchanged": 1, "locked": 0, "error": 0}
+    assert replenish.await_args_list[-1].args[0] == changing
+
+
+@pytest.mark.asyncio
+async def test_failed_campaign_is_retried_next_tick():
+    campaign_id = uuid4()
+    scheduler = CampaignReplenishmentScheduler(session_factory=_session_factory())
+    scheduler.fingerprints = AsyncMock(return_value={campaign_id: ("ACTIVE", 1)})
+
+    with patch("app.services.replenishment_scheduler.settings") as settings, \
+            patch("app.services.queue_warmer.QueueWarmer.check_and_replenish", AsyncMock(side_effect=[RuntimeError, None])):
+        settings.REPLENISH_FULL_PASS_TICKS = 5
+        settings.REPLENISH_CONCURRENCY = 4
+        assert (await scheduler.tick())["error"] == 1
+        assert (await scheduler.tick())["replenished"] == 1
+        assert (await scheduler.tick())["unchanged"] == 1
+
+
+def test_shards_partition_campaigns():
+    ids = [uuid4() for _ in range(50)]
+    shards = [
+        {cid for cid in ids if CampaignReplenishmentScheduler._in_shard(cid, shard_count=3, shard_index=i)}
+        for i in range(3)
+    ]
+
+    assert set().union(*shards) == set(ids)
+    assert sum(len(shard) for shard in shards) == len(ids)
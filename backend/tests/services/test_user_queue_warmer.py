@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core import queue_priority
+from app.models.user_queue_item import UserQueueItem
+from app.services.user_queue_warmer import UserQueueWarmer
+
+
+def _session_returning(items):
+    session = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = items
+    session.execute.return_value = result
+    return session
+
+
+@pytest.mark.asyncio
+async def test_claim_leads_is_one_skip_locked_update():
+    session = _session_returning([])
+
+    await UserQueueWarmer.claim_leads(session, uuid4(), "user-1", limit=3)
+
+    stmt = session.execute.await_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE user_queue_items SET")
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "RETURNING" in sql
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_claim_leads_returns_items_in_priority_order():
+    now = datetime.utcnow()
+    low = UserQueueItem(campaign_id=uuid4(), lead_id=uuid4(), original_queue_item_id=uuid4(), static_priority=10, detected_at=now)
+    # Past the 24h decay, so equal scores: oldest first
+    older = UserQueueItem(campaign_id=uuid4(), lead_id=uuid4(), original_queue_item_id=uuid4(), static_priority=5000, detected_at=now - timedelta(days=3))
+    newer = UserQueueItem(campaign_id=uuid4(), lead_id=uuid4(), original_queue_item_id=uuid4(), static_priority=5000, detected_at=now - timedelta(days=2))
+    session = _session_returning([low, newer, older])
+
+    items = await UserQueueWarmer.claim_leads(session, uuid4(), "user-1", limit=3)
+
+    assert items == [older, newer, low]
+
+
+@pytest.mark.asyncio
+async def test_get_next_lead_claims_a_single_item():
+    item = MagicMock()
+    session = AsyncMock()
+
+    with patch.object(UserQueueWarmer, "claim_leads", AsyncMock(return_value=[item])) as claim:
+        assert await UserQueueWarmer.get_next_lead(session, uuid4(), "user-1") is item
+
+    assert claim.await_args.kwargs["limit"] == 1
+    session.execute.assert_not_called()
+
+
+def test_split_priority_matches_full_score():
+    now = datetime.utcnow()
+    cases = [
+        (None, now - timedelta(hours=3)),
+        (now + timedelta(minutes=30), now),
+        (now - timedelta(minutes=95), now - timedelta(hours=30)),
+        (now + timedelta(minutes=200), None),
+    ]
+    for slot, detected_at in cases:
+        static = queue_priority.static_priority(0.9, 2, 0)
+        expected = queue_priority.priority_score(static, slot, detected_at, now)
+        assert expected == queue_priority.bracket_score(static, slot, now) + queue_priority.drift(slot, detected_at, now)
+
+
+def test_slot_brackets():
+    now = datetime.utcnow()
+    assert queue_priority.slot_bracket(now + timedelta(minutes=200), now) == 3000
+    assert queue_priority.slot_bracket(now + timedelta(minutes=90), now) == 5000
+    assert queue_priority.slot_bracket(now - timedelta(minutes=10), now) == 10000
+    assert queue_priority.slot_bracket(now - timedelta(minutes=45), now) == 8000
+    # Overdue ramp is part of the drift: 15 minutes past the window -> 150 points
+    assert queue_priority.drift(now - timedelta(minutes=45), now, now) == 150 + 1000
+
+
+def test_priority_order_compiles_for_postgres():
+    sql = str(UserQueueWarmer.priority_order(datetime.utcnow()).compile(dialect=postgresql.dialect()))
+    assert "static_priority" in sql and "EXTRACT(epoch" in sql
@@ -0,0 +1,120 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from starlette.websockets import WebSocketState
+
+from app.services.websocket_manager import ConnectionManager
+from app.services.ws_backplane import Backplane, InProcessBackplane, PostgresNotifyBackplane
+
+
+async def _settle():
+    # Sender tasks need a few loop iterations (queue wake-up, wait_for task) to write
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def _socket(send_text=None):
+    ws = MagicMock()
+    ws.application_state = WebSocketState.CONNECTED
+    ws.send_text = send_text or AsyncMock()
+    return ws
+
+
+@pytest.mark.asyncio
+async def test_broadcast_serializes_once_for_whole_room():
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    sockets = [_socket() for _ in range(3)]
+    for ws in sockets:
+        await manager.connect(ws, "c1")
+
+    try:
+        with patch("app.services.websocket_manager.json_serializable", side_effect=lambda m: m) as serialize:
+            await manager.broadcast_status_update("c1", {"progress": 50})
+            await _settle()
+
+        assert serialize.call_count == 1
+        for ws in sockets:
+            sent = json.loads(ws.send_text.await_args.args[0])
+            assert sent["data"] == {"progress": 50}
+    finally:
+        await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_block_room_and_keeps_latest():
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    stalled = asyncio.Event()
+
+    async def never_returns(text):
+        await stalled.wait()
+
+    slow = _socket(send_text=AsyncMock(side_effect=never_returns))
+    fast = _socket()
+    with patch("app.services.websocket_manager.settings") as settings:
+        settings.WS_SEND_QUEUE_SIZE = 2
+        settings.WS_SEND_TIMEOUT_S = 60.0
+        await manager.connect(slow, "c1")
+        await manager.connect(fast, "c1")
+
+    try:
+        for i in range(40):
+            await manager.broadcast_status_update("c1", {"n": i})
+            await _settle()
+
+        assert json.loads(fast.send_text.await_args.args[0])["data"] == {"n": 39}
+        assert manager._channels[fast].dropped == 0
+        channel = manager._channels[slow]
+        assert channel.dropped > 0
+        queued = [json.loads(channel.queue.get_nowait())["data"]["n"] for _ in range(channel.queue.qsize())]
+        assert queued[-1] == 39
+    finally:
+        stalled.set()
+        await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_socket_is_removed_from_room():
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    broken = _socket(send_text=AsyncMock(side_effect=RuntimeError("closed")))
+    await manager.connect(broken, "c1")
+
+    try:
+        await manager.broadcast_event("c1", {"type": "call"})
+        await _settle()
+
+        assert manager.get_connection_count("c1") == 0
+    finally:
+        await manager.stop()
+
+
+def test_backplane_requires_publish():
+    class Incomplete(Backplane):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.asyncio
+async def test_postgres_backplane_reconnects_without_publishing():
+    backplane = PostgresNotifyBackplane("postgresql+asyncpg://u:p@db/app")
+    backplane.health_check_interval_s = 60.0
+    dead, fresh = MagicMock(), MagicMock()
+    dead.is_closed.return_value, fresh.is_closed.return_value = False, False
+    dead.add_listener = fresh.add_listener = AsyncMock()
+    dead.close = AsyncMock()
+    fresh.execute = AsyncMock()
+
+    with patch("asyncpg.connect", AsyncMock(side_effect=[dead, fresh])) as connect:
+        await backplane.start(AsyncMock())
+        termination_listener = dead.add_termination_listener.call_args.args[0]
+        dead.is_closed.return_value = True
+        termination_listener(dead)
+        await _settle()
+
+        assert connect.await_count == 2
+        assert backplane._conn is fresh
+        fresh.add_termination_listener.assert_called_once()
+        await backplane.stop()
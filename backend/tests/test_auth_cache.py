@@ -0,0 +1,74 @@
+import time
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core import auth_cache
+
+
+def test_token_cache_never_outlives_token():
+    auth_cache.token_cache.clear()
+
+    auth_cache.cache_token("fresh", {"uid": "u1", "exp": time.time() + 3600})
+    auth_cache.cache_token("expiring", {"uid": "u2", "exp": time.time() + 5})
+
+    assert auth_cache.get_cached_token("fresh")["uid"] == "u1"
+    assert auth_cache.get_cached_token("expiring") is None
+
+
+def test_invalidate_membership_by_user_and_company():
+    auth_cache.membership_cache.clear()
+    company, other = uuid.uuid4(), uuid.uuid4()
+    auth_cache.cache_role(company, "u1", "owner")
+    auth_cache.cache_role(company, "u2", "viewer")
+    auth_cache.cache_role(other, "u1", "admin")
+
+    auth_cache.invalidate_membership(company, "u1")
+    assert auth_cache.get_cached_role(company, "u1") is None
+    assert auth_cache.get_cached_role(company, "u2") == "viewer"
+
+    auth_cache.invalidate_membership(company)
+    assert auth_cache.get_cached_role(company, "u2") is None
+    assert auth_cache.get_cached_role(other, "u1") == "admin"
+
+
+def test_invalidate_user_memberships_across_companies():
+    auth_cache.membership_cache.clear()
+    company, other = uuid.uuid4(), uuid.uuid4()
+    auth_cache.cache_role(company, "old", "owner")
+    auth_cache.cache_role(other, "old", "admin")
+    auth_cache.cache_role(company, "u2", "viewer")
+
+    auth_cache.invalidate_user_memberships("old")
+
+    assert auth_cache.get_cached_role(company, "old") is None
+    assert auth_cache.get_cached_role(other, "old") is None
+    assert auth_cache.get_cached_role(company, "u2") == "viewer"
+
+
+def test_membership_write_invalidates_cache():
+    from app.models.iam import CompanyMembership, receive_membership_change
+
+    auth_cache.membership_cache.clear()
+    company = uuid.uuid4()
+    auth_cache.cache_role(company, "u1", "owner")
+
+    receive_membership_change(None, None, CompanyMembership(company_id=company, user_id="u1", role="viewer"))
+
+    assert auth_cache.get_cached_role(company, "u1") is None
+
+
+@pytest.mark.asyncio
+async def test_middleware_token_verification_is_cached():
+    from app.core import security
+
+    auth_cache.token_cache.clear()
+    verify = MagicMock(return_value={"user_id": "u1", "exp": time.time() + 3600})
+
+    with patch.object(security.auth, "verify_id_token", verify):
+        first = await security.get_current_user_no_depends("Bearer tok")
+        second = await security.get_current_user_no_depends("Bearer tok")
+
+    assert first["uid"] == second["uid"] == "u1"
+    verify.assert_called_once_with("tok")
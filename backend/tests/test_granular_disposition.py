@@ -2,7 +2,7 @@
 import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
 from datetime import datetime, timedelta
-from app.api.v1.endpoints.bolna_webhook import bolna_webhook
+from app.api.v1.endpoints.bolna_webhook import process_bolna_event
 from app.models.queue_item import QueueItem
 from app.models.bolna_execution_map import BolnaExecutionMap
 from app.models.campaign import Campaign
@@ -72,7 +72,7 @@ async def test_disposition_waterfall(mock_session, mock_q_item, mock_exec_map):
         # But primarily these two.
         mock_session.execute.side_effect = [res_map, res_log, res_map, res_log, res_map, res_log] # Allow buffer
         
-        await bolna_webhook(payload, session=mock_session)
+        await process_bolna_event(payload, session=mock_session)
         return mock_q_item.status, mock_q_item.outcome
 
     # 1. SCHEDULED (Explicit)
@@ -0,0 +1,18 @@
+import time
+
+from app.core.ttl_cache import TTLCache
+
+
+def test_ttl_cache_expires_and_evicts_least_recent():
+    cache = TTLCache(maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None  # evicted
+    assert cache.get("a") == 1
+
+    cache.set("short", 4, ttl_seconds=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
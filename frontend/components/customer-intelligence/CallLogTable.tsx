@@ -75,6 +75,8 @@ export default function CallLogTable({ campaignId }: CallLogTableProps) {
     const [viewMode, setViewMode] = useState<'live' | 'history'>('live');
     const [clearedAt, setClearedAt] = useState<number | null>(null);
     const [page, setPage] = useState(1);
+    // cursors[n - 1] fetches page n; filled from each page's X-Next-Cursor header
+    const [cursors, setCursors] = useState<(string | null)[]>([null]);
     const [hasMore, setHasMore] = useState(true);
     const [selectedCall, setSelectedCall] = useState<CallLog | null>(null);
     const [isModalOpen, setIsModalOpen] = useState(false);
@@ -112,16 +114,26 @@ export default function CallLogTable({ campaignId }: CallLogTableProps) {
         document.body.removeChild(link);
     };
 
-    const handleRowClick = (log: CallLog) => {
+    const handleRowClick = async (log: CallLog) => {
         setSelectedCall(log);
         setIsModalOpen(true);
+        if (!companyId) return;
+        // List rows are summaries; transcripts and raw payloads load on expand
+        try {
+            const detail: CallLog = await api.get(`/execution/campaign/${campaignId}/logs/${log.id}`, { "X-Company-ID": companyId });
+            setSelectedCall(current => (current?.id === log.id ? { ...current, ...detail } : current));
+        } catch (error) {
+            console.error("Failed to fetch call details:", error);
+        }
     };
 
     const fetchLogs = async () => {
         if (!companyId) return;
         setLoading(true);
         try {
-            const res: any = await api.get(`/execution/campaign/${campaignId}/logs?page=${page}&page_size=20`, { "X-Company-ID": companyId });
+            const cursor = cursors[page - 1];
+            const query = `page_size=20&fields=summary${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`;
+            const { data: res, headers }: any = await api.getWithHeaders(`/execution/campaign/${campaignId}/logs?${query}`, { "X-Company-ID": companyId });
             console.log("CallLogTable: logs response", res);
 
             // Handle different possible response structures
@@ -136,11 +148,11 @@ export default function CallLogTable({ campaignId }: CallLogTableProps) {
                 newLogs = res;
             }
 
-            if (newLogs.length < 20) {
-                setHasMore(false);
-            } else {
-                setHasMore(true); // Pagination fix: re-enable Next button if full page returned
+            const nextCursor = headers.get("X-Next-Cursor");
+            if (nextCursor) {
+                setCursors(prev => [...prev.slice(0, page), nextCursor]);
             }
+            setHasMore(Boolean(nextCursor));
             setLogs(newLogs);
         } catch (error) {
             console.error("Failed to fetch logs:", error);
@@ -162,6 +174,12 @@ export default function CallLogTable({ campaignId }: CallLogTableProps) {
         }
     }, [wsData]);
 
+    // Cursors belong to one campaign; start over from the newest page
+    useEffect(() => {
+        setPage(1);
+        setCursors([null]);
+    }, [campaignId]);
+
     // Initialize from localStorage
     useEffect(() => {
         const stored = localStorage.getItem(`unclutr_call_log_cleared_at_${campaignId}`);
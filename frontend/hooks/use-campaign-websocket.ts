@@ -28,9 +28,13 @@ interface CampaignStatusData {
 }
 
 interface WebSocketMessage {
-    type: 'connected' | 'status_update' | 'agents_update' | 'new_event' | 'user_queue_update' | 'item_locked_update' | 'pong';
+    type: 'connected' | 'status_update' | 'status_diff' | 'agents_update' | 'new_event' | 'user_queue_update' | 'item_locked_update' | 'pong';
     campaign_id?: string;
     data?: CampaignStatusData;
+    version?: number;       // Live snapshot version (status_update / status_diff)
+    base_version?: number;  // Version a status_diff applies on top of
+    changes?: Partial<CampaignStatusData>;
+    removed?: string[];
     agents?: any[];
     event?: any;
     message?: string;
@@ -62,6 +66,7 @@ export function useCampaignWebSocket(campaignId: string | null): UseCampaignWebS
     const reconnectDelayRef = useRef(INITIAL_RECONNECT_DELAY);
     const pingIntervalRef = useRef<NodeJS.Timeout | null>(null);
     const shouldConnectRef = useRef(true);
+    const versionRef = useRef<number | null>(null);
 
     const cleanup = useCallback(() => {
         // Clear ping interval
@@ -117,6 +122,7 @@ export function useCampaignWebSocket(campaignId: string | null): UseCampaignWebS
 
             ws.onopen = () => {
                 console.log('[WebSocket] Connected');
+                versionRef.current = null; // The initial status_update re-establishes the diff base
                 setIsConnected(true);
                 setIsConnecting(false);
                 setError(null);
@@ -141,6 +147,9 @@ export function useCampaignWebSocket(campaignId: string | null): UseCampaignWebS
                             break;
 
                         case 'status_update':
+                            if (typeof message.version === 'number') {
+                                versionRef.current = message.version;
+                            }
                             if (message.data) {
                                 setData(prev => {
                                     // Optimization: If the payload is identical, return previous state to avoid unnecessary re-renders.
@@ -158,6 +167,31 @@ export function useCampaignWebSocket(campaignId: string | null): UseCampaignWebS
                             }
                             break;
 
+                        case 'status_diff': {
+                            if (typeof message.version !== 'number') break;
+                            if (versionRef.current !== null && message.version <= versionRef.current) {
+                                break; // Already applied
+                            }
+                            if (versionRef.current !== message.base_version) {
+                                // Missed a diff: ask for the full snapshot instead of applying on a wrong base
+                                ws.send('resync');
+                                break;
+                            }
+                            versionRef.current = message.version;
+                            const changes = message.changes || {};
+                            const removed = message.removed || [];
+                            setData(prev => {
+                                if (!prev) return prev;
+                                const next: any = { ...prev, ...changes };
+                                removed.forEach(key => { delete next[key]; });
+                                if (prev.campaign_status !== next.campaign_status) {
+                                    console.log(`[WebSocket] Campaign status changed to: ${next.campaign_status}`);
+                                }
+                                return next;
+                            });
+                            break;
+                        }
+
                         case 'agents_update':
                             if (message.agents) {
                                 setData(prev => prev ? { ...prev, agents: message.agents || [] } : null);
@@ -25,6 +25,11 @@ export class ApiError extends Error {
 
 export const api = {
     async request(endpoint: string, options: RequestInit = {}) {
+        const response = await this.fetchResponse(endpoint, options);
+        return response.json();
+    },
+
+    async fetchResponse(endpoint: string, options: RequestInit = {}) {
         const user = auth.currentUser;
         const token = user ? await user.getIdToken() : null;
 
@@ -54,13 +59,19 @@ export const api = {
             throw new ApiError(errorData.detail || response.statusText, response.status, errorData);
         }
 
-        return response.json();
+        return response;
     },
 
     get(endpoint: string, headers?: any) {
         return this.request(endpoint, { method: "GET", headers });
     },
 
+    // For endpoints that return paging state in headers (e.g. X-Next-Cursor)
+    async getWithHeaders(endpoint: string, headers?: any) {
+        const response = await this.fetchResponse(endpoint, { method: "GET", headers });
+        return { data: await response.json(), headers: response.headers };
+    },
+
     post(endpoint: string, body: any = {}, headers?: any) {
         return this.request(endpoint, {
             method: "POST",